@@ -0,0 +1,48 @@
+from django.contrib import admin
+
+from .models import (
+    DailyJobRollup,
+    DailyPaymentRollup,
+    DailyRequestRollup,
+    RollupWatermark,
+)
+
+
+@admin.register(DailyPaymentRollup)
+class DailyPaymentRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "date",
+        "status",
+        "currency",
+        "payment_type",
+        "count",
+        "total_amount",
+    )
+    list_filter = ("status", "currency", "payment_type")
+    date_hierarchy = "date"
+
+
+@admin.register(DailyRequestRollup)
+class DailyRequestRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "date",
+        "status",
+        "request_type",
+        "service_level",
+        "count",
+        "total_amount",
+    )
+    list_filter = ("status", "request_type", "service_level")
+    date_hierarchy = "date"
+
+
+@admin.register(DailyJobRollup)
+class DailyJobRollupAdmin(admin.ModelAdmin):
+    list_display = ("date", "status", "is_instant", "count", "total_amount")
+    list_filter = ("status", "is_instant")
+    date_hierarchy = "date"
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("source", "watermark", "rows_processed", "last_run_at")
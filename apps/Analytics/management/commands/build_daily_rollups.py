@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.Analytics.rollups import ROLLUP_SOURCES, update_rollups
+
+
+class Command(BaseCommand):
+    help = "Update the daily payment/request/job rollups from rows changed since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            choices=sorted(ROLLUP_SOURCES),
+            help="Only update this source (repeatable; default: all)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Source rows per transaction (default: 2000)",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop the rollups and rebuild them from every row (removes deleted rows)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        processed = update_rollups(
+            options["source"],
+            batch_size=options["batch_size"],
+            rebuild=options["rebuild"],
+        )
+        for source, count in processed.items():
+            self.stdout.write(self.style.SUCCESS(f"{source}: {count} rows rolled up"))
@@ -0,0 +1,157 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:00
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyJobRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("date", models.DateField()),
+                ("status", models.CharField(max_length=20)),
+                ("is_instant", models.BooleanField(default=False)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "db_table": "daily_job_rollup",
+                "ordering": ["date"],
+                "managed": True,
+                "unique_together": {("date", "status", "is_instant")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyPaymentRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("date", models.DateField()),
+                ("status", models.CharField(max_length=30)),
+                ("currency", models.CharField(max_length=3)),
+                ("payment_type", models.CharField(max_length=20)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "db_table": "daily_payment_rollup",
+                "ordering": ["date"],
+                "managed": True,
+                "unique_together": {("date", "status", "currency", "payment_type")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyRequestRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("date", models.DateField()),
+                ("status", models.CharField(max_length=50)),
+                ("request_type", models.CharField(max_length=10)),
+                ("service_level", models.CharField(max_length=20)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "db_table": "daily_request_rollup",
+                "ordering": ["date"],
+                "managed": True,
+                "unique_together": {
+                    ("date", "status", "request_type", "service_level")
+                },
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupContribution",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=20)),
+                ("object_id", models.CharField(max_length=36)),
+                ("date", models.DateField()),
+                ("dimensions", models.JSONField(default=list)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+            options={
+                "db_table": "rollup_contribution",
+                "managed": True,
+                "unique_together": {("source", "object_id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=20, unique=True)),
+                ("watermark", models.DateTimeField(blank=True, null=True)),
+                ("rows_processed", models.PositiveBigIntegerField(default=0)),
+                ("last_run_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "rollup_watermark",
+                "managed": True,
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+from django.db import models
+
+from apps.Basemodel.models import Basemodel
+
+
+class DailyPaymentRollup(Basemodel):
+    """Payments per day by status, currency and payment type"""
+
+    date = models.DateField()
+    status = models.CharField(max_length=30)
+    currency = models.CharField(max_length=3)
+    payment_type = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "daily_payment_rollup"
+        managed = True
+        unique_together = ("date", "status", "currency", "payment_type")
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date} payments {self.status}/{self.currency}: {self.count}"
+
+
+class DailyRequestRollup(Basemodel):
+    """Requests per day by status, request type and service level"""
+
+    date = models.DateField()
+    status = models.CharField(max_length=50)
+    request_type = models.CharField(max_length=10)
+    service_level = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "daily_request_rollup"
+        managed = True
+        unique_together = ("date", "status", "request_type", "service_level")
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date} requests {self.status}/{self.request_type}: {self.count}"
+
+
+class DailyJobRollup(Basemodel):
+    """Jobs per day by status and instant/biddable"""
+
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    is_instant = models.BooleanField(default=False)
+    count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "daily_job_rollup"
+        managed = True
+        unique_together = ("date", "status", "is_instant")
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date} jobs {self.status}: {self.count}"
+
+
+class RollupContribution(models.Model):
+    """
+    What one source row currently contributes to its rollup
+
+    Lets the rollup command apply only the difference when a row changes,
+    and keeps each row on the day it was first seen.
+    """
+
+    source = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=36)
+    date = models.DateField()
+    dimensions = models.JSONField(default=list)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "rollup_contribution"
+        managed = True
+        unique_together = ("source", "object_id")
+
+    def __str__(self):
+        return f"{self.source} {self.object_id} on {self.date}"
+
+
+class RollupWatermark(models.Model):
+    """How far the rollup command has processed each source"""
+
+    source = models.CharField(max_length=20, unique=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+    rows_processed = models.PositiveBigIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "rollup_watermark"
+        managed = True
+
+    def __str__(self):
+        return f"{self.source} rolled up to {self.watermark}"
@@ -0,0 +1,280 @@
+"""
+Incremental daily rollups
+
+Each source (payments, requests, jobs) is rolled up into a daily table keyed
+by a few dimensions. ``update_rollups`` only reads source rows whose
+``updated_at`` is past the source's watermark:
+
+- every source row has a ``RollupContribution`` recording the day, dimensions
+  and amount it currently adds to its rollup;
+- when a row changes, its old contribution is subtracted and the new one
+  added, so rollups stay exact without rescanning whole days;
+- a row stays on the day it was first rolled up, even though
+  ``Basemodel.created_at`` moves on every save.
+
+Deleted source rows are only removed by a rebuild.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    DailyJobRollup,
+    DailyPaymentRollup,
+    DailyRequestRollup,
+    RollupContribution,
+    RollupWatermark,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RollupSource:
+    """How one source model maps onto its daily rollup table"""
+
+    def __init__(self, name, model, rollup_model, dimensions, amount):
+        self.name = name
+        self.model_label = model
+        self.rollup_model = rollup_model
+        self.dimensions = dimensions
+        self.amount = amount
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def amount_expression(self):
+        return Coalesce(
+            self.amount,
+            Value(Decimal("0")),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+
+
+ROLLUP_SOURCES = {
+    "payments": RollupSource(
+        "payments",
+        "Payment.Payment",
+        DailyPaymentRollup,
+        ("status", "currency", "payment_type"),
+        F("amount"),
+    ),
+    "requests": RollupSource(
+        "requests",
+        "Request.Request",
+        DailyRequestRollup,
+        ("status", "request_type", "service_level"),
+        Coalesce("final_price", "base_price"),
+    ),
+    "jobs": RollupSource(
+        "jobs",
+        "Job.Job",
+        DailyJobRollup,
+        ("status", "is_instant"),
+        F("price"),
+    ),
+}
+
+
+def _overlap() -> timedelta:
+    # Rows committed slightly out of updated_at order are re-read; reapplying
+    # an unchanged row is a no-op
+    return timedelta(seconds=getattr(settings, "ROLLUP_OVERLAP_SECONDS", 300))
+
+
+def update_rollups(
+    source_names=None, batch_size: int = 2000, rebuild: bool = False
+) -> Dict[str, int]:
+    """
+    Bring the rollups for the given sources (default: all) up to date
+
+    Returns:
+        Dict: Source name -> number of source rows read
+    """
+    processed = {}
+    for name in source_names or ROLLUP_SOURCES:
+        source = ROLLUP_SOURCES[name]
+        if rebuild:
+            reset_source(source)
+        processed[name] = update_source(source, batch_size)
+
+    # Dashboards that read rollups must not serve figures older than this run
+    from utils import dashboard_metrics
+
+    dashboard_metrics.invalidate(dashboard_metrics.PAYMENT_STATS)
+    return processed
+
+
+def reset_source(source: RollupSource):
+    """Drop a source's rollups, contributions and watermark"""
+    with transaction.atomic():
+        source.rollup_model.objects.all().delete()
+        RollupContribution.objects.filter(source=source.name).delete()
+        RollupWatermark.objects.filter(source=source.name).delete()
+    logger.info(f"Reset {source.name} rollups")
+
+
+def update_source(source: RollupSource, batch_size: int) -> int:
+    """Process every row changed since the watermark, one batch per transaction"""
+    run_started = timezone.now()
+    cursor: Optional[Tuple] = None
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            # Locking the watermark row serialises concurrent runs
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+                source=source.name
+            )
+            rows = _changed_rows(source, watermark.watermark, cursor, run_started)
+            rows = list(rows[:batch_size])
+            if rows:
+                _apply(source, rows)
+                last = rows[-1]
+                cursor = (last["updated_at"], last["pk"])
+                if (
+                    watermark.watermark is None
+                    or last["updated_at"] > watermark.watermark
+                ):
+                    watermark.watermark = last["updated_at"]
+                watermark.rows_processed += len(rows)
+            watermark.last_run_at = timezone.now()
+            watermark.save()
+
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    logger.info(f"Rolled up {total} changed {source.name} rows")
+    return total
+
+
+def _changed_rows(source: RollupSource, watermark, cursor, until):
+    queryset = source.model.objects.filter(updated_at__lte=until)
+    if cursor is not None:
+        updated_at, pk = cursor
+        queryset = queryset.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk)
+        )
+    elif watermark is not None:
+        queryset = queryset.filter(updated_at__gte=watermark - _overlap())
+
+    return (
+        queryset.annotate(rollup_amount=source.amount_expression())
+        .order_by("updated_at", "pk")
+        .values("pk", "updated_at", "created_at", "rollup_amount", *source.dimensions)
+    )
+
+
+def _apply(source: RollupSource, rows):
+    """Apply the contribution changes of a batch of source rows"""
+    ids = [str(row["pk"]) for row in rows]
+    existing = {
+        contribution.object_id: contribution
+        for contribution in RollupContribution.objects.filter(
+            source=source.name, object_id__in=ids
+        )
+    }
+
+    # (date, dimensions) -> [count delta, amount delta]
+    deltas = defaultdict(lambda: [0, Decimal("0")])
+    created, changed = [], []
+
+    for row in rows:
+        object_id = str(row["pk"])
+        dimensions = [row[field] for field in source.dimensions]
+        amount = row["rollup_amount"]
+        contribution = existing.get(object_id)
+
+        if contribution is None:
+            contribution = RollupContribution(
+                source=source.name,
+                object_id=object_id,
+                date=timezone.localdate(row["created_at"]),
+                dimensions=dimensions,
+                amount=amount,
+            )
+            created.append(contribution)
+        else:
+            if contribution.dimensions == dimensions and contribution.amount == amount:
+                continue
+            old = deltas[(contribution.date, tuple(contribution.dimensions))]
+            old[0] -= 1
+            old[1] -= contribution.amount
+            contribution.dimensions = dimensions
+            contribution.amount = amount
+            changed.append(contribution)
+
+        new = deltas[(contribution.date, tuple(dimensions))]
+        new[0] += 1
+        new[1] += amount
+
+    RollupContribution.objects.bulk_create(created)
+    RollupContribution.objects.bulk_update(changed, ["dimensions", "amount"])
+    _apply_deltas(source, deltas)
+
+
+def _apply_deltas(source: RollupSource, deltas):
+    rollup_model = source.rollup_model
+    deltas = {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+    if not deltas:
+        return
+
+    rows = {
+        (row.date, tuple(getattr(row, field) for field in source.dimensions)): row
+        for row in rollup_model.objects.select_for_update().filter(
+            date__in={date for date, _ in deltas}
+        )
+    }
+
+    now = timezone.now()
+    to_create, to_update, to_delete = [], [], []
+    for (date, dimensions), (count, amount) in deltas.items():
+        row = rows.get((date, dimensions))
+        if row is None:
+            row = rollup_model(date=date, **dict(zip(source.dimensions, dimensions)))
+            row.count, row.total_amount = count, amount
+            to_create.append(row)
+            continue
+
+        row.count += count
+        row.total_amount += amount
+        # bulk_update() does not apply auto_now
+        row.updated_at = now
+        if row.count <= 0:
+            to_delete.append(row.pk)
+        else:
+            to_update.append(row)
+
+    rollup_model.objects.bulk_create(to_create)
+    rollup_model.objects.bulk_update(to_update, ["count", "total_amount", "updated_at"])
+    if to_delete:
+        rollup_model.objects.filter(pk__in=to_delete).delete()
+
+
+def rollup_series(
+    source: RollupSource, start=None, end=None, group_by=(), daily: bool = True
+):
+    """Read rollups summed over the requested dimensions (and per day)"""
+    queryset = source.rollup_model.objects.all()
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+
+    fields = (["date"] if daily else []) + list(group_by)
+    return (
+        queryset.values(*fields)
+        .annotate(count=Sum("count"), total_amount=Sum("total_amount"))
+        .order_by(*fields)
+    )
@@ -0,0 +1,33 @@
+from rest_framework import serializers
+
+from .rollups import ROLLUP_SOURCES
+
+
+class RollupQuerySerializer(serializers.Serializer):
+    """Query parameters of the rollup read API"""
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    group_by = serializers.CharField(required=False, allow_blank=True)
+    daily = serializers.BooleanField(required=False, default=True)
+
+    def validate(self, attrs):
+        source = ROLLUP_SOURCES[self.context["source"]]
+        group_by = [
+            field.strip()
+            for field in attrs.get("group_by", "").split(",")
+            if field.strip()
+        ]
+        invalid = [field for field in group_by if field not in source.dimensions]
+        if invalid:
+            raise serializers.ValidationError(
+                {
+                    "group_by": f"Unknown dimension(s) {', '.join(invalid)}; "
+                    f"choose from {', '.join(source.dimensions)}"
+                }
+            )
+        attrs["group_by"] = group_by
+
+        if attrs.get("start") and attrs.get("end") and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError({"start": "start must be before end"})
+        return attrs
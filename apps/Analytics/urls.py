@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .views import DailyRollupView
+
+urlpatterns = [
+    path(
+        "analytics/rollups/<str:source>/",
+        DailyRollupView.as_view(),
+        name="daily-rollups",
+    ),
+]
@@ -0,0 +1,55 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import RollupWatermark
+from .rollups import ROLLUP_SOURCES, rollup_series
+from .serializer import RollupQuerySerializer
+
+
+class DailyRollupView(APIView):
+    """
+    Read daily rollups (Admin only)
+
+    GET /analytics/rollups/<source>/?start=2025-01-01&end=2025-12-31
+        &group_by=status,currency&daily=false
+
+    ``source`` is one of payments, requests or jobs. Without ``group_by`` the
+    figures are totals; ``daily=false`` sums over the whole range.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, source):
+        if source not in ROLLUP_SOURCES:
+            return Response(
+                {"detail": f"Unknown rollup source: {source}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        query = RollupQuerySerializer(
+            data=request.query_params, context={"source": source}
+        )
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        watermark = RollupWatermark.objects.filter(source=source).first()
+        rows = rollup_series(
+            ROLLUP_SOURCES[source],
+            start=params.get("start"),
+            end=params.get("end"),
+            group_by=params["group_by"],
+            daily=params["daily"],
+        )
+
+        return Response(
+            {
+                "source": source,
+                "start": params.get("start"),
+                "end": params.get("end"),
+                "group_by": params["group_by"],
+                "dimensions": ROLLUP_SOURCES[source].dimensions,
+                "up_to": watermark.watermark if watermark else None,
+                "rows": list(rows),
+            }
+        )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.Authentication'
+
+    def ready(self):
+        # Keeps the cached JWT principals and the token blacklist filter current
+        import apps.Authentication.signals
@@ -7,6 +7,9 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from django.core.mail.backends.base import BaseEmailBackend
 from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class GmailSSLBackend(BaseEmailBackend):
@@ -50,13 +53,13 @@ class GmailSSLBackend(BaseEmailBackend):
                     num_sent += 1
 
                 except Exception as e:
-                    print(f"Failed to send email: {e}")
+                    logger.error(f"Failed to send email: {e}")
                     continue
 
             server.quit()
 
         except Exception as e:
-            print(f"SMTP connection failed: {e}")
+            logger.error(f"SMTP connection failed: {e}")
             raise
 
         return num_sent
@@ -0,0 +1,159 @@
+"""
+Cached JWT principals
+
+Every JWT-authenticated request used to load the ``User`` row (and, for
+permission checks, its groups and permissions). The principal — the handful
+of fields the API checks on ``request.user`` — is cached instead, in the
+``auth_principal`` namespace of the two-tier cache (utils/caching.py):
+
+- ``CachedUser`` is what ``request.user`` becomes: it answers principal
+  attributes (id, email, names, user_type, account_status, is_active,
+  is_staff, is_superuser, group names, permissions) from the cache and loads
+  the full ``User`` row only when anything else is accessed;
+- signals.py drops a user's principal when the user is saved or deleted and
+  when their groups or permissions change, once the transaction commits.
+  Other processes may keep serving it from their local tier for up to
+  ``CACHE_LAYER["LOCAL_TIMEOUT"]`` seconds.
+"""
+
+import logging
+from functools import partial
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject, empty
+
+from utils.caching import namespace
+
+logger = logging.getLogger(__name__)
+
+PRINCIPALS = namespace(
+    "auth_principal", timeout=getattr(settings, "AUTH_PRINCIPAL_CACHE_TTL", 300)
+)
+
+
+def build_principal(user) -> Dict:
+    """The cached fields of ``user``"""
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.utils import get_md5_hash_password
+
+    principal = {
+        "id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "user_type": user.user_type,
+        "account_status": user.account_status,
+        "is_active": user.is_active,
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+        "is_authenticated": True,
+        "is_anonymous": False,
+        "group_names": sorted(user.groups.values_list("name", flat=True)),
+        "permissions": frozenset(user.get_all_permissions()),
+    }
+    if api_settings.CHECK_REVOKE_TOKEN:
+        principal["password_md5"] = get_md5_hash_password(user.password)
+    return principal
+
+
+def _load_principal(user_id) -> Optional[Dict]:
+    try:
+        user = get_user_model().objects.filter(pk=user_id).first()
+    except (ValueError, ValidationError):
+        # Not a valid primary key
+        return None
+    return build_principal(user) if user is not None else None
+
+
+def get_principal(user_id) -> Optional[Dict]:
+    """The principal of ``user_id``, or None if there is no such user"""
+    return PRINCIPALS.get_or_set(
+        str(user_id), partial(_load_principal, user_id), cache_none=False
+    )
+
+
+def invalidate_principal(user_id):
+    """Drop the cached principal once the current transaction commits"""
+    transaction.on_commit(partial(PRINCIPALS.delete, str(user_id)))
+
+
+def invalidate_all_principals():
+    """Drop every cached principal (e.g. a group's permissions changed)"""
+    transaction.on_commit(PRINCIPALS.invalidate)
+
+
+def _load_user(user_id):
+    return get_user_model().objects.get(pk=user_id)
+
+
+class CachedUser(SimpleLazyObject):
+    """
+    ``request.user`` backed by a cached principal
+
+    Principal attributes need no query; anything else (a related manager,
+    ``save()``, a field not in the principal) loads the ``User`` row once.
+    Like Django's own lazy ``request.user``, it passes ``isinstance(..., User)``
+    and can be used in queries and assigned to foreign keys.
+    """
+
+    def __init__(self, principal: Dict):
+        self.__dict__["_principal"] = principal
+        super().__init__(partial(_load_user, principal["id"]))
+
+    @property
+    def __class__(self):
+        return get_user_model()
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            principal = self.__dict__["_principal"]
+            if name in principal:
+                return principal[name]
+            if name == "pk":
+                return principal["id"]
+            if name == "_meta":
+                return get_user_model()._meta
+            if not name.startswith("_") and not hasattr(get_user_model(), name):
+                # Not a User attribute at all (e.g. the ORM probing a query
+                # value for resolve_expression): no need to load the row
+                raise AttributeError(name)
+        return super().__getattr__(name)
+
+    def _user(self):
+        if self._wrapped is empty:
+            self._setup()
+        return self._wrapped
+
+    def _is_pk_set(self, meta=None):
+        # Asked by the ORM when the user is used as a query value
+        return self._wrapped is empty or self._wrapped._is_pk_set(meta)
+
+    def get_all_permissions(self, obj=None):
+        if obj is None and self._wrapped is empty:
+            return set(self._principal["permissions"])
+        return self._user().get_all_permissions(obj)
+
+    def has_perm(self, perm, obj=None):
+        if obj is None and self._wrapped is empty:
+            principal = self._principal
+            if not principal["is_active"]:
+                return False
+            return principal["is_superuser"] or perm in principal["permissions"]
+        return self._user().has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, app_label):
+        if self._wrapped is empty:
+            principal = self._principal
+            if not principal["is_active"]:
+                return False
+            return principal["is_superuser"] or any(
+                perm.split(".", 1)[0] == app_label for perm in principal["permissions"]
+            )
+        return self._user().has_module_perms(app_label)
@@ -2,12 +2,14 @@ from django.contrib.auth import authenticate
 from django.utils.translation import gettext as _
 from apps.User.models import User
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework.exceptions import APIException
 from rest_framework import status
 from django.contrib.auth.password_validation import validate_password
 from django.db import IntegrityError
 from django.db.models import Q
 import logging
+from apps.User.activity import record_login
 from .models import UserVerification, OTP
 from .utils import mask_email, mask_phone, OTPValidator
 
@@ -412,5 +414,15 @@ class PasswordChangeSerializer(serializers.Serializer):
     new_password = serializers.CharField(required=True, validators=[validate_password])
 
 
+class BufferedLastLoginTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token obtain serializer that buffers the last_login update
+    (SIMPLE_JWT["UPDATE_LAST_LOGIN"] saves it on every token issue)"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        record_login(self.user)
+        return data
+
+
 from .models import OTP
 from .utils import OTPValidator
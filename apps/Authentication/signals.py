@@ -0,0 +1,79 @@
+"""
+Keeps the cached JWT principals (principal.py) and the token blacklist
+filter (token_blacklist.py) in step with the database
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .principal import invalidate_all_principals, invalidate_principal
+from .token_blacklist import token_blacklisted
+
+User = get_user_model()
+
+# User fields the principal (or the token revocation check) depends on
+PRINCIPAL_FIELDS = {
+    "email",
+    "first_name",
+    "last_name",
+    "user_type",
+    "account_status",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "password",
+}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, update_fields=None, **kwargs):
+    # Covers deactivation, account status and user type changes; saves of
+    # other fields only (e.g. last_login on every login) keep the principal
+    if update_fields and not PRINCIPAL_FIELDS.intersection(update_fields):
+        return
+    invalidate_principal(instance.pk)
+
+
+def invalidate_membership_principals(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """A user's groups or permissions changed (from either side of the relation)"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_principal(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate_principal(user_id)
+    else:
+        # Cleared from the group/permission side: the users are not known
+        invalidate_all_principals()
+
+
+m2m_changed.connect(invalidate_membership_principals, sender=User.groups.through)
+m2m_changed.connect(
+    invalidate_membership_principals, sender=User.user_permissions.through
+)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permission_principals(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_all_principals()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_principals(sender, **kwargs):
+    # Renamed or deleted: the cached group names are stale
+    invalidate_all_principals()
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def record_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        token_blacklisted(instance.token.jti)
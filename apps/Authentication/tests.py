@@ -1,3 +1,50 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from .utils import verify_otp_utility
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class VerifyOTPTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SimpleNamespace(id=uuid.uuid4(), email="jane@example.com")
+        self.otp = SimpleNamespace(
+            id=uuid.uuid4(),
+            otp_code="123456",
+            is_used=False,
+            expires_at=timezone.now() + timedelta(minutes=10),
+        )
+
+    def verify(self, code):
+        with patch("apps.Authentication.models.OTP") as OTP:
+            OTP.objects.filter.return_value.order_by.return_value.first.return_value = (
+                self.otp
+            )
+            return verify_otp_utility(self.user, code, "login")
+
+    def test_wrong_code_reports_remaining_attempts(self):
+        result = self.verify("654321")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error_code"], "INVALID_OTP")
+        self.assertEqual(result["remaining_otp_attempts"], 2)
+        self.assertEqual(result["remaining_hourly_attempts"], 4)
+        self.assertIn("2 attempts remaining for this OTP", result["message"])
+
+        result = self.verify("654321")
+        self.assertEqual(result["remaining_otp_attempts"], 1)
+        self.assertEqual(result["remaining_hourly_attempts"], 3)
+
+    def test_attempts_run_out(self):
+        for _ in range(3):
+            self.verify("654321")
+        result = self.verify("123456")
+        self.assertEqual(result["error_code"], "OTP_MAX_ATTEMPTS_REACHED")
@@ -0,0 +1,96 @@
+"""
+Blacklisted token checks through a Bloom filter
+
+Checking a JWT against ``BlacklistedToken`` on every request costs a query
+that almost never matches. Each process keeps a Bloom filter of the JTIs of
+the blacklisted, unexpired tokens instead: a token whose JTI is not in the
+filter is not blacklisted, and only possible matches are confirmed with a
+query.
+
+Blacklisting a token (signals.py) adds it to this process's filter at once
+and moves the ``token_blacklist`` cache namespace to a new version when the
+transaction commits; other processes rebuild their filter from the table
+when they see the new version, within ``CACHE_LAYER["LOCAL_TIMEOUT"]``
+seconds.
+
+The filter is only trusted when that version is kept in a cache shared by
+every process: with the per-process stand-in, other workers would never
+hear of a new blacklisting, so every check goes to the table. Token refresh
+and verification always ask the table (``exact=True``): they are rare, and
+a blacklisted refresh token must stop minting access tokens at once.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from utils.bloom import BloomFilter
+from utils.caching import namespace
+
+logger = logging.getLogger(__name__)
+
+# Only the namespace version is used: it changes whenever a token is blacklisted
+BLACKLIST = namespace("token_blacklist")
+
+_lock = threading.Lock()
+_filter = None
+_filter_version = None
+
+
+def _error_rate() -> float:
+    return getattr(settings, "TOKEN_BLACKLIST_BLOOM_ERROR_RATE", 0.001)
+
+
+def build_filter() -> BloomFilter:
+    """A filter of the JTIs of every blacklisted token that has not expired"""
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    jtis = list(
+        BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now()
+        ).values_list("token__jti", flat=True)
+    )
+    # Room for the tokens blacklisted until the next rebuild
+    bloom_filter = BloomFilter(max(1024, 2 * len(jtis)), _error_rate())
+    bloom_filter.update(jtis)
+    logger.info(f"Built token blacklist filter ({len(jtis)} tokens)")
+    return bloom_filter
+
+
+def _current_filter() -> BloomFilter:
+    global _filter, _filter_version
+    version = BLACKLIST.version()
+    if _filter is not None and _filter_version == version and not _filter.saturated:
+        return _filter
+    with _lock:
+        if _filter is None or _filter_version != version or _filter.saturated:
+            _filter = build_filter()
+            _filter_version = version
+        return _filter
+
+
+def is_token_blacklisted(jti, exact: bool = False) -> bool:
+    """
+    Whether the token with this JTI was blacklisted
+
+    Args:
+        exact: Always query the table instead of trusting a filter miss
+    """
+    if not jti:
+        return False
+    if not exact and BLACKLIST.is_shared and str(jti) not in _current_filter():
+        return False
+
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def token_blacklisted(jti):
+    """Record a newly blacklisted token; called by the BlacklistedToken signal"""
+    if _filter is not None:
+        _filter.add(str(jti))
+    transaction.on_commit(BLACKLIST.invalidate)
@@ -1,13 +1,27 @@
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
-from django.core.cache import cache
 from datetime import datetime
+from functools import lru_cache
 import logging
+import math
+import time
+
+from utils.emails import build_message, render_email, send_messages
+from utils.rate_limit import Limit, rate_limiter
 
 logger = logging.getLogger(__name__)
 
+# Rate limits (sliding windows, see utils/rate_limit.py)
+LOGIN_FAILURES_LIMIT = Limit("login_failures", 5, 3600)  # lock after 5 per hour
+LOGIN_FAILURES_IP_LIMIT = Limit("login_failures_ip", 50, 3600)
+OTP_SEND_LIMIT = Limit("otp_send", 5, 3600)  # OTP requests per user and type
+OTP_GLOBAL_EMAIL_LIMIT = Limit("otp_emails", 1000, 3600)  # email service quota
+OTP_VERIFY_HOURLY_LIMIT = Limit("otp_verify", 5, 3600)
+OTP_VERIFY_CODE_LIMIT = Limit("otp_verify_code", 3, 3600)  # attempts per OTP
+# The resend cooldown is a plain lock: as a one-hit sliding window it would
+# keep refusing for up to twice its length
+OTP_RESEND_COOLDOWN_SECONDS = 60
+
 
 def mask_email(email):
     """Mask email address for security (e.g., j***@example.com)"""
@@ -42,29 +56,31 @@ def get_client_ip(request):
     return ip
 
 
-def increment_failed_logins(email, ip):
-    """Increment failed login attempts counter"""
-    cache_key = f"login_attempts:{email}"
-    attempts = cache.get(cache_key, 0) + 1
-    cache.set(cache_key, attempts, timeout=3600)  # 1 hour
+def failed_login_checks(email, ip=None):
+    """Rate limiter keys of the failed login counters"""
+    checks = [(LOGIN_FAILURES_LIMIT, email)]
+    if ip:
+        # Also track by IP to prevent attacks across multiple accounts
+        checks.append((LOGIN_FAILURES_IP_LIMIT, ip))
+    return checks
 
-    # Also track by IP to prevent attacks across multiple accounts
-    ip_key = f"login_attempts_ip:{ip}"
-    ip_attempts = cache.get(ip_key, 0) + 1
-    cache.set(ip_key, ip_attempts, timeout=3600)
+
+def increment_failed_logins(email, ip):
+    """Increment failed login attempts counters (account and IP) in one call"""
+    # Counted even past the limit, so the lock lasts while attempts continue
+    rate_limiter.hit(failed_login_checks(email, ip), enforce=False)
 
 
-def is_account_locked(email):
-    """Check if account is locked due to too many failed attempts"""
-    cache_key = f"login_attempts:{email}"
-    attempts = cache.get(cache_key, 0)
-    return attempts >= 5  # Lock after 5 failed attempts
+def is_account_locked(email, ip=None):
+    """Check if account (or, with ``ip``, the client) made too many failed attempts"""
+    checks = failed_login_checks(email, ip)
+    counts = rate_limiter.peek(checks)
+    return any(count >= limit.limit for count, (limit, _) in zip(counts, checks))
 
 
 def reset_failed_logins(email):
     """Reset failed login attempts counter"""
-    cache_key = f"login_attempts:{email}"
-    cache.delete(cache_key)
+    rate_limiter.reset(failed_login_checks(email))
 
 
 def send_email_template(user, subject, template_name, context=None):
@@ -90,23 +106,13 @@ def send_email_template(user, subject, template_name, context=None):
             }
         )
 
-        # Render email templates
-        html_content = render_to_string(f"emails/{template_name}.html", context)
-        text_content = render_to_string(f"emails/{template_name}.txt", context)
+        # Render email templates (compiled once per process)
+        html_content, text_content = render_email(f"emails/{template_name}", context)
 
-        # Create email message
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email],
-        )
-
-        # Attach HTML version
-        email.attach_alternative(html_content, "text/html")
-
-        # Send email
-        email.send(fail_silently=False)
+        # Send through the pooled connection
+        email = build_message(subject, [user.email], html_content, text_content)
+        if not send_messages([email])[0]:
+            raise RuntimeError("The email backend did not accept the message")
 
         logger.info(f"Email sent successfully to {user.email}: {subject}")
         return True
@@ -135,8 +141,9 @@ class OTPEmailService:
         return svg
 
     @staticmethod
+    @lru_cache(maxsize=16)
     def get_logo_data_url(text="MV", color="#2E2787", size=80):
-        """Get base64 encoded SVG logo for email embedding"""
+        """Get base64 encoded SVG logo for email embedding (built once per process)"""
         import base64
 
         svg = OTPEmailService.generate_svg_logo(text, color, size)
@@ -217,11 +224,12 @@ class OTPEmailService:
             # Add any additional context passed in kwargs
             context.update(kwargs)
 
-            # Render email templates
+            # Render email templates (compiled once per process)
             logger.info(f"[EMAIL_DEBUG] Rendering email templates")
             try:
-                html_content = render_to_string("emails/otp_verification.html", context)
-                text_content = render_to_string("emails/otp_verification.txt", context)
+                html_content, text_content = render_email(
+                    "emails/otp_verification", context
+                )
                 logger.info(
                     f"[EMAIL_DEBUG] Templates rendered successfully - HTML length: {len(html_content)}, Text length: {len(text_content)}"
                 )
@@ -232,25 +240,19 @@ class OTPEmailService:
                 raise
 
             # Create email message
-            logger.info(f"[EMAIL_DEBUG] Creating EmailMultiAlternatives object")
+            logger.info(f"[EMAIL_DEBUG] Creating email message")
             logger.info(f"[EMAIL_DEBUG] From email: {settings.DEFAULT_FROM_EMAIL}")
             logger.info(f"[EMAIL_DEBUG] To email: {user.email}")
 
-            email = EmailMultiAlternatives(
-                subject=context["subject"],
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[user.email],
+            email = build_message(
+                context["subject"], [user.email], html_content, text_content
             )
 
-            # Attach HTML version
-            logger.info(f"[EMAIL_DEBUG] Attaching HTML alternative")
-            email.attach_alternative(html_content, "text/html")
-
-            # Send email
-            logger.info(f"[EMAIL_DEBUG] Attempting to send email via SMTP")
-            email.send(fail_silently=False)
-            logger.info(f"[EMAIL_DEBUG] Email sent successfully via SMTP")
+            # Send email through the pooled connection
+            logger.info(f"[EMAIL_DEBUG] Attempting to send email")
+            if not send_messages([email])[0]:
+                raise RuntimeError("The email backend did not accept the message")
+            logger.info(f"[EMAIL_DEBUG] Email sent successfully")
 
             logger.info(f"OTP email sent successfully to {user.email} for {otp_type}")
             return True
@@ -298,36 +300,88 @@ class OTPValidator:
         return True, None
 
     @staticmethod
-    def get_rate_limit_key(user, otp_type):
-        """Generate cache key for rate limiting"""
-        return f"otp_rate_limit:{user.id}:{otp_type}"
+    def get_rate_limit_checks(user, otp_type):
+        """Rate limiter keys of OTP requests (hourly limit)"""
+        return [(OTP_SEND_LIMIT, f"{user.id}:{otp_type}")]
 
     @staticmethod
-    def get_resend_cooldown_key(user, otp_type):
-        """Generate cache key for resend cooldown"""
+    def _cooldown_key(user, otp_type):
         return f"otp_resend_cooldown:{user.id}:{otp_type}"
 
     @staticmethod
-    def get_hourly_verification_key(user, otp_type):
-        """Generate cache key for hourly verification attempts"""
-        return f"otp_hourly_verification:{user.id}:{otp_type}"
+    def start_cooldown(user, otp_type):
+        """
+        Start the resend cooldown; returns 0, or the seconds left of the
+        cooldown already running
+        """
+        key = OTPValidator._cooldown_key(user, otp_type)
+        until = time.time() + OTP_RESEND_COOLDOWN_SECONDS
+        try:
+            if rate_limiter.cache.add(key, until, timeout=OTP_RESEND_COOLDOWN_SECONDS):
+                return 0
+            running_until = rate_limiter.cache.get(key)
+        except Exception as e:
+            # Like the rate limiter, an unavailable cache does not fail requests
+            logger.warning(f"Could not check the OTP resend cooldown: {str(e)}")
+            return 0
+        if running_until is None:
+            # Expired between add() and get()
+            return OTPValidator.start_cooldown(user, otp_type)
+        return max(1, math.ceil(running_until - time.time()))
+
+    @staticmethod
+    def clear_cooldowns(user, otp_types):
+        """End the resend cooldowns of ``otp_types``; returns how many were running"""
+        keys = [OTPValidator._cooldown_key(user, otp_type) for otp_type in otp_types]
+        running = rate_limiter.cache.get_many(keys)
+        rate_limiter.cache.delete_many(keys)
+        return len(running)
+
+    @staticmethod
+    def release_send(user, otp_type, reserved):
+        """Give back the limits taken by an OTP request that was not sent"""
+        if reserved:
+            rate_limiter.release(reserved)
+            OTPValidator.clear_cooldowns(user, [otp_type])
 
     @staticmethod
-    def get_otp_verification_key(user, otp_type, otp_id):
-        """Generate cache key for specific OTP verification attempts"""
-        return f"otp_verification_attempts:{user.id}:{otp_type}:{otp_id}"
+    def get_global_email_check():
+        """Rate limiter key of the global email sending limit"""
+        return (OTP_GLOBAL_EMAIL_LIMIT, "all")
 
     @staticmethod
-    def get_global_email_limit_key():
-        """Generate cache key for global email sending limit"""
-        return "global_otp_emails_sent_hourly"
+    def get_verification_checks(user, otp_type, otp_id=None):
+        """Rate limiter keys of verification attempts (per hour and per OTP)"""
+        checks = [(OTP_VERIFY_HOURLY_LIMIT, f"{user.id}:{otp_type}")]
+        if otp_id is not None:
+            checks.append((OTP_VERIFY_CODE_LIMIT, f"{user.id}:{otp_type}:{otp_id}"))
+        return checks
+
+    @staticmethod
+    def reset_limits(user, otp_types, otps=()):
+        """
+        Clear a user's OTP request and verification limits for ``otp_types``
+        and the attempts on the given OTPs in one batch; returns how many
+        limits were active
+        """
+        checks = []
+        for otp_type in otp_types:
+            checks += OTPValidator.get_rate_limit_checks(user, otp_type)
+            checks += OTPValidator.get_verification_checks(user, otp_type)
+        for otp in otps:
+            checks += OTPValidator.get_verification_checks(
+                user, otp.otp_type, otp.id
+            )[1:]
+        return rate_limiter.reset(checks) + OTPValidator.clear_cooldowns(
+            user, otp_types
+        )
 
     @staticmethod
     def get_global_email_stats():
         """Get current global email sending statistics"""
-        key = OTPValidator.get_global_email_limit_key()
-        current_count = cache.get(key, 0)
-        max_limit = 1000  # Should match the limit in send_otp_utility
+        check = OTPValidator.get_global_email_check()
+        current_count = int(rate_limiter.peek([check])[0])
+        max_limit = OTP_GLOBAL_EMAIL_LIMIT.limit
 
         return {
             "current_count": current_count,
@@ -341,8 +395,7 @@ class OTPValidator:
     @staticmethod
     def reset_global_email_limit():
         """Reset global email sending counter (admin function)"""
-        key = OTPValidator.get_global_email_limit_key()
-        cache.delete(key)
+        rate_limiter.reset([OTPValidator.get_global_email_check()])
         return True
 
 
@@ -367,6 +420,8 @@ def send_otp_utility(
         f"[OTP_DEBUG] Starting OTP send process for user {user.id} ({user.email}), type: {otp_type}"
     )
 
+    # Rate limit hits counted for this request
+    reserved = []
     try:
         # Validate admin override
         if admin_override:
@@ -411,65 +466,50 @@ def send_otp_utility(
                 "error_code": "NO_RECIPIENT",
             }
 
-        # GLOBAL EMAIL ABUSE PROTECTION - Check total emails sent per hour
-        if recipient_email and not admin_override:
-            logger.info(
-                f"[OTP_DEBUG] Checking global email limit for {recipient_email}"
-            )
-            global_email_key = "global_otp_emails_sent_hourly"
-            global_email_count = cache.get(global_email_key, 0)
-            max_global_emails_per_hour = (
-                1000  # Adjust based on your email service limits
-            )
-
-            logger.info(
-                f"[OTP_DEBUG] Global email count: {global_email_count}/{max_global_emails_per_hour}"
-            )
-
-            if global_email_count >= max_global_emails_per_hour:
-                logger.warning(
-                    f"[OTP_DEBUG] Global email limit reached: {global_email_count} emails sent in the last hour"
-                )
+        # Start the resend cooldown, then check and count the global email
+        # limit and the user's hourly limit in one atomic call; all given
+        # back if sending fails
+        if not admin_override:
+            logger.info(f"[OTP_DEBUG] Checking rate limits for {user.id}")
+            cooldown_left = OTPValidator.start_cooldown(user, otp_type)
+            if cooldown_left:
+                logger.warning(f"[OTP_DEBUG] Resend cooldown active for user {user.id}")
                 return {
                     "success": False,
-                    "message": "Email service temporarily unavailable. Please try again later.",
-                    "error_code": "EMAIL_SERVICE_LIMIT",
-                    "status_code": 503,
+                    "message": "Please wait before requesting another OTP.",
+                    "error_code": "COOLDOWN_ACTIVE",
+                    "status_code": 429,
+                    "retry_after": cooldown_left,
                 }
-            logger.info(f"[OTP_DEBUG] Global email limit check passed")
 
-        # Skip rate limiting checks if admin override is enabled
-        if not admin_override:
-            logger.info(f"[OTP_DEBUG] Checking user rate limits for {user.id}")
-            # Check rate limiting using cache
-            rate_limit_key = OTPValidator.get_rate_limit_key(user, otp_type)
-            attempts = cache.get(rate_limit_key, 0)
-            logger.info(f"[OTP_DEBUG] User rate limit attempts: {attempts}/5")
+            checks = OTPValidator.get_rate_limit_checks(user, otp_type)
+            if recipient_email:
+                # GLOBAL EMAIL ABUSE PROTECTION - total emails sent per hour
+                checks.insert(0, OTPValidator.get_global_email_check())
+            limited = rate_limiter.hit(checks)
 
-            if attempts >= 5:  # Max 5 OTP requests per hour
+            if not limited.allowed:
+                OTPValidator.clear_cooldowns(user, [otp_type])
                 logger.warning(
-                    f"[OTP_DEBUG] User rate limit exceeded for {user.id}: {attempts} attempts"
+                    f"[OTP_DEBUG] Rate limit {limited.limit.name} reached for user "
+                    f"{user.id}: {limited.count:.0f}/{limited.limit.limit}"
                 )
+                if limited.limit == OTP_GLOBAL_EMAIL_LIMIT:
+                    return {
+                        "success": False,
+                        "message": "Email service temporarily unavailable. Please try again later.",
+                        "error_code": "EMAIL_SERVICE_LIMIT",
+                        "status_code": 503,
+                        "retry_after": limited.retry_after,
+                    }
                 return {
                     "success": False,
                     "message": "Too many OTP requests. Please try again later.",
                     "error_code": "RATE_LIMIT_EXCEEDED",
                     "status_code": 429,
+                    "retry_after": limited.retry_after,
                 }
-
-            # Check resend cooldown
-            cooldown_key = OTPValidator.get_resend_cooldown_key(user, otp_type)
-            cooldown_active = cache.get(cooldown_key)
-            logger.info(f"[OTP_DEBUG] Cooldown check: {cooldown_active}")
-
-            if cooldown_active:
-                logger.warning(f"[OTP_DEBUG] Cooldown active for user {user.id}")
-                return {
-                    "success": False,
-                    "message": "Please wait before requesting another OTP.",
-                    "error_code": "COOLDOWN_ACTIVE",
-                    "status_code": 429,
-                }
+            reserved = checks
             logger.info(f"[OTP_DEBUG] All rate limit checks passed")
         else:
             logger.info(f"[OTP_DEBUG] Skipping rate limit checks due to admin override")
@@ -502,37 +542,14 @@ def send_otp_utility(
                 logger.error(
                     f"[OTP_DEBUG] Email sending failed for user {user.id} to {recipient_email}"
                 )
+                OTPValidator.release_send(user, otp_type, reserved)
                 return {
                     "success": False,
                     "message": "Failed to send OTP email. Please try again later.",
                     "error_code": "EMAIL_SEND_FAILED",
                 }
 
-            logger.info(f"[OTP_DEBUG] Email sent successfully, updating counters")
-
-            # Update global email counter (only if not admin override)
-            if not admin_override:
-                global_email_key = "global_otp_emails_sent_hourly"
-                global_email_count = cache.get(global_email_key, 0)
-                new_global_count = global_email_count + 1
-                cache.set(global_email_key, new_global_count, 3600)  # 1 hour expiry
-                logger.info(
-                    f"[OTP_DEBUG] Updated global email counter: {global_email_count} -> {new_global_count}"
-                )
-
-            # Update rate limiting (only if not admin override)
-            if not admin_override:
-                rate_limit_key = OTPValidator.get_rate_limit_key(user, otp_type)
-                attempts = cache.get(rate_limit_key, 0)
-                new_attempts = attempts + 1
-                cache.set(rate_limit_key, new_attempts, 3600)  # 1 hour expiry
-                logger.info(
-                    f"[OTP_DEBUG] Updated user rate limit: {attempts} -> {new_attempts}"
-                )
-
-                cooldown_key = OTPValidator.get_resend_cooldown_key(user, otp_type)
-                cache.set(cooldown_key, True, 60)  # 1 minute cooldown
-                logger.info(f"[OTP_DEBUG] Set cooldown for user {user.id}")
+            logger.info(f"[OTP_DEBUG] Email sent successfully")
 
             # Log admin override if applicable
             if admin_override:
@@ -559,6 +576,7 @@ def send_otp_utility(
             logger.info(
                 f"[OTP_DEBUG] SMS OTP requested for {recipient_phone} (not implemented)"
             )
+            OTPValidator.release_send(user, otp_type, reserved)
             # TODO: Implement SMS sending logic here
             # For now, return error indicating SMS not implemented
             return {
@@ -581,6 +599,7 @@ def send_otp_utility(
         logger.exception(
             f"[OTP_DEBUG] Exception in send_otp_utility for user {user.id}: {str(e)}"
         )
+        OTPValidator.release_send(user, otp_type, reserved)
         return {
             "success": False,
             "message": "Failed to send OTP. Please try again later.",
@@ -698,17 +717,15 @@ def verify_otp_utility(user, otp_code, otp_type, admin_override=False, admin_use
         # Skip rate limiting checks if admin override is enabled
         if not admin_override:
             logger.info(f"[VERIFY_DEBUG] Checking verification rate limits")
-            # TIER 1: Check hourly verification attempts per user per OTP type
-            hourly_verification_key = OTPValidator.get_hourly_verification_key(
-                user, otp_type
-            )
-            hourly_attempts = cache.get(hourly_verification_key, 0)
-            max_hourly_attempts = 5
-            logger.info(
-                f"[VERIFY_DEBUG] Hourly verification attempts: {hourly_attempts}/{max_hourly_attempts}"
+            # TIER 1: hourly verification attempts per user per OTP type
+            # TIER 2: attempts per specific OTP instance
+            # Both are checked and counted in one atomic call
+            verification_checks = OTPValidator.get_verification_checks(
+                user, otp_type, otp.id
             )
+            limited = rate_limiter.hit(verification_checks)
 
-            if hourly_attempts >= max_hourly_attempts:
+            if not limited.allowed and limited.limit == OTP_VERIFY_HOURLY_LIMIT:
                 logger.warning(
                     f"[VERIFY_DEBUG] Hourly verification limit exceeded for user {user.id}"
                 )
@@ -718,17 +735,7 @@ def verify_otp_utility(user, otp_code, otp_type, admin_override=False, admin_use
                     "error_code": "HOURLY_LIMIT_EXCEEDED",
                 }
 
-            # TIER 2: Check attempts per specific OTP instance
-            otp_verification_key = OTPValidator.get_otp_verification_key(
-                user, otp_type, otp.id
-            )
-            otp_attempts = cache.get(otp_verification_key, 0)
-            max_otp_attempts = 3
-            logger.info(
-                f"[VERIFY_DEBUG] OTP-specific attempts: {otp_attempts}/{max_otp_attempts}"
-            )
-
-            if otp_attempts >= max_otp_attempts:
+            if not limited.allowed:
                 logger.warning(
                     f"[VERIFY_DEBUG] OTP-specific limit exceeded for OTP {otp.id}"
                 )
@@ -737,18 +744,7 @@ def verify_otp_utility(user, otp_code, otp_type, admin_override=False, admin_use
                     "message": "Maximum attempts reached for this OTP. Please request a new OTP.",
                     "error_code": "OTP_MAX_ATTEMPTS_REACHED",
                 }
-
-            # Increment both counters
-            hourly_attempts += 1
-            otp_attempts += 1
-            logger.info(
-                f"[VERIFY_DEBUG] Incremented counters - Hourly: {hourly_attempts}, OTP: {otp_attempts}"
-            )
-
-            # Store with appropriate expiry times
-            cache.set(hourly_verification_key, hourly_attempts, 3600)  # 1 hour expiry
-            cache.set(otp_verification_key, otp_attempts, 3600)  # 1 hour expiry
-            logger.info(f"[VERIFY_DEBUG] Rate limit counters updated in cache")
+            logger.info(f"[VERIFY_DEBUG] Rate limit counters updated")
         else:
             logger.info(
                 f"[VERIFY_DEBUG] Skipping rate limit checks due to admin override"
@@ -765,10 +761,10 @@ def verify_otp_utility(user, otp_code, otp_type, admin_override=False, admin_use
             otp.save()
             logger.info(f"[VERIFY_DEBUG] Marked OTP {otp.id} as used")
 
-            # Clear verification attempts cache (only if not admin override)
+            # Clear verification attempts (only if not admin override)
             if not admin_override:
-                cache.delete(otp_verification_key)
-                logger.info(f"[VERIFY_DEBUG] Cleared OTP verification cache")
+                rate_limiter.reset(verification_checks[1:])
+                logger.info(f"[VERIFY_DEBUG] Cleared OTP verification attempts")
 
             # Log admin override if applicable
             if admin_override:
@@ -856,9 +852,18 @@ def verify_otp_utility(user, otp_code, otp_type, admin_override=False, admin_use
                     "admin_user_id": str(admin_user.id),
                 }
             else:
-                # Calculate remaining attempts for both tiers
-                remaining_otp_attempts = max_otp_attempts - otp_attempts
-                remaining_hourly_attempts = max_hourly_attempts - hourly_attempts
+                # Calculate remaining attempts for both tiers (this attempt
+                # was counted above)
+                hourly_check, otp_check = verification_checks
+                otp_attempts, hourly_attempts = rate_limiter.peek(
+                    [otp_check, hourly_check]
+                )
+                remaining_otp_attempts = max(
+                    0, math.floor(OTP_VERIFY_CODE_LIMIT.limit - otp_attempts)
+                )
+                remaining_hourly_attempts = max(
+                    0, math.floor(OTP_VERIFY_HOURLY_LIMIT.limit - hourly_attempts)
+                )
                 logger.info(
                     f"[VERIFY_DEBUG] Remaining attempts - OTP: {remaining_otp_attempts}, Hourly: {remaining_hourly_attempts}"
                 )
@@ -22,7 +22,6 @@ from rest_framework_simplejwt.exceptions import (
     InvalidToken,
     AuthenticationFailed,
 )
-from django.core.cache import cache
 from django.utils import timezone
 from datetime import timezone as dt_timezone
 import logging
@@ -55,8 +54,13 @@ from .error_handlers import (
 )
 from .utils import send_otp_utility, verify_otp_utility, OTPValidator
 from .models import OTP, UserVerification
+from .principal import CachedUser, get_principal
+from apps.User.activity import record_login
+from .token_blacklist import is_token_blacklisted
+from utils.debug_trace import get_tracer
 
 logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -74,7 +78,7 @@ class RegisterAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
-        print("request.data", request.data)
+        tracer.debug("request.data {}", request.data)
 
         try:
             serializer = RegisterSerializer(data=request.data)
@@ -216,8 +220,9 @@ class LoginAPIView(APIView):
             #         status=status.HTTP_403_FORBIDDEN,
             #     )
 
-            # Check if account is locked due to too many failed attempts
-            if is_account_locked(user.email):
+            # Check if account (or client IP) is locked due to too many failed attempts
+            ip = get_client_ip(request)
+            if is_account_locked(user.email, ip):
                 return Response(
                     {
                         "detail": "Account temporarily locked. Try again later or reset your password."
@@ -226,20 +231,11 @@ class LoginAPIView(APIView):
                 )
 
             # Record successful login
-            ip = get_client_ip(request)
             logger.info(f"Successful login for user {user.id} from IP {ip}")
             reset_failed_logins(user.email)
 
-            # Log user activity
-            from apps.User.models import UserActivity
-
-            UserActivity.objects.create(
-                user=user, activity_type="login", details={"ip": ip}
-            )
-
-            # Update last login timestamp
-            user.last_login = timezone.now()
-            user.save()
+            # Log user activity and update the last login timestamp (buffered)
+            record_login(user, "login", {"ip": ip})
 
             # Generate JWT tokens
             refresh = RefreshToken.for_user(user)
@@ -400,7 +396,7 @@ class PasswordResetConfirmAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request, uidb64, token):
-        print("request data", request.data)
+        tracer.debug("request data {}", request.data)
         serializer = PasswordResetConfirmSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -492,7 +488,7 @@ class TokenRefreshView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
-        print("TokenRefreshView", request.headers)
+        tracer.debug("TokenRefreshView {}", request.headers)
         # Detailed header logging
         logger.debug("=== Token Refresh Request Headers ===")
         for header, value in request.headers.items():
@@ -511,7 +507,7 @@ class TokenRefreshView(APIView):
                 )
             refresh_token = auth_header.split(" ")[1]
 
-        print("the refresh token", refresh_token)
+        tracer.debug("the refresh token {}", refresh_token)
 
         try:
             # Verify and decode the refresh token
@@ -538,7 +534,7 @@ class TokenRefreshView(APIView):
                 )
 
             token_data = token_backend.decode(refresh_token, verify=True)
-            print("the token data", token_data)
+            tracer.debug("the token data {}", token_data)
 
             # Debug: Check token type
             token_type = token_data.get("token_type")
@@ -557,17 +553,20 @@ class TokenRefreshView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            user = User.objects.get(id=user_id)
-
             # Check if token is blacklisted
-            from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
-
-            if BlacklistedToken.objects.filter(token=refresh_token).exists():
+            if is_token_blacklisted(
+                token_data.get(api_settings.JTI_CLAIM), exact=True
+            ):
                 return Response(
                     {"detail": "Token has been blacklisted."},
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
+            principal = get_principal(user_id)
+            if principal is None:
+                raise User.DoesNotExist
+            user = CachedUser(principal)
+
             # Generate new access token
             refresh = RefreshToken.for_user(user)
             new_access_token = str(refresh.access_token)
@@ -644,26 +643,29 @@ class TokenVerifyView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            user = User.objects.get(id=user_id)
-
             # Check if token is blacklisted
-            from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
-
-            if BlacklistedToken.objects.filter(token=token).exists():
+            if is_token_blacklisted(
+                token_data.get(api_settings.JTI_CLAIM), exact=True
+            ):
                 return Response(
                     {"detail": "Token has been blacklisted."},
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
+            # The cached principal has every field the response needs
+            user = get_principal(user_id)
+            if user is None:
+                raise User.DoesNotExist
+
             return Response(
                 {
                     "valid": True,
                     "user": {
-                        "id": user.id,
-                        "email": user.email,
-                        "first_name": user.first_name,
-                        "last_name": user.last_name,
-                        "is_active": user.is_active,
+                        "id": user["id"],
+                        "email": user["email"],
+                        "first_name": user["first_name"],
+                        "last_name": user["last_name"],
+                        "is_active": user["is_active"],
                     },
                 },
                 status=status.HTTP_200_OK,
@@ -804,7 +806,7 @@ class VerifyOTPView(APIView):
 
     def post(self, request):
         serializer = VerifyOTPSerializer(data=request.data)
-        print("the otp data", request.data)
+        tracer.debug("the otp data {}", request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -966,24 +968,10 @@ class ResendOTPView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Check cooldown
-            cooldown_key = f"otp_cooldown:{user.id}:{otp_type}"
-            if cache.get(cooldown_key):
-                return Response(
-                    {
-                        "message": "Please wait before requesting another OTP.",
-                        "error_code": "COOLDOWN_ACTIVE",
-                    },
-                    status=status.HTTP_429_TOO_MANY_REQUESTS,
-                )
-
-            # Send OTP
+            # Send OTP (send_otp_utility enforces the resend cooldown)
             result = send_otp_utility(user, otp_type, user.email)
 
             if result["success"]:
-                # Set cooldown
-                cache.set(cooldown_key, True, timeout=60)  # 1 minute cooldown
-
                 return Response(
                     {
                         "message": result["message"],
@@ -994,15 +982,16 @@ class ResendOTPView(APIView):
                     status=status.HTTP_200_OK,
                 )
             else:
-                if result["status_code"] == 429:
+                if result.get("status_code") == 429:
                     return Response(
                         {
                             "message": result["message"],
                             "error_code": result.get("error_code", "UNKNOWN_ERROR"),
                         },
                         status=status.HTTP_429_TOO_MANY_REQUESTS,
+                        headers={"Retry-After": str(result.get("retry_after", 60))},
                     )
-                elif result["status_code"] == 503:
+                elif result.get("status_code") == 503:
                     return Response(
                         {
                             "message": result["message"],
@@ -1340,8 +1329,8 @@ class MFALoginView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            # Check if account is locked due to too many failed attempts
-            if is_account_locked(user.email):
+            # Check if account (or client IP) is locked due to too many failed attempts
+            if is_account_locked(user.email, get_client_ip(request)):
                 return Response(
                     {
                         "message": "Account temporarily locked due to too many failed attempts. Try again later or reset your password.",
@@ -1470,16 +1459,8 @@ class VerifyMFALoginView(APIView):
                 ip = get_client_ip(request)
                 logger.info(f"Successful MFA login for user {user.id} from IP {ip}")
 
-                # Log user activity
-                from apps.User.models import UserActivity
-
-                UserActivity.objects.create(
-                    user=user, activity_type="mfa_login", details={"ip": ip}
-                )
-
-                # Update last login timestamp
-                user.last_login = timezone.now()
-                user.save()
+                # Log user activity and update the last login timestamp (buffered)
+                record_login(user, "mfa_login", {"ip": ip})
 
                 # Generate JWT tokens
                 refresh = RefreshToken.for_user(user)
@@ -1800,86 +1781,23 @@ class AdminResetOTPLimitsView(APIView):
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
-            # Reset rate limits
-            reset_count = 0
-
-            if otp_type:
-                # Reset specific OTP type
-                valid_otp_types = [choice[0] for choice in OTP.OTP_TYPES]
-                if otp_type not in valid_otp_types:
-                    return Response(
-                        {
-                            "message": f"Invalid OTP type. Valid types: {valid_otp_types}",
-                            "error_code": "INVALID_OTP_TYPE",
-                        },
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                # Reset sending rate limit
-                rate_limit_key = OTPValidator.get_rate_limit_key(user, otp_type)
-                if cache.get(rate_limit_key):
-                    cache.delete(rate_limit_key)
-                    reset_count += 1
-
-                # Reset cooldown
-                cooldown_key = OTPValidator.get_resend_cooldown_key(user, otp_type)
-                if cache.get(cooldown_key):
-                    cache.delete(cooldown_key)
-                    reset_count += 1
-
-                # Reset hourly verification limit
-                hourly_verification_key = OTPValidator.get_hourly_verification_key(
-                    user, otp_type
+            valid_otp_types = [choice[0] for choice in OTP.OTP_TYPES]
+            if otp_type and otp_type not in valid_otp_types:
+                return Response(
+                    {
+                        "message": f"Invalid OTP type. Valid types: {valid_otp_types}",
+                        "error_code": "INVALID_OTP_TYPE",
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-                if cache.get(hourly_verification_key):
-                    cache.delete(hourly_verification_key)
-                    reset_count += 1
-
-                # Reset all OTP verification attempts for this type
-                # This is a bit more complex as we need to find all OTPs for this user and type
-                otps = OTP.objects.filter(user=user, otp_type=otp_type, is_used=False)
-                for otp in otps:
-                    otp_verification_key = OTPValidator.get_otp_verification_key(
-                        user, otp_type, otp.id
-                    )
-                    if cache.get(otp_verification_key):
-                        cache.delete(otp_verification_key)
-                        reset_count += 1
-            else:
-                # Reset all OTP types
-                valid_otp_types = [choice[0] for choice in OTP.OTP_TYPES]
-                for otp_type in valid_otp_types:
-                    # Reset sending rate limit
-                    rate_limit_key = OTPValidator.get_rate_limit_key(user, otp_type)
-                    if cache.get(rate_limit_key):
-                        cache.delete(rate_limit_key)
-                        reset_count += 1
-
-                    # Reset cooldown
-                    cooldown_key = OTPValidator.get_resend_cooldown_key(user, otp_type)
-                    if cache.get(cooldown_key):
-                        cache.delete(cooldown_key)
-                        reset_count += 1
-
-                    # Reset hourly verification limit
-                    hourly_verification_key = OTPValidator.get_hourly_verification_key(
-                        user, otp_type
-                    )
-                    if cache.get(hourly_verification_key):
-                        cache.delete(hourly_verification_key)
-                        reset_count += 1
+            otp_types = [otp_type] if otp_type else valid_otp_types
 
-                    # Reset all OTP verification attempts for this type
-                    otps = OTP.objects.filter(
-                        user=user, otp_type=otp_type, is_used=False
-                    )
-                    for otp in otps:
-                        otp_verification_key = OTPValidator.get_otp_verification_key(
-                            user, otp_type, otp.id
-                        )
-                        if cache.get(otp_verification_key):
-                            cache.delete(otp_verification_key)
-                            reset_count += 1
+            # Reset sending limits, cooldowns, hourly verification limits and
+            # the verification attempts of every unused OTP in one batch
+            otps = OTP.objects.filter(
+                user=user, otp_type__in=otp_types, is_used=False
+            ).only("id", "otp_type")
+            reset_count = OTPValidator.reset_limits(user, otp_types, otps)
 
             # Log the admin action
             logger.info(
@@ -2108,7 +2026,7 @@ class RegisterProviderAPIView(APIView):
             "accepted_privacy_policy": true
         }
         """
-        print("request data", request.data)
+        tracer.debug("request data {}", request.data)
         try:
             from apps.Provider.serializer import ProviderRegistrationSerializer
 
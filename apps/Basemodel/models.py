@@ -8,6 +8,9 @@ import random
 from django.db import models
 from django.forms import model_to_dict
 import uuid
+from utils.debug_trace import get_tracer
+
+tracer = get_tracer(__name__)
 
 
 class Basemodel(models.Model):
@@ -57,6 +60,5 @@ class Basemodel(models.Model):
         abstract = True
 
     def save(self, *args, **kwargs):
-        print("BaseModel save starting...")
         super().save(*args, **kwargs)
-        print("BaseModel save completed")
+        tracer.debug("{} {} saved", self.__class__.__name__, self.pk)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BiddingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.Bidding'
+
+    def ready(self):
+        # Keeps the jobs' bid summaries current
+        import apps.Bidding.signals
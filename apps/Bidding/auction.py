@@ -0,0 +1,278 @@
+"""
+Auctions
+
+A biddable job (``Job.make_biddable``) is an auction that ends at
+``bidding_end_time``. This module closes auctions and keeps the bid summary
+that job listings show.
+
+Bid summary: ``Job.bid_count``, ``best_bid`` and ``best_bid_amount`` (the
+lowest live bid, earliest first on a tie) are denormalized onto the job.
+signals.py calls ``bids_changed`` when a bid is saved or deleted, and the
+bid settlement and auction closing call it after their bulk updates; the
+affected jobs are recomputed with one ``UPDATE`` once the transaction
+commits, so listings read them from the job row.
+
+Closing: ``AuctionScheduler`` keeps a min-heap of open auctions by end time,
+topped up from the jobs changed since its last sync, and sleeps until the
+next one ends. Due auctions are closed in bulk by ``close_auctions``: their
+pending bids expire, the jobs go back to ``draft`` (so they can be made
+biddable again) and one ``job.status_changed`` event per job records the
+timeline entry and notifies the customer. Jobs being settled at that moment
+(row locked by apps/Bidding/services.py) are skipped and retried.
+
+Run with ``python manage.py run_auctions``.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.Notification.outbox import JOB_STATUS_CHANGED, emit_many
+
+from .models import Bid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "BATCH_SIZE": 500,  # auctions closed per transaction
+    "POLL_INTERVAL": 30,  # seconds between syncs of new and changed auctions
+    "RETRY_DELAY": 5,  # seconds before retrying an auction that was being settled
+}
+
+# Bids that can still win
+LIVE_BID_STATUSES = ("pending", "accepted")
+
+_pending = threading.local()
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "AUCTIONS", {})}
+
+
+def summary_expressions() -> Dict:
+    """Expressions recomputing a job's bid summary"""
+    best = Bid.objects.filter(
+        job=OuterRef("pk"), status__in=LIVE_BID_STATUSES
+    ).order_by("amount", "created_at")
+    return {
+        "bid_count": Coalesce(
+            Subquery(
+                Bid.objects.filter(job=OuterRef("pk"))
+                .order_by()
+                .values("job")
+                .annotate(count=Count("pk"))
+                .values("count"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        "best_bid": Subquery(best.values("pk")[:1]),
+        "best_bid_amount": Subquery(best.values("amount")[:1]),
+    }
+
+
+def refresh_summaries(job_ids: Iterable) -> int:
+    """Recompute the bid summary of ``job_ids``; returns the jobs updated"""
+    from apps.Job.models import Job
+
+    job_ids = list(job_ids)
+    batch_size = get_config()["BATCH_SIZE"]
+    updated = 0
+    for start in range(0, len(job_ids), batch_size):
+        updated += Job.objects.filter(
+            pk__in=job_ids[start : start + batch_size]
+        ).update(**summary_expressions())
+    return updated
+
+
+def _refresh_pending():
+    job_ids = getattr(_pending, "job_ids", None)
+    _pending.job_ids = set()
+    if not job_ids:
+        # Already refreshed by an earlier callback of the same transaction
+        return
+    try:
+        refresh_summaries(job_ids)
+    except Exception as e:
+        logger.error(f"Error refreshing bid summaries: {str(e)}")
+
+
+def bids_changed(job_id):
+    """Refresh ``job_id``'s bid summary once the current transaction commits"""
+    if job_id is None:
+        return
+    job_ids = getattr(_pending, "job_ids", None)
+    if job_ids is None:
+        job_ids = _pending.job_ids = set()
+    job_ids.add(job_id)
+    transaction.on_commit(_refresh_pending)
+
+
+def close_auctions(job_ids: Iterable, now: datetime = None) -> Tuple[List, List]:
+    """
+    Close the auctions of ``job_ids`` that have ended
+
+    Returns:
+        Tuple: The ids of the jobs closed, and of those skipped because they
+        were being settled at the time (still open, to retry)
+    """
+    from apps.Job.models import Job
+
+    now = now or timezone.now()
+    job_ids = list(job_ids)
+    ended = Job.objects.filter(
+        pk__in=job_ids, status="bidding", bidding_end_time__lte=now
+    )
+
+    with transaction.atomic():
+        jobs = list(
+            ended.select_for_update(skip_locked=True).only("id", "bidding_end_time")
+        )
+        closed_ids = [job.pk for job in jobs]
+        if closed_ids:
+            expired = dict(
+                Bid.objects.filter(job_id__in=closed_ids, status="pending")
+                .order_by()
+                .values("job_id")
+                .annotate(count=Count("pk"))
+                .values_list("job_id", "count")
+            )
+            Bid.objects.filter(job_id__in=closed_ids, status="pending").update(
+                status="expired", updated_at=now
+            )
+            Job.objects.filter(pk__in=closed_ids).update(status="draft", updated_at=now)
+            emit_many(
+                JOB_STATUS_CHANGED,
+                [
+                    (
+                        job,
+                        {
+                            "old_status": "bidding",
+                            "new_status": "draft",
+                            "timeline": {
+                                "event_type": "status_changed",
+                                "description": "Bidding closed without an accepted bid",
+                                "metadata": {
+                                    "bidding_end_time": job.bidding_end_time.isoformat(),
+                                    "expired_bids": expired.get(job.pk, 0),
+                                },
+                            },
+                        },
+                    )
+                    for job in jobs
+                ],
+            )
+            refresh_summaries(closed_ids)
+
+    skipped_ids = list(ended.exclude(pk__in=closed_ids).values_list("pk", flat=True))
+    if closed_ids:
+        logger.info(f"Closed {len(closed_ids)} auctions")
+    return closed_ids, skipped_ids
+
+
+class AuctionScheduler:
+    """Closes auctions as they end (see the module docstring)"""
+
+    def __init__(self, batch_size: int = None):
+        config = get_config()
+        self.batch_size = batch_size or config["BATCH_SIZE"]
+        self.retry_delay = timedelta(seconds=config["RETRY_DELAY"])
+        # (end time, job id) entries; an entry is stale when the job's end
+        # time has since changed, which ``_end_times`` tells
+        self._heap: List[Tuple[datetime, str]] = []
+        self._end_times: Dict[str, datetime] = {}
+        self._synced_at = None
+
+    def __len__(self) -> int:
+        return len(self._end_times)
+
+    def schedule(self, job_id, end_time: datetime):
+        job_id = str(job_id)
+        if self._end_times.get(job_id) == end_time:
+            return
+        self._end_times[job_id] = end_time
+        heapq.heappush(self._heap, (end_time, job_id))
+
+    def sync(self, now: datetime = None):
+        """Schedule the open auctions changed since the last sync (all of
+        them the first time)"""
+        from apps.Job.models import Job
+
+        now = now or timezone.now()
+        auctions = Job.objects.filter(status="bidding", bidding_end_time__isnull=False)
+        if self._synced_at is not None:
+            # Overlap a little: a transaction may commit a change stamped
+            # slightly before the previous sync
+            auctions = auctions.filter(
+                updated_at__gte=self._synced_at - timedelta(minutes=1)
+            )
+        for job_id, end_time in auctions.values_list("pk", "bidding_end_time"):
+            self.schedule(job_id, end_time)
+        self._synced_at = now
+
+    def next_end_time(self):
+        while self._heap:
+            end_time, job_id = self._heap[0]
+            if self._end_times.get(job_id) == end_time:
+                return end_time
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: datetime) -> List[str]:
+        due = []
+        while len(due) < self.batch_size:
+            end_time = self.next_end_time()
+            if end_time is None or end_time > now:
+                break
+            _, job_id = heapq.heappop(self._heap)
+            del self._end_times[job_id]
+            due.append(job_id)
+        return due
+
+    def run_once(self, now: datetime = None) -> Dict:
+        """Sync, then close every auction that has ended"""
+        now = now or timezone.now()
+        self.sync(now)
+        stats = {"closed": 0, "retried": 0}
+        while True:
+            due = self.pop_due(now)
+            if not due:
+                break
+            closed, skipped = close_auctions(due, now)
+            stats["closed"] += len(closed)
+            stats["retried"] += len(skipped)
+            for job_id in skipped:
+                self.schedule(job_id, now + self.retry_delay)
+        return stats
+
+    def run(self, interval: float = None, once: bool = False):
+        """Close auctions until interrupted (or one pass with once)"""
+        interval = interval if interval is not None else get_config()["POLL_INTERVAL"]
+        while True:
+            self.run_once()
+            if once:
+                return
+            # Wake up for the next auction to end, or to pick up new ones
+            wait = interval
+            next_end_time = self.next_end_time()
+            if next_end_time is not None:
+                wait = min(
+                    wait, max((next_end_time - timezone.now()).total_seconds(), 0)
+                )
+            time.sleep(wait)
+
+    def stats(self) -> Dict:
+        next_end_time = self.next_end_time()
+        return {
+            "scheduled": len(self),
+            "next_end_time": next_end_time.isoformat() if next_end_time else None,
+        }
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from apps.Bidding.auction import AuctionScheduler, refresh_summaries
+
+
+class Command(BaseCommand):
+    help = "Close auctions as they end: expire their pending bids and reopen the jobs as drafts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Seconds between checks for new auctions (default: AUCTIONS)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Close the auctions that have ended and exit instead of running forever",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Show the open auctions, then exit",
+        )
+        parser.add_argument(
+            "--rebuild-summaries",
+            action="store_true",
+            help="Recompute every job's bid count and best bid first",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild_summaries"]:
+            from apps.Job.models import Job
+
+            updated = refresh_summaries(Job.objects.values_list("pk", flat=True))
+            self.stdout.write(f"Rebuilt the bid summaries of {updated} jobs")
+
+        scheduler = AuctionScheduler()
+        if options["stats"]:
+            scheduler.sync()
+            for key, value in scheduler.stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        self.stdout.write("Running auctions...")
+        try:
+            scheduler.run(interval=options.get("interval"), once=options["once"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Auction scheduler stopped"))
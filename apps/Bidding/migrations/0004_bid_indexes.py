@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Bidding', '0003_initial'),
+        ('Job', '0004_initial'),
+        ('Provider', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['job', '-created_at'], name='bid_job_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['provider', '-created_at'], name='bid_provider_created_idx'),
+        ),
+    ]
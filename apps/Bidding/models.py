@@ -29,18 +29,28 @@ class Bid(Basemodel):
         verbose_name = _("Bid")
         verbose_name_plural = _("Bids")
         ordering = ["-created_at"]
+        indexes = [
+            # A job's bids and a provider's bids, newest first
+            models.Index(fields=["job", "-created_at"], name="bid_job_created_idx"),
+            models.Index(
+                fields=["provider", "-created_at"], name="bid_provider_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Bid of {self.amount} for {self.job}"
 
-    def accept(self):
-        """Accept this bid"""
-        if self.status == "pending":
-            self.status = "accepted"
-            self.save()
-            self.job.accept_bid(self)
-            return True
-        return False
+    def accept(self, accepted_by=None):
+        """Accept this bid (see apps/Bidding/services.py)"""
+        from .services import BidNotAcceptable, accept_bid
+
+        try:
+            accepted = accept_bid(self.pk, job_id=self.job_id, actor=accepted_by)
+        except BidNotAcceptable:
+            return False
+        self.status = accepted.status
+        self.updated_at = accepted.updated_at
+        return True
 
     def reject(self):
         """Reject this bid"""
@@ -0,0 +1,148 @@
+"""
+Bid settlement
+
+Accepting a bid used to mark it accepted, save the job and ``update()`` the
+other bids as rejected without any lock, so two concurrent accepts on the
+same job could both succeed (and ``Bid.accept`` saved the bid and the job
+separately). ``accept_bid`` settles a bid in one transaction instead:
+
+- the job row is locked (``SELECT ... FOR UPDATE``), so accepts of bids on
+  the same job run one after the other; each re-reads the job and its bid
+  under the lock, and every accept after the first fails with
+  ``BidNotAcceptable`` instead of overwriting the first;
+- the job is assigned with ``Job.assign_provider``, whose domain event
+  writes the timeline entry and notifies the customer;
+- the accepted bid and all other pending bids are written with one
+  ``UPDATE`` each, and a ``bid.accepted`` domain event notifies the winning
+  and losing providers (apps/Notification/outbox.py); the job's bid summary
+  (auction.py) is refreshed after commit.
+
+Placing a bid (``place_bid``) takes no lock, so providers bidding on a hot
+job never wait for each other. Inserting a bid waits for a settlement in
+progress on its job (the foreign key check needs the job row), and the job is
+re-checked afterwards, so a bid cannot be left pending on a settled job.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.Notification.outbox import BID_ACCEPTED, emit
+
+from .auction import bids_changed
+from .models import Bid
+
+logger = logging.getLogger(__name__)
+
+# Job statuses in which bids can be placed and accepted
+OPEN_JOB_STATUSES = ("draft", "pending", "bidding")
+
+
+class BidNotAcceptable(ValueError):
+    """The bid or its job is no longer in a state where it can be accepted"""
+
+
+def accept_bid(bid_id, job_id=None, actor=None) -> Bid:
+    """
+    Accept ``bid_id`` (which must belong to ``job_id`` if given), assign its
+    provider to the job and reject the job's other pending bids
+
+    Raises:
+        Bid.DoesNotExist: No such bid (on that job)
+        BidNotAcceptable: The bid is not pending, or the job is not open
+    """
+    from apps.Job.models import Job
+
+    with transaction.atomic():
+        if job_id is None:
+            job_id = Bid.objects.values_list("job_id", flat=True).get(pk=bid_id)
+            if job_id is None:
+                raise BidNotAcceptable("Bid is not for a job")
+
+        # Lock order is always job, then bids
+        job = Job.objects.select_for_update().get(pk=job_id)
+        bid = (
+            Bid.objects.select_for_update(of=("self",))
+            .select_related("provider__user")
+            .get(pk=bid_id, job_id=job.pk)
+        )
+
+        if bid.status != "pending":
+            raise BidNotAcceptable("Only pending bids can be accepted")
+        if job.status not in OPEN_JOB_STATUSES or job.assigned_provider_id:
+            raise BidNotAcceptable(f"Job is no longer open for bids ({job.status})")
+        if bid.provider is None:
+            raise BidNotAcceptable("Bid has no provider")
+
+        try:
+            job.assign_provider(bid.provider, assigned_by=actor)
+        except ValueError as e:
+            raise BidNotAcceptable(str(e)) from e
+
+        now = timezone.now()
+        Bid.objects.filter(pk=bid.pk).update(status="accepted", updated_at=now)
+        bid.status = "accepted"
+        bid.updated_at = now
+        bid.job = job
+
+        rejected = Bid.objects.filter(job_id=job.pk, status="pending").exclude(
+            pk=bid.pk
+        )
+        rejected_ids = [str(pk) for pk in rejected.values_list("pk", flat=True)]
+        if rejected_ids:
+            Bid.objects.filter(pk__in=rejected_ids).update(
+                status="rejected", updated_at=now
+            )
+
+        bids_changed(job.pk)
+
+        emit(
+            BID_ACCEPTED,
+            bid,
+            {"job_id": str(job.pk), "rejected_bid_ids": rejected_ids},
+            actor=actor,
+        )
+
+    logger.info(
+        f"Bid {bid.pk} accepted for job {job.pk}, {len(rejected_ids)} bids rejected"
+    )
+    return bid
+
+
+def place_bid(serializer, provider=None) -> Bid:
+    """
+    Save a new bid from ``serializer`` (for ``provider`` if given), unless
+    its job is no longer open
+
+    Raises:
+        BidNotAcceptable: The job was settled, or is not open for bids
+    """
+    from apps.Job.models import Job
+
+    def is_open(job_id):
+        return (
+            Job.objects.filter(
+                pk=job_id, status__in=OPEN_JOB_STATUSES, assigned_provider__isnull=True
+            )
+            # An auction stops taking bids when it ends, before it is closed
+            .filter(
+                Q(bidding_end_time__isnull=True)
+                | Q(bidding_end_time__gt=timezone.now())
+            ).exists()
+        )
+
+    job = serializer.validated_data.get("job")
+    job_id = job.pk if job is not None else serializer.validated_data.get("job_id")
+    if job_id is not None and not is_open(job_id):
+        raise BidNotAcceptable("Job is no longer open for bids")
+
+    with transaction.atomic():
+        kwargs = {"provider": provider} if provider is not None else {}
+        bid = serializer.save(**kwargs)
+        # The insert waited for any settlement of the job in progress, so this
+        # read sees its outcome
+        if bid.job_id and not is_open(bid.job_id):
+            raise BidNotAcceptable("Job is no longer open for bids")
+    return bid
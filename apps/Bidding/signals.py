@@ -0,0 +1,15 @@
+"""
+Keeps the jobs' bid summaries (auction.py) in step with their bids
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auction import bids_changed
+from .models import Bid
+
+
+@receiver(post_save, sender=Bid)
+@receiver(post_delete, sender=Bid)
+def bid_changed(sender, instance, **kwargs):
+    bids_changed(instance.job_id)
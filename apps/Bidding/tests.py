@@ -1,3 +1,83 @@
-from django.test import TestCase
+import threading
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection, connections
+from django.test import TransactionTestCase
+
+from apps.Job.models import Job
+from apps.Provider.models import ServiceProvider
+from apps.Request.models import Request
+from apps.User.models import User
+
+from .models import Bid
+from .services import BidNotAcceptable, accept_bid
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "accept_bid relies on PostgreSQL row locks"
+)
+class ConcurrentAcceptBidTests(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        customer = User.objects.create_user(
+            email="customer@example.com", password="password", user_type="customer"
+        )
+        request = Request.objects.create(user=customer, request_type="biddable")
+        self.job = Job.objects.create(request=request, status="bidding")
+
+        self.bids = []
+        for i in range(self.THREADS):
+            user = User.objects.create_user(
+                email=f"provider{i}@example.com",
+                password="password",
+                user_type="provider",
+            )
+            provider = ServiceProvider.objects.create(
+                user=user, business_type="sole_trader", company_name=f"Movers {i}"
+            )
+            self.bids.append(
+                Bid.objects.create(job=self.job, provider=provider, amount=100 + i)
+            )
+
+    def test_exactly_one_concurrent_accept_wins(self):
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = {}
+        lock = threading.Lock()
+
+        def attempt(bid):
+            try:
+                barrier.wait()
+                try:
+                    accept_bid(bid.pk, job_id=self.job.pk)
+                    outcome = "accepted"
+                except BidNotAcceptable:
+                    outcome = "refused"
+                except Exception as e:
+                    outcome = f"error: {e!r}"
+                with lock:
+                    outcomes[bid.pk] = outcome
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=attempt, args=(bid,)) for bid in self.bids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        winners = [pk for pk, outcome in outcomes.items() if outcome == "accepted"]
+        self.assertEqual(len(winners), 1, outcomes)
+        self.assertEqual(
+            sorted(outcomes.values()),
+            ["accepted"] + ["refused"] * (self.THREADS - 1),
+        )
+
+        statuses = dict(Bid.objects.filter(job=self.job).values_list("pk", "status"))
+        self.assertEqual(statuses.pop(winners[0]), "accepted")
+        self.assertEqual(set(statuses.values()), {"rejected"})
+
+        self.job.refresh_from_db()
+        winner = Bid.objects.get(pk=winners[0])
+        self.assertEqual(self.job.status, "assigned")
+        self.assertEqual(self.job.assigned_provider_id, winner.provider_id)
@@ -3,9 +3,11 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.utils import timezone
 from .models import Bid
 from .serializers import BidSerializer
+from .services import BidNotAcceptable, accept_bid, place_bid
 
 
 class BidViewSet(viewsets.ModelViewSet):
@@ -64,18 +66,22 @@ class BidViewSet(viewsets.ModelViewSet):
 
                 try:
                     provider = ServiceProvider.objects.get(id=provider_id)
-                    serializer.save(provider=provider)
                 except ServiceProvider.DoesNotExist:
                     raise ValidationError("Provider not found")
             else:
-                serializer.save()
+                provider = None
         else:
             # Regular provider creates their own bid
             if hasattr(user, "provider") and user.provider:
-                serializer.save(provider=user.provider)
+                provider = user.provider
             else:
                 raise PermissionDenied("Only providers can create bids")
 
+        try:
+            place_bid(serializer, provider=provider)
+        except BidNotAcceptable as e:
+            raise ValidationError(str(e))
+
     def perform_update(self, serializer):
         """Override update to check permissions"""
         bid = self.get_object()
@@ -126,26 +132,12 @@ class BidViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Check if bid can be accepted
-        if bid.status != "pending":
-            return Response(
-                {"error": "Only pending bids can be accepted"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Accept the bid
-        bid.status = "accepted"
-        bid.save()
-
-        # Update job
-        job.status = "assigned"
-        job.assigned_provider = bid.provider
-        job.save()
-
-        # Reject all other pending bids
-        Bid.objects.filter(job=job, status="pending").exclude(id=bid.id).update(
-            status="rejected"
-        )
+        # Accept the bid, assign the job and reject the other bids, with the
+        # job locked against concurrent accepts
+        try:
+            bid = accept_bid(bid.id, job_id=job.id, actor=user)
+        except BidNotAcceptable as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             {"message": "Bid accepted successfully", "bid": BidSerializer(bid).data},
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CommonitemsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.CommonItems'
+
+    def ready(self):
+        import apps.CommonItems.signals
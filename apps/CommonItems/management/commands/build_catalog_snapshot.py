@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.CommonItems import snapshot
+
+
+class Command(BaseCommand):
+    help = "Build the catalog snapshot, e.g. after a deploy or a bulk import"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--new-version",
+            action="store_true",
+            help="Move to a new catalog version first (after raw SQL imports)",
+        )
+
+    def handle(self, *args, **options):
+        if options["new_version"]:
+            snapshot.bump_version()
+
+        built = snapshot.build_snapshot()
+        for name, body in built["sections"].items():
+            self.stdout.write(f"  {name}: {len(body)} bytes")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built catalog snapshot v{built['version']} ({built['etag']})"
+            )
+        )
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:00
+
+import re
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN indexes only exist on PostgreSQL; other databases use the
+    # in-memory index in apps/CommonItems/search.py
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS common_item_search_vector_idx '
+        'ON common_item USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS common_item_search_trgm_idx '
+        'ON common_item USING gin (search_document gin_trgm_ops)'
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS common_item_search_vector_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS common_item_search_trgm_idx')
+
+
+def populate_search_documents(apps, schema_editor):
+    CommonItem = apps.get_model('CommonItems', 'CommonItem')
+
+    items = []
+    for item in CommonItem.objects.select_related('type', 'category', 'brand', 'model'):
+        parts = [
+            item.name,
+            item.type.name if item.type_id else '',
+            item.category.name if item.category_id else '',
+            item.brand.name if item.brand_id else '',
+            item.model.name if item.model_id else '',
+            item.model_number,
+            item.description,
+        ]
+        text = ' '.join(part for part in parts if part).lower()
+        item.search_document = ' '.join(re.findall(r'[a-z0-9]+', text))
+        items.append(item)
+    CommonItem.objects.bulk_update(items, ['search_document'], batch_size=500)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        CommonItem.objects.update(
+            search_vector=django.contrib.postgres.search.SearchVector('name', weight='A', config='simple')
+            + django.contrib.postgres.search.SearchVector('search_document', weight='B', config='simple')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CommonItems', '0002_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='commonitem',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='commonitem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.Basemodel.models import Basemodel
 
@@ -217,6 +218,10 @@ class CommonItem(Basemodel):
         help_text="Service category for this category of items",
     )
 
+    # Denormalized search fields, maintained on save (see search.py)
+    search_document = models.TextField(blank=True, default="", editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         brand_name = self.brand.name if self.brand else ""
         model_name = self.model.name if self.model else ""
@@ -236,6 +241,15 @@ class CommonItem(Basemodel):
         ]
         unique_together = ["name", "category", "type", "brand", "model"]
 
+    def save(self, *args, **kwargs):
+        from .search import build_search_document
+
+        self.search_document = build_search_document(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "search_document"}
+        super().save(*args, **kwargs)
+
     @property
     def full_name(self):
         """Returns the full name including type, brand and model"""
@@ -0,0 +1,262 @@
+"""
+CommonItem catalog search
+
+Every item carries a denormalized ``search_document``: its name, type,
+category, brand, model, model number and description, lowercased and
+tokenized. The document is rebuilt when the item is saved and when a related
+category, type, brand or model is renamed (signals.py).
+
+On PostgreSQL the item also has a ``search_vector`` (name weighted above the
+rest of the document), and migration 0003 adds two GIN indexes: one on the
+vector and one ``gin_trgm_ops`` index on the document. ``search_items`` then:
+
+- matches every query token as a prefix (``to_tsquery('simple', 'sof:* & ...')``)
+  or the whole query fuzzily (``%>`` word similarity, so typos still match);
+- ranks by name prefix, full-text rank and trigram similarity.
+
+Other databases (SQLite in development) use ``InMemorySearchIndex``, a
+per-process token prefix/trigram index built from the documents. It is rebuilt
+when the catalog version in the cache changes.
+"""
+
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "LIMIT": 20,  # results returned when the caller does not ask for a limit
+    "MAX_LIMIT": 100,
+    "MIN_SIMILARITY": 0.4,  # trigram similarity for in-memory fuzzy matches
+    "MAX_CANDIDATES": 500,  # in-memory matches handed to the database
+}
+
+VERSION_KEY = "catalog_search:version"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+SEARCH_VECTOR = SearchVector("name", weight="A", config="simple") + SearchVector(
+    "search_document", weight="B", config="simple"
+)
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "COMMON_ITEM_SEARCH", {})}
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def build_search_document(item) -> str:
+    """The searchable text of an item, from its own and related names"""
+    parts = [
+        item.name,
+        item.type.name if item.type_id else "",
+        item.category.name if item.category_id else "",
+        item.brand.name if item.brand_id else "",
+        item.model.name if item.model_id else "",
+        item.model_number,
+        item.description,
+    ]
+    return " ".join(tokenize(" ".join(part for part in parts if part)))
+
+
+def uses_postgres_search() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def bump_version():
+    """Mark in-memory indexes in every process as stale"""
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def update_search_vectors(queryset):
+    """Recompute search_vector from search_document (PostgreSQL only)"""
+    if uses_postgres_search():
+        queryset.update(search_vector=SEARCH_VECTOR)
+
+
+def refresh_search_documents(queryset, batch_size: int = 500) -> int:
+    """Rebuild the documents (and vectors) of the given items"""
+    from .models import CommonItem
+
+    changed = []
+    for item in queryset.select_related("type", "category", "brand", "model"):
+        document = build_search_document(item)
+        if document != item.search_document:
+            item.search_document = document
+            changed.append(item)
+
+    CommonItem.objects.bulk_update(changed, ["search_document"], batch_size=batch_size)
+    if changed:
+        update_search_vectors(
+            CommonItem.objects.filter(pk__in=[item.pk for item in changed])
+        )
+        bump_version()
+    return len(changed)
+
+
+def search_items(query: str, queryset, limit: int = None) -> List:
+    """
+    Ranked items of ``queryset`` matching ``query``
+
+    Returns:
+        List: At most ``limit`` items, best match first
+    """
+    config = get_config()
+    limit = min(limit or config["LIMIT"], config["MAX_LIMIT"])
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    if uses_postgres_search():
+        return list(_postgres_search(queryset, query, tokens)[:limit])
+
+    ranked_ids = get_memory_index().search(query, config["MAX_CANDIDATES"])
+    found = queryset.in_bulk(ranked_ids)
+    return [found[pk] for pk in ranked_ids if pk in found][:limit]
+
+
+def _postgres_search(queryset, query: str, tokens: List[str]):
+    # Tokens are [a-z0-9]+ only, so they are safe in a raw tsquery
+    prefix_query = SearchQuery(
+        " & ".join(f"{token}:*" for token in tokens),
+        search_type="raw",
+        config="simple",
+    )
+    text = " ".join(tokens)
+
+    return (
+        queryset.filter(
+            Q(search_vector=prefix_query)
+            | Q(search_document__trigram_word_similar=text)
+        )
+        .annotate(
+            score=Case(
+                When(name__istartswith=query.strip(), then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            + SearchRank(F("search_vector"), prefix_query)
+            + TrigramWordSimilarity(text, "search_document")
+        )
+        .order_by("-score", "name")
+    )
+
+
+def _trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class InMemorySearchIndex:
+    """Token prefix and trigram index over the catalog's search documents"""
+
+    def __init__(self, rows: Iterable, version=None):
+        self.version = version
+        self.names = {}
+        self.token_ids = defaultdict(set)  # token -> item ids
+        self.prefix_ids = defaultdict(set)  # token prefix -> item ids
+        self.trigram_tokens = defaultdict(set)  # trigram -> tokens
+
+        for pk, name, document in rows:
+            self.names[pk] = (name or "").lower()
+            for token in set(tokenize(document) or tokenize(name)):
+                self.token_ids[token].add(pk)
+                for end in range(1, len(token) + 1):
+                    self.prefix_ids[token[:end]].add(pk)
+
+        for token in self.token_ids:
+            for trigram in _trigrams(token):
+                self.trigram_tokens[trigram].add(token)
+
+    def search(self, query: str, limit: int) -> List:
+        """Item ids matching every query token, best match first"""
+        min_similarity = get_config()["MIN_SIMILARITY"]
+        scores = None
+
+        for token in tokenize(query):
+            token_scores = {pk: 0.8 for pk in self.prefix_ids.get(token, ())}
+            for pk in self.token_ids.get(token, ()):
+                token_scores[pk] = 1.0
+
+            if not token_scores:
+                # No prefix match: fall back to similar tokens (typos)
+                for similar, similarity in self._similar_tokens(token, min_similarity):
+                    for pk in self.token_ids[similar]:
+                        token_scores[pk] = max(
+                            token_scores.get(pk, 0.0), 0.6 * similarity
+                        )
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    pk: score + token_scores[pk]
+                    for pk, score in scores.items()
+                    if pk in token_scores
+                }
+            if not scores:
+                return []
+
+        phrase = query.strip().lower()
+        for pk in scores:
+            if self.names[pk].startswith(phrase):
+                scores[pk] += 1.0
+
+        return sorted(scores, key=lambda pk: (-scores[pk], self.names[pk]))[:limit]
+
+    def _similar_tokens(self, token: str, min_similarity: float):
+        trigrams = _trigrams(token)
+        shared = defaultdict(int)
+        for trigram in trigrams:
+            for candidate in self.trigram_tokens.get(trigram, ()):
+                shared[candidate] += 1
+
+        for candidate, count in shared.items():
+            similarity = count / len(trigrams | _trigrams(candidate))
+            if similarity >= min_similarity:
+                yield candidate, similarity
+
+
+_memory_index = None
+_memory_index_lock = threading.Lock()
+
+
+def get_memory_index() -> InMemorySearchIndex:
+    """The process's in-memory index, rebuilt when the catalog version moves"""
+    global _memory_index
+    from .models import CommonItem
+
+    version = cache.get(VERSION_KEY, 0)
+    index = _memory_index
+    if index is not None and index.version == version:
+        return index
+
+    with _memory_index_lock:
+        if _memory_index is None or _memory_index.version != version:
+            rows = CommonItem.objects.values_list("pk", "name", "search_document")
+            _memory_index = InMemorySearchIndex(rows.iterator(), version=version)
+            logger.info(
+                f"Built in-memory catalog search index ({len(_memory_index.names)} items)"
+            )
+        return _memory_index
@@ -0,0 +1,72 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search, snapshot
+from .models import (
+    CommonItem,
+    ItemBrand,
+    ItemCategory,
+    ItemModel,
+    ItemType,
+)
+
+logger = logging.getLogger(__name__)
+
+# Related model -> CommonItem field pointing at it
+SEARCH_DOCUMENT_SOURCES = {
+    ItemCategory: "category",
+    ItemType: "type",
+    ItemBrand: "brand",
+    ItemModel: "model",
+}
+
+
+@receiver(post_save, sender=CommonItem)
+def update_item_search_vector(sender, instance, **kwargs):
+    """search_document is set in save(); derive the vector from it"""
+    search.update_search_vectors(CommonItem.objects.filter(pk=instance.pk))
+    search.bump_version()
+
+
+@receiver(post_delete, sender=CommonItem)
+def remove_item_from_search(sender, instance, **kwargs):
+    search.bump_version()
+
+
+def refresh_related_search_documents(sender, instance, created, **kwargs):
+    """A renamed category/type/brand/model changes its items' documents"""
+    if created:
+        return
+    field = SEARCH_DOCUMENT_SOURCES[sender]
+    refreshed = search.refresh_search_documents(
+        CommonItem.objects.filter(**{field: instance})
+    )
+    if refreshed:
+        logger.info(
+            f"Refreshed search documents of {refreshed} items after "
+            f"{sender.__name__} {instance.pk} changed"
+        )
+
+
+for source in SEARCH_DOCUMENT_SOURCES:
+    post_save.connect(
+        refresh_related_search_documents,
+        sender=source,
+        dispatch_uid=f"search_documents_{source.__name__}",
+    )
+
+
+def invalidate_catalog_snapshot(sender, **kwargs):
+    snapshot.invalidate()
+
+
+for source in snapshot.SOURCES:
+    name = source.split(".")[-1]
+    for signal in (post_save, post_delete):
+        signal.connect(
+            invalidate_catalog_snapshot,
+            sender=source,
+            dispatch_uid=f"catalog_snapshot_{name}_{signal is post_save}",
+        )
@@ -0,0 +1,397 @@
+"""
+Versioned catalog snapshot
+
+The booking UI loads the whole catalog (item categories/types/brands/models,
+common items, vehicle types/sizes/categories and service categories) on every
+page, but it only changes when admins edit it. The snapshot serializes each
+read-only catalog response once per catalog version:
+
+- every section is rendered to JSON bytes with the same serializer (and
+  ordering) the endpoint used, so responses are unchanged;
+- each section has an ETag derived from its content, and ``snapshot_response``
+  answers ``If-None-Match`` with 304 Not Modified;
+- catalog writes (signals.py) bump the version in the cache when they commit
+  and schedule a rebuild shortly after, coalescing bursts of writes into one
+  build; a missing snapshot is also built on first read.
+
+The version only reaches other processes when the ``default`` cache is
+shared (Redis). So that a process never serves a stale catalog for long
+whatever the cache, each process also compares the row count and latest
+``updated_at`` of every catalog table with those the snapshot was built
+from, at most every ``CATALOG_SNAPSHOT_CHECK_INTERVAL`` seconds, and
+rebuilds when they differ.
+
+Endpoints only serve the snapshot when the request has no query parameters;
+filtered requests still go to the database.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "catalog_snapshot:version"
+
+# Models rendered into the snapshot; writes to them invalidate it (signals.py)
+SOURCES = [
+    "CommonItems.ItemCategory",
+    "CommonItems.ItemType",
+    "CommonItems.ItemBrand",
+    "CommonItems.ItemModel",
+    "CommonItems.CommonItem",
+    "CommonItems.VehicleType",
+    "CommonItems.VehicleSize",
+    "CommonItems.VehicleCategory",
+    "Services.ServiceCategory",
+    "Services.Services",
+]
+
+SECTIONS: Dict[str, Callable] = {}
+
+
+def section(name: str):
+    """Register a snapshot section builder"""
+
+    def register(builder):
+        SECTIONS[name] = builder
+        return builder
+
+    return register
+
+
+def _rebuild_delay() -> float:
+    return getattr(settings, "CATALOG_SNAPSHOT_REBUILD_DELAY", 1.0)
+
+
+def _ttl() -> int:
+    return getattr(settings, "CATALOG_SNAPSHOT_TTL", 24 * 60 * 60)
+
+
+def _check_interval() -> float:
+    return getattr(settings, "CATALOG_SNAPSHOT_CHECK_INTERVAL", 10)
+
+
+@section("item_categories")
+def _item_categories():
+    from .models import ItemCategory
+    from .serializers import ItemCategorySerializer
+
+    return ItemCategorySerializer(ItemCategory.objects.order_by("name"), many=True)
+
+
+@section("item_categories_with_brands")
+def _item_categories_with_brands():
+    from .models import ItemBrand, ItemCategory
+    from .serializers import ItemCategoryWithBrandsSerializer
+
+    categories = ItemCategory.objects.prefetch_related(
+        Prefetch("brands", queryset=ItemBrand.objects.select_related("category"))
+    )
+    return ItemCategoryWithBrandsSerializer(categories, many=True)
+
+
+@section("item_category_dropdown")
+def _item_category_dropdown():
+    from .models import ItemCategory
+    from .serializers import CategoryForDropdownSerializer
+
+    return CategoryForDropdownSerializer(ItemCategory.objects.all(), many=True)
+
+
+@section("item_type_dropdown")
+def _item_type_dropdown():
+    from .models import ItemType
+    from .serializers import TypeForDropdownSerializer
+
+    return TypeForDropdownSerializer(
+        ItemType.objects.select_related("category"), many=True
+    )
+
+
+@section("item_brand_dropdown")
+def _item_brand_dropdown():
+    from .models import ItemBrand
+    from .serializers import BrandForDropdownSerializer
+
+    return BrandForDropdownSerializer(
+        ItemBrand.objects.select_related("category"), many=True
+    )
+
+
+@section("item_model_dropdown")
+def _item_model_dropdown():
+    from .models import ItemModel
+    from .serializers import ModelForDropdownSerializer
+
+    return ModelForDropdownSerializer(
+        ItemModel.objects.select_related("brand__category"), many=True
+    )
+
+
+@section("categories_with_items")
+def _categories_with_items():
+    """CommonItemViewSet.categories_with_items, from two queries"""
+    from .models import CommonItem, ItemCategory
+
+    items_by_category = {}
+    for item in CommonItem.objects.select_related("type"):
+        items_by_category.setdefault(item.category_id, []).append(
+            {
+                "id": item.id,
+                "name": item.name,
+                "dimensions": item.dimensions,
+                "weight": item.weight,
+                "needs_disassembly": item.needs_disassembly,
+                "fragile": item.fragile,
+                "type": item.type.name if item.type else None,
+            }
+        )
+
+    categories = ItemCategory.objects.annotate(item_count=Count("items")).filter(
+        item_count__gt=0
+    )
+    return [
+        {
+            "id": category.id,
+            "name": category.name,
+            "item_count": category.item_count,
+            "icon": category.icon,
+            "color": category.color,
+            "items": items_by_category.get(category.id, []),
+        }
+        for category in categories
+    ]
+
+
+@section("vehicle_types")
+def _vehicle_types():
+    from .models import VehicleType
+    from .serializers import VehicleTypeSerializer
+
+    return VehicleTypeSerializer(VehicleType.objects.order_by("name"), many=True)
+
+
+@section("vehicle_sizes")
+def _vehicle_sizes():
+    from .models import VehicleSize
+    from .serializers import VehicleSizeSerializer
+
+    return VehicleSizeSerializer(VehicleSize.objects.order_by("name"), many=True)
+
+
+@section("vehicle_category_dropdown")
+def _vehicle_category_dropdown():
+    from .models import VehicleCategory
+    from .serializers import VehicleCategoryDropdownSerializer
+
+    return VehicleCategoryDropdownSerializer(
+        VehicleCategory.objects.select_related("type", "vehicle_size"), many=True
+    )
+
+
+@section("service_categories")
+def _service_categories():
+    from apps.Services.models import ServiceCategory
+    from apps.Services.serializers import ServiceCategorySerializer
+
+    return ServiceCategorySerializer(
+        ServiceCategory.objects.annotate(services_count=Count("services")).order_by(
+            "name"
+        ),
+        many=True,
+    )
+
+
+def _etag(content: bytes) -> str:
+    return quote_etag(hashlib.md5(content).hexdigest()[:20])
+
+
+def current_version() -> int:
+    return cache.get(VERSION_KEY, 0)
+
+
+def _snapshot_key(version: int) -> str:
+    return f"catalog_snapshot:{version}"
+
+
+def catalog_state() -> Tuple:
+    """The row count and latest ``updated_at`` of every catalog table"""
+    state = []
+    for label in SOURCES:
+        totals = apps.get_model(label).objects.aggregate(
+            rows=Count("pk"), updated_at=Max("updated_at")
+        )
+        state.append((label, totals["rows"], str(totals["updated_at"])))
+    return tuple(state)
+
+
+def build_snapshot(version: int = None) -> Dict:
+    """Render every section and store the snapshot for ``version``"""
+    version = current_version() if version is None else version
+    # Read before rendering, so a write made meanwhile is caught by the check
+    state = catalog_state()
+    renderer = JSONRenderer()
+
+    sections, etags = {}, {}
+    for name, builder in SECTIONS.items():
+        result = builder()
+        data = result.data if hasattr(result, "data") else result
+        sections[name] = renderer.render(data)
+        etags[name] = _etag(sections[name])
+
+    snapshot = {
+        "version": version,
+        "state": state,
+        "generated_at": timezone.now().isoformat(),
+        "sections": sections,
+        "etags": etags,
+        "etag": _etag("".join(etags[name] for name in sorted(etags)).encode()),
+    }
+    # Superseded versions expire on their own
+    cache.set(_snapshot_key(version), snapshot, timeout=_ttl())
+    logger.info(
+        f"Built catalog snapshot v{version} "
+        f"({sum(len(body) for body in sections.values())} bytes)"
+    )
+    return snapshot
+
+
+# Last snapshot read by this process, so a hit costs one cache read of the
+# version instead of unpickling the whole snapshot
+_last_snapshot = None
+# When this process last compared the catalog tables with its snapshot
+_checked_at = 0.0
+
+
+def get_snapshot() -> Dict:
+    """
+    The snapshot for the current catalog version, built on a miss, or
+    rebuilt when the catalog tables no longer match it
+    """
+    global _last_snapshot, _checked_at
+    version = current_version()
+    snapshot = _last_snapshot
+    if snapshot is None or snapshot["version"] != version:
+        snapshot = cache.get(_snapshot_key(version))
+        if snapshot is None:
+            snapshot = build_snapshot(version)
+            _checked_at = time.monotonic()
+
+    if time.monotonic() - _checked_at >= _check_interval():
+        _checked_at = time.monotonic()
+        if catalog_state() != snapshot.get("state"):
+            # A write whose version bump did not reach this process's cache
+            logger.info(f"Catalog changed since snapshot v{version}; rebuilding")
+            bump_version()
+            snapshot = build_snapshot(current_version())
+
+    _last_snapshot = snapshot
+    return snapshot
+
+
+def snapshot_response(request, name: str = None) -> HttpResponse:
+    """
+    Serve a section (or, without ``name``, the whole snapshot) with an ETag,
+    answering a matching If-None-Match with 304
+    """
+    snapshot = get_snapshot()
+    if name is None:
+        etag = snapshot["etag"]
+        content = b"".join(
+            [
+                b'{"version":',
+                json.dumps(snapshot["version"]).encode(),
+                b',"generated_at":',
+                json.dumps(snapshot["generated_at"]).encode(),
+                b',"sections":{',
+                b",".join(
+                    json.dumps(section_name).encode() + b":" + body
+                    for section_name, body in snapshot["sections"].items()
+                ),
+                b"}}",
+            ]
+        )
+    else:
+        etag = snapshot["etags"][name]
+        content = None
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            content if content is not None else snapshot["sections"][name],
+            content_type="application/json",
+        )
+    response["ETag"] = etag
+    # Clients may keep the body but must revalidate it on every use
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+_rebuild_lock = threading.Lock()
+_rebuild_timer = None
+
+
+def invalidate():
+    """
+    Move to a new catalog version; called by the catalog model signals
+
+    The version moves once the transaction commits, so a snapshot built in
+    the meantime cannot be stored under it with the old rows. The rebuild
+    runs once, shortly after, however many catalog rows were written.
+    """
+    transaction.on_commit(_bump_and_rebuild)
+
+
+def bump_version():
+    """
+    Make the current snapshot stale in every process sharing the cache; the
+    others notice through the table check
+    """
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def _bump_and_rebuild():
+    bump_version()
+    _schedule_rebuild()
+
+
+def _schedule_rebuild():
+    global _rebuild_timer
+    with _rebuild_lock:
+        if _rebuild_timer is not None:
+            return
+        _rebuild_timer = threading.Timer(_rebuild_delay(), _rebuild)
+        _rebuild_timer.daemon = True
+        _rebuild_timer.start()
+
+
+def _rebuild():
+    global _rebuild_timer
+    with _rebuild_lock:
+        _rebuild_timer = None
+    try:
+        get_snapshot()
+    except Exception as e:
+        # The next read builds it instead
+        logger.error(f"Error rebuilding catalog snapshot: {str(e)}")
+    finally:
+        connections.close_all()
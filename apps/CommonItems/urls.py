@@ -9,6 +9,7 @@ from .views import (
     VehicleTypeViewSet,
     VehicleCategoryViewSet,
     VehicleSizeViewSet,
+    CatalogSnapshotView,
 )
 
 router = DefaultRouter()
@@ -22,5 +23,6 @@ router.register(r"vehicle-categories", VehicleCategoryViewSet)
 router.register(r"vehicle-sizes", VehicleSizeViewSet)
 
 urlpatterns = [
+    path("catalog/snapshot/", CatalogSnapshotView.as_view(), name="catalog-snapshot"),
     path("", include(router.urls)),
 ]
@@ -1,8 +1,9 @@
 from django.shortcuts import render
-from django.db.models import Q, Count
+from django.db.models import Prefetch
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from rest_framework.filters import SearchFilter, OrderingFilter
 from .models import (
     ItemCategory,
@@ -14,6 +15,8 @@ from .models import (
     VehicleCategory,
     VehicleSize,
 )
+from .search import search_items
+from .snapshot import snapshot_response
 from .serializers import (
     ItemCategorySerializer,
     ItemTypeSerializer,
@@ -65,16 +68,27 @@ class ItemCategoryViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params:
+            return snapshot_response(request, "item_categories")
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=["get"])
     def with_brands(self, request):
         """Get categories with nested brands"""
-        categories = self.get_queryset()
+        if not request.query_params:
+            return snapshot_response(request, "item_categories_with_brands")
+        categories = self.get_queryset().prefetch_related(
+            Prefetch("brands", queryset=ItemBrand.objects.select_related("category"))
+        )
         serializer = ItemCategoryWithBrandsSerializer(categories, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
     def dropdown(self, request):
         """Get categories for dropdown"""
+        if not request.query_params:
+            return snapshot_response(request, "item_category_dropdown")
         categories = self.get_queryset()
         serializer = CategoryForDropdownSerializer(categories, many=True)
         return Response(serializer.data)
@@ -102,6 +116,8 @@ class ItemTypeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def dropdown(self, request):
         """Get item types for dropdown"""
+        if not request.query_params:
+            return snapshot_response(request, "item_type_dropdown")
         item_types = self.get_queryset()
         serializer = TypeForDropdownSerializer(item_types, many=True)
         return Response(serializer.data)
@@ -136,6 +152,8 @@ class ItemBrandViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def dropdown(self, request):
         """Get brands for dropdown"""
+        if not request.query_params:
+            return snapshot_response(request, "item_brand_dropdown")
         brands = self.get_queryset()
         serializer = BrandForDropdownSerializer(brands, many=True)
         return Response(serializer.data)
@@ -169,6 +187,8 @@ class ItemModelViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def dropdown(self, request):
         """Get models for dropdown"""
+        if not request.query_params:
+            return snapshot_response(request, "item_model_dropdown")
         models = self.get_queryset()
         serializer = ModelForDropdownSerializer(models, many=True)
         return Response(serializer.data)
@@ -177,7 +197,9 @@ class ItemModelViewSet(viewsets.ModelViewSet):
 class CommonItemViewSet(viewsets.ModelViewSet):
     """ViewSet for CommonItem model"""
 
-    queryset = CommonItem.objects.select_related("category", "brand", "model").all()
+    queryset = CommonItem.objects.select_related(
+        "category", "type", "brand", "model"
+    ).all()
     serializer_class = CommonItemSerializer
     filter_backends = [SearchFilter, OrderingFilter]
     search_fields = [
@@ -238,7 +260,7 @@ class CommonItemViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def search(self, request):
-        """Search items with query parameter"""
+        """Search items with query parameter (best match first, ?limit= results)"""
         query = request.query_params.get("q", "")
         if not query:
             return Response(
@@ -246,49 +268,23 @@ class CommonItemViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        items = self.get_queryset().filter(
-            Q(name__icontains=query)
-            | Q(description__icontains=query)
-            | Q(category__name__icontains=query)
-            | Q(brand__name__icontains=query)
-            | Q(model__name__icontains=query)
-        )
+        try:
+            limit = int(request.query_params.get("limit", 0)) or None
+        except ValueError:
+            return Response(
+                {"error": 'Query parameter "limit" must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Ranked prefix/fuzzy match on the denormalized search document
+        items = search_items(query, self.get_queryset(), limit=limit)
         serializer = CommonItemListSerializer(items, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
     def categories_with_items(self, request):
         """Get categories with their item counts"""
-        categories = ItemCategory.objects.annotate(item_count=Count("items")).filter(
-            item_count__gt=0
-        )
-
-        data = []
-        for category in categories:
-            items = CommonItem.objects.filter(category=category)
-            data.append(
-                {
-                    "id": category.id,
-                    "name": category.name,
-                    "item_count": category.item_count,
-                    "icon": category.icon,
-                    "color": category.color,
-                    "items": [
-                        {
-                            "id": item.id,
-                            "name": item.name,
-                            "dimensions": item.dimensions,
-                            "weight": item.weight,
-                            "needs_disassembly": item.needs_disassembly,
-                            "fragile": item.fragile,
-                            "type": item.type.name if item.type else None,
-                        }
-                        for item in items
-                    ],
-                }
-            )
-
-        return Response(data)
+        return snapshot_response(request, "categories_with_items")
 
     @action(detail=True, methods=["post"])
     def duplicate(self, request, pk=None):
@@ -339,9 +335,16 @@ class VehicleTypeViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params:
+            return snapshot_response(request, "vehicle_types")
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=["get"])
     def dropdown(self, request):
         """Get vehicle types for dropdown"""
+        if not request.query_params:
+            return snapshot_response(request, "vehicle_types")
         vehicle_types = self.get_queryset()
         serializer = VehicleTypeSerializer(vehicle_types, many=True)
         return Response(serializer.data)
@@ -378,9 +381,16 @@ class VehicleSizeViewSet(viewsets.ModelViewSet):
         queryset = VehicleSize.objects.all()
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params:
+            return snapshot_response(request, "vehicle_sizes")
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=["get"])
     def dropdown(self, request):
         """Get vehicle sizes for dropdown"""
+        if not request.query_params:
+            return snapshot_response(request, "vehicle_sizes")
         vehicle_sizes = self.get_queryset()
         serializer = VehicleSizeSerializer(vehicle_sizes, many=True)
         return Response(serializer.data)
@@ -451,6 +461,8 @@ class VehicleCategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def dropdown(self, request):
         """Get vehicle categories for dropdown"""
+        if not request.query_params:
+            return snapshot_response(request, "vehicle_category_dropdown")
         categories = self.get_queryset()
         serializer = VehicleCategoryDropdownSerializer(categories, many=True)
         return Response(serializer.data)
@@ -537,3 +549,12 @@ class VehicleCategoryViewSet(viewsets.ModelViewSet):
         obj.save()
         serializer = self.get_serializer(obj)
         return Response(serializer.data)
+
+
+class CatalogSnapshotView(APIView):
+    """The whole catalog snapshot in one response, for clients that cache it"""
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return snapshot_response(request)
@@ -18,6 +18,9 @@ from .serializer import (
     DriverDocumentSerializer,
     DriverInfringementSerializer,
 )
+from utils.debug_trace import get_tracer
+
+tracer = get_tracer(__name__)
 
 
 class DriverViewSet(viewsets.ModelViewSet):
@@ -83,8 +86,8 @@ class DriverViewSet(viewsets.ModelViewSet):
         Get all documents for a driver or create a new document.
         """
         driver = self.get_object()
-        print("hit the doc view")
-        print("the driver", driver)
+        tracer.debug("hit the doc view")
+        tracer.debug("the driver {}", driver)
 
         if request.method == "GET":
             documents = driver.documents.all()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class JobConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.Job'
+
+    def ready(self):
+        # Keeps the cached job timelines current
+        import apps.Job.signals
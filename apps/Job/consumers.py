@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .feed import (
+    JOB_FEED_GROUP,
+    Coverage,
+    SubscriptionIndex,
+    encode_cursor,
+    missed_jobs,
+)
+
+logger = logging.getLogger(__name__)
+
+# Below the channel layer's group expiry (a day by default), so the process
+# channel never drops out of the feed group
+REJOIN_INTERVAL = 3600
+
+
+class JobFeedDispatcher:
+    """
+    The job feed of one ASGI process
+
+    Holds the process channel subscribed to ``job_feed`` and the index of
+    the feed consumers connected to this process; forwards each opened job
+    to the consumers whose coverage contains it.
+    """
+
+    def __init__(self):
+        self.index = SubscriptionIndex()
+        self.consumers = {}
+        self._channel = None
+        self._task = None
+        # Held while the process channel is created and joins the group, so
+        # consumers connecting at the same time start a single listener
+        self._starting = asyncio.Lock()
+
+    async def subscribe(self, consumer, coverage: Coverage):
+        self.consumers[consumer.channel_name] = consumer
+        self.index.add(consumer.channel_name, coverage)
+        await self._listen_once()
+
+    def unsubscribe(self, consumer):
+        self.consumers.pop(consumer.channel_name, None)
+        self.index.remove(consumer.channel_name)
+
+    async def _listen_once(self):
+        async with self._starting:
+            if self._task is not None and not self._task.done():
+                return
+            channel_layer = get_channel_layer()
+            if self._channel is not None:
+                # The previous listener died; leave the group with its channel
+                await channel_layer.group_discard(JOB_FEED_GROUP, self._channel)
+            self._channel = await channel_layer.new_channel("job_feed.")
+            await channel_layer.group_add(JOB_FEED_GROUP, self._channel)
+            self._task = asyncio.ensure_future(self._listen(channel_layer))
+
+    async def _listen(self, channel_layer):
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    channel_layer.receive(self._channel), REJOIN_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                await channel_layer.group_add(JOB_FEED_GROUP, self._channel)
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job feed receive failed: {str(e)}")
+                await asyncio.sleep(1)
+                continue
+
+            if message.get("type") == "job.opened":
+                await self.dispatch(message)
+
+    async def dispatch(self, message):
+        for key in self.index.match(message["latitude"], message["longitude"]):
+            consumer = self.consumers.get(key)
+            if consumer is None:
+                continue
+            try:
+                await consumer.job_opened(message)
+            except Exception as e:
+                logger.warning(f"Could not send job feed to {key}: {str(e)}")
+
+
+dispatcher = JobFeedDispatcher()
+
+
+def _provider_for_token(raw_token):
+    """The provider (with its service areas) a JWT access token belongs to"""
+    from apps.Authentication.authentication import CachedJWTAuthentication
+    from apps.Provider.models import ServiceProvider
+
+    authentication = CachedJWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except AuthenticationFailed:
+        return None
+    return (
+        ServiceProvider.objects.filter(user_id=user.pk)
+        .prefetch_related("service_areas")
+        .first()
+    )
+
+
+class JobFeedConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes newly opened jobs to a provider (see feed.py)
+
+    Connect to ``ws/jobs/feed/?token=<access token>[&cursor=<cursor>]``.
+    The server sends:
+
+    - ``{"type": "subscribed", "cursor": ...}`` when connected without a cursor;
+    - ``{"type": "jobs.missed", "jobs": [...], "cursor": ..., "has_more": ...}``
+      when connected with a cursor or sent ``{"action": "resume", "cursor": ...}``;
+    - ``{"type": "job.opened", "job": {...}, "cursor": ...}`` for each new job.
+
+    Clients keep the latest cursor they received and resume from it after a
+    reconnect. A job opened while resuming can be sent twice; clients
+    de-duplicate by job id.
+    """
+
+    async def connect(self):
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        token = (query.get("token") or [None])[0]
+        provider = (
+            await database_sync_to_async(_provider_for_token)(token) if token else None
+        )
+        if provider is None:
+            await self.close(code=4401)
+            return
+
+        self.provider_id = provider.id
+        self.coverage = Coverage.for_provider(provider)
+        await self.accept()
+        await dispatcher.subscribe(self, self.coverage)
+
+        cursor = (query.get("cursor") or [None])[0]
+        if cursor:
+            await self.resume(cursor)
+        else:
+            await self.send_json(
+                {"type": "subscribed", "cursor": encode_cursor(timezone.now())}
+            )
+
+    async def disconnect(self, code):
+        dispatcher.unsubscribe(self)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action")
+        if action == "resume":
+            await self.resume(content.get("cursor"))
+        elif action == "ping":
+            await self.send_json({"type": "pong"})
+
+    async def resume(self, cursor):
+        result = await database_sync_to_async(missed_jobs)(self.coverage, cursor)
+        await self.send_json({"type": "jobs.missed", **result})
+
+    async def job_opened(self, message):
+        await self.send_json(
+            {"type": "job.opened", "job": message["job"], "cursor": message["cursor"]}
+        )
@@ -0,0 +1,342 @@
+"""
+Job feed
+
+Providers used to discover new jobs by polling ``JobViewSet.list``. The job
+feed pushes them instead, over the ``ws/jobs/feed/`` websocket
+(consumers.py):
+
+- when a job becomes open (``Job.make_biddable`` to ``bidding``,
+  ``Job.make_instant`` to ``pending``), the domain event worker
+  (apps/Notification/outbox.py) publishes its summary to the ``job_feed``
+  group once;
+- every ASGI process has one channel in that group. It matches the job's
+  pickup point against an in-memory ``SubscriptionIndex`` of the coverage of
+  the providers connected to that process, and forwards the job only to
+  those whose coverage contains it;
+- every message carries a cursor (the time the job opened). A client that
+  reconnects with its last cursor first receives the open jobs it missed
+  (``missed_jobs``), read from the domain event log.
+
+Coverage is a provider's service areas or, without any, the circle of
+``service_radius_km`` around its base location.
+"""
+
+import logging
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "CELL_DEGREES": 0.25,  # grid cell size of the subscription index
+    "MAX_CELLS": 4096,  # coverages spanning more cells are checked for every job
+    "RESYNC_WINDOW_HOURS": 24,  # how far back a reconnecting client can resume
+    "RESYNC_LIMIT": 100,  # jobs sent per resume
+    "RESYNC_SCAN": 1000,  # events read per resume
+}
+
+JOB_FEED_GROUP = "job_feed"
+
+# Statuses in which a job is open to providers
+FEED_STATUSES = ("bidding", "pending")
+
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "JOB_FEED", {})}
+
+
+def encode_cursor(moment: datetime) -> str:
+    return str((moment - _EPOCH) // timedelta(microseconds=1))
+
+
+def decode_cursor(cursor) -> Optional[datetime]:
+    try:
+        return _EPOCH + timedelta(microseconds=int(cursor))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class Coverage:
+    """
+    Where a provider works: service area geometries (SRID 4326), or a radius
+    around a base point
+    """
+
+    def __init__(self, areas: Iterable = (), base: Tuple = None, radius_km=0):
+        self.areas = [area for area in areas if area is not None]
+        self.base = base if not self.areas else None
+        self.radius_km = float(radius_km or 0)
+        self._prepared = [area.prepared for area in self.areas]
+
+    @classmethod
+    def for_provider(cls, provider) -> "Coverage":
+        """Coverage of a provider with its ``service_areas`` loaded"""
+        base = None
+        if provider.base_location is not None:
+            base = (provider.base_location.y, provider.base_location.x)
+        return cls(
+            areas=[area.area for area in provider.service_areas.all()],
+            base=base,
+            radius_km=provider.service_radius_km,
+        )
+
+    def is_empty(self) -> bool:
+        return not self.areas and (self.base is None or self.radius_km <= 0)
+
+    def boxes(self) -> List[Tuple[float, float, float, float]]:
+        """Bounding boxes as (min_lat, min_lng, max_lat, max_lng)"""
+        if self.areas:
+            boxes = []
+            for area in self.areas:
+                min_lng, min_lat, max_lng, max_lat = area.extent
+                boxes.append((min_lat, min_lng, max_lat, max_lng))
+            return boxes
+        if self.is_empty():
+            return []
+        lat, lng = self.base
+        lat_delta = self.radius_km / KM_PER_DEGREE
+        lng_delta = self.radius_km / (
+            KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+        )
+        return [(lat - lat_delta, lng - lng_delta, lat + lat_delta, lng + lng_delta)]
+
+    def contains(self, lat: float, lng: float) -> bool:
+        if self.areas:
+            from django.contrib.gis.geos import Point
+
+            point = Point(lng, lat, srid=4326)
+            return any(prepared.covers(point) for prepared in self._prepared)
+        if self.is_empty():
+            return False
+        return distance_km(self.base[0], self.base[1], lat, lng) <= self.radius_km
+
+
+class SubscriptionIndex:
+    """
+    Subscribers by the grid cells their coverage overlaps
+
+    A job is only checked against the subscribers in its pickup point's cell
+    (plus the few whose coverage is too large to grid), so matching costs
+    the same however many providers are connected.
+    """
+
+    def __init__(self, cell_degrees: float = None, max_cells: int = None):
+        config = get_config()
+        self.cell_degrees = cell_degrees or config["CELL_DEGREES"]
+        self.max_cells = max_cells or config["MAX_CELLS"]
+        self._cells: Dict[Tuple[int, int], set] = {}
+        self._wide = set()
+        self._subscriptions: Dict = {}
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def __contains__(self, key) -> bool:
+        return key in self._subscriptions
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (
+            math.floor(lat / self.cell_degrees),
+            math.floor(lng / self.cell_degrees),
+        )
+
+    def _cells_of(self, coverage: Coverage) -> Optional[set]:
+        """The cells ``coverage`` overlaps, or None if there are too many"""
+        cells = set()
+        for min_lat, min_lng, max_lat, max_lng in coverage.boxes():
+            low_row, low_col = self._cell(min_lat, min_lng)
+            high_row, high_col = self._cell(max_lat, max_lng)
+            if (high_row - low_row + 1) * (high_col - low_col + 1) > self.max_cells:
+                return None
+            cells.update(
+                (row, col)
+                for row in range(low_row, high_row + 1)
+                for col in range(low_col, high_col + 1)
+            )
+        return cells
+
+    def add(self, key, coverage: Coverage):
+        self.remove(key)
+        cells = self._cells_of(coverage)
+        self._subscriptions[key] = (coverage, cells)
+        if cells is None:
+            self._wide.add(key)
+            return
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        subscription = self._subscriptions.pop(key, None)
+        if subscription is None:
+            return
+        _, cells = subscription
+        if cells is None:
+            self._wide.discard(key)
+            return
+        for cell in cells:
+            keys = self._cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._cells[cell]
+
+    def match(self, lat: float, lng: float) -> List:
+        """Keys of the subscribers whose coverage contains the point"""
+        candidates = self._cells.get(self._cell(lat, lng), set()) | self._wide
+        return [
+            key for key in candidates if self._subscriptions[key][0].contains(lat, lng)
+        ]
+
+
+def pickup_point(job) -> Optional[Tuple[float, float]]:
+    """(lat, lng) of the job's pickup: the request's pickup location or,
+    for journeys, its first pickup stop"""
+    request = job.request
+    if request is None:
+        return None
+    locations = [request.pickup_location]
+    stops = sorted(request.stops.all(), key=lambda stop: stop.sequence)
+    locations += [stop.location for stop in stops if stop.type == "pickup"]
+    for location in locations:
+        if (
+            location is not None
+            and location.latitude is not None
+            and location.longitude is not None
+        ):
+            return float(location.latitude), float(location.longitude)
+    return None
+
+
+def job_summary(job, point: Tuple[float, float] = None) -> Dict:
+    """What the feed sends about a job"""
+    request = job.request
+    location = request.pickup_location if request else None
+    return {
+        "id": str(job.id),
+        "job_number": job.job_number,
+        "title": job.title,
+        "status": job.status,
+        "is_instant": job.is_instant,
+        "price": str(job.price) if job.price is not None else None,
+        "minimum_bid": str(job.minimum_bid) if job.minimum_bid is not None else None,
+        "bidding_end_time": (
+            job.bidding_end_time.isoformat() if job.bidding_end_time else None
+        ),
+        "service_type": request.service_type if request else None,
+        "preferred_pickup_date": (
+            request.preferred_pickup_date.isoformat()
+            if request and request.preferred_pickup_date
+            else None
+        ),
+        "pickup": {
+            "city": location.city if location else None,
+            "postcode": location.postcode if location else None,
+            "latitude": point[0] if point else None,
+            "longitude": point[1] if point else None,
+        },
+    }
+
+
+def _load_related(jobs: List):
+    prefetch_related_objects(
+        jobs, "request__pickup_location", "request__stops__location"
+    )
+
+
+def feed_message(job, opened_at: datetime) -> Optional[Dict]:
+    """The ``job_feed`` group message announcing ``job``, or None if it has
+    no pickup point to match providers against"""
+    point = pickup_point(job)
+    if point is None:
+        logger.warning(f"Job {job.id} has no pickup coordinates, not in the feed")
+        return None
+    return {
+        "type": "job.opened",
+        "cursor": encode_cursor(opened_at),
+        "latitude": point[0],
+        "longitude": point[1],
+        "job": job_summary(job, point),
+    }
+
+
+def publish_opened_jobs(opened: List[Tuple], fan_out):
+    """Queue feed messages for (job, opened_at) pairs on the event fan-out"""
+    if not opened:
+        return
+    _load_related([job for job, _ in opened])
+    for job, opened_at in opened:
+        message = feed_message(job, opened_at)
+        if message is not None:
+            fan_out.publish(JOB_FEED_GROUP, message)
+
+
+def missed_jobs(coverage: Coverage, cursor) -> Dict:
+    """
+    The jobs opened after ``cursor`` that are still open and inside
+    ``coverage``, oldest first, with the cursor to resume from next
+    """
+    from apps.Notification.models import DomainEvent
+    from apps.Notification.outbox import JOB_STATUS_CHANGED
+
+    from .models import Job
+
+    config = get_config()
+    earliest = timezone.now() - timedelta(hours=config["RESYNC_WINDOW_HOURS"])
+    since = decode_cursor(cursor)
+    if since is None or since < earliest:
+        since = earliest
+
+    events = list(
+        DomainEvent.objects.filter(
+            event_type=JOB_STATUS_CHANGED,
+            aggregate_type="job",
+            occurred_at__gt=since,
+            payload__new_status__in=FEED_STATUSES,
+        )
+        .order_by("occurred_at")
+        .values_list("aggregate_id", "occurred_at")[: config["RESYNC_SCAN"]]
+    )
+    has_more = len(events) == config["RESYNC_SCAN"]
+
+    jobs = Job.objects.filter(status__in=FEED_STATUSES).in_bulk(
+        {aggregate_id for aggregate_id, _ in events}
+    )
+    jobs = {str(pk): job for pk, job in jobs.items()}
+    _load_related(list(jobs.values()))
+
+    matched, seen = [], set()
+    next_cursor = encode_cursor(since)
+    for aggregate_id, occurred_at in events:
+        if len(matched) == config["RESYNC_LIMIT"]:
+            has_more = True
+            break
+        next_cursor = encode_cursor(occurred_at)
+        job = jobs.get(aggregate_id)
+        if job is None or aggregate_id in seen:
+            continue
+        point = pickup_point(job)
+        if point is not None and coverage.contains(*point):
+            seen.add(aggregate_id)
+            matched.append(job_summary(job, point))
+
+    return {"jobs": matched, "cursor": next_cursor, "has_more": has_more}
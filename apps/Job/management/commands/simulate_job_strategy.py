@@ -0,0 +1,102 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.Job.strategy import StrategyThresholds, evaluate_strategies, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Evaluate the instant/auction strategy of existing requests, optionally "
+        "under other thresholds, without changing anything"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Requests created in the last DAYS days (default: 30, 0 for all)",
+        )
+        parser.add_argument(
+            "--status", action="append", help="Only requests in this status"
+        )
+        parser.add_argument(
+            "--set",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="Override a threshold, e.g. --set decision_threshold=0.6",
+        )
+        parser.add_argument(
+            "--providers",
+            choices=["check", "available", "unavailable"],
+            default="check",
+            help="Assume providers are (un)available instead of checking",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Also count the requests whose strategy differs from the current thresholds",
+        )
+
+    def thresholds(self, assignments):
+        overrides = {}
+        for assignment in assignments:
+            name, sep, value = assignment.partition("=")
+            if not sep:
+                raise CommandError(f"Expected NAME=VALUE, got '{assignment}'")
+            try:
+                overrides[name] = json.loads(value)
+            except ValueError:
+                raise CommandError(f"Invalid value for {name}: {value}")
+            if isinstance(overrides[name], list):
+                overrides[name] = tuple(overrides[name])
+        try:
+            return StrategyThresholds.from_settings(**overrides)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def handle(self, *args, **options):
+        from apps.Request.models import Request
+
+        requests = Request.objects.all()
+        if options["days"]:
+            requests = requests.filter(
+                created_at__gte=timezone.now() - timedelta(days=options["days"])
+            )
+        if options["status"]:
+            requests = requests.filter(status__in=options["status"])
+        available = {"check": None, "available": True, "unavailable": False}[
+            options["providers"]
+        ]
+
+        thresholds = self.thresholds(options["set"])
+        decisions = evaluate_strategies(requests, thresholds, available=available)
+        summary = summarize(decisions)
+
+        self.stdout.write(f"Requests: {summary['requests']}")
+        for strategy, count in sorted(summary["strategies"].items()):
+            self.stdout.write(f"  {strategy}: {count}")
+        self.stdout.write("Reasons:")
+        for reason, count in summary["reasons"].items():
+            self.stdout.write(f"  {count:>7}  {reason}")
+
+        if options["compare"]:
+            current = evaluate_strategies(
+                requests, StrategyThresholds.from_settings(), available=available
+            )
+            changed = [
+                request_id
+                for request_id, decision in decisions.items()
+                if current[request_id]["strategy"] != decision["strategy"]
+            ]
+            to_instant = sum(
+                1 for request_id in changed if decisions[request_id]["is_instant"]
+            )
+            self.stdout.write(
+                f"Strategy changed for {len(changed)} requests "
+                f"({to_instant} to instant, {len(changed) - to_instant} to auction)"
+            )
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Bidding', '0004_bid_indexes'),
+        ('Job', '0004_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='best_bid',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Bidding.bid'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='best_bid_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
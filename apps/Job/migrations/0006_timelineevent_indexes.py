@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Job', '0005_job_bid_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['job', '-created_at'], name='timeline_job_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['job', 'visibility', '-created_at'], name='timeline_job_visibility_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from apps.Basemodel.models import Basemodel
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -10,6 +10,12 @@ from datetime import datetime
 from rest_framework import serializers
 from .services import JobTimelineService
 from apps.Request.serializer import RequestSerializer
+from apps.Notification.outbox import JOB_STATUS_CHANGED, emit
+import logging
+from utils.debug_trace import get_tracer
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class Job(Basemodel):
@@ -58,6 +64,18 @@ class Job(Basemodel):
         blank=True,
         related_name="assigned_jobs",
     )
+    # Bid summary, maintained by apps/Bidding/auction.py
+    bid_count = models.PositiveIntegerField(default=0)
+    best_bid = models.ForeignKey(
+        "Bidding.Bid",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    best_bid_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
 
     class Meta:
         verbose_name = _("Job")
@@ -151,7 +169,7 @@ class Job(Basemodel):
 
     @staticmethod
     def create_job(request_obj, **kwargs):
-        print(f"create_job called with kwargs: {kwargs}")
+        tracer.debug("create_job called with kwargs: {}", kwargs)
         """
         Creates a job after payment has been completed for a request.
         If a job already exists for this request, returns the existing job.
@@ -172,9 +190,9 @@ class Job(Basemodel):
 
         # Check if a job already exists for this request
         existing_job = Job.objects.filter(request=request_obj).first()
-        print(f"Checking for existing job in create_job method: {existing_job}")
+        tracer.debug("Checking for existing job in create_job method: {}", existing_job)
         if existing_job:
-            print(f"Returning existing job: {existing_job.id}")
+            tracer.debug("Returning existing job: {}", existing_job.id)
             return existing_job
 
         # Get all stops ordered by sequence
@@ -183,9 +201,15 @@ class Job(Basemodel):
         dropoff_stops = all_stops.filter(type="dropoff")
         intermediate_stops = all_stops.filter(type="intermediate")
 
-        print(
-            f"Stops found: {all_stops.count()} total, {pickup_stops.count()} pickup, {dropoff_stops.count()} dropoff, {intermediate_stops.count()} intermediate"
-        )
+        # The counts are queries, so only run them when tracing
+        if tracer.is_enabled():
+            tracer.debug(
+                "Stops found: {} total, {} pickup, {} dropoff, {} intermediate",
+                all_stops.count(),
+                pickup_stops.count(),
+                dropoff_stops.count(),
+                intermediate_stops.count(),
+            )
 
         # Get first pickup and last dropoff for job title
         first_pickup = pickup_stops.first()
@@ -240,19 +264,19 @@ class Job(Basemodel):
 
         # Create the job
         base_price = request_obj.base_price or Decimal("0.00")
-        print(f"Base price: {base_price}, Type: {type(base_price)}")
+        tracer.debug("Base price: {}, Type: {}", base_price, type(base_price))
 
         # If base price is 0, try to calculate it
         if base_price == Decimal("0.00"):
-            print("Base price is 0, attempting to calculate it...")
+            tracer.debug("Base price is 0, attempting to calculate it...")
             try:
                 base_price = request_obj.calculate_base_price()
-                print(f"Calculated base price: {base_price}")
+                tracer.debug("Calculated base price: {}", base_price)
             except Exception as e:
-                print(f"Error calculating base price: {e}")
+                logger.error(f"Error calculating base price: {e}")
                 # Use a default base price
                 base_price = Decimal("50.00")
-                print(f"Using default base price: {base_price}")
+                tracer.debug("Using default base price: {}", base_price)
 
         # For all jobs, use the base price as the job price (what provider gets paid)
         final_price = base_price
@@ -273,8 +297,10 @@ class Job(Basemodel):
                 base_price * minimum_bid_multiplier if base_price > 0 else None
             )
 
-        print(f"Final price: {final_price}, Minimum bid: {minimum_bid}")
-        print(f"Complexity factor: {complexity_factor}, Is instant: {is_instant}")
+        tracer.debug("Final price: {}, Minimum bid: {}", final_price, minimum_bid)
+        tracer.debug(
+            "Complexity factor: {}, Is instant: {}", complexity_factor, is_instant
+        )
 
         job_data = {
             "request": request_obj,
@@ -285,25 +311,23 @@ class Job(Basemodel):
             "is_instant": kwargs.get("is_instant", is_instant),
             "minimum_bid": kwargs.get("minimum_bid", minimum_bid),
         }
-        print(f"Creating job with data: {job_data}")
-        print(f"About to call Job.objects.create with {len(job_data)} fields")
+        tracer.debug("Creating job with data: {}", job_data)
+        tracer.debug("About to call Job.objects.create with {} fields", len(job_data))
 
         try:
             job = Job.objects.create(**job_data)
-            print(f"Job.objects.create() completed successfully")
+            tracer.debug("Job.objects.create() completed successfully")
         except Exception as create_error:
-            print(f"Error in Job.objects.create(): {str(create_error)}")
-            print(f"Error type: {type(create_error)}")
-            import traceback
-
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.error(
+                f"Error in Job.objects.create(): {str(create_error)}", exc_info=True
+            )
             raise create_error
 
         # Ensure the job is saved and job number is generated
         job.save()
 
-        print(f"\033[92mJob created with number: {job.job_number}\033[0m")
-        print(f"\033[92mJob ID: {job.id}, Status: {job.status}\033[0m")
+        tracer.debug("Job created with number: {}", job.job_number)
+        tracer.debug("Job ID: {}, Status: {}", job.id, job.status)
 
         return job
 
@@ -387,14 +411,16 @@ class Job(Basemodel):
             return True
         return False
 
-    def accept_bid(self, bid):
-        """Accept a bid for this job"""
-        if self.status == "bidding":
-            self.status = "assigned"
-            self.provider = bid.provider
-            self.save()
-            return True
-        return False
+    def accept_bid(self, bid, accepted_by=None):
+        """Accept a bid for this job (see apps/Bidding/services.py)"""
+        from apps.Bidding.services import BidNotAcceptable, accept_bid
+
+        try:
+            accept_bid(bid.pk, job_id=self.pk, actor=accepted_by)
+        except BidNotAcceptable:
+            return False
+        self.refresh_from_db()
+        return True
 
     def complete_job(self, completed_by=None):
         """
@@ -415,14 +441,11 @@ class Job(Basemodel):
         old_status = self.status
         self.status = "completed"
         self.is_completed = True
-        self.save()
-
-        # Create timeline event
-        TimelineEvent.objects.create(
-            job=self,
+        self._save_transition(
+            old_status,
+            completed_by,
             event_type="completed",
             description="Job has been marked as completed",
-            created_by=completed_by,
             metadata={
                 "completed_at": timezone.now().isoformat(),
                 "previous_status": old_status,
@@ -461,6 +484,34 @@ class Job(Basemodel):
             },
         )
 
+    def _save_transition(self, old_status, actor, event_type, description, metadata):
+        """
+        Save a status transition and append its domain event in one
+        transaction. The domain event worker (apps/Notification/outbox.py)
+        writes the timeline event and sends the notifications.
+        """
+        # Tells the post_save notification signal not to emit a second event
+        self._transition_in_progress = True
+        try:
+            with transaction.atomic():
+                self.save()
+                emit(
+                    JOB_STATUS_CHANGED,
+                    self,
+                    {
+                        "old_status": old_status,
+                        "new_status": self.status,
+                        "timeline": {
+                            "event_type": event_type,
+                            "description": description,
+                            "metadata": metadata,
+                        },
+                    },
+                    actor=actor,
+                )
+        finally:
+            self._transition_in_progress = False
+
     def start_transit(self, started_by=None):
         """
         Mark a job as in transit.
@@ -476,14 +527,11 @@ class Job(Basemodel):
 
         old_status = self.status
         self.status = "in_transit"
-        self.save()
-
-        # Create timeline event
-        TimelineEvent.objects.create(
-            job=self,
+        self._save_transition(
+            old_status,
+            started_by,
             event_type="in_transit",
             description="Job is now in transit",
-            created_by=started_by,
             metadata={
                 "transit_started_at": timezone.now().isoformat(),
                 "previous_status": old_status,
@@ -511,14 +559,11 @@ class Job(Basemodel):
         old_status = self.status
         self.status = "assigned"
         self.assigned_provider = provider
-        self.save()
-
-        # Create timeline event
-        TimelineEvent.objects.create(
-            job=self,
+        self._save_transition(
+            old_status,
+            assigned_by,
             event_type="provider_assigned",
             description=f"Provider {provider.user.get_full_name()} assigned to job",
-            created_by=assigned_by,
             metadata={
                 "assigned_at": timezone.now().isoformat(),
                 "previous_status": old_status,
@@ -646,9 +691,25 @@ class TimelineEvent(Basemodel):
         ordering = ["-created_at"]
         verbose_name = "Timeline Event"
         verbose_name_plural = "Timeline Events"
+        indexes = [
+            # A job's whole timeline (staff), newest first
+            models.Index(
+                fields=["job", "-created_at"], name="timeline_job_created_idx"
+            ),
+            # A job's timeline for one audience (see timeline.py)
+            models.Index(
+                fields=["job", "visibility", "-created_at"],
+                name="timeline_job_visibility_idx",
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.get_event_type_display()} - {self.job.request.tracking_number}"
+        # Only name the request if it is already loaded: lists of events
+        # would otherwise query the job and its request for each one
+        job = self.job if TimelineEvent.job.is_cached(self) else None
+        if job is not None and Job.request.is_cached(job):
+            return f"{self.get_event_type_display()} - {job.request.tracking_number}"
+        return f"{self.get_event_type_display()} - job {self.job_id}"
 
 
 class JobSerializer(serializers.ModelSerializer):
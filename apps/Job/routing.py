@@ -0,0 +1,7 @@
+from django.urls import re_path
+
+from .consumers import JobFeedConsumer
+
+websocket_urlpatterns = [
+    re_path(r"^ws/jobs/feed/$", JobFeedConsumer.as_asgi()),
+]
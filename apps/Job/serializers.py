@@ -1,3 +1,4 @@
+from django.db.models import QuerySet
 from rest_framework import serializers
 from .models import Job, TimelineEvent
 from apps.Request.serializer import RequestSerializer
@@ -62,8 +63,20 @@ class JobSerializer(serializers.ModelSerializer):
             "price",
             "timeline_events",
             "bids",  # Add this line
+            "bid_count",
+            "best_bid",
+            "best_bid_amount",
+        ]
+        read_only_fields = [
+            "id",
+            "job_number",
+            "created_at",
+            "updated_at",
+            "bids",
+            "bid_count",
+            "best_bid",
+            "best_bid_amount",
         ]
-        read_only_fields = ["id", "job_number", "created_at", "updated_at", "bids"]
 
     def get_time_remaining(self, obj):
         if obj.bidding_end_time:
@@ -75,8 +88,16 @@ class JobSerializer(serializers.ModelSerializer):
 
     def get_timeline_events(self, obj):
         # Import here to avoid circular imports
-        try:
-            from .services import JobTimelineService
+        from .timeline import timelines_for
+
+        # Rendered once for every job of the list being serialized
+        timelines = self.context.get("_timelines")
+        if timelines is None or obj.pk not in timelines:
+            jobs = [obj]
+            if isinstance(self.parent, serializers.ListSerializer) and isinstance(
+                self.parent.instance, (list, QuerySet)
+            ):
+                jobs = list(self.parent.instance)
 
             # Get the requesting user
             user = None
@@ -84,9 +105,7 @@ class JobSerializer(serializers.ModelSerializer):
             if request and hasattr(request, "user"):
                 user = request.user
 
-            # Get timeline events with proper visibility filtering
-            events = JobTimelineService.get_job_timeline(job=obj, user=user)
-            return TimelineEventSerializer(events, many=True).data
-        except ImportError:
-            # Fallback if service is not available
-            return []
+            timelines = timelines_for(jobs, user)
+            if isinstance(self.context, dict):
+                self.context["_timelines"] = timelines
+        return timelines.get(obj.pk, [])
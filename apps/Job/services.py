@@ -1,6 +1,5 @@
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.core.cache import cache
 from django.conf import settings
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
@@ -8,9 +7,12 @@ from enum import Enum
 from datetime import datetime, timedelta
 import logging
 from decimal import Decimal
+from utils.caching import namespace
+from utils.debug_trace import get_tracer
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class JobComplexityAnalyzer:
@@ -20,76 +22,11 @@ class JobComplexityAnalyzer:
     def calculate_complexity_score(request) -> float:
         """
         Calculate complexity score for a request (0-1, higher = more complex)
-        Based on the AnyVan algorithm logic we designed
+        Based on the AnyVan algorithm logic we designed (see strategy.py)
         """
-        complexity = 0.0
+        from .strategy import complexity_scores, inputs_for
 
-        # Special handling requirements
-        if request.requires_special_handling:
-            complexity += 0.3
-
-        # Weight factor
-        if request.total_weight:
-            weight_kg = float(request.total_weight)
-            if weight_kg > 500:  # Very heavy items
-                complexity += 0.2
-            elif weight_kg > 200:  # Heavy items
-                complexity += 0.1
-
-        # Staff requirements
-        if request.staff_required and request.staff_required > 2:
-            complexity += 0.15
-
-        # Special instructions
-        if request.special_instructions and len(request.special_instructions) > 100:
-            complexity += 0.1
-
-        # Insurance requirements
-        if request.insurance_required:
-            complexity += 0.1
-            if request.insurance_value and float(request.insurance_value) > 10000:
-                complexity += 0.1
-
-        # Service type complexity
-        if request.service_type:
-            complex_services = [
-                "piano_transport",
-                "antique_furniture",
-                "artwork",
-                "fragile_items",
-            ]
-            if any(
-                service in request.service_type.lower() for service in complex_services
-            ):
-                complexity += 0.2
-
-        # Multiple locations (journey type)
-        if request.request_type == "journey":
-            stop_count = request.stops.count() if hasattr(request, "stops") else 0
-            if stop_count > 3:  # More than pickup and dropoff + 1 stop
-                complexity += 0.15
-
-        # Time constraints
-        if request.priority in ["same_day", "express"]:
-            complexity += 0.1
-
-        # Location access difficulty (if you have this data)
-        if hasattr(request, "pickup_location") and request.pickup_location:
-            # You might need to add these fields to your Location model
-            if hasattr(request.pickup_location, "access_difficulty"):
-                if request.pickup_location.access_difficulty == "difficult":
-                    complexity += 0.2
-                elif request.pickup_location.access_difficulty == "very_difficult":
-                    complexity += 0.4
-
-        if hasattr(request, "dropoff_location") and request.dropoff_location:
-            if hasattr(request.dropoff_location, "access_difficulty"):
-                if request.dropoff_location.access_difficulty == "difficult":
-                    complexity += 0.2
-                elif request.dropoff_location.access_difficulty == "very_difficult":
-                    complexity += 0.4
-
-        return min(1.0, complexity)
+        return complexity_scores(inputs_for(request))[0]
 
 
 class RouteEfficiencyAnalyzer:
@@ -98,22 +35,9 @@ class RouteEfficiencyAnalyzer:
     @staticmethod
     def calculate_route_efficiency(request) -> float:
         """Calculate route efficiency score (0-1, higher = better for instant pricing)"""
-        if not request.pickup_location or not request.dropoff_location:
-            return 0.3  # Low efficiency for incomplete location data
+        from .strategy import inputs_for, route_scores
 
-        pickup_postcode = getattr(request.pickup_location, "postcode", "")
-        dropoff_postcode = getattr(request.dropoff_location, "postcode", "")
-
-        if not pickup_postcode or not dropoff_postcode:
-            return 0.4  # Medium-low efficiency
-
-        # Same postcode area (first 2-3 characters)
-        if pickup_postcode[:2] == dropoff_postcode[:2]:
-            return 0.9  # High efficiency - same area
-        elif pickup_postcode[0] == dropoff_postcode[0]:
-            return 0.7  # Medium efficiency - same region
-        else:
-            return 0.4  # Lower efficiency - different regions
+        return route_scores(inputs_for(request, count_stops=False))[0]
 
 
 class DemandAnalyzer:
@@ -122,68 +46,32 @@ class DemandAnalyzer:
     @staticmethod
     def get_demand_score(request) -> float:
         """Get demand score (0-1, higher = more demand)"""
-        if not request.preferred_pickup_date:
-            return 0.6  # Default demand
-
-        pickup_date = request.preferred_pickup_date
-
-        # Seasonal factors
-        month = pickup_date.month
-        seasonal_factor = 1.2 if month in [4, 5, 6, 7, 8] else 0.8  # Peak moving season
-
-        # Day of week factors
-        weekday = pickup_date.weekday()
-        weekend_factor = 1.3 if weekday >= 5 else 1.0  # Weekend premium
-
-        # Time urgency
-        days_ahead = (pickup_date - timezone.now().date()).days
-        urgency_factor = 1.0
-        if days_ahead <= 1:
-            urgency_factor = 1.4  # Same/next day high demand
-        elif days_ahead <= 7:
-            urgency_factor = 1.2  # Within a week
-
-        base_demand = 0.6
-        final_score = min(
-            1.0, base_demand * seasonal_factor * weekend_factor * urgency_factor
-        )
+        from .strategy import demand_scores, inputs_for
 
-        return final_score
+        return demand_scores(
+            inputs_for(request, count_stops=False), timezone.now().date()
+        )[0]
 
 
 class ProviderAvailabilityService:
     """Service to check provider availability for instant jobs"""
 
+    CACHE = namespace("provider_availability", timeout=300)  # Cache for 5 minutes
+
     @staticmethod
     def check_qualified_providers(request) -> bool:
         """Check if qualified providers are available for this request"""
-        # This would integrate with your ServiceProvider model
-        # For now, we'll use a simplified check
-
-        cache_key = f"providers_available_{request.pickup_location.postcode if request.pickup_location else 'unknown'}"
-        cached_result = cache.get(cache_key)
+        # Not location based yet, so the answer is the same for every request
+        from .strategy import providers_available
 
-        if cached_result is not None:
-            return cached_result
+        return providers_available()
 
-        # In a real implementation, you'd query your ServiceProvider model
-        # Check for providers in the area with good ratings
-        try:
-            from apps.Provider.models import ServiceProvider
-
-            # Get providers in the area (you might need to implement location-based filtering)
-            available_providers = ServiceProvider.objects.filter(
-                is_active=True,
-                # Add location/area filtering based on your model structure
-            ).count()
-
-            result = available_providers > 0
-            cache.set(cache_key, result, timeout=300)  # Cache for 5 minutes
-            return result
+    @staticmethod
+    def _providers_available() -> bool:
+        from apps.Provider.models import ServiceProvider
 
-        except ImportError:
-            # Fallback if ServiceProvider model doesn't exist yet
-            return True  # Assume providers available
+        # Add location/area filtering based on your model structure
+        return ServiceProvider.objects.filter(accepts_instant_bookings=True).exists()
 
 
 class JobService:
@@ -238,7 +126,8 @@ class JobService:
     def determine_if_biddable_or_not(request) -> Dict[str, Any]:
         """
         Determine if a job should be biddable or instant based on request properties.
-        Implements the AnyVan-style algorithm selection logic.
+        Implements the AnyVan-style algorithm selection logic; see strategy.py,
+        which also evaluates whole querysets of requests at once.
 
         Args:
             request: The Request instance to analyze
@@ -246,122 +135,10 @@ class JobService:
         Returns:
             dict: Decision result with strategy, confidence, and reasoning
         """
-        logger.info(f"Analyzing request {request.id} for pricing strategy")
-
-        reasoning = []
-        confidence_score = 1.0
+        from .strategy import decide, inputs_for
 
-        # Step 1: Check if request type is eligible for instant pricing
-        # Based on your REQUEST_TYPE_CHOICES, 'instant' type should be eligible
-        instant_eligible_types = ["instant"]
-
-        if request.request_type not in instant_eligible_types:
-            reasoning.append(
-                f"Request type '{request.request_type}' not eligible for instant pricing"
-            )
-            return {
-                "strategy": "biddable",
-                "is_instant": False,
-                "confidence_score": 1.0,
-                "reasoning": reasoning,
-                "estimated_response_time": "2-6 hours",
-                "recommendation": "Route to auction for competitive bidding",
-            }
-
-        # Step 2: Assess job complexity
-        complexity_score = JobComplexityAnalyzer.calculate_complexity_score(request)
-        if complexity_score > 0.6:
-            reasoning.append(f"High complexity score: {complexity_score:.2f}")
-            confidence_score -= 0.3
-
-        # Step 3: Check route efficiency
-        route_efficiency = RouteEfficiencyAnalyzer.calculate_route_efficiency(request)
-        if route_efficiency < 0.5:
-            reasoning.append(f"Low route efficiency: {route_efficiency:.2f}")
-            confidence_score -= 0.2
-
-        # Step 4: Check provider availability
-        providers_available = ProviderAvailabilityService.check_qualified_providers(
-            request
-        )
-        if not providers_available:
-            reasoning.append("No qualified providers available")
-            confidence_score -= 0.4
-
-        # Step 5: Check timing constraints
-        if request.preferred_pickup_date:
-            days_ahead = (request.preferred_pickup_date - datetime.now().date()).days
-            if days_ahead < 2:
-                reasoning.append("Short notice booking - limited route optimization")
-                confidence_score -= 0.3
-
-        # Step 6: Demand analysis
-        demand_score = DemandAnalyzer.get_demand_score(request)
-        if demand_score > 0.8:
-            reasoning.append(f"High demand period: {demand_score:.2f}")
-            confidence_score -= 0.2
-
-        # Step 7: Service level check
-        if request.service_level in ["same_day", "express"]:
-            reasoning.append("Express/same-day service requires special handling")
-            confidence_score -= 0.2
-
-        # Step 8: Weight and size constraints
-        if request.total_weight and float(request.total_weight) > 1000:  # 1 ton
-            reasoning.append("Heavy items require specialized equipment")
-            confidence_score -= 0.2
-
-        # Step 9: Distance check
-        if (
-            request.estimated_distance and float(request.estimated_distance) > 500
-        ):  # 500km
-            reasoning.append("Long distance move requires custom planning")
-            confidence_score -= 0.3
-
-        # Final decision logic
-        decision_threshold = 0.7
-        complexity_threshold = 0.6
-
-        if (
-            confidence_score >= decision_threshold
-            and complexity_score <= complexity_threshold
-            and providers_available
-            and route_efficiency >= 0.5
-        ):
-
-            # Use instant pricing
-            reasoning.append("Job suitable for instant pricing algorithm")
-            return {
-                "strategy": "instant",
-                "is_instant": True,
-                "confidence_score": confidence_score,
-                "reasoning": reasoning,
-                "estimated_price": request.base_price,
-                "booking_expires_minutes": 5,
-                "recommendation": "Show instant price and booking option",
-            }
-        else:
-            # Use auction bidding
-            reasoning.append("Job requires human assessment via auction")
-
-            # Determine bidding duration based on complexity
-            if complexity_score > 0.8:
-                bidding_hours = 48  # Complex jobs get longer bidding
-            elif complexity_score > 0.6:
-                bidding_hours = 24  # Standard bidding time
-            else:
-                bidding_hours = 12  # Simple jobs get shorter bidding
-
-            return {
-                "strategy": "biddable",
-                "is_instant": False,
-                "confidence_score": confidence_score,
-                "reasoning": reasoning,
-                "estimated_response_time": f"{bidding_hours//12 * 2}-{bidding_hours//6} hours",
-                "bidding_duration_hours": bidding_hours,
-                "minimum_bid": request.base_price * 0.8 if request.base_price else None,
-                "recommendation": "Create auction listing for competitive bidding",
-            }
+        logger.info(f"Analyzing request {request.id} for pricing strategy")
+        return decide(inputs_for(request))[0]
 
     @staticmethod
     def create_job_with_strategy(request):
@@ -505,34 +282,16 @@ class JobTimelineService:
         Returns:
             QuerySet: Filtered timeline events
         """
-        from .models import Job, TimelineEvent
+        from .models import TimelineEvent
+        from .timeline import AUDIENCES, audiences_for
 
         events = TimelineEvent.objects.filter(job=job)
 
-        # If no user provided, return only 'all' visibility
-        if user is None:
-            return events.filter(visibility="all")
-
-        # Check user's role relative to the job to determine visibility
-        is_customer = hasattr(job.request, "user") and job.request.user == user
-        is_provider = False  # Implement based on your provider-job relationship
-        is_staff = user.is_staff if hasattr(user, "is_staff") else False
-
-        # Filter by visibility based on user's role
+        # Filter by visibility based on user's role relative to the job
+        if not visibility:
+            visibility = AUDIENCES[audiences_for([job], user)[job.pk]]
         if visibility:
             events = events.filter(visibility__in=visibility)
-        elif is_staff:
-            # Staff can see everything
-            pass
-        elif is_customer:
-            # Customers can see 'all' and 'customer' events
-            events = events.filter(visibility__in=["all", "customer"])
-        elif is_provider:
-            # Providers can see 'all' and 'provider' events
-            events = events.filter(visibility__in=["all", "provider"])
-        else:
-            # Others can only see 'all' events
-            events = events.filter(visibility="all")
 
         return events
 
@@ -611,12 +370,14 @@ class InstantJobPricingService:
 
         # Start with the base job price (what provider gets paid)
         job_price = base_job_price
-        print(f"Starting with base job price: {job_price}, Type: {type(job_price)}")
+        tracer.debug(
+            "Starting with base job price: {}, Type: {}", job_price, type(job_price)
+        )
 
         # Ensure job_price is a Decimal
         if not isinstance(job_price, Decimal):
             job_price = Decimal(str(job_price))
-            print(f"Converted job_price to Decimal: {job_price}")
+            tracer.debug("Converted job_price to Decimal: {}", job_price)
 
         breakdown = {
             "base_job_price": float(job_price),
@@ -627,23 +388,29 @@ class InstantJobPricingService:
         # 1. Apply complexity adjustments to job price
         try:
             complexity_score = JobComplexityAnalyzer.calculate_complexity_score(request)
-            print(
-                f"Complexity score: {complexity_score}, Type: {type(complexity_score)}"
+            tracer.debug(
+                "Complexity score: {}, Type: {}",
+                complexity_score,
+                type(complexity_score),
             )
             complexity_multiplier = Decimal("1.0") + (
                 Decimal(str(complexity_score)) * Decimal("0.3")
             )  # Up to 30% increase for complexity
-            print(
-                f"Complexity multiplier: {complexity_multiplier}, Type: {type(complexity_multiplier)}"
+            tracer.debug(
+                "Complexity multiplier: {}, Type: {}",
+                complexity_multiplier,
+                type(complexity_multiplier),
             )
 
             job_price *= complexity_multiplier
         except Exception as e:
-            print(f"Error in complexity calculation: {e}")
+            logger.error(f"Error in complexity calculation: {e}")
             # Use default complexity multiplier
             complexity_multiplier = Decimal("1.0")
             complexity_score = 0.0
-            print(f"Using default complexity multiplier: {complexity_multiplier}")
+            tracer.debug(
+                "Using default complexity multiplier: {}", complexity_multiplier
+            )
 
         breakdown["complexity_score"] = float(complexity_score)
         breakdown["complexity_multiplier"] = float(complexity_multiplier)
@@ -774,21 +541,23 @@ class InstantJobPricingService:
         # 7. Apply demand-based adjustments to job price
         try:
             demand_score = DemandAnalyzer.get_demand_score(request)
-            print(f"Demand score: {demand_score}, Type: {type(demand_score)}")
+            tracer.debug("Demand score: {}, Type: {}", demand_score, type(demand_score))
             demand_multiplier = Decimal("1.0") + (
                 Decimal(str(demand_score)) * Decimal("0.2")
             )  # Up to 20% demand bonus
-            print(
-                f"Demand multiplier: {demand_multiplier}, Type: {type(demand_multiplier)}"
+            tracer.debug(
+                "Demand multiplier: {}, Type: {}",
+                demand_multiplier,
+                type(demand_multiplier),
             )
 
             job_price *= demand_multiplier
         except Exception as e:
-            print(f"Error in demand calculation: {e}")
+            logger.error(f"Error in demand calculation: {e}")
             # Use default demand multiplier
             demand_multiplier = Decimal("1.0")
             demand_score = 0.0
-            print(f"Using default demand multiplier: {demand_multiplier}")
+            tracer.debug("Using default demand multiplier: {}", demand_multiplier)
 
         breakdown["demand_score"] = float(demand_score)
         breakdown["demand_multiplier"] = float(demand_multiplier)
@@ -909,25 +678,30 @@ class InstantJobPricingService:
             mock_request
         )
 
-        print("=== INSTANT PRICING EXAMPLE ===")
-        print(f"Base Job Price: £{pricing_data['breakdown']['base_job_price']}")
-        print(f"Final Job Price: £{pricing_data['job_price']}")
-        print(f"Customer Price: £{pricing_data['customer_price']}")
-        print(f"Platform Fee: £{pricing_data['platform_fee']}")
-        print(f"Profit Margin: {pricing_data['breakdown']['profit_margin']:.1f}%")
-        print(
-            f"Platform Fee %: {pricing_data['breakdown']['platform_fee_percentage']:.1f}%"
+        tracer.debug("=== INSTANT PRICING EXAMPLE ===")
+        tracer.debug("Base Job Price: £{}", pricing_data["breakdown"]["base_job_price"])
+        tracer.debug("Final Job Price: £{}", pricing_data["job_price"])
+        tracer.debug("Customer Price: £{}", pricing_data["customer_price"])
+        tracer.debug("Platform Fee: £{}", pricing_data["platform_fee"])
+        tracer.debug(
+            "Profit Margin: {:.1f}%", pricing_data["breakdown"]["profit_margin"]
+        )
+        tracer.debug(
+            "Platform Fee %: {:.1f}%",
+            pricing_data["breakdown"]["platform_fee_percentage"],
+        )
+        tracer.debug(
+            "Markup %: {:.1f}%", pricing_data["breakdown"]["markup_percentage"]
         )
-        print(f"Markup %: {pricing_data['breakdown']['markup_percentage']:.1f}%")
-        print("\nPricing Factors Applied:")
+        tracer.debug("Pricing Factors Applied:")
         for factor in pricing_data["breakdown"]["factors_applied"]:
-            print(f"  - {factor}")
-        print("\nAdjustments:")
+            tracer.debug("  - {}", factor)
+        tracer.debug("Adjustments:")
         for adjustment, value in pricing_data["breakdown"]["adjustments"].items():
-            print(f"  - {adjustment}: {value}")
-        print(
-            f"\nComplexity Score: {pricing_data['breakdown']['complexity_score']:.2f}"
+            tracer.debug("  - {}: {}", adjustment, value)
+        tracer.debug(
+            "Complexity Score: {:.2f}", pricing_data["breakdown"]["complexity_score"]
         )
-        print(f"Demand Score: {pricing_data['breakdown']['demand_score']:.2f}")
+        tracer.debug("Demand Score: {:.2f}", pricing_data["breakdown"]["demand_score"])
 
         return pricing_data
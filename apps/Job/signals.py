@@ -0,0 +1,15 @@
+"""
+Drops the cached timelines (timeline.py) of jobs whose events change
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import TimelineEvent
+from .timeline import timelines_changed
+
+
+@receiver(post_save, sender=TimelineEvent)
+@receiver(post_delete, sender=TimelineEvent)
+def timeline_event_changed(sender, instance, **kwargs):
+    timelines_changed([instance.job_id])
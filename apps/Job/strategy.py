@@ -0,0 +1,480 @@
+"""
+Job strategy evaluation
+
+Deciding whether a request becomes an instant job or an auction
+(``JobService.determine_if_biddable_or_not``) used to load and score one
+request at a time, with a provider COUNT for each pickup postcode, so
+backfills and what-if analyses cost several queries per request. The
+evaluation works on columns instead:
+
+- ``load_inputs`` reads every scoring input of a queryset of requests with
+  one query (``values()``, with the stop count and postcode joins), as one
+  list per input;
+- ``complexity_scores``, ``route_scores`` and ``demand_scores`` turn those
+  columns into one score per request, and provider availability is checked
+  once for the whole batch;
+- ``decide`` applies ``StrategyThresholds`` to the scores and returns the
+  decisions, in the shape ``determine_if_biddable_or_not`` always returned.
+
+The single-request path builds a one-row batch from the instance
+(``inputs_for``), so both give the same answer. Thresholds default to the
+``JOB_STRATEGY`` setting; passing others to ``evaluate_strategies``
+simulates a policy change without touching any job (see the
+``simulate_job_strategy`` command).
+"""
+
+import logging
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import Length
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COMPLEX_SERVICES = ("piano_transport", "antique_furniture", "artwork", "fragile_items")
+
+ACCESS_DIFFICULTY = {"difficult": 0.2, "very_difficult": 0.4}
+
+PEAK_MONTHS = (4, 5, 6, 7, 8)
+
+
+@dataclass(frozen=True)
+class StrategyThresholds:
+    """The policy turning scores into a decision"""
+
+    instant_request_types: tuple = ("instant",)
+    # A request goes instant when its confidence is at least this, and none
+    # of the complexity, route and availability checks below fail
+    decision_threshold: float = 0.7
+    complexity_threshold: float = 0.6
+    route_threshold: float = 0.5
+    high_demand: float = 0.8
+    short_notice_days: int = 2
+    max_weight_kg: float = 1000
+    max_distance_km: float = 500
+    # Confidence lost per failed check
+    complexity_penalty: float = 0.3
+    route_penalty: float = 0.2
+    no_providers_penalty: float = 0.4
+    short_notice_penalty: float = 0.3
+    high_demand_penalty: float = 0.2
+    service_level_penalty: float = 0.2
+    weight_penalty: float = 0.2
+    distance_penalty: float = 0.3
+    # Auctions: longer bidding for complex jobs
+    long_bidding_complexity: float = 0.8
+    long_bidding_hours: int = 48
+    standard_bidding_hours: int = 24
+    short_bidding_hours: int = 12
+    minimum_bid_ratio: float = 0.8
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "StrategyThresholds":
+        """The ``JOB_STRATEGY`` setting over the defaults, then ``overrides``"""
+        values = {**getattr(settings, "JOB_STRATEGY", {}), **overrides}
+        names = {field.name for field in fields(cls)}
+        unknown = set(values) - names
+        if unknown:
+            raise ValueError(
+                f"Unknown strategy thresholds: {', '.join(sorted(unknown))}"
+            )
+        return cls(**values)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _location_fields() -> List[str]:
+    from apps.Location.models import Location
+
+    return [
+        field.name
+        for field in Location._meta.get_fields()
+        if field.name == "access_difficulty"
+    ]
+
+
+def load_inputs(queryset) -> Dict[str, List]:
+    """The scoring inputs of the requests in ``queryset``, one list per input"""
+    columns = [
+        "id",
+        "request_type",
+        "requires_special_handling",
+        "total_weight",
+        "staff_required",
+        "insurance_required",
+        "insurance_value",
+        "service_type",
+        "priority",
+        "service_level",
+        "preferred_pickup_date",
+        "estimated_distance",
+        "base_price",
+        "pickup_location_id",
+        "dropoff_location_id",
+        "pickup_location__postcode",
+        "dropoff_location__postcode",
+    ]
+    for name in _location_fields():
+        columns += [f"pickup_location__{name}", f"dropoff_location__{name}"]
+
+    rows = (
+        queryset.order_by()
+        .annotate(
+            stop_count=Count("stops", distinct=True),
+            special_instructions_length=Length("special_instructions"),
+        )
+        .values_list(*columns, "stop_count", "special_instructions_length")
+    )
+    # pickup_location__postcode -> pickup_postcode, etc.
+    names = [name.replace("_location__", "_") for name in columns]
+    names += ["stop_count", "special_instructions_length"]
+
+    inputs = {name: [] for name in names}
+    for row in rows:
+        for name, value in zip(names, row):
+            inputs[name].append(value)
+    return _normalize(inputs)
+
+
+def inputs_for(request, count_stops: bool = True) -> Dict[str, List]:
+    """A one-row batch of ``request``'s scoring inputs, read from the
+    instance (which need not be saved); ``count_stops=False`` skips the
+    query only the complexity score needs"""
+    pickup = getattr(request, "pickup_location", None)
+    dropoff = getattr(request, "dropoff_location", None)
+    stop_count = 0
+    if (
+        count_stops
+        and getattr(request, "request_type", None) == "journey"
+        and hasattr(request, "stops")
+    ):
+        stop_count = request.stops.count()
+    instructions = getattr(request, "special_instructions", None)
+
+    row = {
+        "id": getattr(request, "id", None),
+        "request_type": getattr(request, "request_type", None),
+        "requires_special_handling": getattr(
+            request, "requires_special_handling", False
+        ),
+        "total_weight": getattr(request, "total_weight", None),
+        "staff_required": getattr(request, "staff_required", None),
+        "insurance_required": getattr(request, "insurance_required", False),
+        "insurance_value": getattr(request, "insurance_value", None),
+        "service_type": getattr(request, "service_type", None),
+        "priority": getattr(request, "priority", None),
+        "service_level": getattr(request, "service_level", None),
+        "preferred_pickup_date": getattr(request, "preferred_pickup_date", None),
+        "estimated_distance": getattr(request, "estimated_distance", None),
+        "base_price": getattr(request, "base_price", None),
+        "pickup_present": bool(pickup),
+        "dropoff_present": bool(dropoff),
+        "pickup_postcode": getattr(pickup, "postcode", ""),
+        "dropoff_postcode": getattr(dropoff, "postcode", ""),
+        "pickup_access_difficulty": getattr(pickup, "access_difficulty", None),
+        "dropoff_access_difficulty": getattr(dropoff, "access_difficulty", None),
+        "stop_count": stop_count,
+        "special_instructions_length": len(instructions) if instructions else 0,
+    }
+    return _normalize({name: [value] for name, value in row.items()})
+
+
+def _floats(values: Iterable) -> List[float]:
+    return [float(value) if value else 0.0 for value in values]
+
+
+def _normalize(inputs: Dict[str, List]) -> Dict[str, List]:
+    """Numbers as floats, missing values as their neutral default"""
+    size = len(inputs["id"])
+    for name in ("total_weight", "insurance_value", "estimated_distance"):
+        inputs[name] = _floats(inputs[name])
+    for name in ("staff_required", "stop_count", "special_instructions_length"):
+        inputs[name] = [value or 0 for value in inputs[name]]
+    for name in ("pickup", "dropoff"):
+        if f"{name}_present" not in inputs:
+            inputs[f"{name}_present"] = [
+                pk is not None for pk in inputs[f"{name}_location_id"]
+            ]
+        inputs[f"{name}_postcode"] = [
+            postcode or "" for postcode in inputs[f"{name}_postcode"]
+        ]
+        inputs.setdefault(f"{name}_access_difficulty", [None] * size)
+    return inputs
+
+
+def complexity_scores(inputs: Dict[str, List]) -> List[float]:
+    """Complexity of each request (0-1, higher = more complex)"""
+    size = len(inputs["id"])
+    scores = [0.0] * size
+
+    def add(points, condition):
+        for i, applies in enumerate(condition):
+            if applies:
+                scores[i] += points
+
+    add(0.3, inputs["requires_special_handling"])
+    add(0.2, (weight > 500 for weight in inputs["total_weight"]))
+    add(0.1, (200 < weight <= 500 for weight in inputs["total_weight"]))
+    add(0.15, (staff > 2 for staff in inputs["staff_required"]))
+    add(0.1, (length > 100 for length in inputs["special_instructions_length"]))
+    add(0.1, inputs["insurance_required"])
+    add(
+        0.1,
+        (
+            insured and value > 10000
+            for insured, value in zip(
+                inputs["insurance_required"], inputs["insurance_value"]
+            )
+        ),
+    )
+    add(
+        0.2,
+        (
+            bool(service)
+            and any(complex in service.lower() for complex in COMPLEX_SERVICES)
+            for service in inputs["service_type"]
+        ),
+    )
+    add(
+        0.15,
+        (
+            request_type == "journey" and stops > 3
+            for request_type, stops in zip(inputs["request_type"], inputs["stop_count"])
+        ),
+    )
+    add(0.1, (priority in ("same_day", "express") for priority in inputs["priority"]))
+    for name in ("pickup", "dropoff"):
+        for i, (present, difficulty) in enumerate(
+            zip(inputs[f"{name}_present"], inputs[f"{name}_access_difficulty"])
+        ):
+            if present:
+                scores[i] += ACCESS_DIFFICULTY.get(difficulty, 0)
+
+    return [min(1.0, score) for score in scores]
+
+
+def route_scores(inputs: Dict[str, List]) -> List[float]:
+    """Route efficiency of each request (0-1, higher = better for instant
+    pricing), from how close its pickup and dropoff postcodes are"""
+
+    def score(has_pickup, has_dropoff, pickup, dropoff):
+        if not has_pickup or not has_dropoff:
+            return 0.3  # Incomplete location data
+        if not pickup or not dropoff:
+            return 0.4
+        if pickup[:2] == dropoff[:2]:
+            return 0.9  # Same area
+        if pickup[0] == dropoff[0]:
+            return 0.7  # Same region
+        return 0.4
+
+    return [
+        score(*row)
+        for row in zip(
+            inputs["pickup_present"],
+            inputs["dropoff_present"],
+            inputs["pickup_postcode"],
+            inputs["dropoff_postcode"],
+        )
+    ]
+
+
+def days_ahead(inputs: Dict[str, List], today: date) -> List[Optional[int]]:
+    return [
+        (pickup_date - today).days if pickup_date else None
+        for pickup_date in inputs["preferred_pickup_date"]
+    ]
+
+
+def demand_scores(inputs: Dict[str, List], today: date) -> List[float]:
+    """Demand on each request's pickup date (0-1, higher = more demand)"""
+
+    def score(pickup_date, ahead):
+        if not pickup_date:
+            return 0.6
+        seasonal = 1.2 if pickup_date.month in PEAK_MONTHS else 0.8
+        weekend = 1.3 if pickup_date.weekday() >= 5 else 1.0
+        urgency = 1.4 if ahead <= 1 else 1.2 if ahead <= 7 else 1.0
+        return min(1.0, 0.6 * seasonal * weekend * urgency)
+
+    return [
+        score(pickup_date, ahead)
+        for pickup_date, ahead in zip(
+            inputs["preferred_pickup_date"], days_ahead(inputs, today)
+        )
+    ]
+
+
+def providers_available() -> bool:
+    """Whether any provider takes instant jobs; the same for every request,
+    so a batch checks it once (cached, see ``ProviderAvailabilityService``)"""
+    from .services import ProviderAvailabilityService
+
+    return ProviderAvailabilityService.CACHE.get_or_set(
+        "any", ProviderAvailabilityService._providers_available
+    )
+
+
+def decide(
+    inputs: Dict[str, List],
+    thresholds: StrategyThresholds = None,
+    available: Optional[bool] = None,
+    today: date = None,
+) -> List[Dict]:
+    """
+    The strategy decision for each request of ``inputs``
+
+    Args:
+        thresholds: The policy to apply (default: ``JOB_STRATEGY``)
+        available: Assume providers are (or are not) available instead of
+            checking
+        today: The date notice and demand are measured from
+    """
+    thresholds = thresholds or StrategyThresholds.from_settings()
+    today = today or timezone.now().date()
+    complexity = complexity_scores(inputs)
+    route = route_scores(inputs)
+    demand = demand_scores(inputs, today)
+    ahead = days_ahead(inputs, today)
+    if available is None and any(
+        request_type in thresholds.instant_request_types
+        for request_type in inputs["request_type"]
+    ):
+        available = providers_available()
+
+    decisions = []
+    for i, request_type in enumerate(inputs["request_type"]):
+        if request_type not in thresholds.instant_request_types:
+            decisions.append(
+                {
+                    "strategy": "biddable",
+                    "is_instant": False,
+                    "confidence_score": 1.0,
+                    "reasoning": [
+                        f"Request type '{request_type}' not eligible for instant pricing"
+                    ],
+                    "estimated_response_time": "2-6 hours",
+                    "recommendation": "Route to auction for competitive bidding",
+                }
+            )
+            continue
+
+        reasoning = []
+        confidence = 1.0
+        if complexity[i] > thresholds.complexity_threshold:
+            reasoning.append(f"High complexity score: {complexity[i]:.2f}")
+            confidence -= thresholds.complexity_penalty
+        if route[i] < thresholds.route_threshold:
+            reasoning.append(f"Low route efficiency: {route[i]:.2f}")
+            confidence -= thresholds.route_penalty
+        if not available:
+            reasoning.append("No qualified providers available")
+            confidence -= thresholds.no_providers_penalty
+        if ahead[i] is not None and ahead[i] < thresholds.short_notice_days:
+            reasoning.append("Short notice booking - limited route optimization")
+            confidence -= thresholds.short_notice_penalty
+        if demand[i] > thresholds.high_demand:
+            reasoning.append(f"High demand period: {demand[i]:.2f}")
+            confidence -= thresholds.high_demand_penalty
+        if inputs["service_level"][i] in ("same_day", "express"):
+            reasoning.append("Express/same-day service requires special handling")
+            confidence -= thresholds.service_level_penalty
+        if inputs["total_weight"][i] > thresholds.max_weight_kg:
+            reasoning.append("Heavy items require specialized equipment")
+            confidence -= thresholds.weight_penalty
+        if inputs["estimated_distance"][i] > thresholds.max_distance_km:
+            reasoning.append("Long distance move requires custom planning")
+            confidence -= thresholds.distance_penalty
+
+        scores = {
+            "complexity": complexity[i],
+            "route_efficiency": route[i],
+            "demand": demand[i],
+            "providers_available": bool(available),
+        }
+        base_price = inputs["base_price"][i]
+        if (
+            confidence >= thresholds.decision_threshold
+            and complexity[i] <= thresholds.complexity_threshold
+            and available
+            and route[i] >= thresholds.route_threshold
+        ):
+            reasoning.append("Job suitable for instant pricing algorithm")
+            decisions.append(
+                {
+                    "strategy": "instant",
+                    "is_instant": True,
+                    "confidence_score": confidence,
+                    "reasoning": reasoning,
+                    "scores": scores,
+                    "estimated_price": base_price,
+                    "booking_expires_minutes": 5,
+                    "recommendation": "Show instant price and booking option",
+                }
+            )
+            continue
+
+        reasoning.append("Job requires human assessment via auction")
+        if complexity[i] > thresholds.long_bidding_complexity:
+            bidding_hours = thresholds.long_bidding_hours
+        elif complexity[i] > thresholds.complexity_threshold:
+            bidding_hours = thresholds.standard_bidding_hours
+        else:
+            bidding_hours = thresholds.short_bidding_hours
+        decisions.append(
+            {
+                "strategy": "biddable",
+                "is_instant": False,
+                "confidence_score": confidence,
+                "reasoning": reasoning,
+                "scores": scores,
+                "estimated_response_time": f"{bidding_hours // 12 * 2}-{bidding_hours // 6} hours",
+                "bidding_duration_hours": bidding_hours,
+                "minimum_bid": (
+                    (
+                        Decimal(str(base_price))
+                        * Decimal(str(thresholds.minimum_bid_ratio))
+                    ).quantize(Decimal("0.01"))
+                    if base_price
+                    else None
+                ),
+                "recommendation": "Create auction listing for competitive bidding",
+            }
+        )
+    return decisions
+
+
+def evaluate_strategies(
+    queryset,
+    thresholds: StrategyThresholds = None,
+    available: Optional[bool] = None,
+    today: date = None,
+) -> Dict[str, Dict]:
+    """The strategy decision for every request of ``queryset``, by request id"""
+    inputs = load_inputs(queryset)
+    decisions = decide(inputs, thresholds, available=available, today=today)
+    return {
+        str(request_id): decision
+        for request_id, decision in zip(inputs["id"], decisions)
+    }
+
+
+def summarize(decisions: Dict[str, Dict]) -> Dict:
+    """Counts of a batch of decisions by strategy and by reason"""
+    reasons = Counter(
+        reason for decision in decisions.values() for reason in decision["reasoning"]
+    )
+    return {
+        "requests": len(decisions),
+        "strategies": dict(
+            Counter(decision["strategy"] for decision in decisions.values())
+        ),
+        "reasons": dict(reasons.most_common()),
+    }
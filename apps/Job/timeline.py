@@ -0,0 +1,139 @@
+"""
+Job timeline read model
+
+``JobSerializer`` used to query each job's timeline events (filtered by the
+reader's visibility) and then each event's author, so a list of jobs cost
+two queries per job plus one per event. The timeline is read through here
+instead:
+
+- who is reading a job decides its audience: staff see every event, the
+  job's customer and assigned provider also see the events meant for them,
+  anyone else only the events visible to all;
+- ``timelines_for`` renders the timelines of many jobs at once. Each
+  (job, audience) timeline is cached rendered; the jobs missing from the
+  cache are loaded with one query, with their authors, and grouped in
+  Python, so a page of jobs costs the same few queries however long it is;
+- a job's cached timelines are dropped when one of its events is saved or
+  deleted (signals.py) or bulk-created by the domain event worker
+  (apps/Notification/outbox.py), once the transaction commits.
+
+The ``(job, created_at)`` and ``(job, visibility, created_at)`` indexes of
+``TimelineEvent`` serve both the bulk load and ``get_job_timeline``.
+"""
+
+import logging
+from functools import partial
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+
+from utils.caching import namespace
+
+logger = logging.getLogger(__name__)
+
+TIMELINES = namespace("job_timeline", timeout=300)
+
+# The visibilities each audience reads (None: all of them)
+AUDIENCES = {
+    "staff": None,
+    "customer": ("all", "customer"),
+    "provider": ("all", "provider"),
+    "public": ("all",),
+}
+
+
+def _cache_key(job_id, audience: str) -> str:
+    return f"{job_id}:{audience}"
+
+
+def audiences_for(jobs: List, user=None) -> Dict:
+    """The audience ``user`` belongs to for each of ``jobs``, by job id"""
+    from .models import Job
+
+    if user is None or not getattr(user, "is_authenticated", False):
+        return {job.pk: "public" for job in jobs}
+    if getattr(user, "is_staff", False):
+        return {job.pk: "staff" for job in jobs}
+
+    parties = Job.objects.filter(pk__in=[job.pk for job in jobs]).values_list(
+        "pk", "request__user_id", "assigned_provider__user_id"
+    )
+    audiences = {job.pk: "public" for job in jobs}
+    for job_id, customer_id, provider_user_id in parties:
+        if customer_id == user.pk:
+            audiences[job_id] = "customer"
+        elif provider_user_id == user.pk:
+            audiences[job_id] = "provider"
+    return audiences
+
+
+def _render(events: List) -> List[Dict]:
+    from .serializers import TimelineEventSerializer
+
+    return [dict(event) for event in TimelineEventSerializer(events, many=True).data]
+
+
+def load_timelines(wanted: Dict) -> Dict:
+    """
+    Render the timelines of ``wanted`` ({job id: audience}) from the
+    database with one query, newest event first
+    """
+    from .models import TimelineEvent
+
+    if not wanted:
+        return {}
+    visibilities = set()
+    for audience in set(wanted.values()):
+        if AUDIENCES[audience] is None:
+            visibilities = None
+            break
+        visibilities.update(AUDIENCES[audience])
+
+    events = TimelineEvent.objects.filter(job_id__in=list(wanted)).select_related(
+        "created_by"
+    )
+    if visibilities is not None:
+        events = events.filter(visibility__in=visibilities)
+
+    grouped = {job_id: [] for job_id in wanted}
+    for event in events.order_by("job_id", "-created_at"):
+        allowed = AUDIENCES[wanted[event.job_id]]
+        if allowed is None or event.visibility in allowed:
+            grouped[event.job_id].append(event)
+    return {job_id: _render(job_events) for job_id, job_events in grouped.items()}
+
+
+def timelines_for(jobs: Iterable, user=None) -> Dict:
+    """The rendered timeline of each of ``jobs`` as ``user`` may see it,
+    by job id"""
+    jobs = [job for job in jobs if job is not None and job.pk is not None]
+    if not jobs:
+        return {}
+    audiences = audiences_for(jobs, user)
+
+    timelines, missing = {}, {}
+    for job_id, audience in audiences.items():
+        timeline = TIMELINES.get(_cache_key(job_id, audience))
+        if timeline is None:
+            missing[job_id] = audience
+        else:
+            timelines[job_id] = timeline
+
+    for job_id, timeline in load_timelines(missing).items():
+        TIMELINES.set(_cache_key(job_id, missing[job_id]), timeline)
+        timelines[job_id] = timeline
+    return timelines
+
+
+def _drop_timelines(job_ids):
+    for job_id in job_ids:
+        for audience in AUDIENCES:
+            TIMELINES.delete(_cache_key(job_id, audience))
+
+
+def timelines_changed(job_ids: Iterable):
+    """Drop the cached timelines of ``job_ids`` once the current
+    transaction commits"""
+    job_ids = {job_id for job_id in job_ids if job_id is not None}
+    if job_ids:
+        transaction.on_commit(partial(_drop_timelines, job_ids))
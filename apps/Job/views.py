@@ -5,11 +5,13 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Q
+from django.core.exceptions import ValidationError
 from .models import Job
 from .serializers import JobSerializer
 from apps.Request.models import Request
 from apps.Bidding.models import Bid
 from apps.Bidding.serializers import BidSerializer
+from apps.Bidding.services import BidNotAcceptable, accept_bid
 from apps.Request.views import RequestViewSet
 from decimal import Decimal
 
@@ -126,34 +128,22 @@ class JobViewSet(viewsets.ModelViewSet):
                 {"error": "Bid ID is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            bid = Bid.objects.get(id=bid_id, job=job)
-        except Bid.DoesNotExist:
-            return Response(
-                {"error": "Bid not found"}, status=status.HTTP_404_NOT_FOUND
-            )
-
         # if job.request.customer != request.user:
         #     return Response(
         #         {"error": "Only the job owner can accept bids"},
         #         status=status.HTTP_403_FORBIDDEN,
         #     )
 
-        # assign provider to job
-        job.assigned_provider = bid.provider
-        job.save()
-
-        # Update job and bid status
-        job.status = "assigned"
-        job.save()
-
-        bid.status = "accepted"
-        bid.save()
-
-        # Reject all other bids
-        Bid.objects.filter(job=job, status="pending").exclude(id=bid_id).update(
-            status="rejected"
-        )
+        # Accept the bid, assign the job and reject the other bids, with the
+        # job locked against concurrent accepts
+        try:
+            accept_bid(bid_id, job_id=job.id, actor=request.user)
+        except (Bid.DoesNotExist, ValidationError):
+            return Response(
+                {"error": "Bid not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        except BidNotAcceptable as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
             {"message": "Bid accepted successfully"}, status=status.HTTP_200_OK
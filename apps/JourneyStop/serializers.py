@@ -4,6 +4,9 @@ from .models import JourneyStop
 from apps.Location.serializer import LocationSerializer
 from apps.Location.models import Location
 from apps.Request.models import Request
+from utils.debug_trace import get_tracer
+
+tracer = get_tracer(__name__)
 
 
 class JourneyStopSerializer(serializers.ModelSerializer):
@@ -42,7 +45,10 @@ class JourneyStopSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "external_id"]
 
     def create(self, validated_data):
-        print("validated_data", json.dumps(validated_data, indent=4, default=str))
+        if tracer.is_enabled():
+            tracer.debug(
+                "validated_data {}", json.dumps(validated_data, indent=4, default=str)
+            )
         location_data = validated_data.pop("location", {})
 
         # Handle case where location is already an ID (from bulk_create)
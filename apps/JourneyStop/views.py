@@ -8,6 +8,11 @@ from .models import JourneyStop
 from .serializers import JourneyStopSerializer
 from apps.Request.models import Request
 from apps.Location.models import Location
+import logging
+from utils.debug_trace import get_tracer
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class JourneyStopViewSet(viewsets.ModelViewSet):
@@ -39,7 +44,7 @@ class JourneyStopViewSet(viewsets.ModelViewSet):
         """
         Create a new journey stop with location data
         """
-        print("creating with data", request.data)
+        tracer.debug("creating with data {}", request.data)
         try:
             # Extract location data from request
             location_data = request.data.pop("location", None)
@@ -91,7 +96,7 @@ class JourneyStopViewSet(viewsets.ModelViewSet):
         """
         Create multiple journey stops at once
         """
-        print("Hit the bulk create endpoint")
+        tracer.debug("Hit the bulk create endpoint")
         try:
             stops_data = (
                 request.data if isinstance(request.data, list) else [request.data]
@@ -109,7 +114,7 @@ class JourneyStopViewSet(viewsets.ModelViewSet):
             response_data = self.get_serializer(created_stops, many=True).data
             return Response(response_data, status=status.HTTP_201_CREATED)
         except Exception as e:
-            print(f"Error in bulk_create: {str(e)}")
+            logger.error(f"Error in bulk_create: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=["post"])
@@ -0,0 +1,176 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.Location.models import PostcodeRecord
+from apps.Location.postcode_index import (
+    PostcodeIndex,
+    compact_postcode,
+    format_postcode,
+    get_index_path,
+)
+
+# PostcodeRecord field -> default CSV column
+DEFAULT_COLUMNS = {
+    "postcode": "postcode",
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "admin_district": "admin_district",
+    "admin_county": "admin_county",
+    "region": "region",
+    "country": "country",
+}
+
+UPDATE_FIELDS = [
+    "outcode",
+    "latitude",
+    "longitude",
+    "admin_district",
+    "admin_county",
+    "region",
+    "country",
+]
+
+
+class Command(BaseCommand):
+    help = "Bulk-load a UK postcode CSV dump into the local postcode table and index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "csv_path",
+            nargs="?",
+            help="Path to the postcode CSV file (omit with --index-only)",
+        )
+        parser.add_argument(
+            "--column",
+            action="append",
+            default=[],
+            metavar="FIELD=HEADER",
+            help="Map a postcode field to a CSV header, e.g. --column postcode=pcds",
+        )
+        parser.add_argument(
+            "--terminated-column",
+            type=str,
+            help="Skip rows where this column is non-empty (e.g. doterm)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk insert (default: 5000)",
+        )
+        parser.add_argument(
+            "--truncate",
+            action="store_true",
+            help="Delete all stored postcodes before loading",
+        )
+        parser.add_argument(
+            "--index-only",
+            action="store_true",
+            help="Only rebuild the index file from the postcode table",
+        )
+
+    def handle(self, *args, **options):
+        if not options["index_only"]:
+            if not options["csv_path"]:
+                raise CommandError("csv_path is required unless --index-only is set")
+            self.load_csv(options)
+
+        self.build_index()
+
+    def load_csv(self, options):
+        """Upsert every row of the CSV into the postcode table in batches"""
+        columns = dict(DEFAULT_COLUMNS)
+        for mapping in options["column"]:
+            field, _, header = mapping.partition("=")
+            if field not in DEFAULT_COLUMNS or not header:
+                raise CommandError(f"Invalid column mapping: {mapping}")
+            columns[field] = header
+
+        terminated_column = options.get("terminated_column")
+        batch_size = options["batch_size"]
+
+        if options["truncate"]:
+            deleted, _ = PostcodeRecord.objects.all().delete()
+            self.stdout.write(f"Deleted {deleted} existing postcodes")
+
+        loaded = 0
+        skipped = 0
+        batch = []
+
+        with open(options["csv_path"], newline="", encoding="utf-8-sig") as handle:
+            reader = csv.DictReader(handle)
+            if columns["postcode"] not in (reader.fieldnames or []):
+                raise CommandError(
+                    f"Postcode column '{columns['postcode']}' not found in CSV"
+                )
+
+            for row in reader:
+                if terminated_column and row.get(terminated_column):
+                    skipped += 1
+                    continue
+
+                record = self.build_record(row, columns)
+                if record is None:
+                    skipped += 1
+                    continue
+
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    loaded += self.flush(batch)
+                    batch = []
+                    self.stdout.write(f"Loaded {loaded} postcodes...")
+
+        if batch:
+            loaded += self.flush(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Loaded {loaded} postcodes ({skipped} rows skipped)")
+        )
+
+    def build_record(self, row, columns):
+        """Convert a CSV row into an unsaved PostcodeRecord"""
+        compact = compact_postcode(row.get(columns["postcode"]) or "")
+        if not 5 <= len(compact) <= 7:
+            return None
+
+        return PostcodeRecord(
+            postcode=format_postcode(compact),
+            outcode=compact[:-3],
+            latitude=self.parse_coordinate(row.get(columns["latitude"])),
+            longitude=self.parse_coordinate(row.get(columns["longitude"])),
+            admin_district=(row.get(columns["admin_district"]) or "")[:100],
+            admin_county=(row.get(columns["admin_county"]) or "")[:100],
+            region=(row.get(columns["region"]) or "")[:100],
+            country=(row.get(columns["country"]) or "")[:50],
+        )
+
+    def parse_coordinate(self, value):
+        try:
+            return round(Decimal(value), 6) if value not in (None, "") else None
+        except InvalidOperation:
+            return None
+
+    def flush(self, batch):
+        """Upsert a batch of postcodes in a single statement"""
+        with transaction.atomic():
+            PostcodeRecord.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["postcode"],
+                update_fields=UPDATE_FIELDS,
+            )
+        return len(batch)
+
+    def build_index(self):
+        """Write the memory-mapped prefix index from the postcode table"""
+        path = get_index_path()
+        postcodes = PostcodeRecord.objects.values_list("postcode", flat=True).iterator(
+            chunk_size=10000
+        )
+        count = PostcodeIndex.write(path, postcodes)
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote postcode index with {count} postcodes to {path}")
+        )
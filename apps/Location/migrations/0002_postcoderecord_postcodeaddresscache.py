@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:00
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Location', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostcodeRecord',
+            fields=[
+                ('postcode', models.CharField(max_length=8, primary_key=True, serialize=False)),
+                ('outcode', models.CharField(db_index=True, max_length=4)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('admin_district', models.CharField(blank=True, max_length=100)),
+                ('admin_county', models.CharField(blank=True, max_length=100)),
+                ('region', models.CharField(blank=True, max_length=100)),
+                ('country', models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                'verbose_name': 'Postcode',
+                'verbose_name_plural': 'Postcodes',
+                'db_table': 'postcode',
+                'managed': True,
+                'indexes': [models.Index(fields=['postcode'], name='postcode_prefix_idx', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostcodeAddressCache',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('postcode', models.CharField(max_length=8)),
+                ('source', models.CharField(max_length=50)),
+                ('addresses', models.JSONField(default=list)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Postcode Address Cache',
+                'verbose_name_plural': 'Postcode Address Cache',
+                'db_table': 'postcode_address_cache',
+                'managed': True,
+                'unique_together': {('postcode', 'source')},
+            },
+        ),
+    ]
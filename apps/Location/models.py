@@ -31,6 +31,73 @@ class Location(Basemodel):
         verbose_name = "Location"
         verbose_name_plural = "Locations"
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        print("Location init:", self.address_line1)
+
+class PostcodeRecord(models.Model):
+    """
+    Locally stored UK postcode with its centroid, bulk-loaded from a postcode
+    dump by the ``load_postcodes`` management command
+    """
+
+    postcode = models.CharField(max_length=8, primary_key=True)  # e.g. "SW1A 1AA"
+    outcode = models.CharField(max_length=4, db_index=True)
+    latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True
+    )
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, null=True, blank=True
+    )
+    admin_district = models.CharField(max_length=100, blank=True)
+    admin_county = models.CharField(max_length=100, blank=True)
+    region = models.CharField(max_length=100, blank=True)
+    country = models.CharField(max_length=50, blank=True)
+
+    def __str__(self):
+        return self.postcode
+
+    def to_postcode_info(self):
+        """Return the record in the same shape as a postcodes.io result"""
+        return {
+            "postcode": self.postcode,
+            "outcode": self.outcode,
+            "latitude": float(self.latitude) if self.latitude is not None else None,
+            "longitude": (
+                float(self.longitude) if self.longitude is not None else None
+            ),
+            "admin_district": self.admin_district,
+            "admin_county": self.admin_county,
+            "region": self.region,
+            "country": self.country,
+        }
+
+    class Meta:
+        db_table = "postcode"
+        managed = True
+        verbose_name = "Postcode"
+        verbose_name_plural = "Postcodes"
+        indexes = [
+            # Supports LIKE 'PREFIX%' autocomplete on PostgreSQL
+            models.Index(
+                fields=["postcode"],
+                name="postcode_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+
+class PostcodeAddressCache(Basemodel):
+    """Write-through cache of address lists fetched from external providers"""
+
+    postcode = models.CharField(max_length=8)
+    source = models.CharField(max_length=50)
+    addresses = models.JSONField(default=list)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.postcode} ({self.source})"
+
+    class Meta:
+        db_table = "postcode_address_cache"
+        managed = True
+        verbose_name = "Postcode Address Cache"
+        verbose_name_plural = "Postcode Address Cache"
+        unique_together = ("postcode", "source")
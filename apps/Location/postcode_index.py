@@ -0,0 +1,173 @@
+"""
+Local UK postcode index
+
+A sorted array of fixed-width postcode keys stored in a flat file and
+memory-mapped, so every gunicorn worker shares the same pages. Lookups and
+prefix autocomplete are binary searches, with no database or network access.
+The file is written by the ``load_postcodes`` management command.
+"""
+
+import logging
+import mmap
+import os
+import threading
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Compact UK postcodes are at most 7 characters ("SW1A1AA"); shorter ones are
+# right-padded with spaces, which sort below every digit and letter
+RECORD_SIZE = 7
+
+
+def compact_postcode(postcode: str) -> str:
+    """Strip spaces and uppercase a postcode, e.g. "sw1a 1aa" -> "SW1A1AA" """
+    return postcode.replace(" ", "").upper()
+
+
+def format_postcode(postcode: str) -> str:
+    """Format a postcode with the standard single space before the inward code"""
+    postcode = compact_postcode(postcode)
+    if len(postcode) >= 5:
+        return postcode[:-3] + " " + postcode[-3:]
+    return postcode
+
+
+class PostcodeIndex:
+    """Read-only, memory-mapped sorted index of UK postcodes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = len(self._mmap) // RECORD_SIZE
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def _key(self, position: int) -> bytes:
+        start = position * RECORD_SIZE
+        return self._mmap[start : start + RECORD_SIZE]
+
+    def _lower_bound(self, key: bytes) -> int:
+        """Position of the first record that is >= key"""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def contains(self, postcode: str) -> bool:
+        """Check whether a postcode exists in the index"""
+        compact = compact_postcode(postcode)
+        if not compact or len(compact) > RECORD_SIZE:
+            return False
+
+        key = compact.ljust(RECORD_SIZE).encode("ascii", "ignore")
+        position = self._lower_bound(key)
+        return position < self._count and self._key(position) == key
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return up to ``limit`` formatted postcodes starting with ``prefix``"""
+        compact = compact_postcode(prefix)
+        if not compact or len(compact) > RECORD_SIZE:
+            return []
+
+        key = compact.encode("ascii", "ignore")
+        position = self._lower_bound(key)
+
+        suggestions = []
+        while position < self._count and len(suggestions) < limit:
+            record = self._key(position)
+            if not record.startswith(key):
+                break
+            suggestions.append(format_postcode(record.decode("ascii").rstrip()))
+            position += 1
+
+        return suggestions
+
+    @staticmethod
+    def write(path: str, postcodes: Iterable[str]) -> int:
+        """
+        Write a sorted index file for the given postcodes
+
+        The file is written next to the destination and swapped in atomically,
+        so readers never see a partially written index.
+
+        Returns:
+            int: Number of postcodes written
+        """
+        keys = sorted(
+            {
+                compact.ljust(RECORD_SIZE)
+                for compact in (compact_postcode(pc) for pc in postcodes)
+                if compact and len(compact) <= RECORD_SIZE
+            }
+        )
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as handle:
+            for key in keys:
+                handle.write(key.encode("ascii", "ignore"))
+        os.replace(temp_path, path)
+
+        return len(keys)
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_index_path() -> str:
+    return str(
+        getattr(
+            settings,
+            "POSTCODE_INDEX_PATH",
+            os.path.join(settings.BASE_DIR, "data", "postcodes.idx"),
+        )
+    )
+
+
+def get_postcode_index() -> Optional[PostcodeIndex]:
+    """
+    Return the process-wide postcode index, or None if no index has been built
+
+    The index is reopened when the file on disk is replaced by a reload.
+    """
+    global _index, _index_mtime
+
+    path = get_index_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    if _index is not None and _index_mtime == mtime:
+        return _index
+
+    with _index_lock:
+        if _index is None or _index_mtime != mtime:
+            try:
+                new_index = PostcodeIndex(path)
+            except (OSError, ValueError) as e:
+                # ValueError: mmap of an empty file
+                logger.error(f"Could not open postcode index {path}: {str(e)}")
+                return None
+
+            # The previous mapping is left for the garbage collector so that
+            # readers still holding it are not cut off mid-lookup
+            _index, _index_mtime = new_index, mtime
+            logger.info(f"Loaded postcode index with {len(new_index)} postcodes")
+
+    return _index
@@ -3,13 +3,257 @@ Postcode Validation Services
 Simplified service using only Google Maps API for clean, structured address data
 """
 
-import requests
 import re
+import threading
+import time
 import logging
-from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import timedelta
 from django.conf import settings
+from django.utils import timezone
+
+from utils.debug_trace import get_tracer
+from utils.http_client import http_client
+
+from .models import PostcodeAddressCache, PostcodeRecord
+from .postcode_index import format_postcode, get_postcode_index
 
 logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+
+# Shared worker pool for postcode/address providers
+LOOKUP_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, "POSTCODE_LOOKUP_MAX_WORKERS", 8),
+    thread_name_prefix="postcode-lookup",
+)
+# Nested per-prediction calls get their own pool so they never wait on a
+# provider task that is itself waiting on them
+DETAILS_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, "POSTCODE_LOOKUP_MAX_WORKERS", 8),
+    thread_name_prefix="place-details",
+)
+
+
+# Provider tasks cancelled before a pool thread picked them up, by provider
+QUEUE_CANCELLATIONS = Counter()
+_queue_cancellations_lock = threading.Lock()
+
+
+class _LookupTask:
+    """
+    A provider call run in a copy of the caller's context, so outbound calls
+    are attributed to the current request's metrics, that records when a
+    pool thread starts running it
+    """
+
+    def __init__(self, func: Callable[[], object]):
+        self.func = func
+        self.context = copy_context()
+        self.started = None
+
+    def __call__(self):
+        self.started = time.monotonic()
+        return self.context.run(self.func)
+
+
+def _record_queue_cancellation(name: str, waited: float):
+    with _queue_cancellations_lock:
+        QUEUE_CANCELLATIONS[name] += 1
+        total = QUEUE_CANCELLATIONS[name]
+    logger.warning(
+        f"Postcode provider {name} cancelled after {waited * 1000:.0f}ms in the "
+        f"lookup queue (queue_cancellations={total})"
+    )
+
+
+def fan_out_lookup(
+    providers: Dict[str, Callable[[], object]],
+    timeouts: Optional[Dict[str, float]] = None,
+    enough: Optional[int] = None,
+    counted: Optional[List[str]] = None,
+) -> Dict[str, object]:
+    """
+    Run provider lookups concurrently and collect their results
+
+    A provider's timeout runs from when a pool thread starts it, so lookups
+    queued behind other requests' providers are not timed out by the wait.
+    A provider still queued after ``POSTCODE_LOOKUP_QUEUE_TIMEOUT`` seconds
+    is cancelled without running.
+
+    Args:
+        providers (Dict): Provider name -> zero-argument callable
+        timeouts (Dict): Optional per-provider timeout in seconds
+        enough (int): Stop waiting once this many results have been collected
+        counted (List): Providers whose results count towards ``enough``
+            (defaults to all providers)
+
+    Returns:
+        Dict: Provider name -> result. Providers that failed, timed out or
+        were not waited for are omitted.
+    """
+    timeouts = timeouts or {}
+    default_timeout = getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5)
+    queue_timeout = getattr(settings, "POSTCODE_LOOKUP_QUEUE_TIMEOUT", default_timeout)
+    counted = set(counted if counted is not None else providers.keys())
+
+    started = time.monotonic()
+    tasks = {name: _LookupTask(func) for name, func in providers.items()}
+    futures = {LOOKUP_EXECUTOR.submit(task): name for name, task in tasks.items()}
+
+    def deadline(future) -> float:
+        name = futures[future]
+        task_started = tasks[name].started
+        if task_started is None:
+            return started + queue_timeout
+        return task_started + timeouts.get(name, default_timeout)
+
+    results = {}
+    found = 0
+    pending = set(futures)
+
+    while pending:
+        now = time.monotonic()
+        for future in [future for future in pending if deadline(future) <= now]:
+            name = futures[future]
+            if tasks[name].started is None and future.cancel():
+                _record_queue_cancellation(name, now - started)
+            elif tasks[name].started is None:
+                # Picked up by a pool thread just now; its timeout has begun
+                continue
+            else:
+                logger.warning(f"Postcode provider timed out: {name}")
+            pending.discard(future)
+        if not pending:
+            break
+
+        next_deadline = min(deadline(future) for future in pending)
+        done, pending = wait(
+            pending, timeout=max(0, next_deadline - now), return_when=FIRST_COMPLETED
+        )
+
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Postcode provider {name} failed: {str(e)}")
+                continue
+
+            if name in counted and results[name]:
+                found += len(results[name])
+
+        if enough is not None and found >= enough:
+            logger.info(
+                f"Postcode lookup returned early with {found} results after "
+                f"{(time.monotonic() - started) * 1000:.0f}ms"
+            )
+            for future in pending:
+                future.cancel()
+            break
+
+    return results
+
+
+def lookup_local_postcode(postcode: str) -> Optional[Dict]:
+    """
+    Look up a postcode in the local postcode table
+
+    Returns:
+        Dict: postcodes.io-shaped postcode info, or None if not stored locally
+    """
+    record = PostcodeRecord.objects.filter(postcode=format_postcode(postcode)).first()
+    return record.to_postcode_info() if record else None
+
+
+def suggest_postcodes(query: str, limit: int = 10) -> Optional[List[str]]:
+    """
+    Prefix autocomplete against the local postcode index
+
+    Returns:
+        List: Matching postcodes, or None if no local index has been built
+    """
+    index = get_postcode_index()
+    if index is None:
+        return None
+    return index.autocomplete(query, limit=limit)
+
+
+def get_cached_addresses(postcode: str, sources) -> Dict[str, object]:
+    """Return unexpired cached provider results for a postcode, keyed by source"""
+    entries = PostcodeAddressCache.objects.filter(
+        postcode=format_postcode(postcode),
+        source__in=list(sources),
+        expires_at__gt=timezone.now(),
+    ).values_list("source", "addresses")
+    return dict(entries)
+
+
+def store_cached_addresses(postcode: str, results: Dict[str, object]):
+    """Write non-empty provider results through to the postcode address cache"""
+    ttl = getattr(settings, "POSTCODE_ADDRESS_CACHE_TTL", 60 * 60 * 24 * 30)
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    postcode = format_postcode(postcode)
+
+    entries = [
+        PostcodeAddressCache(
+            postcode=postcode, source=source, addresses=result, expires_at=expires_at
+        )
+        for source, result in results.items()
+        if result
+    ]
+    if not entries:
+        return
+
+    try:
+        PostcodeAddressCache.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["postcode", "source"],
+            update_fields=["addresses", "expires_at", "updated_at"],
+        )
+    except Exception as e:
+        # A cache write failure must never fail the lookup itself
+        logger.error(f"Error caching addresses for {postcode}: {str(e)}")
+
+
+def cached_fan_out_lookup(
+    postcode: str,
+    providers: Dict[str, Callable[[], object]],
+    timeouts: Optional[Dict[str, float]] = None,
+    enough: Optional[int] = None,
+    counted: Optional[List[str]] = None,
+) -> Dict[str, object]:
+    """
+    ``fan_out_lookup`` with the postcode address cache in front of it
+
+    Cached sources are served from the database; only the remaining providers
+    are called, and their results are written back to the cache.
+    """
+    counted = list(counted if counted is not None else providers.keys())
+    cached = get_cached_addresses(postcode, providers.keys())
+
+    if enough is not None:
+        already = sum(
+            len(result) for source, result in cached.items() if source in counted
+        )
+        if already >= enough:
+            return cached
+        enough -= already
+
+    results = fan_out_lookup(
+        {name: func for name, func in providers.items() if name not in cached},
+        timeouts=timeouts,
+        enough=enough,
+        counted=counted,
+    )
+    store_cached_addresses(postcode, results)
+
+    results.update(cached)
+    return results
 
 
 class PostcodeValidationService:
@@ -124,13 +368,20 @@ class PostcodeValidationService:
         addresses = []
 
         try:
-            # Method 1: Google Places Autocomplete for the postcode
-            places_addresses = self._get_addresses_from_google_places(postcode)
-            addresses.extend(places_addresses)
-
-            # Method 2: Google Geocoding for the postcode
-            geocoding_addresses = self._get_addresses_from_google_geocoding(postcode)
-            addresses.extend(geocoding_addresses)
+            # Places Autocomplete and Geocoding are independent, so query both at once
+            results = cached_fan_out_lookup(
+                postcode,
+                {
+                    "google_place_details": lambda: self._get_addresses_from_google_places(
+                        postcode
+                    ),
+                    "google_geocoding": lambda: self._get_addresses_from_google_geocoding(
+                        postcode
+                    ),
+                },
+            )
+            addresses.extend(results.get("google_place_details", []))
+            addresses.extend(results.get("google_geocoding", []))
 
             # Remove duplicates based on formatted_address
             seen_addresses = set()
@@ -159,7 +410,7 @@ class PostcodeValidationService:
                 "types": "address",
             }
 
-            response = requests.get(
+            response = http_client.get(
                 "https://maps.googleapis.com/maps/api/place/autocomplete/json",
                 params=params,
                 timeout=10,
@@ -170,16 +421,19 @@ class PostcodeValidationService:
                 if data.get("status") == "OK":
                     predictions = data.get("predictions", [])
 
-                    addresses = []
-                    for pred in predictions:
-                        # Get detailed place information
-                        place_details = self._get_google_place_details(
-                            pred.get("place_id")
+                    # Fetch place details for every prediction concurrently
+                    place_ids = [pred.get("place_id") for pred in predictions]
+                    futures = [
+                        DETAILS_EXECUTOR.submit(
+                            copy_context().run,
+                            self._get_google_place_details,
+                            place_id,
                         )
-                        if place_details:
-                            addresses.append(place_details)
+                        for place_id in place_ids
+                    ]
 
-                    return addresses
+                    details = [future.result() for future in futures]
+                    return [detail for detail in details if detail]
 
         except Exception as e:
             logger.error(f"Error getting addresses from Google Places: {str(e)}")
@@ -196,7 +450,7 @@ class PostcodeValidationService:
                 "language": "en",
             }
 
-            response = requests.get(
+            response = http_client.get(
                 "https://maps.googleapis.com/maps/api/geocode/json",
                 params=params,
                 timeout=10,
@@ -232,7 +486,7 @@ class PostcodeValidationService:
                 "language": "en",
             }
 
-            response = requests.get(
+            response = http_client.get(
                 "https://maps.googleapis.com/maps/api/place/details/json",
                 params=params,
                 timeout=10,
@@ -355,7 +609,6 @@ def get_addresses_for_postcode(postcode: str) -> Dict:
 
 
 import os
-import requests
 
 
 def get_distance_and_travel_time(locations, fuel_efficiency_l_per_100km=10.0):
@@ -378,7 +631,7 @@ def get_distance_and_travel_time(locations, fuel_efficiency_l_per_100km=10.0):
             lat, lon = loc
         coords.append([lon, lat])
 
-    print(f"[OpenRouteService] Coordinates sent: {coords}")
+    tracer.debug("[OpenRouteService] Coordinates sent: {}", coords)
 
     url = "https://api.openrouteservice.org/v2/directions/driving-car"
     headers = {
@@ -386,9 +639,12 @@ def get_distance_and_travel_time(locations, fuel_efficiency_l_per_100km=10.0):
         "Content-Type": "application/json",
     }
     body = {"coordinates": coords}
-    response = requests.post(url, json=body, headers=headers)
-    print(
-        f"[OpenRouteService] Raw response: {response.status_code} {response.text[:500]}"
+    # Directions requests have no side effects, so they are safe to retry
+    response = http_client.post(url, json=body, headers=headers, retries=1)
+    tracer.debug(
+        "[OpenRouteService] Raw response: {} {}",
+        response.status_code,
+        response.text[:500],
     )
     if response.status_code != 200:
         raise Exception(
@@ -399,8 +655,11 @@ def get_distance_and_travel_time(locations, fuel_efficiency_l_per_100km=10.0):
     distance_miles = summary["distance"] / 1609.34
     distance_km = distance_miles * 1.60934
     estimated_fuel_liters = distance_km * (fuel_efficiency_l_per_100km / 100)
-    print(
-        f"[OpenRouteService] Calculated: {distance_miles:.2f} miles, {summary['duration']} seconds, {estimated_fuel_liters:.2f} liters"
+    tracer.debug(
+        "[OpenRouteService] Calculated: {:.2f} miles, {} seconds, {:.2f} liters",
+        distance_miles,
+        summary["duration"],
+        estimated_fuel_liters,
     )
     return {
         "distance": distance_miles,  # in miles
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import api_view, permission_classes
@@ -6,7 +7,6 @@ from .models import Location
 from .serializer import LocationSerializer
 from rest_framework.response import Response
 from rest_framework import status
-import requests
 import logging
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -14,9 +14,17 @@ from rest_framework.views import APIView
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 import re
-from .services import PostcodeValidationService
+from utils.http_client import http_client
+from .services import (
+    PostcodeValidationService,
+    cached_fan_out_lookup,
+    lookup_local_postcode,
+    suggest_postcodes,
+)
+from utils.debug_trace import get_tracer
 
 logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class LocationViewSet(viewsets.ModelViewSet):
@@ -68,7 +76,7 @@ def validate_postcode_ideal(request, postcode):
         headers = {"Authorization": f"api_key={API_KEY}"}
 
         logger.info(f"Calling Ideal Postcodes API: {api_url}")
-        response = requests.get(api_url, headers=headers)
+        response = http_client.get(api_url, headers=headers)
 
         if response.status_code == 200:
             data = response.json()
@@ -188,11 +196,27 @@ def validate_postcode(request, postcode):
         logger.info(f"Validating postcode: {postcode}")
         formatted_postcode = postcode.replace(" ", "").upper()
 
+        # Answer from the local postcode store when the postcode is loaded
+        local_info = lookup_local_postcode(formatted_postcode)
+        if local_info:
+            return Response(
+                {
+                    "isValid": True,
+                    "requiresManualEntry": True,
+                    "context": {
+                        "post_town": local_info["admin_district"],
+                        "county": local_info["admin_county"],
+                        "region": local_info["region"],
+                    },
+                    "message": "Postcode is valid. Please enter your full address.",
+                }
+            )
+
         # Call postcodes.io API to validate postcode only
         validate_url = (
             f"https://api.postcodes.io/postcodes/{formatted_postcode}/validate"
         )
-        response = requests.get(validate_url)
+        response = http_client.get(validate_url)
 
         if response.status_code == 200:
             data = response.json()
@@ -201,7 +225,7 @@ def validate_postcode(request, postcode):
             if is_valid:
                 # Get postcode details for context
                 details_url = f"https://api.postcodes.io/postcodes/{formatted_postcode}"
-                details_response = requests.get(details_url)
+                details_response = http_client.get(details_url)
 
                 context = {}
                 if details_response.status_code == 200:
@@ -251,9 +275,15 @@ class PostcodeSuggestionsView(APIView):
             return Response({"suggestions": []})
 
         try:
+            # Serve from the local postcode index when one has been built
+            suggestions = suggest_postcodes(query)
+            if suggestions is not None:
+                return Response({"suggestions": suggestions})
+
             # Call postcodes.io API for suggestions
-            response = requests.get(
-                f"https://api.postcodes.io/postcodes/{query}/autocomplete"
+            response = http_client.get(
+                f"https://api.postcodes.io/postcodes/{query}/autocomplete",
+                timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5),
             )
             data = response.json()
 
@@ -309,7 +339,7 @@ class GoogleAddressAutocompleteView(APIView):
             if session_token:
                 params["sessiontoken"] = session_token
 
-            response = requests.get(
+            response = http_client.get(
                 "https://maps.googleapis.com/maps/api/place/autocomplete/json",
                 params=params,
                 timeout=10,
@@ -362,7 +392,7 @@ def google_place_details(request):
         if not place_id:
             return Response({"error": "place_id parameter required"}, status=400)
 
-        print(f"🏠 ADDRESS SELECTED - Getting details for place_id: {place_id}")
+        tracer.debug("🏠 ADDRESS SELECTED - Getting details for place_id: {}", place_id)
 
         # Get Google Maps API key from settings
         google_api_key = getattr(settings, "GOOGLE_MAPS_API_KEY", None)
@@ -386,7 +416,7 @@ def google_place_details(request):
         if session_token:
             params["sessiontoken"] = session_token
 
-        response = requests.get(
+        response = http_client.get(
             "https://maps.googleapis.com/maps/api/place/details/json",
             params=params,
             timeout=10,
@@ -409,10 +439,12 @@ def google_place_details(request):
             geometry = result.get("geometry", {})
             location = geometry.get("location", {})
 
-            print(f"📍 SELECTED ADDRESS: {formatted_address}")
+            tracer.debug("📍 SELECTED ADDRESS: {}", formatted_address)
             if location:
-                print(
-                    f"🌍 COORDINATES: Lat {location.get('lat')}, Lng {location.get('lng')}"
+                tracer.debug(
+                    "🌍 COORDINATES: Lat {}, Lng {}",
+                    location.get("lat"),
+                    location.get("lng"),
                 )
 
             # Parse address components for easier frontend use
@@ -421,17 +453,19 @@ def google_place_details(request):
             )
 
             if parsed_address:
-                print(f"🏘️  ADDRESS COMPONENTS:")
+                tracer.debug("🏘️  ADDRESS COMPONENTS:")
                 if parsed_address.get("street_number"):
-                    print(f"   - Street Number: {parsed_address['street_number']}")
+                    tracer.debug(
+                        "   - Street Number: {}", parsed_address["street_number"]
+                    )
                 if parsed_address.get("route"):
-                    print(f"   - Street: {parsed_address['route']}")
+                    tracer.debug("   - Street: {}", parsed_address["route"])
                 if parsed_address.get("locality"):
-                    print(f"   - City: {parsed_address['locality']}")
+                    tracer.debug("   - City: {}", parsed_address["locality"])
                 if parsed_address.get("postal_code"):
-                    print(f"   - Postcode: {parsed_address['postal_code']}")
+                    tracer.debug("   - Postcode: {}", parsed_address["postal_code"])
                 if parsed_address.get("country"):
-                    print(f"   - Country: {parsed_address['country']}")
+                    tracer.debug("   - Country: {}", parsed_address["country"])
 
             # Extract useful information
             place_data = {
@@ -444,7 +478,7 @@ def google_place_details(request):
             place_data["parsed_address"] = parsed_address
 
             logger.info(f"Retrieved place details for place_id: {place_id}")
-            print(f"✅ ADDRESS SELECTION COMPLETE\n")
+            tracer.debug("✅ ADDRESS SELECTION COMPLETE")
 
             return Response({"result": place_data, "status": "OK"})
         else:
@@ -458,7 +492,7 @@ def google_place_details(request):
 
     except Exception as e:
         logger.error(f"Error in Google place details: {str(e)}", exc_info=True)
-        print(f"❌ ERROR getting address details: {str(e)}")
+        tracer.debug("❌ ERROR getting address details: {}", e)
         return Response(
             {"error": "Place details request failed"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -534,7 +568,7 @@ def geocode_address(request):
             "language": "en",
         }
 
-        response = requests.get(
+        response = http_client.get(
             "https://maps.googleapis.com/maps/api/geocode/json",
             params=params,
             timeout=10,
@@ -591,7 +625,7 @@ def google_address_autocomplete_simple(request):
         if not input_text:
             return JsonResponse({"predictions": []})
 
-        print(f"🔍 SEARCHING ADDRESSES for: '{input_text}'")
+        tracer.debug("🔍 SEARCHING ADDRESSES for: '{}'", input_text)
 
         # Get Google Maps API key from settings
         google_api_key = getattr(settings, "GOOGLE_MAPS_API_KEY", None)
@@ -613,7 +647,7 @@ def google_address_autocomplete_simple(request):
         if session_token:
             params["sessiontoken"] = session_token
 
-        response = requests.get(
+        response = http_client.get(
             "https://maps.googleapis.com/maps/api/place/autocomplete/json",
             params=params,
             timeout=10,
@@ -625,7 +659,11 @@ def google_address_autocomplete_simple(request):
             # Check for API errors
             if data.get("status") != "OK":
                 logger.warning(f'Google API returned status: {data.get("status")}')
-                print(f"⚠️  API Status: {data.get('status')} for search: '{input_text}'")
+                tracer.debug(
+                    "⚠️  API Status: {} for search: '{}'",
+                    data.get("status"),
+                    input_text,
+                )
                 return JsonResponse({"predictions": [], "status": data.get("status")})
 
             predictions = data.get("predictions", [])
@@ -633,23 +671,25 @@ def google_address_autocomplete_simple(request):
                 f"Found {len(predictions)} address predictions for: {input_text}"
             )
 
-            print(f"📋 FOUND {len(predictions)} ADDRESSES:")
+            tracer.debug("📋 FOUND {} ADDRESSES:", len(predictions))
             for i, prediction in enumerate(predictions[:5], 1):  # Show first 5 results
                 description = prediction.get("description", "")
-                print(f"   {i}. {description}")
+                tracer.debug("   {}. {}", i, description)
             if len(predictions) > 5:
-                print(f"   ... and {len(predictions) - 5} more")
-            print()  # Empty line for readability
+                tracer.debug("   ... and {} more", len(predictions) - 5)
+            pass  # Empty line for readability
 
             return JsonResponse({"predictions": predictions, "status": "OK"})
         else:
             logger.error(f"Google API error: {response.status_code} - {response.text}")
-            print(f"❌ API ERROR: {response.status_code} for search: '{input_text}'")
+            tracer.debug(
+                "❌ API ERROR: {} for search: '{}'", response.status_code, input_text
+            )
             return JsonResponse({"error": "Google API request failed"}, status=500)
 
     except Exception as e:
         logger.error(f"Error in Google address autocomplete: {str(e)}", exc_info=True)
-        print(f"❌ SEARCH ERROR for '{input_text}': {str(e)}")
+        tracer.debug("❌ SEARCH ERROR for '{}': {}", input_text, e)
         return JsonResponse({"error": "Address autocomplete failed"}, status=500)
 
 
@@ -665,9 +705,15 @@ def postcode_suggestions_simple(request):
         return JsonResponse({"suggestions": []})
 
     try:
+        # Serve from the local postcode index when one has been built
+        suggestions = suggest_postcodes(query)
+        if suggestions is not None:
+            return JsonResponse({"suggestions": suggestions})
+
         # Call postcodes.io API for suggestions
-        response = requests.get(
-            f"https://api.postcodes.io/postcodes/{query}/autocomplete"
+        response = http_client.get(
+            f"https://api.postcodes.io/postcodes/{query}/autocomplete",
+            timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5),
         )
         data = response.json()
 
@@ -709,14 +755,20 @@ def postcode_address_lookup(request):
 
         logger.info(f"Looking up addresses for postcode: {postcode}")
 
-        # Method 1: Try Google Places API first (works for many postcodes)
-        google_addresses = get_addresses_from_google_places(postcode)
-
-        # Method 2: Try Ideal Postcodes API if available
-        ideal_addresses = get_addresses_from_ideal_postcodes(postcode)
+        # Postcode info comes from the local store when the postcode is loaded
+        postcode_info = lookup_local_postcode(postcode)
+        providers = {
+            "google_places": lambda: get_addresses_from_google_places(postcode),
+            "ideal_postcodes": lambda: get_addresses_from_ideal_postcodes(postcode),
+        }
+        if not postcode_info:
+            providers["postcodes_io"] = lambda: get_postcode_info(postcode)
 
-        # Method 3: Get basic postcode info from postcodes.io
-        postcode_info = get_postcode_info(postcode)
+        # Query all sources concurrently; latency is the slowest provider, not the sum
+        results = cached_fan_out_lookup(postcode, providers)
+        google_addresses = results.get("google_places", [])
+        ideal_addresses = results.get("ideal_postcodes", [])
+        postcode_info = postcode_info or results.get("postcodes_io", {})
 
         # Combine and deduplicate results
         all_addresses = []
@@ -819,10 +871,10 @@ def get_addresses_from_google_places(postcode):
             "components": "country:gb",
         }
 
-        response = requests.get(
+        response = http_client.get(
             "https://maps.googleapis.com/maps/api/place/autocomplete/json",
             params=params,
-            timeout=10,
+            timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5),
         )
 
         if response.status_code == 200:
@@ -849,7 +901,11 @@ def get_addresses_from_ideal_postcodes(postcode):
         api_url = f"https://api.ideal-postcodes.co.uk/v1/postcodes/{postcode}"
         headers = {"Authorization": f"api_key={api_key}"}
 
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = http_client.get(
+            api_url,
+            headers=headers,
+            timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5),
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -863,9 +919,13 @@ def get_addresses_from_ideal_postcodes(postcode):
 
 def get_postcode_info(postcode):
     """Get basic postcode information from postcodes.io"""
+    from django.conf import settings
+
     try:
         api_url = f"https://api.postcodes.io/postcodes/{postcode}"
-        response = requests.get(api_url, timeout=10)
+        response = http_client.get(
+            api_url, timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5)
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -925,17 +985,46 @@ def postcode_address_lookup_enhanced(request):
 
         logger.info(f"Enhanced lookup for postcode: {postcode}")
 
+        # Postcode info comes from the local store when the postcode is loaded
+        postcode_info = lookup_local_postcode(postcode)
+        providers = {
+            "google_text_search": lambda: get_addresses_from_google_text_search(
+                postcode
+            ),
+            "google_geocoding_nearby": lambda: get_addresses_from_geocoding_nearby(
+                postcode
+            ),
+            "ideal_postcodes": lambda: get_addresses_from_ideal_postcodes(postcode),
+        }
+        if not postcode_info:
+            providers["postcodes_io"] = lambda: get_postcode_info(postcode)
+
+        # Query all sources concurrently and stop waiting once enough addresses
+        # are in. Geocoding + Nearby chains two calls, so it gets twice the budget.
+        lookup_timeout = getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5)
+        results = cached_fan_out_lookup(
+            postcode,
+            providers,
+            timeouts={"google_geocoding_nearby": lookup_timeout * 2},
+            enough=getattr(settings, "POSTCODE_LOOKUP_ENOUGH_ADDRESSES", 20),
+            counted=[
+                "google_text_search",
+                "google_geocoding_nearby",
+                "ideal_postcodes",
+            ],
+        )
+
         # Method 1: Google Places Text Search (more comprehensive than autocomplete)
-        google_addresses = get_addresses_from_google_text_search(postcode)
+        google_addresses = results.get("google_text_search", [])
 
         # Method 2: Google Geocoding + Nearby Search
-        geocoded_addresses = get_addresses_from_geocoding_nearby(postcode)
+        geocoded_addresses = results.get("google_geocoding_nearby", [])
 
         # Method 3: Ideal Postcodes API if available (most comprehensive for UK)
-        ideal_addresses = get_addresses_from_ideal_postcodes(postcode)
+        ideal_addresses = results.get("ideal_postcodes", [])
 
         # Method 4: Get basic postcode info from postcodes.io
-        postcode_info = get_postcode_info(postcode)
+        postcode_info = postcode_info or results.get("postcodes_io", {})
 
         # Combine and deduplicate results
         all_addresses = []
@@ -1056,10 +1145,10 @@ def get_addresses_from_google_text_search(postcode):
             "type": "street_address",  # Focus on addresses
         }
 
-        response = requests.get(
+        response = http_client.get(
             "https://maps.googleapis.com/maps/api/place/textsearch/json",
             params=params,
-            timeout=10,
+            timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5),
         )
 
         if response.status_code == 200:
@@ -1098,10 +1187,10 @@ def get_addresses_from_geocoding_nearby(postcode):
             "components": "country:GB",
         }
 
-        geocode_response = requests.get(
+        geocode_response = http_client.get(
             "https://maps.googleapis.com/maps/api/geocode/json",
             params=geocode_params,
-            timeout=10,
+            timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5),
         )
 
         if geocode_response.status_code == 200:
@@ -1118,10 +1207,10 @@ def get_addresses_from_geocoding_nearby(postcode):
                     "key": google_api_key,
                 }
 
-                nearby_response = requests.get(
+                nearby_response = http_client.get(
                     "https://maps.googleapis.com/maps/api/place/nearbysearch/json",
                     params=nearby_params,
-                    timeout=10,
+                    timeout=getattr(settings, "POSTCODE_LOOKUP_TIMEOUT", 5),
                 )
 
                 if nearby_response.status_code == 200:
@@ -1177,7 +1266,7 @@ def simple_postcode_addresses(request):
                 "language": "en",
             }
 
-            response = requests.get(
+            response = http_client.get(
                 "https://maps.googleapis.com/maps/api/place/autocomplete/json",
                 params=params,
                 timeout=10,
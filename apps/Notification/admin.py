@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
 from django.db.models import Count, Q
-from .models import Notification
+from .models import DomainEvent, Notification
 from .services import NotificationService
 
 
@@ -172,16 +172,16 @@ class NotificationAdmin(admin.ModelAdmin):
 
     def resend_notifications(self, request, queryset):
         count = 0
-        for notification in queryset:
-            try:
-                NotificationService.send_notification(notification)
-                count += 1
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f"Failed to resend notification {notification.id}: {str(e)}",
-                    level="ERROR",
-                )
+        notifications = list(queryset.select_related("user"))
+        try:
+            NotificationService.send_notifications(notifications)
+            count = len(notifications)
+        except Exception as e:
+            self.message_user(
+                request,
+                f"Failed to resend notifications: {str(e)}",
+                level="ERROR",
+            )
 
         if count > 0:
             self.message_user(request, f"{count} notifications resent successfully.")
@@ -231,6 +231,35 @@ class NotificationAdmin(admin.ModelAdmin):
         return super().changelist_view(request, extra_context)
 
 
+@admin.register(DomainEvent)
+class DomainEventAdmin(admin.ModelAdmin):
+    list_display = [
+        "event_type",
+        "aggregate_type",
+        "aggregate_id",
+        "occurred_at",
+        "processed",
+        "attempts",
+    ]
+    list_filter = ["event_type", "aggregate_type", "processed"]
+    search_fields = ["aggregate_id", "last_error"]
+    readonly_fields = [
+        "id",
+        "event_type",
+        "aggregate_type",
+        "aggregate_id",
+        "payload",
+        "actor",
+        "occurred_at",
+        "processed",
+        "processed_at",
+        "attempts",
+        "last_error",
+    ]
+    date_hierarchy = "occurred_at"
+    ordering = ["-occurred_at"]
+
+
 # Register additional admin actions as standalone admin commands
 class NotificationAdminActions:
     """Additional admin actions for notifications"""
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from apps.Notification.outbox import DomainEventProcessor
+
+
+class Command(BaseCommand):
+    help = "Fan out pending domain events to tracking, timeline, notifications and websockets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Events claimed per transaction (default: DOMAIN_EVENTS)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Seconds to wait when there is nothing to process",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the pending events and exit instead of polling forever",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Show the backlog, then exit",
+        )
+
+    def handle(self, *args, **options):
+        processor = DomainEventProcessor(batch_size=options.get("batch_size"))
+
+        if options["stats"]:
+            for key, value in processor.backlog_stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        self.stdout.write("Processing domain events...")
+        try:
+            processor.run(interval=options.get("interval"), once=options["once"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Domain event worker stopped"))
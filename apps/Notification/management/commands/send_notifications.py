@@ -69,20 +69,21 @@ class Command(BaseCommand):
     def send_scheduled_notifications(self):
         """Send all scheduled notifications that are due"""
         now = timezone.now()
-        scheduled_notifications = Notification.objects.filter(
-            scheduled_for__lte=now, delivered_at__isnull=True
+        scheduled_notifications = list(
+            Notification.objects.filter(
+                scheduled_for__lte=now, delivered_at__isnull=True
+            ).select_related("user")
         )
 
+        # Rendered and sent in batches over one connection
         count = 0
-        for notification in scheduled_notifications:
+        for start in range(0, len(scheduled_notifications), 100):
+            batch = scheduled_notifications[start : start + 100]
             try:
-                NotificationService.send_notification(notification)
-                count += 1
-                self.stdout.write(f"Sent scheduled notification {notification.id}")
+                NotificationService.send_notifications(batch)
+                count += len(batch)
             except Exception as e:
-                self.stderr.write(
-                    f"Failed to send notification {notification.id}: {str(e)}"
-                )
+                self.stderr.write(f"Failed to send notifications: {str(e)}")
 
         self.stdout.write(
             self.style.SUCCESS(f"Successfully sent {count} scheduled notifications")
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Notification', '0004_domainevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='domainevent',
+            index=models.Index(fields=['event_type', 'occurred_at'], name='domain_event_type_idx'),
+        ),
+    ]
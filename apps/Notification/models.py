@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.Basemodel.models import Basemodel
 from apps.User.models import User
 
@@ -156,3 +157,42 @@ class Notification(Basemodel):
             status["push"] = self.push_sent
         status["in_app"] = True  # Always available in-app
         return status
+
+
+class DomainEvent(Basemodel):
+    """
+    Outbox of state transitions, appended in the transition's transaction and
+    fanned out to tracking, timeline, notification and websocket channels by
+    the process_domain_events worker (apps/Notification/outbox.py)
+    """
+
+    event_type = models.CharField(max_length=50)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    actor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    occurred_at = models.DateTimeField(default=timezone.now)
+
+    processed = models.BooleanField(default=False)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.event_type} {self.aggregate_type}:{self.aggregate_id}"
+
+    class Meta:
+        db_table = "domain_event"
+        managed = True
+        ordering = ["occurred_at"]
+        indexes = [
+            models.Index(
+                fields=["processed", "occurred_at"], name="domain_event_pending_idx"
+            ),
+            # Replaying events of a type, e.g. job feed resumes
+            models.Index(
+                fields=["event_type", "occurred_at"], name="domain_event_type_idx"
+            ),
+        ]
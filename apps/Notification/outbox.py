@@ -0,0 +1,446 @@
+"""
+Domain event outbox
+
+State transitions (``Request.update_status``, the ``Job`` transitions) no
+longer write their side effects inline. They append one ``DomainEvent`` in the
+same transaction as the status change with ``emit``, and the
+``process_domain_events`` worker fans events out in batches:
+
+- tracking updates, timeline events and notifications for a whole batch are
+  written with one ``bulk_create`` per table, in the transaction that marks
+  the events processed, so an event is never applied twice;
+- emails and websocket messages are sent after that transaction commits;
+- if a batch fails, its events are retried one by one in savepoints so a bad
+  event cannot hold up the rest, and given up after ``MAX_ATTEMPTS``.
+
+Handlers are registered per event type with ``@handles``. Each one receives
+the batch's events of that type and the ``FanOut`` collecting its writes.
+
+Run with ``python manage.py process_domain_events``.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import DomainEvent, Notification
+from .services import NotificationService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "BATCH_SIZE": 100,
+    "MAX_ATTEMPTS": 5,
+    "POLL_INTERVAL": 1,  # seconds to sleep when there is nothing to claim
+}
+
+REQUEST_STATUS_CHANGED = "request.status_changed"
+JOB_STATUS_CHANGED = "job.status_changed"
+BID_ACCEPTED = "bid.accepted"
+
+HANDLERS: Dict[str, List[Callable]] = defaultdict(list)
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "DOMAIN_EVENTS", {})}
+
+
+def handles(*event_types: str):
+    """Register a fan-out handler for one or more event types"""
+
+    def register(handler):
+        for event_type in event_types:
+            HANDLERS[event_type].append(handler)
+        return handler
+
+    return register
+
+
+def emit(event_type: str, aggregate, payload: Dict = None, actor=None) -> DomainEvent:
+    """
+    Append a domain event for ``aggregate``
+
+    Call inside the transaction that made the change, so the event is stored
+    if and only if the change is.
+    """
+    return DomainEvent.objects.create(
+        event_type=event_type,
+        aggregate_type=aggregate._meta.model_name,
+        aggregate_id=str(aggregate.pk),
+        payload=payload or {},
+        actor=actor if getattr(actor, "pk", None) else None,
+    )
+
+
+def emit_many(event_type: str, items, actor=None) -> List[DomainEvent]:
+    """``emit`` for many (aggregate, payload) pairs, with one insert"""
+    return DomainEvent.objects.bulk_create(
+        [
+            DomainEvent(
+                event_type=event_type,
+                aggregate_type=aggregate._meta.model_name,
+                aggregate_id=str(aggregate.pk),
+                payload=payload or {},
+                actor=actor if getattr(actor, "pk", None) else None,
+            )
+            for aggregate, payload in items
+        ]
+    )
+
+
+class FanOut:
+    """Side effects of a batch of events, collected so each target is written once"""
+
+    def __init__(self):
+        self.tracking_updates = []
+        self.timeline_events = []
+        # (unsaved Notification, template context) pairs
+        self.notifications = []
+        # (group name, message) pairs
+        self.messages = []
+
+    def notify(self, notification: Notification, **context):
+        self.notifications.append((notification, context))
+
+    def publish(self, group: str, message: Dict):
+        self.messages.append((group, message))
+
+    def write(self):
+        """Write the collected rows; runs inside the batch transaction"""
+        from apps.Job.models import TimelineEvent
+        from apps.Tracking.models import TrackingUpdate
+
+        TrackingUpdate.objects.bulk_create(self.tracking_updates)
+        TimelineEvent.objects.bulk_create(self.timeline_events)
+        if self.timeline_events:
+            # bulk_create sends no post_save, so drop the cached timelines here
+            from apps.Job.timeline import timelines_changed
+
+            timelines_changed(event.job_id for event in self.timeline_events)
+        Notification.objects.bulk_create(
+            [notification for notification, _ in self.notifications]
+        )
+
+    def deliver(self):
+        """Send emails and websocket messages; runs after the batch commits"""
+        NotificationService.send_notifications(
+            [
+                (notification, context)
+                for notification, context in self.notifications
+                if set(notification.delivery_channels) - {"in_app"}
+            ]
+        )
+
+        if not self.messages:
+            return
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        for group, message in self.messages:
+            try:
+                async_to_sync(channel_layer.group_send)(group, message)
+            except Exception as e:
+                # Websocket clients resync on reconnect; do not retry events
+                logger.warning(f"Could not publish to {group}: {str(e)}")
+
+
+def _websocket_message(event: DomainEvent) -> Dict:
+    return {
+        "type": "domain.event",
+        "event_type": event.event_type,
+        "aggregate_id": event.aggregate_id,
+        "payload": event.payload,
+        "occurred_at": event.occurred_at.isoformat(),
+    }
+
+
+@handles(REQUEST_STATUS_CHANGED)
+def request_status_changed(events: List[DomainEvent], fan_out: FanOut):
+    from apps.Request.models import Request
+    from apps.Tracking.models import TrackingUpdate
+
+    requests = Request.objects.select_related("user", "driver__user").in_bulk(
+        [event.aggregate_id for event in events]
+    )
+
+    for event in events:
+        request_obj = requests.get(_pk(Request, event.aggregate_id))
+        if request_obj is None:
+            continue
+        old_status = event.payload.get("old_status")
+        new_status = event.payload.get("new_status")
+        data = {"request_id": str(request_obj.id), "status": new_status}
+
+        fan_out.tracking_updates.append(
+            TrackingUpdate(
+                request=request_obj,
+                update_type="status",
+                status_message=f"Status changed from {old_status} to {new_status}",
+            )
+        )
+
+        # Notifications for relevant parties
+        if request_obj.user:
+            fan_out.notify(
+                NotificationService.build_notification(
+                    user=request_obj.user,
+                    notification_type="request_update",
+                    title="Request Status Update",
+                    message=f"Your request status has been updated to {new_status}",
+                    data=data,
+                    channels=["in_app"],
+                )
+            )
+        if request_obj.driver and request_obj.driver.user:
+            fan_out.notify(
+                NotificationService.build_notification(
+                    user=request_obj.driver.user,
+                    notification_type="request_update",
+                    title="Request Status Update",
+                    message=f"Request status has been updated to {new_status}",
+                    data=data,
+                    channels=["in_app"],
+                )
+            )
+
+        fan_out.publish(f"request_{request_obj.id}", _websocket_message(event))
+
+
+@handles(JOB_STATUS_CHANGED)
+def job_status_changed(events: List[DomainEvent], fan_out: FanOut):
+    from apps.Job.feed import FEED_STATUSES, publish_opened_jobs
+    from apps.Job.models import Job, TimelineEvent
+
+    jobs = Job.objects.select_related(
+        "request__user", "assigned_provider__user"
+    ).in_bulk([event.aggregate_id for event in events])
+    # Jobs that became open to providers, for the job feed
+    opened = []
+
+    for event in events:
+        job = jobs.get(_pk(Job, event.aggregate_id))
+        if job is None:
+            continue
+        old_status = event.payload.get("old_status")
+        new_status = event.payload.get("new_status")
+
+        timeline = event.payload.get("timeline")
+        if timeline:
+            fan_out.timeline_events.append(
+                TimelineEvent(
+                    job=job,
+                    event_type=timeline["event_type"],
+                    description=timeline["description"],
+                    visibility=timeline.get("visibility", "all"),
+                    metadata=timeline.get("metadata"),
+                    created_by_id=event.actor_id,
+                )
+            )
+
+        # Notify the customer and, if assigned, the provider
+        recipients = [job.request.user if job.request else None]
+        if job.assigned_provider:
+            recipients.append(job.assigned_provider.user)
+        kwargs = NotificationService.job_status_notification_kwargs(
+            job, old_status, new_status
+        )
+        for user in filter(None, recipients):
+            fan_out.notify(
+                NotificationService.build_notification(user=user, **kwargs),
+                job=job,
+                old_status=old_status,
+                new_status=new_status,
+            )
+
+        fan_out.publish(f"job_{job.id}", _websocket_message(event))
+        if new_status in FEED_STATUSES and old_status not in FEED_STATUSES:
+            opened.append((job, event.occurred_at))
+
+    publish_opened_jobs(opened, fan_out)
+
+
+@handles(BID_ACCEPTED)
+def bid_accepted(events: List[DomainEvent], fan_out: FanOut):
+    """Tell the winning provider, and the providers whose bids were rejected
+    with it (apps/Bidding/services.py)"""
+    from apps.Bidding.models import Bid
+
+    bid_ids = []
+    for event in events:
+        bid_ids.append(event.aggregate_id)
+        bid_ids += event.payload.get("rejected_bid_ids", [])
+    bids = Bid.objects.select_related("provider__user").in_bulk(bid_ids)
+
+    for event in events:
+        outcomes = [(event.aggregate_id, "bid_accepted")] + [
+            (bid_id, "bid_rejected")
+            for bid_id in event.payload.get("rejected_bid_ids", [])
+        ]
+        for bid_id, notification_type in outcomes:
+            bid = bids.get(_pk(Bid, bid_id))
+            if bid is None or bid.provider is None or bid.provider.user is None:
+                continue
+            fan_out.notify(
+                NotificationService.build_notification(
+                    user=bid.provider.user,
+                    notification_type=notification_type,
+                    related_object_type="bid",
+                    related_object_id=bid.id,
+                    action_url=f"/bids/{bid.id}",
+                    priority=(
+                        "high" if notification_type == "bid_accepted" else "normal"
+                    ),
+                    bid=bid,
+                    amount=bid.amount,
+                ),
+                bid=bid,
+                amount=bid.amount,
+            )
+
+        fan_out.publish(f"job_{event.payload.get('job_id')}", _websocket_message(event))
+
+
+def _pk(model, value):
+    """in_bulk() keys are primary key instances, event ids are strings"""
+    try:
+        return model._meta.pk.to_python(value)
+    except Exception:
+        return value
+
+
+class DomainEventProcessor:
+    """Claims pending domain events and fans them out in batches"""
+
+    def __init__(self, batch_size: int = None, max_attempts: int = None):
+        config = get_config()
+        self.batch_size = batch_size or config["BATCH_SIZE"]
+        self.max_attempts = max_attempts or config["MAX_ATTEMPTS"]
+
+    def pending(self):
+        return DomainEvent.objects.filter(
+            processed=False, attempts__lt=self.max_attempts
+        )
+
+    def process_batch(self) -> Dict:
+        """
+        Claim and fan out one batch of pending events
+
+        Returns:
+            Dict: Counts of claimed, processed and failed events
+        """
+        stats = {"claimed": 0, "processed": 0, "failed": 0}
+
+        with transaction.atomic():
+            events = list(
+                self.pending()
+                .select_for_update(skip_locked=True)
+                .order_by("occurred_at")[: self.batch_size]
+            )
+            stats["claimed"] = len(events)
+            if not events:
+                return stats
+
+            try:
+                with transaction.atomic():
+                    fan_outs = [self._fan_out(events)]
+                succeeded, failed = events, []
+            except Exception as e:
+                logger.warning(
+                    f"Domain event batch failed, retrying events one by one: {str(e)}"
+                )
+                fan_outs, succeeded, failed = self._fan_out_each(events)
+
+            now = timezone.now()
+            DomainEvent.objects.filter(id__in=[event.id for event in succeeded]).update(
+                processed=True,
+                processed_at=now,
+                attempts=F("attempts") + 1,
+                last_error="",
+                updated_at=now,
+            )
+            for event, error in failed:
+                self._record_failure(event, error)
+
+            for fan_out in fan_outs:
+                transaction.on_commit(fan_out.deliver)
+
+        stats["processed"] = len(succeeded)
+        stats["failed"] = len(failed)
+        logger.info(
+            f"Domain events: {stats['processed']} processed, {stats['failed']} failed"
+        )
+        return stats
+
+    def _fan_out(self, events: List[DomainEvent]) -> FanOut:
+        fan_out = FanOut()
+        by_type = defaultdict(list)
+        for event in events:
+            by_type[event.event_type].append(event)
+
+        for event_type, typed_events in by_type.items():
+            handlers = HANDLERS.get(event_type)
+            if not handlers:
+                logger.warning(f"No handler for domain event type {event_type}")
+            for handler in handlers or []:
+                handler(typed_events, fan_out)
+
+        fan_out.write()
+        return fan_out
+
+    def _fan_out_each(self, events: List[DomainEvent]):
+        fan_outs, succeeded, failed = [], [], []
+        for event in events:
+            try:
+                with transaction.atomic():
+                    fan_outs.append(self._fan_out([event]))
+                succeeded.append(event)
+            except Exception as e:
+                failed.append((event, e))
+        return fan_outs, succeeded, failed
+
+    def _record_failure(self, event: DomainEvent, error: Exception):
+        event.attempts += 1
+        event.last_error = str(error)
+        event.save(update_fields=["attempts", "last_error", "updated_at"])
+
+        if event.attempts >= self.max_attempts:
+            logger.error(
+                f"Domain event {event.id} ({event.event_type}) gave up after "
+                f"{event.attempts} attempts: {str(error)}"
+            )
+        else:
+            logger.warning(
+                f"Domain event {event.id} ({event.event_type}) failed, "
+                f"attempt {event.attempts}: {str(error)}"
+            )
+
+    def run(self, interval: float = None, once: bool = False):
+        """Process batches until interrupted (or until the queue is empty with once)"""
+        interval = interval if interval is not None else get_config()["POLL_INTERVAL"]
+        while True:
+            stats = self.process_batch()
+            if once and stats["processed"] == 0 and stats["failed"] == 0:
+                return
+            if stats["claimed"] < self.batch_size:
+                time.sleep(interval)
+
+    def backlog_stats(self) -> Dict:
+        """Backlog size, age of the oldest pending event and given-up events"""
+        oldest = self.pending().aggregate(oldest=Min("occurred_at"))["oldest"]
+        return {
+            "pending": self.pending().count(),
+            "oldest_pending_age": (
+                (timezone.now() - oldest).total_seconds() if oldest else 0.0
+            ),
+            "dead": DomainEvent.objects.filter(
+                processed=False, attempts__gte=self.max_attempts
+            ).count(),
+        }
@@ -1,7 +1,5 @@
 import logging
 from typing import Dict, List, Optional, Any, Union
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -9,6 +7,7 @@ from decimal import Decimal
 
 from .models import Notification
 from apps.User.models import User
+from utils.emails import base_context, build_message, render_email, send_messages
 
 logger = logging.getLogger(__name__)
 
@@ -165,36 +164,23 @@ class NotificationService:
             **context: Additional context for template rendering
         """
         try:
-            # Get template config
-            template_config = cls.NOTIFICATION_TEMPLATES.get(notification_type, {})
-
-            # Use template defaults if not provided
-            if not title and template_config.get("subject"):
-                title = template_config["subject"]
-
-            if not channels:
-                channels = template_config.get("default_channels", ["in_app"])
-
-            # Generate message if not provided
-            if not message:
-                message = cls._generate_message(notification_type, user, context)
-
-            # Create notification
-            notification = Notification.objects.create(
+            notification = cls.build_notification(
                 user=user,
                 notification_type=notification_type,
                 title=title,
                 message=message,
-                data=data or {},
+                data=data,
                 priority=priority,
-                delivery_channels=channels,
+                channels=channels,
                 related_object_type=related_object_type,
-                related_object_id=str(related_object_id) if related_object_id else None,
+                related_object_id=related_object_id,
                 action_url=action_url,
                 action_text=action_text,
                 scheduled_for=scheduled_for,
                 expires_at=expires_at,
+                **context,
             )
+            notification.save()
 
             logger.info(f"Created notification {notification.id} for user {user.id}")
 
@@ -208,6 +194,58 @@ class NotificationService:
             logger.error(f"Error creating notification: {str(e)}")
             raise
 
+    @classmethod
+    def build_notification(
+        cls,
+        user: User,
+        notification_type: str,
+        title: str = None,
+        message: str = None,
+        data: Dict = None,
+        priority: str = "normal",
+        channels: List[str] = None,
+        related_object_type: str = None,
+        related_object_id: str = None,
+        action_url: str = None,
+        action_text: str = None,
+        scheduled_for: datetime = None,
+        expires_at: datetime = None,
+        **context,
+    ) -> Notification:
+        """
+        Build an unsaved notification with the same defaults as
+        create_notification, so callers can bulk_create a batch of them.
+        """
+        # Get template config
+        template_config = cls.NOTIFICATION_TEMPLATES.get(notification_type, {})
+
+        # Use template defaults if not provided
+        if not title and template_config.get("subject"):
+            title = template_config["subject"]
+
+        if not channels:
+            channels = template_config.get("default_channels", ["in_app"])
+
+        # Generate message if not provided
+        if not message:
+            message = cls._generate_message(notification_type, user, context)
+
+        return Notification(
+            user=user,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            data=data or {},
+            priority=priority,
+            delivery_channels=channels,
+            related_object_type=related_object_type,
+            related_object_id=str(related_object_id) if related_object_id else None,
+            action_url=action_url,
+            action_text=action_text,
+            scheduled_for=scheduled_for,
+            expires_at=expires_at,
+        )
+
     @classmethod
     def send_notification(cls, notification: Notification, **context):
         """Send notification across all specified channels."""
@@ -230,49 +268,93 @@ class NotificationService:
             logger.error(f"Error sending notification {notification.id}: {str(e)}")
 
     @classmethod
-    def _send_email_notification(cls, notification: Notification, **context):
-        """Send email notification using templates."""
-        try:
-            template_config = cls.NOTIFICATION_TEMPLATES.get(
-                notification.notification_type, {}
-            )
-            template_name = template_config.get(
-                "email_template", "generic_notification"
-            )
+    def send_notifications(cls, notifications, **context):
+        """
+        Send a batch of notifications: emails are rendered from the cached
+        templates and sent through the pooled connection, and the delivery
+        flags of the whole batch are written with one bulk_update.
 
-            # Prepare context
-            email_context = {
-                "user": notification.user,
-                "user_name": notification.user.first_name
-                or notification.user.email.split("@")[0],
-                "notification": notification,
-                "title": notification.title,
-                "message": notification.message,
-                "action_url": notification.action_url,
-                "action_text": notification.action_text or "View Details",
-                "app_name": "MoreVans",
-                "current_year": datetime.now().year,
-                "notification_data": notification.data,
-                **context,
-            }
+        ``notifications`` are Notification instances or (notification,
+        context) pairs; ``context`` is shared by all of them.
+        """
+        pairs = [
+            item if isinstance(item, tuple) else (item, {}) for item in notifications
+        ]
+        if not pairs:
+            return
+
+        shared = {**base_context(), **context}
+        now = timezone.now()
+        emails = []
+        for notification, own_context in pairs:
+            channels = notification.delivery_channels
+            if "email" in channels:
+                try:
+                    emails.append(
+                        (
+                            notification,
+                            cls._build_email(notification, {**shared, **own_context}),
+                        )
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Error rendering email for notification {notification.id}: {str(e)}"
+                    )
+            # SMS and push are not implemented yet (see _send_sms_notification)
+            notification.sms_sent = notification.sms_sent or "sms" in channels
+            notification.push_sent = notification.push_sent or "push" in channels
+            notification.delivered_at = now
+            notification.updated_at = now
+
+        results = send_messages([message for _, message in emails])
+        for (notification, _), sent in zip(emails, results):
+            if sent:
+                notification.email_sent = True
+            else:
+                logger.error(f"Error sending email for notification {notification.id}")
+
+        Notification.objects.bulk_update(
+            [notification for notification, _ in pairs],
+            ["delivered_at", "email_sent", "sms_sent", "push_sent", "updated_at"],
+        )
+        logger.info(f"Sent {len(pairs)} notifications ({sum(results)} emails)")
 
-            # Render templates
-            html_content = render_to_string(
-                f"emails/notifications/{template_name}.html", email_context
-            )
-            text_content = render_to_string(
-                f"emails/notifications/{template_name}.txt", email_context
-            )
+    @classmethod
+    def _build_email(cls, notification: Notification, context: Dict):
+        """The rendered email message of a notification"""
+        template_config = cls.NOTIFICATION_TEMPLATES.get(
+            notification.notification_type, {}
+        )
+        template_name = template_config.get("email_template", "generic_notification")
+
+        email_context = {
+            "user": notification.user,
+            "user_name": notification.user.first_name
+            or notification.user.email.split("@")[0],
+            "notification": notification,
+            "title": notification.title,
+            "message": notification.message,
+            "action_url": notification.action_url,
+            "action_text": notification.action_text or "View Details",
+            "notification_data": notification.data,
+            **context,
+        }
+        html_content, text_content = render_email(
+            f"emails/notifications/{template_name}",
+            email_context,
+            fallback="emails/notifications/generic_notification",
+        )
+        return build_message(
+            notification.title, [notification.user.email], html_content, text_content
+        )
 
-            # Create and send email
-            email = EmailMultiAlternatives(
-                subject=notification.title,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[notification.user.email],
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.send(fail_silently=False)
+    @classmethod
+    def _send_email_notification(cls, notification: Notification, **context):
+        """Send email notification using templates."""
+        try:
+            email = cls._build_email(notification, {**base_context(), **context})
+            if not send_messages([email])[0]:
+                raise RuntimeError("The email backend did not accept the message")
 
             notification.mark_as_delivered("email")
             logger.info(f"Email sent for notification {notification.id}")
@@ -423,8 +505,15 @@ class NotificationService:
         cls, user: User, job_obj, old_status, new_status, **kwargs
     ):
         """Notify user about job status changes."""
-        notification_type = f"job_{new_status}"
+        return cls.create_notification(
+            user=user,
+            **cls.job_status_notification_kwargs(job_obj, old_status, new_status),
+            **kwargs,
+        )
 
+    @classmethod
+    def job_status_notification_kwargs(cls, job_obj, old_status, new_status) -> Dict:
+        """create_notification/build_notification arguments for a job status change"""
         # Map status to notification types
         status_mapping = {
             "started": "job_started",
@@ -433,20 +522,16 @@ class NotificationService:
             "cancelled": "job_cancelled",
         }
 
-        notification_type = status_mapping.get(new_status, "request_update")
-
-        return cls.create_notification(
-            user=user,
-            notification_type=notification_type,
-            related_object_type="job",
-            related_object_id=job_obj.id,
-            action_url=f"/jobs/{job_obj.id}",
-            priority="high" if new_status in ["started", "completed"] else "normal",
-            job=job_obj,
-            old_status=old_status,
-            new_status=new_status,
-            **kwargs,
-        )
+        return {
+            "notification_type": status_mapping.get(new_status, "request_update"),
+            "related_object_type": "job",
+            "related_object_id": job_obj.id,
+            "action_url": f"/jobs/{job_obj.id}",
+            "priority": "high" if new_status in ["started", "completed"] else "normal",
+            "job": job_obj,
+            "old_status": old_status,
+            "new_status": new_status,
+        }
 
 
 class NotificationPreferenceService:
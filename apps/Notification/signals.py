@@ -1,8 +1,12 @@
 import logging
+from django.db import transaction
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from apps.Payment.state_changes import PaymentTransition, on_payment_status
+
+from .outbox import JOB_STATUS_CHANGED, emit
 from .services import NotificationService
 
 logger = logging.getLogger(__name__)
@@ -56,30 +60,29 @@ def handle_request_status_change(sender, instance, created, **kwargs):
             logger.error(f"Error sending request status notification: {str(e)}")
 
 
-@receiver(post_save, sender="Payment.Payment")
-def handle_payment_status_change(sender, instance, created, **kwargs):
+@on_payment_status(to=["completed", "failed"])
+def handle_payment_status_change(transition: PaymentTransition):
     """Send notification when payment status changes"""
-    if not created and instance.request and instance.request.user:
-        try:
-            if instance.status == "completed":
-                NotificationService.notify_payment_confirmed(
-                    user=instance.request.user, payment_obj=instance
-                )
-            elif instance.status == "failed":
-                NotificationService.create_notification(
-                    user=instance.request.user,
-                    notification_type="payment_failed",
-                    related_object_type="payment",
-                    related_object_id=instance.id,
-                    action_url=f"/payments/{instance.id}",
-                    priority="high",
-                    payment=instance,
-                    amount=instance.amount,
-                )
-
-            logger.info(f"Sent payment notification for payment {instance.id}")
-        except Exception as e:
-            logger.error(f"Error sending payment notification: {str(e)}")
+    payment = transition.payment
+    user = transition.request.user
+    if not user:
+        return
+
+    if transition.new_status == "completed":
+        NotificationService.notify_payment_confirmed(user=user, payment_obj=payment)
+    else:
+        NotificationService.create_notification(
+            user=user,
+            notification_type="payment_failed",
+            related_object_type="payment",
+            related_object_id=payment.id,
+            action_url=f"/payments/{payment.id}",
+            priority="high",
+            payment=payment,
+            amount=payment.amount,
+        )
+
+    logger.info(f"Sent payment notification for payment {payment.id}")
 
 
 @receiver(post_save, sender="Provider.ServiceProvider")
@@ -146,32 +149,26 @@ def handle_bid_status_change(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender="Job.Job")
 def handle_job_status_change(sender, instance, created, **kwargs):
-    """Send notification when job status changes"""
-    if not created and instance.request and instance.request.user:
+    """
+    Append a domain event when job status changes; the outbox worker sends
+    the notifications
+    """
+    if created or getattr(instance, "_transition_in_progress", False):
+        # Job transitions emit their own event, with the timeline entry
+        return
+
+    old_status = getattr(instance, "_original_status", None)
+    if old_status and old_status != instance.status:
         try:
-            # Get old status (you might need to implement this)
-            old_status = getattr(instance, "_original_status", None)
-
-            if old_status and old_status != instance.status:
-                NotificationService.notify_job_status_change(
-                    user=instance.request.user,
-                    job_obj=instance,
-                    old_status=old_status,
-                    new_status=instance.status,
+            # Savepoint, so a failure cannot break the caller's transaction
+            with transaction.atomic():
+                emit(
+                    JOB_STATUS_CHANGED,
+                    instance,
+                    {"old_status": old_status, "new_status": instance.status},
                 )
-
-                # Also notify the provider if assigned
-                if instance.assigned_provider and instance.assigned_provider.user:
-                    NotificationService.notify_job_status_change(
-                        user=instance.assigned_provider.user,
-                        job_obj=instance,
-                        old_status=old_status,
-                        new_status=instance.status,
-                    )
-
-            logger.info(f"Sent job status notification for job {instance.id}")
         except Exception as e:
-            logger.error(f"Error sending job status notification: {str(e)}")
+            logger.error(f"Error recording job status change: {str(e)}")
 
 
 @receiver(post_save, sender="Message.Message")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PaymentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.Payment'
+
+    def ready(self):
+        # Connects the payment state-change dispatcher
+        import apps.Payment.state_changes
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from apps.Payment.webhook_processor import StripeEventProcessor
+
+
+class Command(BaseCommand):
+    help = "Process stored Stripe webhook events (run one or more as workers)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Events claimed per transaction (default: STRIPE_EVENT_PROCESSING)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Seconds to wait when there is nothing to process",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the pending events and exit instead of polling forever",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Show backlog size and processing lag, then exit",
+        )
+
+    def handle(self, *args, **options):
+        processor = StripeEventProcessor(batch_size=options.get("batch_size"))
+
+        if options["stats"]:
+            for key, value in processor.lag_stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        self.stdout.write("Processing Stripe events...")
+        try:
+            processor.run(interval=options.get("interval"), once=options["once"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Stripe event worker stopped"))
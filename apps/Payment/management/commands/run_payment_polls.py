@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.Payment.polling import PaymentPollWorker
+
+
+class Command(BaseCommand):
+    help = "Run queued bulk payment poll jobs (run one or more as workers)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Seconds to wait when no job is queued (default: STRIPE_POLLING)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the queued jobs and exit instead of polling forever",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Show poll jobs by status, then exit",
+        )
+
+    def handle(self, *args, **options):
+        worker = PaymentPollWorker()
+
+        if options["stats"]:
+            for key, value in worker.stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        self.stdout.write("Running payment poll jobs...")
+        try:
+            worker.run(interval=options.get("interval"), once=options["once"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Payment poll worker stopped"))
@@ -1,7 +1,11 @@
 from django.db import models
+from django.utils import timezone
 from apps.Basemodel.models import Basemodel
 from apps.Request.models import Request
 from apps.User.models import User
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class PaymentMethod(Basemodel):
@@ -156,7 +160,7 @@ class Payment(Basemodel):
                 self.request.save()
             except Exception as e:
                 # Log the error but don't prevent payment completion
-                print(f"Error completing request payment: {str(e)}")
+                logger.error(f"Error completing request payment: {str(e)}")
 
     def mark_as_failed(self, failure_reason=None, transaction_details=None):
         """
@@ -408,16 +412,76 @@ class PaymentEvent(Basemodel):
 
 
 class StripeEvent(Basemodel):
-    """Model to store Stripe webhook events to prevent duplicate processing"""
+    """
+    Raw Stripe webhook event
+
+    The webhook only verifies and stores events; they are processed later by
+    the ``process_stripe_events`` worker (see webhook_processor.py).
+    """
 
     stripe_event_id = models.CharField(max_length=100, unique=True)
     event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    # Events for the same payment intent are processed in Stripe creation order
+    payment_intent_id = models.CharField(max_length=100, blank=True, db_index=True)
+    stripe_created = models.DateTimeField(null=True, blank=True)
+    received_at = models.DateTimeField(default=timezone.now)
     processed = models.BooleanField(default=False)
     processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
 
     class Meta:
         db_table = "stripe_event"
         managed = True
+        indexes = [
+            models.Index(
+                fields=["processed", "received_at"],
+                name="stripe_event_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Stripe Event {self.stripe_event_id} - {self.event_type}"
+
+
+class PaymentPollJob(Basemodel):
+    """Background bulk poll of payment statuses from Stripe (see polling.py)"""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    payment_ids = models.JSONField(default=list)
+    poll_until_complete = models.BooleanField(default=False)
+
+    # Progress
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    successful = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    results = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Worker state
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "payment_poll_job"
+        managed = True
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Payment Poll Job {self.id} - {self.status} ({self.completed}/{self.total})"
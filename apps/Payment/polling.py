@@ -0,0 +1,339 @@
+"""
+Bulk Stripe payment polling
+
+``PaymentViewSet.bulk_poll`` queues a ``PaymentPollJob``. Poll workers
+(``python manage.py run_payment_polls``) claim queued jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED`` and run them with ``BulkPollRunner``:
+
+- payments are polled concurrently in a bounded pool;
+- every Stripe call first takes a slot of ``RATE_PER_SECOND``, counted in
+  the shared cache (utils/rate_limit.py), so the rate holds across every
+  worker process and running job;
+- each poll is a single round trip (the service expands the payment intent
+  and latest charge);
+- with ``poll_until_complete`` payments that are not yet in a terminal state
+  are polled again in rounds with exponential backoff, instead of each one
+  sleeping in a worker;
+- progress is written to the job row, so ``bulk_poll_progress`` can be
+  served by any worker process;
+- a running job's ``heartbeat_at`` is refreshed every few seconds. A job
+  whose worker died (restart, deploy) stops beating and is requeued by the
+  next worker that looks, which resumes it from the payments not yet
+  recorded; after ``MAX_ATTEMPTS`` runs it is marked failed.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from utils.rate_limit import Limit, rate_limiter
+
+from .models import PaymentPollJob
+from .stripe_service import StripeService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "CONCURRENCY": 8,  # payments polled at the same time per job
+    "RATE_PER_SECOND": 20,  # all workers together; Stripe allows 25/s in test mode
+    "MAX_PAYMENTS": 500,  # per job
+    "ROUNDS": 5,  # poll_until_complete rounds
+    "BASE_DELAY": 1.0,  # seconds before the second round, doubled each round
+    "PROGRESS_INTERVAL": 1.0,  # minimum seconds between progress writes
+    "HEARTBEAT_INTERVAL": 10,  # seconds between heartbeats of a running job
+    "STALE_AFTER": 60,  # seconds without a heartbeat before a job is requeued
+    "MAX_ATTEMPTS": 3,  # runs of a job before it is given up on
+    "POLL_INTERVAL": 2,  # seconds a worker sleeps when no job is queued
+}
+
+TERMINAL_STATES = {
+    "completed",
+    "failed",
+    "refunded",
+    "partially_refunded",
+    "cancelled",
+    "canceled",
+}
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "STRIPE_POLLING", {})}
+
+
+class StripeRateLimiter:
+    """Stripe requests per second, shared by every process through the rate
+    limiter's cache (on a per-process cache such as LocMem, per process)"""
+
+    def __init__(self, rate: int):
+        self.limit = Limit("stripe_requests", rate, 1)
+
+    def acquire(self):
+        """Block until a request fits under the rate"""
+        while not rate_limiter.hit([(self.limit, "all")]).allowed:
+            # Jittered, so waiting threads do not all retry at once
+            time.sleep(random.uniform(0.5, 1.5) / self.limit.limit)
+
+
+stripe_rate_limiter = StripeRateLimiter(get_config()["RATE_PER_SECOND"])
+
+
+class BulkPollRunner:
+    """Runs one PaymentPollJob to completion"""
+
+    def __init__(self, job: PaymentPollJob):
+        self.job = job
+        self.config = get_config()
+        self.stripe_service = StripeService()
+        # Status before the first poll, kept across poll_until_complete rounds
+        self.original_status: Dict[str, str] = {}
+        self.last_saved = 0.0
+
+    def run(self):
+        job = self.job
+        heartbeat = Heartbeat(job, self.config["HEARTBEAT_INTERVAL"])
+        heartbeat.start()
+
+        try:
+            # A requeued job resumes with the payments it has not recorded yet
+            recorded = {result["payment_id"] for result in job.results}
+            pending = [
+                str(payment_id)
+                for payment_id in job.payment_ids
+                if str(payment_id) not in recorded
+            ]
+            rounds = self.config["ROUNDS"] if job.poll_until_complete else 1
+
+            with ThreadPoolExecutor(
+                max_workers=self.config["CONCURRENCY"],
+                thread_name_prefix="payment-poll",
+            ) as executor:
+                for round_number in range(rounds):
+                    if round_number:
+                        time.sleep(self.config["BASE_DELAY"] * 2 ** (round_number - 1))
+                    pending = self._poll_round(executor, pending, round_number + 1)
+                    if not pending:
+                        break
+
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Payment poll job {job.id} failed: {str(e)}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            heartbeat.stop()
+
+        job.finished_at = timezone.now()
+        self._save_progress(extra_fields=["status", "error", "finished_at"])
+        logger.info(
+            f"Payment poll job {job.id} {job.status}: {job.successful} successful, "
+            f"{job.errors} errors, {job.updated} updated"
+        )
+
+    def _poll_round(self, executor, payment_ids, round_number):
+        """Poll a set of payments concurrently; returns the still-pending ids"""
+        futures = {
+            executor.submit(self._poll_one, payment_id): payment_id
+            for payment_id in payment_ids
+        }
+        still_pending = []
+        last_attempt = round_number >= (
+            self.config["ROUNDS"] if self.job.poll_until_complete else 1
+        )
+
+        for future in as_completed(futures):
+            payment_id = futures[future]
+            result = future.result()
+            result["attempts"] = round_number
+            if "original_status" in result:
+                result["original_status"] = self.original_status.setdefault(
+                    payment_id, result["original_status"]
+                )
+
+            if (
+                self.job.poll_until_complete
+                and result["success"]
+                and result.get("current_status") not in TERMINAL_STATES
+                and not last_attempt
+            ):
+                still_pending.append(payment_id)
+                continue
+
+            self._record(payment_id, result)
+
+        return still_pending
+
+    def _poll_one(self, payment_id) -> Dict:
+        """Poll one payment from a pool thread"""
+        try:
+            stripe_rate_limiter.acquire()
+            result = self.stripe_service.poll_payment_status(payment_id)
+        except Exception as e:
+            result = {"success": False, "error": str(e), "payment_id": payment_id}
+        finally:
+            # Pool threads do not go through the request cycle that normally
+            # closes connections
+            connections.close_all()
+
+        # Keep the stored result small; the raw Stripe payload is not needed
+        result.pop("stripe_data", None)
+        return result
+
+    def _record(self, payment_id, result: Dict):
+        job = self.job
+        job.completed += 1
+        if result["success"]:
+            job.successful += 1
+            if result.get("original_status") != result.get("current_status"):
+                job.updated += 1
+        else:
+            job.errors += 1
+
+        job.results.append(
+            {"payment_id": payment_id, "success": result["success"], "result": result}
+        )
+        if time.monotonic() - self.last_saved >= self.config["PROGRESS_INTERVAL"]:
+            self._save_progress()
+
+    def _save_progress(self, extra_fields=()):
+        self.last_saved = time.monotonic()
+        self.job.save(
+            update_fields=[
+                "completed",
+                "successful",
+                "errors",
+                "updated",
+                "results",
+                "updated_at",
+                *extra_fields,
+            ]
+        )
+
+
+class Heartbeat(threading.Thread):
+    """Refreshes a running job's ``heartbeat_at`` until stopped"""
+
+    def __init__(self, job: PaymentPollJob, interval: float):
+        super().__init__(name=f"payment-poll-heartbeat-{job.id}", daemon=True)
+        self.job_id = job.id
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    PaymentPollJob.objects.filter(
+                        id=self.job_id, status="running"
+                    ).update(heartbeat_at=timezone.now())
+                except Exception as e:
+                    logger.warning(
+                        f"Payment poll job {self.job_id} heartbeat failed: {e}"
+                    )
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class PaymentPollWorker:
+    """Claims queued poll jobs and runs them, one at a time"""
+
+    def __init__(self):
+        self.config = get_config()
+
+    def _stale(self):
+        cutoff = timezone.now() - timedelta(seconds=self.config["STALE_AFTER"])
+        return PaymentPollJob.objects.filter(status="running").filter(
+            Q(heartbeat_at__lt=cutoff)
+            # Started before heartbeats were recorded
+            | Q(heartbeat_at__isnull=True, updated_at__lt=cutoff)
+        )
+
+    def requeue_stale(self) -> Dict:
+        """Requeue the running jobs whose worker stopped beating (or fail
+        them after ``MAX_ATTEMPTS`` runs)"""
+        stats = {"requeued": 0, "failed": 0}
+        with transaction.atomic():
+            stale = list(self._stale().select_for_update(skip_locked=True))
+            for job in stale:
+                if job.attempts >= self.config["MAX_ATTEMPTS"]:
+                    job.status = "failed"
+                    job.error = f"Worker stopped responding ({job.attempts} attempts)"
+                    job.finished_at = timezone.now()
+                    stats["failed"] += 1
+                else:
+                    job.status = "queued"
+                    stats["requeued"] += 1
+                job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+                logger.warning(f"Payment poll job {job.id} went stale, {job.status}")
+        return stats
+
+    def claim(self) -> Optional[PaymentPollJob]:
+        """Mark the oldest queued job running and return it"""
+        with transaction.atomic():
+            job = (
+                PaymentPollJob.objects.filter(status="queued")
+                .select_for_update(skip_locked=True)
+                .order_by("created_at")
+                .first()
+            )
+            if job is None:
+                return None
+            now = timezone.now()
+            job.status = "running"
+            job.started_at = job.started_at or now
+            job.heartbeat_at = now
+            job.attempts += 1
+            job.save(
+                update_fields=[
+                    "status",
+                    "started_at",
+                    "heartbeat_at",
+                    "attempts",
+                    "updated_at",
+                ]
+            )
+        return job
+
+    def run_once(self) -> bool:
+        """Requeue stale jobs, then run one queued job; returns whether one ran"""
+        self.requeue_stale()
+        job = self.claim()
+        if job is None:
+            return False
+        BulkPollRunner(job).run()
+        return True
+
+    def run(self, interval: float = None, once: bool = False):
+        """Run jobs until interrupted (or until none is queued with once)"""
+        interval = interval if interval is not None else self.config["POLL_INTERVAL"]
+        while True:
+            if not self.run_once():
+                if once:
+                    return
+                time.sleep(interval)
+
+    def stats(self) -> Dict:
+        counts = dict(
+            PaymentPollJob.objects.order_by()
+            .values_list("status")
+            .annotate(count=Count("id"))
+        )
+        return {
+            **{
+                status: counts.get(status, 0)
+                for status, _ in PaymentPollJob.STATUS_CHOICES
+            },
+            "stale": self._stale().count(),
+        }
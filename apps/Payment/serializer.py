@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import PaymentMethod, Payment, StripeEvent
+from .models import PaymentMethod, Payment, PaymentPollJob, StripeEvent
 
 class PaymentMethodSerializer(serializers.ModelSerializer):
     class Meta:
@@ -36,6 +36,21 @@ class StripeEventSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'processed_at']
 
+class PaymentPollJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PaymentPollJob
+        fields = [
+            'id', 'status', 'poll_until_complete', 'total', 'completed',
+            'successful', 'errors', 'updated', 'progress', 'results', 'error',
+            'attempts', 'started_at', 'heartbeat_at', 'finished_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        return round(obj.completed / obj.total * 100, 1) if obj.total else 100.0
+
 class CreateCheckoutSessionSerializer(serializers.Serializer):
     """Serializer for creating Stripe checkout sessions"""
     request_id = serializers.UUIDField()
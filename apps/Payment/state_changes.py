@@ -0,0 +1,167 @@
+"""
+Payment state-change dispatcher
+
+A single ``post_save`` receiver for ``Payment`` works out the status
+transition once, from the status the instance was loaded with and the status
+it was saved with, and runs the handlers registered for it:
+
+- handlers register declaratively with ``@on_payment_status(...)`` in their
+  app's signals module, and only run when the status actually changes;
+- the payment's request (with its user and job) is loaded once and shared by
+  every handler;
+- handlers stage request changes with ``transition.update_request``, which
+  are applied with one ``save(update_fields=...)`` after all handlers ran;
+- each handler runs in a savepoint; a failing handler is logged and its
+  staged request changes are dropped, without failing the payment save.
+"""
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentTransition:
+    """One payment status change, as seen by the registered handlers"""
+
+    def __init__(self, payment: Payment, old_status: Optional[str], created: bool):
+        self.payment = payment
+        self.old_status = old_status
+        self.new_status = payment.status
+        self.created = created
+        self.request_updates: Dict = {}
+
+    @cached_property
+    def request(self):
+        from apps.Request.models import Request
+
+        return (
+            Request.objects.select_related("user", "job")
+            .filter(pk=self.payment.request_id)
+            .first()
+        )
+
+    @property
+    def job(self):
+        """The request's job, or None (loaded with the request)"""
+        try:
+            return self.request.job if self.request else None
+        except ObjectDoesNotExist:
+            return None
+
+    def request_value(self, field: str):
+        """A request field, including changes staged by earlier handlers"""
+        if field in self.request_updates:
+            return self.request_updates[field]
+        return getattr(self.request, field)
+
+    def update_request(self, **fields):
+        """Stage request field changes; saved once after all handlers ran"""
+        self.request_updates.update(fields)
+
+    def apply_request_updates(self):
+        request_obj = self.request
+        changed = [
+            field
+            for field, value in self.request_updates.items()
+            if getattr(request_obj, field) != value
+        ]
+        if not changed:
+            return
+
+        for field in changed:
+            setattr(request_obj, field, self.request_updates[field])
+        request_obj.save(update_fields=[*changed, "updated_at"])
+        logger.info(
+            f"Updated request {request_obj.id} ({', '.join(changed)}) "
+            f"from payment {self.payment.id}"
+        )
+
+
+class _Registration:
+    def __init__(self, handler, to_statuses, from_statuses, on_create):
+        self.handler = handler
+        self.to_statuses = set(to_statuses) if to_statuses else None
+        self.from_statuses = set(from_statuses) if from_statuses else None
+        self.on_create = on_create
+
+    def matches(self, transition: PaymentTransition) -> bool:
+        if transition.created and not self.on_create:
+            return False
+        if self.to_statuses and transition.new_status not in self.to_statuses:
+            return False
+        if self.from_statuses and transition.old_status not in self.from_statuses:
+            return False
+        return True
+
+
+_registry: List[_Registration] = []
+
+
+def on_payment_status(
+    to: Iterable[str] = None, from_: Iterable[str] = None, on_create: bool = False
+):
+    """
+    Register a handler for payment status changes
+
+    Args:
+        to: Only run for these new statuses (default: any)
+        from_: Only run for these previous statuses (default: any)
+        on_create: Also run when a payment is created
+    """
+
+    def register(handler: Callable[[PaymentTransition], None]):
+        _registry.append(_Registration(handler, to, from_, on_create))
+        return handler
+
+    return register
+
+
+@receiver(post_init, sender=Payment)
+def track_payment_status(sender, instance, **kwargs):
+    """Remember the status an instance was loaded with, without a query"""
+    # __dict__ avoids loading a deferred status field
+    instance._tracked_status = instance.__dict__.get("status")
+
+
+@receiver(post_save, sender=Payment)
+def dispatch_payment_status_change(sender, instance, created, **kwargs):
+    old_status = None if created else getattr(instance, "_tracked_status", None)
+    instance._tracked_status = instance.status
+    if not created and old_status == instance.status:
+        return
+
+    transition = PaymentTransition(instance, old_status, created)
+    handlers = [
+        registration.handler
+        for registration in _registry
+        if registration.matches(transition)
+    ]
+    if not handlers or transition.request is None:
+        return
+
+    for handler in handlers:
+        staged = dict(transition.request_updates)
+        try:
+            with transaction.atomic():
+                handler(transition)
+        except Exception as e:
+            transition.request_updates = staged
+            logger.error(
+                f"Payment status handler {handler.__name__} failed for payment "
+                f"{instance.id} ({old_status} -> {instance.status}): {str(e)}"
+            )
+
+    try:
+        with transaction.atomic():
+            transition.apply_request_updates()
+    except Exception as e:
+        logger.error(f"Error updating request for payment {instance.id}: {str(e)}")
@@ -2,10 +2,12 @@
 
 # apps/Payment/stripe_service.py
 
+import json
 import stripe
 import logging
 import time
 from typing import Dict, Optional, List, Any, Tuple
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
 from django.conf import settings
 from django.utils import timezone
@@ -13,8 +15,17 @@ from django.db import transaction
 from .models import Payment, PaymentMethod, StripeEvent
 from apps.User.models import User
 from apps.Request.models import Request
+from utils.http_client import http_client
+from utils.debug_trace import get_tracer
 
 logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+# Route Stripe SDK traffic through the shared pooled, circuit-broken session
+stripe.default_http_client = stripe.RequestsClient(
+    session=http_client.session_for("api.stripe.com"),
+    timeout=http_client.host_config("api.stripe.com")["TIMEOUT"],
+)
 
 
 class StripePollingException(Exception):
@@ -124,19 +135,19 @@ class StripeService:
         from apps.Request.models import Request  # Add Request model import
 
         try:
-            print(f"\nStarting poll_payment_status for payment {payment_id}")
+            tracer.debug("Starting poll_payment_status for payment {}", payment_id)
             payment = Payment.objects.select_related("request").get(
                 id=payment_id
             )  # Use select_related to get request in same query
             original_status = payment.status
-            print(f"Found payment with original status: {original_status}")
+            tracer.debug("Found payment with original status: {}", original_status)
 
             # Try to get current status from Stripe
             stripe_data = self._get_stripe_payment_status(payment)
-            print(f"Got stripe data: {stripe_data}")
+            tracer.debug("Got stripe data: {}", stripe_data)
 
             if not stripe_data:
-                print("Could not retrieve payment status from Stripe")
+                tracer.debug("Could not retrieve payment status from Stripe")
                 return {
                     "success": False,
                     "error": "Could not retrieve payment status from Stripe",
@@ -149,20 +160,22 @@ class StripeService:
                 updated_payment = self._update_payment_from_stripe_data(
                     payment, stripe_data
                 )
-                print(f"Updated payment status: {updated_payment.status}")
+                tracer.debug("Updated payment status: {}", updated_payment.status)
 
                 if updated_payment.status == "completed":
-                    print("Payment completed, updating request and creating job")
+                    tracer.debug("Payment completed, updating request and creating job")
                     if updated_payment.request:  # Check if request exists
-                        print(f"Updating request {updated_payment.request.id} status")
+                        tracer.debug(
+                            "Updating request {} status", updated_payment.request.id
+                        )
                         updated_payment.request.payment_status = "completed"
                         updated_payment.request.save()
                         try:
                             # Create job after payment
                             job = Job.create_job_after_payment(updated_payment.request)
-                            print(f"Successfully created job {job.id}")
+                            tracer.debug("Successfully created job {}", job.id)
                         except Exception as e:
-                            print(f"Error creating job: {str(e)}")
+                            tracer.debug("Error creating job: {}", e)
                             # Don't fail the whole process if job creation fails
                             logger.error(
                                 f"Failed to create job for request {updated_payment.request.id}: {str(e)}"
@@ -186,18 +199,18 @@ class StripeService:
                     "stripe_data": stripe_data,
                 }
             except Exception as e:
-                print(f"Error updating payment from stripe data: {str(e)}")
+                logger.error(f"Error updating payment from stripe data: {str(e)}")
                 return {"success": False, "error": str(e), "payment_id": payment_id}
 
         except Payment.DoesNotExist:
-            print(f"Payment with ID {payment_id} not found")
+            logger.warning(f"Payment with ID {payment_id} not found")
             return {
                 "success": False,
                 "error": f"Payment with ID {payment_id} not found",
                 "payment_id": payment_id,
             }
         except Exception as e:
-            print(f"Error polling payment status: {str(e)}")
+            tracer.debug("Error polling payment status: {}", e)
             logger.error(
                 f"Error polling payment status for payment {payment_id}: {str(e)}"
             )
@@ -308,49 +321,43 @@ class StripeService:
         Get current payment status from Stripe based on available identifiers
         """
         try:
-            print(f"Getting stripe payment status for payment {payment.id}")
-            print(f"Payment intent ID: {payment.stripe_payment_intent_id}")
-            print(f"Transaction ID: {payment.transaction_id}")
+            tracer.debug("Getting stripe payment status for payment {}", payment.id)
+            tracer.debug("Payment intent ID: {}", payment.stripe_payment_intent_id)
+            tracer.debug("Transaction ID: {}", payment.transaction_id)
 
             # Try payment intent first (if available)
             if payment.stripe_payment_intent_id:
-                print("Using payment intent ID")
+                tracer.debug("Using payment intent ID")
                 return self._get_payment_intent_status(payment.stripe_payment_intent_id)
 
             # Fall back to checkout session (transaction_id)
             elif payment.transaction_id and payment.transaction_id.startswith("cs_"):
-                print("Using checkout session ID")
+                tracer.debug("Using checkout session ID")
                 return self._get_checkout_session_status(payment.transaction_id)
 
             else:
-                print(f"Payment {payment.id} has no valid Stripe identifier")
+                tracer.debug("Payment {} has no valid Stripe identifier", payment.id)
                 logger.error(f"Payment {payment.id} has no valid Stripe identifier")
                 return None
 
         except stripe.error.StripeError as e:
-            print(f"Stripe error when getting payment status: {str(e)}")
+            tracer.debug("Stripe error when getting payment status: {}", e)
             logger.error(f"Stripe error when getting payment status: {str(e)}")
             return None
         except Exception as e:
-            print(f"Unexpected error in _get_stripe_payment_status: {str(e)}")
+            tracer.debug("Unexpected error in _get_stripe_payment_status: {}", e)
             logger.error(f"Unexpected error in _get_stripe_payment_status: {str(e)}")
             return None
 
     def _get_payment_intent_status(self, payment_intent_id: str) -> Dict[str, Any]:
         """Get status from payment intent"""
         try:
-            print(f"Getting payment intent status for {payment_intent_id}")
-            payment_intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-            print(f"Payment intent retrieved: {payment_intent}")
-
-            # Safely get charges data
-            charges_data = []
-            if hasattr(payment_intent, "charges") and payment_intent.charges:
-                charges_data = (
-                    payment_intent.charges.data
-                    if hasattr(payment_intent.charges, "data")
-                    else []
-                )
+            tracer.debug("Getting payment intent status for {}", payment_intent_id)
+            # Expand the latest charge so refunds are visible in one round trip
+            payment_intent = stripe.PaymentIntent.retrieve(
+                payment_intent_id, expand=["latest_charge"]
+            )
+            tracer.debug("Payment intent retrieved: {}", payment_intent)
 
             return {
                 "source": "payment_intent",
@@ -359,15 +366,36 @@ class StripeService:
                 "amount": Decimal(payment_intent.amount) / 100,
                 "currency": payment_intent.currency.upper(),
                 "last_payment_error": payment_intent.last_payment_error,
-                "charges": charges_data,
+                "charges": self._get_charges(payment_intent),
             }
         except Exception as e:
-            print(f"Error in _get_payment_intent_status: {str(e)}")
+            logger.error(f"Error in _get_payment_intent_status: {str(e)}")
             raise
 
+    def _get_charges(self, payment_intent) -> List:
+        """Charges of a payment intent, from ``charges`` or an expanded ``latest_charge``"""
+        charges = payment_intent.get("charges")
+        if charges and hasattr(charges, "data"):
+            return charges.data
+
+        latest_charge = payment_intent.get("latest_charge")
+        if latest_charge and not isinstance(latest_charge, str):
+            return [latest_charge]
+        return []
+
     def _get_checkout_session_status(self, session_id: str) -> Dict[str, Any]:
         """Get status from checkout session"""
-        session = stripe.checkout.Session.retrieve(session_id)
+        # The payment intent (and its latest charge) are expanded so the whole
+        # status comes back in one round trip
+        session = stripe.checkout.Session.retrieve(
+            session_id, expand=["payment_intent.latest_charge"]
+        )
+        payment_intent = session.payment_intent
+        if isinstance(payment_intent, str):
+            payment_intent_id, payment_intent = payment_intent, None
+        else:
+            payment_intent_id = payment_intent.id if payment_intent else None
+
         result = {
             "source": "checkout_session",
             "session_id": session.id,
@@ -377,23 +405,17 @@ class StripeService:
                 Decimal(session.amount_total) / 100 if session.amount_total else None
             ),
             "currency": session.currency.upper() if session.currency else None,
-            "payment_intent_id": session.payment_intent,
+            "payment_intent_id": payment_intent_id,
         }
 
-        # If session has payment intent, get additional details
-        if session.payment_intent:
-            try:
-                payment_intent = stripe.PaymentIntent.retrieve(session.payment_intent)
-                result.update(
-                    {
-                        "payment_intent_status": payment_intent.status,
-                        "last_payment_error": payment_intent.last_payment_error,
-                    }
-                )
-            except stripe.error.StripeError as e:
-                logger.warning(
-                    f"Could not retrieve payment intent {session.payment_intent}: {str(e)}"
-                )
+        if payment_intent:
+            result.update(
+                {
+                    "payment_intent_status": payment_intent.status,
+                    "last_payment_error": payment_intent.last_payment_error,
+                    "charges": self._get_charges(payment_intent),
+                }
+            )
 
         return result
 
@@ -562,14 +584,19 @@ class StripeService:
 
     def handle_webhook_event(self, payload: str, sig_header: str) -> Optional[Dict]:
         """
-        Handle Stripe webhook events
+        Verify a Stripe webhook and store the raw event for the event worker
+
+        Nothing is processed here so that Stripe gets its 200 quickly; see
+        webhook_processor.StripeEventProcessor.
+
+        Returns:
+            Dict: {"status": "received" | "already_received"}, or None if the
+            payload or signature is invalid
         """
-        print("about to hanlde webhook event")
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, self.webhook_endpoint_secret
             )
-            print("the event is", event)
         except ValueError:
             logger.error("Invalid payload in webhook")
             return None
@@ -577,26 +604,34 @@ class StripeService:
             logger.error("Invalid signature in webhook")
             return None
 
-        # Check if event already processed
-        stripe_event, created = StripeEvent.objects.get_or_create(
+        event_data = event["data"]["object"]
+        if event_data.get("object") == "payment_intent":
+            payment_intent_id = event_data.get("id")
+        else:
+            payment_intent_id = event_data.get("payment_intent") or event_data.get("id")
+
+        created = event.get("created")
+        _, inserted = StripeEvent.objects.get_or_create(
             stripe_event_id=event["id"],
-            defaults={"event_type": event["type"], "processed": False},
+            defaults={
+                "event_type": event["type"],
+                # The verified body is the event JSON; store it as sent
+                "payload": json.loads(payload),
+                "payment_intent_id": payment_intent_id or "",
+                "stripe_created": (
+                    datetime.fromtimestamp(created, tz=dt_timezone.utc)
+                    if created
+                    else None
+                ),
+            },
         )
 
-        if not created and stripe_event.processed:
-            logger.info(f"Event {event['id']} already processed")
-            return {"status": "already_processed"}
-        print("b=noe thr event", event)
-        # Process the event
-        result = self._process_webhook_event(event)
-        print("the stripe web hook event result is", result)
-
-        # Mark event as processed
-        stripe_event.processed = True
-        stripe_event.processed_at = timezone.now()
-        stripe_event.save()
+        if not inserted:
+            logger.info(f"Event {event['id']} already received")
+            return {"status": "already_received"}
 
-        return result
+        tracer.debug("Stored webhook event {} ({})", event["id"], event["type"])
+        return {"status": "received"}
 
     def _process_webhook_event(self, event: Dict) -> Dict:
         """
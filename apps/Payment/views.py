@@ -11,21 +11,26 @@ from django.utils import timezone
 import json
 import logging
 
-from .models import PaymentMethod, Payment, StripeEvent
-from django.core.exceptions import ObjectDoesNotExist
+from .models import PaymentMethod, Payment, PaymentPollJob, StripeEvent
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from .serializer import (
     PaymentMethodSerializer,
+    PaymentPollJobSerializer,
     PaymentSerializer,
     CreateRefundSerializer,
 )
+from .polling import get_config as get_polling_config
 from .stripe_service import StripeService
 from apps.Job.models import Job
 from apps.Job.serializers import JobSerializer
 from apps.Job.services import JobService
 from apps.Request.models import Request
 import uuid
+from utils import dashboard_metrics
+from utils.debug_trace import get_tracer
 
 logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class PaymentMethodViewSet(viewsets.ModelViewSet):
@@ -100,32 +105,7 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
         """
         Get payment method statistics for admins
         """
-        from django.db.models import Count
-
-        stats = {
-            "total_payment_methods": PaymentMethod.objects.count(),
-            "active_payment_methods": PaymentMethod.objects.filter(
-                is_active=True
-            ).count(),
-            "default_payment_methods": PaymentMethod.objects.filter(
-                is_default=True
-            ).count(),
-            "by_type": PaymentMethod.objects.values("stripe_payment_method_type")
-            .annotate(count=Count("id"))
-            .order_by("stripe_payment_method_type"),
-            "recent_additions": PaymentMethod.objects.select_related("user")
-            .order_by("-created_at")[:10]
-            .values(
-                "id",
-                "user__email",
-                "stripe_payment_method_type",
-                "is_default",
-                "is_active",
-                "created_at",
-            ),
-        }
-
-        return Response(stats)
+        return Response(dashboard_metrics.payment_method_overview())
 
 
 class PaymentViewSet(viewsets.ModelViewSet):
@@ -144,7 +124,14 @@ class PaymentViewSet(viewsets.ModelViewSet):
         """
         if self.action == "create_checkout_session":
             return [permissions.AllowAny()]
-        elif self.action in ["create", "update", "partial_update", "destroy"]:
+        elif self.action in [
+            "create",
+            "update",
+            "partial_update",
+            "destroy",
+            "bulk_poll",
+            "bulk_poll_progress",
+        ]:
             # Only admins can create/update/delete payments directly
             return [permissions.IsAuthenticated(), permissions.IsAdminUser()]
         else:
@@ -187,38 +174,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
         """
         Get payment statistics for admins
         """
-        from django.db.models import Count, Sum, Avg
-        from datetime import datetime, timedelta
-
-        queryset = Payment.objects.all()
-
         # Get date range from query params (default to last 30 days)
         days = int(request.query_params.get("days", 30))
-        start_date = datetime.now() - timedelta(days=days)
-        queryset = queryset.filter(created_at__gte=start_date)
-
-        stats = {
-            "total_payments": queryset.count(),
-            "total_amount": queryset.aggregate(Sum("amount"))["amount__sum"] or 0,
-            "average_amount": queryset.aggregate(Avg("amount"))["amount__avg"] or 0,
-            "by_status": queryset.values("status")
-            .annotate(count=Count("id"), total_amount=Sum("amount"))
-            .order_by("status"),
-            "by_currency": queryset.values("currency")
-            .annotate(count=Count("id"), total_amount=Sum("amount"))
-            .order_by("currency"),
-            "recent_payments": queryset.order_by("-created_at")[:10].values(
-                "id",
-                "amount",
-                "currency",
-                "status",
-                "created_at",
-                "request__tracking_number",
-                "request__user__email",
-            ),
-        }
-
-        return Response(stats)
+        return Response(dashboard_metrics.payment_stats(days))
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def failed_payments(self, request):
@@ -272,9 +230,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
         try:
             stripe_service = StripeService()
-            print("dump 1")
+            tracer.debug("dump 1")
             result = stripe_service.poll_payment_status(payment.id)
-            print("dump 2")
+            tracer.debug("dump 2")
             if result["success"]:
                 # Refresh payment data for response
                 payment.refresh_from_db()
@@ -385,16 +343,19 @@ class PaymentViewSet(viewsets.ModelViewSet):
     )
     def bulk_poll(self, request):
         """
-        Poll multiple payments at once (Admin only)
+        Queue a background poll of multiple payments (Admin only)
 
         POST /api/payments/bulk_poll/
         {
             "payment_ids": [1, 2, 3],
             "poll_until_complete": false  // optional
         }
+
+        Returns 202 with the job; follow progress at
+        GET /api/payments/bulk_poll/<job_id>/
         """
         payment_ids = request.data.get("payment_ids", [])
-        poll_until_complete = request.data.get("poll_until_complete", False)
+        poll_until_complete = bool(request.data.get("poll_until_complete", False))
 
         if not payment_ids:
             return Response(
@@ -402,85 +363,54 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Limit batch size to prevent timeouts
-        if len(payment_ids) > 20:
+        max_payments = get_polling_config()["MAX_PAYMENTS"]
+        if len(payment_ids) > max_payments:
             return Response(
-                {"error": "Maximum 20 payments can be polled at once"},
+                {"error": f"Maximum {max_payments} payments can be polled at once"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            stripe_service = StripeService()
-            results = []
-            success_count = 0
-            error_count = 0
-            updated_count = 0
-
-            for payment_id in payment_ids:
-                try:
-                    # Verify payment exists and user has access
-                    payment = Payment.objects.get(id=payment_id)
-
-                    if poll_until_complete:
-                        result = stripe_service.poll_payment_until_complete(
-                            payment_id,
-                            max_attempts=5,  # Shorter for batch operations
-                            base_delay=1.0,
-                        )
-                    else:
-                        result = stripe_service.poll_payment_status(payment_id)
+        # De-duplicate while keeping the requested order
+        payment_ids = list(dict.fromkeys(str(payment_id) for payment_id in payment_ids))
 
-                    results.append(
-                        {
-                            "payment_id": payment_id,
-                            "success": result["success"],
-                            "result": result,
-                        }
-                    )
+        # Queued for the run_payment_polls workers (polling.py)
+        job = PaymentPollJob.objects.create(
+            requested_by=request.user,
+            payment_ids=payment_ids,
+            poll_until_complete=poll_until_complete,
+            total=len(payment_ids),
+        )
 
-                    if result["success"]:
-                        success_count += 1
-                        if result.get("changes_made"):
-                            updated_count += 1
-                    else:
-                        error_count += 1
+        return Response(
+            {
+                "success": True,
+                "job": PaymentPollJobSerializer(job).data,
+                "progress_url": f"{request.path.rstrip('/')}/{job.id}/",
+                "message": f"Bulk polling of {len(payment_ids)} payments queued",
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-                except Payment.DoesNotExist:
-                    results.append(
-                        {
-                            "payment_id": payment_id,
-                            "success": False,
-                            "error": "Payment not found",
-                        }
-                    )
-                    error_count += 1
-                except Exception as e:
-                    results.append(
-                        {"payment_id": payment_id, "success": False, "error": str(e)}
-                    )
-                    error_count += 1
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"bulk_poll/(?P<job_id>[0-9a-f-]+)",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_poll_progress(self, request, job_id=None):
+        """
+        Progress and results of a bulk poll job (Admin only)
 
+        GET /api/payments/bulk_poll/<job_id>/
+        """
+        try:
+            job = PaymentPollJob.objects.get(id=job_id)
+        except (PaymentPollJob.DoesNotExist, ValidationError):
             return Response(
-                {
-                    "success": True,
-                    "results": results,
-                    "summary": {
-                        "total": len(payment_ids),
-                        "successful_polls": success_count,
-                        "errors": error_count,
-                        "payments_updated": updated_count,
-                    },
-                    "message": f"Bulk polling completed: {success_count} successful, {error_count} errors, {updated_count} payments updated",
-                },
-                status=status.HTTP_200_OK,
+                {"error": "Poll job not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        except Exception as e:
-            logger.error(f"Error in bulk polling: {str(e)}")
-            return Response(
-                {"success": False, "error": f"Bulk polling failed: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return Response(PaymentPollJobSerializer(job).data)
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def needs_polling(self, request):
@@ -657,7 +587,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         """
         Create a Stripe Checkout Session for payment
         """
-        print("the request data is   .................  :", request.data)
+        tracer.debug("the request data is   .................  : {}", request.data)
         # Validate required fields
         request_id = request.data.get("request_id")
         amount = request.data.get("amount")
@@ -714,7 +644,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
             try:
                 actual_user = User.objects.get(id=user_id)
-                print(f"Found user: {actual_user.email}")
+                tracer.debug("Found user: {}", actual_user.email)
             except User.DoesNotExist:
                 return Response(
                     {"detail": "User not found"}, status=status.HTTP_404_NOT_FOUND
@@ -723,14 +653,14 @@ class PaymentViewSet(viewsets.ModelViewSet):
             # Get request with specific user
             try:
                 request_obj = Request.objects.get(id=request_id, user=actual_user)
-                print(f"Found request for user: {request_obj.id}")
+                tracer.debug("Found request for user: {}", request_obj.id)
             except Request.DoesNotExist:
                 return Response(
                     {"detail": "Request not found for this user"},
                     status=status.HTTP_404_NOT_FOUND,
                 )
         # Create checkout session
-        print(f"Creating checkout session for user: {actual_user.email}")
+        tracer.debug("Creating checkout session for user: {}", actual_user.email)
         result = stripe_service.create_checkout_session(
             amount=float(amount),
             currency=currency,
@@ -863,7 +793,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
                         status="completed", completed_at__isnull=False
                     ).select_related("request", "request__user")
 
-                    print("payments to be synced", payments)
+                    tracer.debug("payments to be synced {}", payments)
 
                 results = []
                 jobs_created = 0
@@ -886,8 +816,10 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
                         # Check if job already exists for this request
                         existing_job = Job.objects.filter(request=request_obj).first()
-                        print(
-                            f"Checking for existing job for request {request_obj.id}: {existing_job}"
+                        tracer.debug(
+                            "Checking for existing job for request {}: {}",
+                            request_obj.id,
+                            existing_job,
                         )
 
                         if create_jobs and (not existing_job or force_sync):
@@ -906,18 +838,22 @@ class PaymentViewSet(viewsets.ModelViewSet):
                                 logger.info(
                                     f"Updated existing job {job.id} for payment {payment.id}"
                                 )
-                                print(
-                                    f"Updated existing job {job.id} for payment {payment.id}"
+                                tracer.debug(
+                                    "Updated existing job {} for payment {}",
+                                    job.id,
+                                    payment.id,
                                 )
                             else:
                                 # Create new job
-                                print(f"=== STARTING JOB CREATION ===")
-                                print(
-                                    f"Creating job for request {request_obj.id} with request_type: {request_obj.request_type}"
+                                tracer.debug("=== STARTING JOB CREATION ===")
+                                tracer.debug(
+                                    "Creating job for request {} with request_type: {}",
+                                    request_obj.id,
+                                    request_obj.request_type,
                                 )
-                                print(f"Payment amount: {payment.amount}")
-                                print(f"Payment type: {payment.payment_type}")
-                                print(f"Request status: {request_obj.status}")
+                                tracer.debug("Payment amount: {}", payment.amount)
+                                tracer.debug("Payment type: {}", payment.payment_type)
+                                tracer.debug("Request status: {}", request_obj.status)
 
                                 try:
                                     # Calculate base job price from final price
@@ -934,28 +870,28 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
                                     request_obj.base_price = base_job_price
                                     request_obj.save()
-                                    print(f"=== JOB CREATION SUCCESSFUL ===")
-                                    print(f"Job created with ID: {job.id}")
-                                    print(f"Job number: {job.job_number}")
-                                    print(f"Job status: {job.status}")
-                                    print(f"Job price: {job.price}")
-                                    print(f"Job is_instant: {job.is_instant}")
+                                    tracer.debug("=== JOB CREATION SUCCESSFUL ===")
+                                    tracer.debug("Job created with ID: {}", job.id)
+                                    tracer.debug("Job number: {}", job.job_number)
+                                    tracer.debug("Job status: {}", job.status)
+                                    tracer.debug("Job price: {}", job.price)
+                                    tracer.debug("Job is_instant: {}", job.is_instant)
 
                                     payment_result["job_created"] = True
                                     jobs_created += 1
                                     logger.info(
                                         f"Created new job {job.id} for payment {payment.id}"
                                     )
-                                    print(
-                                        f"Successfully created job {job.id} with number {job.job_number}"
+                                    tracer.debug(
+                                        "Successfully created job {} with number {}",
+                                        job.id,
+                                        job.job_number,
                                     )
                                 except Exception as job_error:
-                                    print(f"=== JOB CREATION FAILED ===")
-                                    print(f"Error creating job: {str(job_error)}")
-                                    print(f"Error type: {type(job_error)}")
-                                    import traceback
-
-                                    print(f"Traceback: {traceback.format_exc()}")
+                                    logger.error(
+                                        f"Error creating job: {str(job_error)}",
+                                        exc_info=True,
+                                    )
                                     raise job_error
 
                             # Add timeline event for job creation
@@ -1205,8 +1141,9 @@ class StripeWebhookView(APIView):
                 {"detail": "No signature header"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Only verify and store the event here; the process_stripe_events
+        # worker applies it (see webhook_processor.py)
         stripe_service = StripeService()
-        print("hit the webhook")
         result = stripe_service.handle_webhook_event(payload, sig_header)
 
         if result is None:
@@ -1214,93 +1151,8 @@ class StripeWebhookView(APIView):
                 {"detail": "Invalid webhook"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Auto-sync payment if it was completed
-        if result.get("event_type") in [
-            "payment_intent.completed",
-            "checkout.session.completed",
-        ]:
-            try:
-                payment_id = result.get("payment_id")
-                if payment_id:
-                    self._auto_sync_payment(payment_id)
-            except Exception as e:
-                logger.error(f"Auto-sync failed for payment {payment_id}: {str(e)}")
-
         return Response(result)
 
-    def _auto_sync_payment(self, payment_id):
-        """
-        Automatically sync a payment with job and request when payment is completed
-        """
-        from apps.Job.models import Job
-        from django.db import transaction
-        import logging
-
-        logger = logging.getLogger(__name__)
-
-        try:
-            payment = Payment.objects.get(id=payment_id, status="completed")
-
-            with transaction.atomic():
-                request_obj = payment.request
-
-                # Check if job already exists
-                existing_job = Job.objects.filter(request=request_obj).first()
-
-                if not existing_job:
-                    # Create job
-                    job = Job.create_job(
-                        request_obj=request_obj,
-                        price=payment.amount,
-                        status="pending",
-                        is_instant=request_obj.request_type == "instant",
-                    )
-
-                    # Update request status
-                    old_status = request_obj.status
-                    request_obj.payment_status = "completed"
-
-                    if payment.payment_type == "deposit":
-                        if request_obj.status == "draft":
-                            request_obj.status = "pending"
-                    elif payment.payment_type in ["full_payment", "final_payment"]:
-                        if request_obj.status in ["draft", "pending"]:
-                            request_obj.status = "accepted"
-
-                    request_obj.save()
-
-                    # Add timeline event
-                    if hasattr(job, "timeline_events"):
-                        from apps.Job.models import TimelineEvent
-
-                        TimelineEvent.objects.create(
-                            job=job,
-                            event_type="payment_processed",
-                            description=f"Job auto-created from payment {payment.id}",
-                            visibility="all",
-                            metadata={
-                                "payment_id": str(payment.id),
-                                "payment_amount": str(payment.amount),
-                                "payment_type": payment.payment_type,
-                                "auto_synced": True,
-                            },
-                        )
-
-                    logger.info(f"Auto-synced payment {payment.id} with job {job.id}")
-                    return True
-                else:
-                    logger.info(
-                        f"Job already exists for payment {payment.id}, skipping auto-sync"
-                    )
-                    return False
-
-        except Payment.DoesNotExist:
-            logger.warning(f"Payment {payment_id} not found for auto-sync")
-            return False
-        except Exception as e:
-            logger.error(f"Auto-sync error for payment {payment_id}: {str(e)}")
-            return False
-
 
 class StripeConfigView(APIView):
     """
@@ -0,0 +1,297 @@
+"""
+Stripe webhook event worker
+
+``StripeWebhookView`` only verifies and stores events (``StripeEvent``). This
+module processes them out of band:
+
+- workers claim pending events with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+  several workers can run side by side without double-processing;
+- events for the same payment intent are handled in Stripe creation order: an
+  event is held back while an earlier event for its payment intent is still
+  pending;
+- each event runs in its own savepoint and is marked processed in the same
+  transaction, so a retry never applies an event twice;
+- failed events are retried up to ``MAX_ATTEMPTS`` times;
+- ingest-to-processed lag is logged per batch and reported by ``lag_stats``.
+
+Run with ``python manage.py process_stripe_events``.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, DurationField, ExpressionWrapper, F, Max, Min
+from django.utils import timezone
+
+from .models import Payment, StripeEvent
+from .stripe_service import StripeService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "BATCH_SIZE": 20,
+    "MAX_ATTEMPTS": 5,
+    "POLL_INTERVAL": 2,  # seconds to sleep when there is nothing to claim
+}
+
+
+class EventProcessingError(Exception):
+    """Raised when a handler reports an error, so its savepoint is rolled back"""
+
+    pass
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "STRIPE_EVENT_PROCESSING", {})}
+
+
+class StripeEventProcessor:
+    """Claims and processes stored Stripe webhook events in batches"""
+
+    def __init__(self, batch_size: int = None, max_attempts: int = None):
+        config = get_config()
+        self.batch_size = batch_size or config["BATCH_SIZE"]
+        self.max_attempts = max_attempts or config["MAX_ATTEMPTS"]
+        self.stripe_service = StripeService()
+
+    def pending(self):
+        return StripeEvent.objects.filter(
+            processed=False, attempts__lt=self.max_attempts
+        )
+
+    def process_batch(self) -> Dict:
+        """
+        Claim and process one batch of pending events
+
+        Returns:
+            Dict: Counts of claimed, processed, failed and deferred events, and
+            the maximum ingest-to-processed lag in seconds
+        """
+        stats = {
+            "claimed": 0,
+            "processed": 0,
+            "failed": 0,
+            "deferred": 0,
+            "max_lag": 0.0,
+        }
+
+        with transaction.atomic():
+            events = list(
+                self.pending()
+                .select_for_update(skip_locked=True)
+                .order_by("received_at")[: self.batch_size]
+            )
+            stats["claimed"] = len(events)
+            if not events:
+                return stats
+
+            events.sort(key=self._order_key)
+            earliest_blocking = self._earliest_unclaimed(events)
+            failed_intents = set()
+
+            for event in events:
+                intent = event.payment_intent_id
+                blocking = earliest_blocking.get(intent)
+                if intent and (
+                    intent in failed_intents
+                    or (blocking is not None and blocking < self._order_key(event))
+                ):
+                    # An earlier event for this payment intent is still
+                    # pending; leave this one for a later batch
+                    stats["deferred"] += 1
+                    continue
+
+                if self._process_event(event):
+                    stats["processed"] += 1
+                    lag = (event.processed_at - event.received_at).total_seconds()
+                    stats["max_lag"] = max(stats["max_lag"], lag)
+                else:
+                    stats["failed"] += 1
+                    if intent:
+                        failed_intents.add(intent)
+
+        if stats["processed"] or stats["failed"]:
+            logger.info(
+                f"Stripe events: {stats['processed']} processed, "
+                f"{stats['failed']} failed, {stats['deferred']} deferred, "
+                f"max lag {stats['max_lag']:.1f}s"
+            )
+        return stats
+
+    def _order_key(self, event: StripeEvent):
+        return (event.stripe_created or event.received_at, event.received_at)
+
+    def _earliest_unclaimed(self, events: List[StripeEvent]) -> Dict:
+        """
+        Order key of the earliest pending event per payment intent that was
+        not claimed in this batch (locked by another worker or past the batch)
+        """
+        intents = {
+            event.payment_intent_id for event in events if event.payment_intent_id
+        }
+        if not intents:
+            return {}
+
+        earliest = {}
+        others = (
+            self.pending()
+            .filter(payment_intent_id__in=intents)
+            .exclude(id__in=[event.id for event in events])
+            .values_list("payment_intent_id", "stripe_created", "received_at")
+        )
+        for intent, stripe_created, received_at in others:
+            key = (stripe_created or received_at, received_at)
+            if intent not in earliest or key < earliest[intent]:
+                earliest[intent] = key
+        return earliest
+
+    def _process_event(self, event: StripeEvent) -> bool:
+        """Apply one event inside a savepoint; returns False if it failed"""
+        attempts = event.attempts + 1
+        try:
+            with transaction.atomic():
+                result = self.stripe_service._process_webhook_event(event.payload)
+                if result.get("status") == "error":
+                    raise EventProcessingError(result.get("message", "Handler error"))
+
+                if event.event_type == "checkout.session.completed" and result.get(
+                    "payment_id"
+                ):
+                    auto_sync_payment(result["payment_id"])
+
+                event.processed = True
+                event.processed_at = timezone.now()
+                event.attempts = attempts
+                event.last_error = ""
+                event.save(
+                    update_fields=[
+                        "processed",
+                        "processed_at",
+                        "attempts",
+                        "last_error",
+                        "updated_at",
+                    ]
+                )
+            return True
+
+        except Exception as e:
+            # The savepoint was rolled back; mirror that on the instance
+            event.processed = False
+            event.processed_at = None
+            event.attempts = attempts
+            event.last_error = str(e)
+            event.save(update_fields=["attempts", "last_error", "updated_at"])
+
+            if event.attempts >= self.max_attempts:
+                logger.error(
+                    f"Stripe event {event.stripe_event_id} ({event.event_type}) "
+                    f"gave up after {event.attempts} attempts: {str(e)}"
+                )
+            else:
+                logger.warning(
+                    f"Stripe event {event.stripe_event_id} ({event.event_type}) "
+                    f"failed, attempt {event.attempts}: {str(e)}"
+                )
+            return False
+
+    def run(self, interval: float = None, once: bool = False):
+        """Process batches until interrupted (or until the queue is empty with once)"""
+        interval = interval if interval is not None else get_config()["POLL_INTERVAL"]
+        while True:
+            stats = self.process_batch()
+            if once and stats["processed"] == 0 and stats["failed"] == 0:
+                return
+            if stats["claimed"] == 0 or stats["processed"] == 0:
+                time.sleep(interval)
+
+    def lag_stats(self, window: timedelta = timedelta(hours=1)) -> Dict:
+        """Backlog size and ingest-to-processed lag over the recent window"""
+        now = timezone.now()
+        pending = self.pending().aggregate(oldest=Min("received_at"))
+        lag = ExpressionWrapper(
+            F("processed_at") - F("received_at"), output_field=DurationField()
+        )
+        recent = StripeEvent.objects.filter(
+            processed=True, processed_at__gte=now - window
+        ).aggregate(avg_lag=Avg(lag), max_lag=Max(lag))
+
+        return {
+            "pending": self.pending().count(),
+            "oldest_pending_age": (
+                (now - pending["oldest"]).total_seconds() if pending["oldest"] else 0.0
+            ),
+            "dead": StripeEvent.objects.filter(
+                processed=False, attempts__gte=self.max_attempts
+            ).count(),
+            "processed_in_window": StripeEvent.objects.filter(
+                processed=True, processed_at__gte=now - window
+            ).count(),
+            "avg_lag": (
+                recent["avg_lag"].total_seconds() if recent["avg_lag"] else 0.0
+            ),
+            "max_lag": (
+                recent["max_lag"].total_seconds() if recent["max_lag"] else 0.0
+            ),
+        }
+
+
+def auto_sync_payment(payment_id) -> bool:
+    """
+    Create the job for a completed payment and move its request forward
+
+    Idempotent: does nothing if the request already has a job.
+    """
+    from apps.Job.models import Job, TimelineEvent
+
+    try:
+        payment = Payment.objects.select_related("request").get(
+            id=payment_id, status="completed"
+        )
+    except Payment.DoesNotExist:
+        logger.warning(f"Payment {payment_id} not found for auto-sync")
+        return False
+
+    with transaction.atomic():
+        request_obj = payment.request
+
+        if Job.objects.filter(request=request_obj).exists():
+            logger.info(
+                f"Job already exists for payment {payment.id}, skipping auto-sync"
+            )
+            return False
+
+        job = Job.create_job(
+            request_obj=request_obj,
+            price=payment.amount,
+            status="pending",
+            is_instant=request_obj.request_type == "instant",
+        )
+
+        request_obj.payment_status = "completed"
+        if payment.payment_type == "deposit":
+            if request_obj.status == "draft":
+                request_obj.status = "pending"
+        elif payment.payment_type in ["full_payment", "final_payment"]:
+            if request_obj.status in ["draft", "pending"]:
+                request_obj.status = "accepted"
+        request_obj.save()
+
+        TimelineEvent.objects.create(
+            job=job,
+            event_type="payment_processed",
+            description=f"Job auto-created from payment {payment.id}",
+            visibility="all",
+            metadata={
+                "payment_id": str(payment.id),
+                "payment_amount": str(payment.amount),
+                "payment_type": payment.payment_type,
+                "auto_synced": True,
+            },
+        )
+
+    logger.info(f"Auto-synced payment {payment.id} with job {job.id}")
+    return True
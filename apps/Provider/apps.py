@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProviderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.Provider'
+
+    def ready(self):
+        # Keeps the provider statistics projection current
+        import apps.Provider.signals
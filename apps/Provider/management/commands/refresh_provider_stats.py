@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.Provider.stats import refresh_provider_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute provider ratings, completed bookings and vehicle counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "provider_ids",
+            nargs="*",
+            help="Providers to refresh (default: all of them)",
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_provider_stats(options["provider_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {updated} providers"))
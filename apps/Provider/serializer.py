@@ -377,52 +377,30 @@ class ServiceProviderSerializer(serializers.ModelSerializer):
         """Custom representation to handle ManyToMany fields properly"""
         data = super().to_representation(instance)
 
-        # Handle ManyToMany fields properly for output
+        # Handle ManyToMany fields properly for output. Iterating .all()
+        # (rather than checking .exists() first) uses the relations
+        # prefetched by ServiceProviderViewSet, so a list costs no query
+        # per provider
         try:
-            # Service categories
-            if (
-                hasattr(instance, "service_categories")
-                and instance.service_categories.exists()
-            ):
-                from apps.Services.serializers import ServiceCategorySerializer
+            from apps.Services.serializers import ServiceCategorySerializer
 
-                data["service_categories"] = ServiceCategorySerializer(
-                    instance.service_categories.all(), many=True
-                ).data
-            else:
-                data["service_categories"] = []
+            data["service_categories"] = ServiceCategorySerializer(
+                instance.service_categories.all(), many=True
+            ).data
+            data["specializations"] = ServiceCategorySerializer(
+                instance.specializations.all(), many=True
+            ).data
 
-            # Specializations
-            if (
-                hasattr(instance, "specializations")
-                and instance.specializations.exists()
-            ):
-                from apps.Services.serializers import ServiceCategorySerializer
+            payment_methods = instance.payment_methods.all()
+            try:
+                from apps.Payment.serializers import PaymentMethodSerializer
 
-                data["specializations"] = ServiceCategorySerializer(
-                    instance.specializations.all(), many=True
+                data["payment_methods"] = PaymentMethodSerializer(
+                    payment_methods, many=True
                 ).data
-            else:
-                data["specializations"] = []
-
-            # Payment methods
-            if (
-                hasattr(instance, "payment_methods")
-                and instance.payment_methods.exists()
-            ):
-                try:
-                    from apps.Payment.serializers import PaymentMethodSerializer
-
-                    data["payment_methods"] = PaymentMethodSerializer(
-                        instance.payment_methods.all(), many=True
-                    ).data
-                except ImportError:
-                    # If PaymentMethodSerializer doesn't exist, just return IDs
-                    data["payment_methods"] = [
-                        pm.id for pm in instance.payment_methods.all()
-                    ]
-            else:
-                data["payment_methods"] = []
+            except ImportError:
+                # If PaymentMethodSerializer doesn't exist, just return IDs
+                data["payment_methods"] = [pm.id for pm in payment_methods]
 
         except ImportError:
             # Fallback: return empty lists if serializers don't exist
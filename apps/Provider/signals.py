@@ -0,0 +1,44 @@
+"""
+Keeps the provider statistics projection (stats.py) in step with reviews,
+job completions and vehicles
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ProviderReview
+from .stats import provider_stats_changed
+
+
+@receiver(post_save, sender=ProviderReview)
+@receiver(post_delete, sender=ProviderReview)
+def review_changed(sender, instance, **kwargs):
+    provider_stats_changed(instance.provider_id)
+
+
+@receiver(post_save, sender="Vehicle.Vehicle")
+@receiver(post_delete, sender="Vehicle.Vehicle")
+def vehicle_changed(sender, instance, **kwargs):
+    provider_stats_changed(instance.provider_id, active=True)
+
+
+@receiver(post_save, sender="Job.Job")
+def job_changed(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and "status" not in update_fields:
+        return
+    # Set by the status tracking pre_save signal (apps/Notification/signals.py)
+    old_status = getattr(instance, "_original_status", None)
+    if "completed" not in (old_status, instance.status):
+        return
+    if not created and old_status == instance.status:
+        # Saved again without a status change
+        return
+    provider_stats_changed(
+        instance.assigned_provider_id, active=instance.status == "completed"
+    )
+
+
+@receiver(post_delete, sender="Job.Job")
+def job_deleted(sender, instance, **kwargs):
+    if instance.status == "completed":
+        provider_stats_changed(instance.assigned_provider_id)
@@ -0,0 +1,153 @@
+"""
+Provider statistics projection
+
+``ServiceProvider.rating``, ``completed_bookings``, ``vehicle_count`` and
+``last_active`` are denormalized so the provider list can serve them from
+the row. They are derived from:
+
+- ``rating``: the average ``ProviderReview.rating`` of the provider;
+- ``completed_bookings``: the provider's jobs in ``completed`` status;
+- ``vehicle_count``: the provider's active vehicles;
+- ``last_active``: the last time the provider completed a job or changed
+  their fleet.
+
+signals.py calls ``provider_stats_changed`` whenever a review, a job
+completion or a vehicle changes. The affected providers are collected and,
+once the transaction commits, refreshed with one ``UPDATE`` per batch that
+recomputes their columns from correlated subqueries. Recomputing (rather
+than adding deltas) keeps the projection idempotent: a missed or repeated
+refresh is corrected by the next one, and ``refresh_provider_stats`` with no
+arguments (the ``refresh_provider_stats`` command) rebuilds every provider.
+"""
+
+import logging
+import threading
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Count,
+    DecimalField,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+_pending = threading.local()
+
+
+def _aggregate(queryset, group_by: str, aggregate, output_field):
+    """A correlated subquery computing ``aggregate`` per provider"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{group_by: OuterRef("pk")})
+            .order_by()
+            .values(group_by)
+            .annotate(value=aggregate)
+            .values("value"),
+            output_field=output_field,
+        ),
+        Value(0),
+        output_field=output_field,
+    )
+
+
+def stats_expressions():
+    """Expressions recomputing the projected columns of a provider"""
+    from apps.Job.models import Job
+    from apps.Vehicle.models import Vehicle
+
+    from .models import ProviderReview
+
+    return {
+        "rating": _aggregate(
+            ProviderReview.objects.all(),
+            "provider",
+            Avg("rating"),
+            DecimalField(max_digits=3, decimal_places=1),
+        ),
+        "completed_bookings": _aggregate(
+            Job.objects.filter(status="completed"),
+            "assigned_provider",
+            Count("pk"),
+            IntegerField(),
+        ),
+        "vehicle_count": _aggregate(
+            Vehicle.objects.filter(is_active=True),
+            "provider",
+            Count("pk"),
+            IntegerField(),
+        ),
+    }
+
+
+def refresh_provider_stats(
+    provider_ids: Optional[Iterable] = None, active: bool = False
+) -> int:
+    """
+    Recompute the stats of ``provider_ids`` (every provider if None); with
+    ``active``, also bump their ``last_active``. Returns the rows updated.
+    """
+    from .models import ServiceProvider
+
+    values = stats_expressions()
+    if active:
+        values["last_active"] = timezone.now()
+
+    if provider_ids is None:
+        updated = ServiceProvider.objects.update(**values)
+        logger.info(f"Rebuilt stats of {updated} providers")
+        return updated
+
+    provider_ids = list(provider_ids)
+    updated = 0
+    for start in range(0, len(provider_ids), BATCH_SIZE):
+        updated += ServiceProvider.objects.filter(
+            pk__in=provider_ids[start : start + BATCH_SIZE]
+        ).update(**values)
+    return updated
+
+
+def _refresh_pending():
+    providers = getattr(_pending, "providers", None)
+    _pending.providers = {}
+    if not providers:
+        # Already refreshed by an earlier callback of the same transaction
+        return
+    active = [pk for pk, is_active in providers.items() if is_active]
+    passive = [pk for pk, is_active in providers.items() if not is_active]
+    try:
+        if active:
+            refresh_provider_stats(active, active=True)
+        if passive:
+            refresh_provider_stats(passive)
+    except Exception as e:
+        logger.error(f"Error refreshing provider stats: {str(e)}")
+
+
+def provider_stats_changed(provider_id, active: bool = False):
+    """
+    Refresh ``provider_id``'s stats once the current transaction commits;
+    ``active`` when the provider did something (completed a job, changed
+    their fleet) rather than had something done to them (a review).
+
+    Changes are collected per thread, so the first callback to run after a
+    commit refreshes every provider changed in the transaction at once.
+    Providers left over from a rolled back transaction are refreshed with
+    the next one, which is harmless.
+    """
+    if provider_id is None:
+        return
+    providers = getattr(_pending, "providers", None)
+    if providers is None:
+        providers = _pending.providers = {}
+    providers[provider_id] = providers.get(provider_id, False) or active
+    transaction.on_commit(_refresh_pending)
@@ -43,7 +43,7 @@ class ServiceProviderViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = self.with_related(super().get_queryset())
 
         # If user is not staff, only show their own provider profile
         if not self.request.user.is_staff:
@@ -66,6 +66,45 @@ class ServiceProviderViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    @staticmethod
+    def with_related(queryset):
+        """
+        Everything ServiceProviderSerializer renders, loaded once per page
+        rather than once per provider: listing any number of providers takes
+        a constant number of queries
+        """
+        from django.contrib.auth.models import Group, Permission
+        from django.db.models import Count, Prefetch
+        from apps.Services.models import ServiceCategory
+        from apps.User.models import UserActivity
+
+        categories = ServiceCategory.objects.annotate(services_count=Count("services"))
+        permissions = Permission.objects.select_related("content_type")
+        return queryset.select_related("user").prefetch_related(
+            Prefetch("service_categories", queryset=categories),
+            Prefetch("specializations", queryset=categories),
+            "payment_methods",
+            "service_areas",
+            "insurance_policies",
+            "documents",
+            Prefetch(
+                "reviews", queryset=ProviderReview.objects.select_related("customer")
+            ),
+            "payments",
+            Prefetch(
+                "user__groups",
+                queryset=Group.objects.annotate(
+                    user_count=Count("custom_user_set")
+                ).prefetch_related(Prefetch("permissions", queryset=permissions)),
+            ),
+            Prefetch("user__user_permissions", queryset=permissions),
+            Prefetch(
+                "user__activities",
+                queryset=UserActivity.objects.order_by("-created_at")[:10],
+                to_attr="recent_activities",
+            ),
+        )
+
     def list(self, request, *args, **kwargs):
         """
         Override list method to return single object when filtering by user_id
@@ -2,15 +2,20 @@ from datetime import timezone, datetime, timedelta
 import uuid
 import random
 import string
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings  # Import settings instead
 from apps.Driver.models import Driver
 from apps.Location.models import Location
-from apps.Notification.models import Notification
+from apps.Notification.outbox import REQUEST_STATUS_CHANGED, emit
 from apps.Tracking.models import TrackingUpdate
 from apps.Basemodel.models import Basemodel
 
 from django_fsm import FSMField, transition
+import logging
+from utils.debug_trace import get_tracer
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class Request(Basemodel):
@@ -383,16 +388,22 @@ class Request(Basemodel):
 
     def get_or_add_base_price(self):
         """Get the base price for the request"""
-        print(f"Getting or adding base price for request {self.id}")
+        tracer.debug("Getting or adding base price for request {}", self.id)
         if not self.base_price:
             self.calculate_base_price()
             self.base_price = self.calculate_base_price()
             self.save()
-        print(f"Base price for request {self.id}: {self.base_price}")
+        tracer.debug("Base price for request {}: {}", self.id, self.base_price)
         return self.base_price
 
     def update_status(self, new_status):
-        """Update request status and handle notifications"""
+        """
+        Update request status
+
+        The tracking update, notifications and websocket message are written
+        by the domain event worker (apps/Notification/outbox.py) from the event
+        appended here, in the same transaction as the status change.
+        """
         if new_status not in dict(self.STATUS_CHOICES).keys():
             raise ValueError(f"Invalid status: {new_status}")
 
@@ -407,31 +418,12 @@ class Request(Basemodel):
             if self.payments.filter(status="completed").exists():
                 self.payment_status = "completed"
 
-        self.save()
-
-        # Create tracking update
-        TrackingUpdate.objects.create(
-            request=self,
-            update_type="status",
-            status_message=f"Status changed from {old_status} to {new_status}",
-        )
-
-        # Create notifications for relevant parties
-        Notification.objects.create(
-            user=self.user,
-            notification_type="request_update",
-            title="Request Status Update",
-            message=f"Your request status has been updated to {new_status}",
-            data={"request_id": self.id, "status": new_status},
-        )
-
-        if self.driver:
-            Notification.objects.create(
-                user=self.driver.user,
-                notification_type="request_update",
-                title="Request Status Update",
-                message=f"Request status has been updated to {new_status}",
-                data={"request_id": self.id, "status": new_status},
+        with transaction.atomic():
+            self.save()
+            emit(
+                REQUEST_STATUS_CHANGED,
+                self,
+                {"old_status": old_status, "new_status": new_status},
             )
 
     def get_all_locations(self):
@@ -539,12 +531,11 @@ class Request(Basemodel):
             self.base_price = price_data["total_price"]
             self.price_breakdown = price_data["price_breakdown"]
 
-            # Print the price in yellow after it's generated
-            print("\033[93m" + f"Request Price: £{self.base_price:.2f}" + "\033[0m")
-            if self.price_breakdown:
-                print("\033[93m" + "Price Breakdown:" + "\033[0m")
-                for key, value in self.price_breakdown.items():
-                    print("\033[93m" + f"  {key}: £{value:.2f}" + "\033[0m")
+            tracer.debug(
+                "Request Price: £{:.2f}",
+                self.base_price,
+                price_breakdown=self.price_breakdown,
+            )
         else:
             raise ValueError("Failed to calculate price")
 
@@ -579,7 +570,7 @@ class Request(Basemodel):
             try:
                 payment.cancel_payment(reason=reason)
             except Exception as e:
-                print(f"Error cancelling payment {payment.id}: {str(e)}")
+                logger.error(f"Error cancelling payment {payment.id}: {str(e)}")
 
     @transition(field=status, source=["pending"], target="payment_completed")
     def complete_payment(self):
@@ -600,7 +591,7 @@ class Request(Basemodel):
             Job.create_job_after_payment(self)
         except Exception as e:
             # Log the error but don't prevent the transition
-            print(f"Error creating job after payment completion: {str(e)}")
+            logger.error(f"Error creating job after payment completion: {str(e)}")
 
         # Create tracking update
         TrackingUpdate.objects.create(
@@ -19,6 +19,11 @@ from apps.Driver.serializer import DriverSerializer
 from datetime import datetime, timedelta
 from django.utils import timezone
 from decimal import Decimal, InvalidOperation
+import logging
+from utils.debug_trace import get_tracer
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class MoveMilestoneSerializer(serializers.ModelSerializer):
@@ -271,17 +276,17 @@ class RequestSerializer(serializers.ModelSerializer):
             if request_user.is_authenticated:
                 # Logged-in user: assign to request
                 validated_data["user"] = request_user
-                print(
-                    f"Creating request for authenticated user: {request_user.username}"
+                tracer.debug(
+                    "Creating request for authenticated user: {}", request_user.username
                 )
             else:
                 # Anonymous user: set to None for later assignment
                 validated_data["user"] = None
-                print("Creating request for anonymous user")
+                tracer.debug("Creating request for anonymous user")
         else:
             # Explicit user provided or no context - use as is (could be None)
             validated_data["user"] = user
-            print(f"Creating request with explicit user: {user}")
+            tracer.debug("Creating request with explicit user: {}", user)
 
         # Create the request
         request = Request.objects.create(**validated_data)
@@ -494,12 +499,12 @@ class RequestSerializer(serializers.ModelSerializer):
 
             # Explicitly save the item
             item.save()
-            print(f"Item saved: {item.id} - {item.name}")  # Debug logging
+            tracer.debug("Item saved: {} - {}", item.id, item.name)  # Debug logging
 
             return item
         except Exception as e:
             # Log the error for debugging
-            print(f"Error saving item: {str(e)}")
+            logger.error(f"Error saving item: {str(e)}")
             raise
 
     def to_representation(self, instance):
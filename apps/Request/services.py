@@ -5,6 +5,9 @@ from django.utils.html import strip_tags
 from decimal import Decimal
 from django.conf import settings
 from apps.pricing.services import PricingService
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def send_booking_confirmation_email(request_data):
@@ -51,7 +54,7 @@ def send_booking_confirmation_email(request_data):
 
         return True
     except Exception as e:
-        print(f"Error sending confirmation email: {str(e)}")
+        logger.error(f"Error sending confirmation email: {str(e)}")
         return False
 
 
@@ -1,5 +1,4 @@
 import json
-import sys
 from django.shortcuts import render, get_object_or_404
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
@@ -30,6 +29,10 @@ from apps.CommonItems.models import ItemCategory
 import os
 import requests
 from apps.Location.services import get_distance_and_travel_time
+from utils.debug_trace import get_tracer
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class RequestViewSet(viewsets.ModelViewSet):
@@ -82,14 +85,12 @@ class RequestViewSet(viewsets.ModelViewSet):
         from Job.serializers import JobSerializer
         import uuid
 
-        print("Request endpoint accessed")
-        sys.stdout.flush()
+        tracer.debug("Request endpoint accessed")
         request_obj = self.get_object()
 
         # Debug information
-        print(f"Request object ID: {request_obj.id}")
-        print(f"Request object type: {type(request_obj.id)}")
-        sys.stdout.flush()
+        tracer.debug("Request object ID: {}", request_obj.id)
+        tracer.debug("Request object type: {}", type(request_obj.id))
 
         # Check if request is in draft status
         if request_obj.status != "draft":
@@ -102,25 +103,18 @@ class RequestViewSet(viewsets.ModelViewSet):
             # Submit the request (this will trigger the pricing calculation)
             request_obj.submit()
 
-            # Print the price in yellow
-            print(
-                "\033[93m" + f"Request Price: £{request_obj.base_price:.2f}" + "\033[0m"
+            tracer.debug(
+                "Request Price: £{:.2f}",
+                request_obj.base_price,
+                price_breakdown=request_obj.price_breakdown,
             )
-            if request_obj.price_breakdown:
-                print("\033[93m" + "Price Breakdown:" + "\033[0m")
-                for key, value in request_obj.price_breakdown.items():
-                    print("\033[93m" + f"  {key}: £{value:.2f}" + "\033[0m")
 
             # Replace with simple randomizer (50% chance of being instant)
             import random
 
             is_instant = random.choice([True, False])
 
-            print(
-                "\033[93m"
-                + f"Request Type: {'Instant' if is_instant else 'Bidding'}"
-                + "\033[0m"
-            )
+            tracer.debug("Request Type: {}", "Instant" if is_instant else "Bidding")
 
             # Get location information from journey stops
             pickup_stops = request_obj.stops.filter(type="pickup").first()
@@ -155,8 +149,7 @@ class RequestViewSet(viewsets.ModelViewSet):
             }
 
             # Debug information
-            print(f"Job data to be sent: {job_data}")
-            sys.stdout.flush()
+            tracer.debug("Job data to be sent: {}", job_data)
 
             job_serializer = JobSerializer(data=job_data)
             if job_serializer.is_valid():
@@ -174,22 +167,16 @@ class RequestViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_200_OK,
                 )
             else:
-                print(f"Serializer errors: {job_serializer.errors}")
-                sys.stdout.flush()
+                tracer.debug("Serializer errors: {}", job_serializer.errors)
                 return Response(
                     job_serializer.errors, status=status.HTTP_400_BAD_REQUEST
                 )
 
         except ValueError as e:
-            print(f"ValueError: {str(e)}")
-            sys.stdout.flush()
+            logger.error(f"ValueError: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Exception: {str(e)}")
-            import traceback
-
-            print(traceback.format_exc())
-            sys.stdout.flush()
+            logger.error(f"Exception: {str(e)}", exc_info=True)
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
@@ -216,13 +203,16 @@ class RequestViewSet(viewsets.ModelViewSet):
         try:
             # Create a mutable copy of the data
             data = request.data.copy()
-            print("Creating request with data:", json.dumps(data, indent=4))
+            if tracer.is_enabled():
+                tracer.debug(
+                    "Creating request with data: {}", json.dumps(data, indent=4)
+                )
             data["status"] = "draft"
 
             # Create the request using serializer
             serializer = self.get_serializer(data=data)
             serializer.is_valid(raise_exception=True)
-            print("serializer clean about to save", serializer.validated_data)
+            tracer.debug("serializer clean about to save {}", serializer.validated_data)
             instance = serializer.save()
 
             # --- New logic: update estimated distance/time/fuel if locations are present ---
@@ -235,7 +225,7 @@ class RequestViewSet(viewsets.ModelViewSet):
             if len(locations) >= 2:
                 try:
                     result = get_distance_and_travel_time(locations)
-                    print(f"[Request] Distance API result: {result}")
+                    tracer.debug("[Request] Distance API result: {}", result)
                     distance_miles = result["distance"]  # Already in miles
                     duration_sec = result["duration"]
                     fuel_used = result["estimated_fuel_liters"]
@@ -270,7 +260,7 @@ class RequestViewSet(viewsets.ModelViewSet):
                         ]
                     )
                 except Exception as e:
-                    print(f"OpenRouteService error: {e}")
+                    logger.error(f"OpenRouteService error: {e}")
 
             # Return the essential data
             return Response(
@@ -293,7 +283,7 @@ class RequestViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def confirm_as_job(self, request, pk=None):
         try:
-            print("Confirming request as a job...", request.data)
+            tracer.debug("Confirming request as a job... {}", request.data)
             data = request.data
             instance = self.get_object()
             price = data.get("price")
@@ -344,12 +334,12 @@ class RequestViewSet(viewsets.ModelViewSet):
 
     def _create_journey_stops(self, instance, journey_stops, request):
         """Helper method to create journey stops - now uses serializer's logic"""
-        print(
-            "Creating journey stops for request ID:",
-            instance.id,
-            "with stops:",
-            json.dumps(journey_stops, indent=4),
-        )
+        if tracer.is_enabled():
+            tracer.debug(
+                "Creating journey stops for request ID: {} with stops: {}",
+                instance.id,
+                json.dumps(journey_stops, indent=4),
+            )
 
         # Use the serializer's _process_journey_stop method
         serializer = self.get_serializer(instance)
@@ -362,7 +352,7 @@ class RequestViewSet(viewsets.ModelViewSet):
     def submit_step1(self, request):
         """Handle step 1 submission (Contact Details)"""
         try:
-            print("Step 1 submission:", json.dumps(request.data, indent=4))
+            tracer.debug("Step 1 submission: {}", json.dumps(request.data, indent=4))
 
             # Get or create request instance
             instance = None
@@ -406,7 +396,7 @@ class RequestViewSet(viewsets.ModelViewSet):
                 ),
             )
         except Exception as e:
-            print(f"Step 1 error: {str(e)}")
+            logger.error(f"Step 1 error: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["post", "put", "patch"])
@@ -415,7 +405,7 @@ class RequestViewSet(viewsets.ModelViewSet):
         try:
             instance = self.get_object()
             data = request.data.copy()
-            print("Step 2 submission:", json.dumps(data, indent=4))
+            tracer.debug("Step 2 submission: {}", json.dumps(data, indent=4))
             data["status"] = "draft"
 
             # Handle journey stops for both request types
@@ -447,7 +437,7 @@ class RequestViewSet(viewsets.ModelViewSet):
             if len(locations) >= 2:
                 try:
                     result = get_distance_and_travel_time(locations)
-                    print(f"[Request] Distance API result: {result}")
+                    tracer.debug("[Request] Distance API result: {}", result)
                     distance_miles = result["distance"]  # Already in miles
                     duration_sec = result["duration"]
                     fuel_used = result["estimated_fuel_liters"]
@@ -462,33 +452,33 @@ class RequestViewSet(viewsets.ModelViewSet):
                         ]
                     )
                 except Exception as e:
-                    print(f"OpenRouteService error: {e}")
+                    logger.error(f"OpenRouteService error: {e}")
 
             return Response(
                 {"message": "Step 2 submitted successfully", "request_id": instance.id},
                 status=status.HTTP_200_OK,
             )
         except Exception as e:
-            print(f"Step 2 error: {str(e)}")
+            logger.error(f"Step 2 error: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["post", "put", "patch"])
     def submit_step3(self, request, pk=None):
         """Handle step 3 submission (Service Details)"""
-        print("Step 3 submission:", json.dumps(request.data, indent=4))
+        tracer.debug("Step 3 submission: {}", json.dumps(request.data, indent=4))
         try:
             # Get the request instance
             try:
                 instance = self.get_object()
             except Request.DoesNotExist:
-                print("Request not found")
+                logger.warning("Request not found")
                 return Response(
                     {"error": "Request not found"},
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
             data = request.data.copy()
-            print("Step 3 submission:", json.dumps(data, indent=4))
+            tracer.debug("Step 3 submission: {}", json.dumps(data, indent=4))
             data["status"] = "draft"
 
             # Handle items based on request type
@@ -578,7 +568,7 @@ class RequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_200_OK,
             )
         except Exception as e:
-            print(f"Step 3 error: {str(e)}")
+            logger.error(f"Step 3 error: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["post", "put", "patch"])
@@ -589,13 +579,13 @@ class RequestViewSet(viewsets.ModelViewSet):
         try:
             instance = self.get_object()
             data = request.data.copy()
-            print("Step 4 submission:", json.dumps(data, indent=4))
+            tracer.debug("Step 4 submission: {}", json.dumps(data, indent=4))
             data["status"] = "draft"
 
             # Update request data
             serializer = self.get_serializer(instance, data=data, partial=True)
             serializer.is_valid(raise_exception=True)
-            print("Serializer data to be saved:", serializer.validated_data)
+            tracer.debug("Serializer data to be saved: {}", serializer.validated_data)
             serializer.save()
 
             serializer.save()
@@ -610,7 +600,7 @@ class RequestViewSet(viewsets.ModelViewSet):
             if len(locations) >= 2:
                 try:
                     result = get_distance_and_travel_time(locations)
-                    print(f"[Request] Distance API result: {result}")
+                    tracer.debug("[Request] Distance API result: {}", result)
                     distance_miles = result["distance"]  # Already in miles
                     duration_sec = result["duration"]
                     fuel_used = result["estimated_fuel_liters"]
@@ -625,7 +615,7 @@ class RequestViewSet(viewsets.ModelViewSet):
                         ]
                     )
                 except Exception as e:
-                    print(f"OpenRouteService error: {e}")
+                    logger.error(f"OpenRouteService error: {e}")
 
             # Get forecast data from the complete request object
             forecast_data = get_request_forecast_data(instance)
@@ -642,7 +632,7 @@ class RequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_200_OK,
             )
         except Exception as e:
-            print(f"Step 4 error: {str(e)}")
+            logger.error(f"Step 4 error: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["post"])
@@ -770,7 +760,7 @@ class RequestViewSet(viewsets.ModelViewSet):
     def accept_price(self, request, pk=None):
         """Accept a price for a request."""
         req = self.get_object()
-        print("Accept price request data:", request.data)
+        tracer.debug("Accept price request data: {}", request.data)
 
         # Get the price and staff count from the request
         price = request.data.get("total_price")
@@ -821,10 +811,9 @@ class RequestViewSet(viewsets.ModelViewSet):
 
     def _update_journey_stops(self, instance, journey_stops, request):
         """Helper method to update journey stops"""
-        print(
-            "Updating journey stops for request ID:",
+        tracer.debug(
+            "Updating journey stops for request ID: {} with stops: {}",
             instance.id,
-            "with stops:",
             json.dumps(journey_stops, indent=4),
         )
 
@@ -832,7 +821,7 @@ class RequestViewSet(viewsets.ModelViewSet):
         existing_stops = list(instance.stops.all().order_by("sequence"))
 
         for idx, stop_data in enumerate(journey_stops):
-            print("Processing stop:", stop_data)
+            tracer.debug("Processing stop: {}", stop_data)
 
             # Get or create location
             if idx < len(existing_stops):
@@ -976,11 +965,14 @@ class RequestViewSet(viewsets.ModelViewSet):
             poll_payments = request.data.get("poll_payments", False)
 
             # Log the start of reconciliation
-            print(f"Starting status reconciliation by {request.user.email}")
-            print(
-                f"Filters - Date from: {date_from}, Date to: {date_to}, Status: {status_filter}"
+            tracer.debug("Starting status reconciliation by {}", request.user.email)
+            tracer.debug(
+                "Filters - Date from: {}, Date to: {}, Status: {}",
+                date_from,
+                date_to,
+                status_filter,
             )
-            print(f"Poll payments: {poll_payments}")
+            tracer.debug("Poll payments: {}", poll_payments)
 
             # Initialize Stripe service if polling is requested
             stripe_service = None
@@ -1020,17 +1012,18 @@ class RequestViewSet(viewsets.ModelViewSet):
             }
 
             # Log completion
-            print(
-                f"Reconciliation completed - {response_data['summary']['total_fixes']} fixes applied"
+            tracer.debug(
+                "Reconciliation completed - {} fixes applied",
+                response_data["summary"]["total_fixes"],
             )
             if poll_payments:
-                print(f"Payments polled: {summary.get('payments_polled', 0)}")
+                tracer.debug("Payments polled: {}", summary.get("payments_polled", 0))
 
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
             error_message = f"Error during reconciliation: {str(e)}"
-            print(error_message)
+            logger.error(error_message)
             return Response(
                 {
                     "error": error_message,
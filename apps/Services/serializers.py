@@ -21,6 +21,9 @@ class ServiceCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "slug", "created_at", "updated_at", "is_active"]
 
     def get_services_count(self, obj):
+        # Annotated by the list queryset and the catalog snapshot
+        if hasattr(obj, "services_count"):
+            return obj.services_count
         return obj.services.count()
 
 
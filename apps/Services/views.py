@@ -4,6 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django.db.models import Count, Q
+from apps.CommonItems.snapshot import snapshot_response
 from .models import ServiceCategory, Services
 from .serializers import (
     ServiceCategorySerializer,
@@ -49,6 +50,11 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params:
+            return snapshot_response(request, "service_categories")
+        return super().list(request, *args, **kwargs)
+
     @action(detail=True, methods=["get"])
     def services(self, request, pk=None):
         """Get all services for a specific category"""
@@ -0,0 +1,130 @@
+"""
+Buffered login side effects
+
+Every login used to insert a ``UserActivity`` row and ``save()`` the whole
+user row to bump ``last_login`` (and the token obtain view bumped it again),
+so login bursts contended on the user table. ``record_login`` buffers both
+in-process instead:
+
+- activities are inserted with one ``bulk_create`` per flush;
+- ``last_login`` is coalesced per user (the latest login wins) and written
+  with one ``UPDATE ... CASE`` per batch of users, which touches no other
+  column and sends no ``post_save`` (so the cached principal and the user
+  dashboards stay valid).
+
+The buffer is flushed ``LOGIN_ACTIVITY_FLUSH_INTERVAL`` seconds after the
+first buffered login, as soon as it holds ``LOGIN_ACTIVITY_MAX_BUFFER``
+entries, and at interpreter exit. Entries buffered when a process is killed
+are lost; nothing security-related (failed login counters, token blacklist)
+goes through here.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+_lock = threading.Lock()
+_activities: List[Dict] = []
+_last_logins: Dict = {}
+_flush_timer = None
+
+
+def _flush_interval() -> float:
+    return getattr(settings, "LOGIN_ACTIVITY_FLUSH_INTERVAL", 2.0)
+
+
+def _max_buffer() -> int:
+    return getattr(settings, "LOGIN_ACTIVITY_MAX_BUFFER", 200)
+
+
+def record_login(user, activity_type: str = None, details: Dict = None):
+    """
+    Buffer a login: a ``UserActivity`` of ``activity_type`` (if given) and
+    the user's ``last_login``. Sets ``user.last_login`` on the instance at
+    once so responses built from it are current.
+    """
+    now = timezone.now()
+    user.last_login = now
+    with _lock:
+        if activity_type:
+            _activities.append(
+                {"user_id": user.pk, "activity_type": activity_type, "details": details}
+            )
+        previous = _last_logins.get(user.pk)
+        if previous is None or previous < now:
+            _last_logins[user.pk] = now
+        full = len(_activities) + len(_last_logins) >= _max_buffer()
+
+    if full:
+        flush()
+    else:
+        _schedule_flush()
+
+
+def _schedule_flush():
+    global _flush_timer
+    with _lock:
+        if _flush_timer is not None:
+            return
+        _flush_timer = threading.Timer(_flush_interval(), _flush_in_background)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
+def _flush_in_background():
+    global _flush_timer
+    with _lock:
+        _flush_timer = None
+    try:
+        flush()
+    finally:
+        connections.close_all()
+
+
+def flush():
+    """Write the buffered activities and last logins"""
+    global _activities, _last_logins
+    with _lock:
+        activities, _activities = _activities, []
+        last_logins, _last_logins = _last_logins, {}
+    if not activities and not last_logins:
+        return
+
+    from .models import User, UserActivity
+
+    try:
+        UserActivity.objects.bulk_create(
+            [UserActivity(**activity) for activity in activities],
+            batch_size=BATCH_SIZE,
+        )
+        user_ids = list(last_logins)
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[start : start + BATCH_SIZE]
+            User.objects.filter(pk__in=batch).update(
+                last_login=Case(
+                    *[
+                        When(pk=user_id, then=Value(last_logins[user_id]))
+                        for user_id in batch
+                    ],
+                    output_field=DateTimeField(),
+                )
+            )
+        logger.debug(
+            f"Flushed {len(activities)} login activities and "
+            f"{len(last_logins)} last logins"
+        )
+    except Exception as e:
+        logger.error(f"Error flushing login activity: {str(e)}")
+
+
+atexit.register(flush)
@@ -24,6 +24,9 @@ class GroupSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "user_count"]
 
     def get_user_count(self, obj):
+        # Annotated by querysets that list many groups (e.g. the provider list)
+        if hasattr(obj, "user_count"):
+            return obj.user_count
         return (
             obj.custom_user_set.count()
         )  # Fixed: changed from user_set to custom_user_set
@@ -162,6 +165,10 @@ class UserSerializer(serializers.ModelSerializer):
         return [group.name for group in obj.groups.all()]
 
     def get_user_permissions(self, obj):
+        prefetched = _prefetched_permissions(obj)
+        if prefetched is not None:
+            return PermissionSerializer(prefetched, many=True).data
+
         # Get all effective permissions (direct + group)
         perms = obj.get_user_permissions() | obj.get_group_permissions()
         # Get Permission objects for all these codenames
@@ -175,10 +182,47 @@ class UserSerializer(serializers.ModelSerializer):
     def get_user_activities(self, obj):
         from .serializer import UserActivitySerializer
 
-        activities = obj.activities.order_by("-created_at")[:10]
+        if hasattr(obj, "recent_activities"):
+            # Prefetched, newest first, by querysets listing many users
+            activities = obj.recent_activities
+        else:
+            activities = obj.activities.order_by("-created_at")[:10]
         return UserActivitySerializer(activities, many=True).data
 
 
+def _prefetched_permissions(user):
+    """
+    The user's effective permissions from prefetched ``user_permissions``
+    and ``groups__permissions``, or None if they were not prefetched (or the
+    user is a superuser, who has every permission)
+    """
+    prefetched = getattr(user, "_prefetched_objects_cache", {})
+    if "user_permissions" not in prefetched or "groups" not in prefetched:
+        return None
+    groups = user.groups.all()
+    if any(
+        "permissions" not in getattr(group, "_prefetched_objects_cache", {})
+        for group in groups
+    ):
+        return None
+    if not user.is_active:
+        return []
+    if user.is_superuser:
+        return None
+
+    permissions = {
+        permission.pk: permission for permission in user.user_permissions.all()
+    }
+    for group in groups:
+        permissions.update(
+            (permission.pk, permission) for permission in group.permissions.all()
+        )
+    return sorted(
+        permissions.values(),
+        key=lambda permission: (permission.content_type_id, permission.codename),
+    )
+
+
 class AddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = Address
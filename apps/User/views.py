@@ -10,8 +10,11 @@ import logging
 from .models import User, Address, UserActivity
 from .serializer import UserSerializer, AddressSerializer, UserActivitySerializer
 from apps.Request.models import Request
+from utils import dashboard_metrics
+from utils.debug_trace import get_tracer
 
 logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -136,7 +139,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         Creates a new customer user or returns existing user if email already exists.
         This endpoint is publicly accessible to allow customer registration.
         """
-        print("the create customer endpoint was called")
+        tracer.debug("the create customer endpoint was called")
         data = request.data.copy()
         data["user_type"] = "customer"
 
@@ -335,39 +338,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         Returns user statistics.
         Only accessible to admin users.
         """
-        total_users = User.objects.count()
-        total_customers = User.objects.filter(user_type="customer").count()
-        total_providers = User.objects.filter(user_type="provider").count()
-        total_admins = User.objects.filter(user_type="admin").count()
-
-        active_users = User.objects.filter(account_status="active").count()
-        inactive_users = User.objects.filter(account_status="inactive").count()
-
-        # New users in the last 30 days
-        thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-        new_users_30d = User.objects.filter(date_joined__gte=thirty_days_ago).count()
-
-        # Request statistics by user type
-        customer_requests = Request.objects.filter(user__user_type="customer").count()
-
-        stats = {
-            "total_users": total_users,
-            "by_type": {
-                "customers": total_customers,
-                "providers": total_providers,
-                "admins": total_admins,
-            },
-            "by_status": {
-                "active": active_users,
-                "inactive": inactive_users,
-            },
-            "new_users_30d": new_users_30d,
-            "requests": {
-                "total_customer_requests": customer_requests,
-            },
-        }
-
-        return Response(stats)
+        return Response(dashboard_metrics.user_stats())
 
     @action(detail=False, methods=["get"], permission_classes=[permissions.AllowAny])
     def get_user_by_email(self, request):
@@ -679,49 +650,10 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         """
         Enhanced statistics including group and permission data.
         """
-        basic_stats = self.stats(request).data
-
-        # Group statistics
-        total_groups = Group.objects.count()
-        groups_with_users = (
-            Group.objects.annotate(user_count=Count("user"))
-            .filter(user_count__gt=0)
-            .count()
-        )
-
-        # Users by group
-        group_stats = []
-        for group in Group.objects.annotate(user_count=Count("user")):
-            group_stats.append(
-                {"group_name": group.name, "user_count": group.user_count}
-            )
-
-        # Permission usage
-        permissions_in_use = (
-            Permission.objects.filter(Q(group__isnull=False) | Q(user__isnull=False))
-            .distinct()
-            .count()
+        return Response(
+            {**dashboard_metrics.user_stats(), **dashboard_metrics.group_stats()}
         )
 
-        total_permissions = Permission.objects.count()
-
-        enhanced_stats = {
-            **basic_stats,
-            "groups": {
-                "total_groups": total_groups,
-                "groups_with_users": groups_with_users,
-                "empty_groups": total_groups - groups_with_users,
-                "group_breakdown": group_stats,
-            },
-            "permissions": {
-                "total_permissions": total_permissions,
-                "permissions_in_use": permissions_in_use,
-                "unused_permissions": total_permissions - permissions_in_use,
-            },
-        }
-
-        return Response(enhanced_stats)
-
 
 class AddressViewSet(viewsets.ModelViewSet):
     """
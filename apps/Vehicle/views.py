@@ -12,6 +12,9 @@ from .serializer import (
     VehicleImageDetailSerializer,
     VehicleDocumentDetailSerializer,
 )
+from utils.debug_trace import get_tracer
+
+tracer = get_tracer(__name__)
 
 
 class VehicleViewSet(viewsets.ModelViewSet):
@@ -24,11 +27,11 @@ class VehicleViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
-        print("CREATE - Request data:", request.data)
+        tracer.debug("CREATE - Request data: {}", request.data)
         return super().create(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
-        print("UPDATE - Request data:", request.data)
+        tracer.debug("UPDATE - Request data: {}", request.data)
         return super().update(request, *args, **kwargs)
 
     def get_queryset(self):
@@ -64,7 +67,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
 
         elif request.method == "POST":
-            print("PHOTOS POST - Request data:", request.data)
+            tracer.debug("PHOTOS POST - Request data: {}", request.data)
             # Check if we already have 5 photos
             existing_photos = VehicleImages.objects.filter(vehicle=vehicle).count()
             if existing_photos >= 5:
@@ -90,7 +93,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
 
         elif request.method == "POST":
-            print("DOCUMENTS POST - Request data:", request.data)
+            tracer.debug("DOCUMENTS POST - Request data: {}", request.data)
             serializer = VehicleDocumentDetailSerializer(data=request.data)
             if serializer.is_valid():
                 serializer.save(vehicle=vehicle)
@@ -136,11 +139,11 @@ class VehicleImageViewSet(viewsets.ModelViewSet):
     """ViewSet for managing vehicle photos"""
 
     def create(self, request, *args, **kwargs):
-        print("CREATE - Request data:", request.data)
+        tracer.debug("CREATE - Request data: {}", request.data)
         return super().create(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
-        print("UPDATE - Request data:", request.data)
+        tracer.debug("UPDATE - Request data: {}", request.data)
         return super().update(request, *args, **kwargs)
 
     queryset = VehicleImages.objects.all()
@@ -159,11 +162,11 @@ class VehicleDocumentViewSet(viewsets.ModelViewSet):
     """ViewSet for managing vehicle documents"""
 
     def create(self, request, *args, **kwargs):
-        print("CREATE - Request data:", request.data)
+        tracer.debug("CREATE - Request data: {}", request.data)
         return super().create(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
-        print("UPDATE - Request data:", request.data)
+        tracer.debug("UPDATE - Request data: {}", request.data)
         return super().update(request, *args, **kwargs)
 
     queryset = VehicleDocuments.objects.all()
@@ -3,7 +3,6 @@ import holidays
 from rest_framework.response import Response
 from rest_framework import status
 import logging
-from django.core.cache import cache
 from django.db.models import Q
 from .models import (
     PricingConfiguration,
@@ -37,8 +36,9 @@ from .defaults import (
 from decimal import Decimal
 import random
 from types import SimpleNamespace
-import requests
 from django.conf import settings
+from utils.caching import namespace
+from utils.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -47,12 +47,7 @@ class PricingService:
     """Service class to handle pricing logic separated from the views"""
 
     CACHE_TIMEOUT = 3600  # 1 hour cache timeout
-    CACHE_KEY_PREFIX = "pricing_"
-
-    @staticmethod
-    def get_cache_key(key):
-        """Generate a cache key with prefix"""
-        return f"{PricingService.CACHE_KEY_PREFIX}{key}"
+    CACHE = namespace("pricing", timeout=CACHE_TIMEOUT)
 
     @staticmethod
     def calculate_price_forecast(forecast_request):
@@ -381,7 +376,7 @@ class PricingService:
                 config.save()
 
                 # Clear cache
-                cache.delete(PricingService.get_cache_key("active_config"))
+                PricingService.CACHE.invalidate()
 
                 logger.info(
                     f"Associated {len(factors)} default pricing factors with the configuration"
@@ -396,11 +391,9 @@ class PricingService:
     @staticmethod
     def _get_pricing_factors(active_config, service_level, property_type, vehicle_type):
         """Get all pricing factors with caching"""
-        cache_key = PricingService.get_cache_key(f"factors_{active_config.id}")
-        factors = cache.get(cache_key)
 
-        if not factors:
-            factors = {
+        def load_factors():
+            return {
                 "distance": active_config.distance_factors.filter(is_active=True),
                 "weight": active_config.weight_factors.filter(is_active=True),
                 "property": active_config.property_type_factors.filter(
@@ -417,7 +410,13 @@ class PricingService:
                 "insurance": active_config.insurance_factors.filter(is_active=True),
                 "staff": active_config.staff_factors.filter(is_active=True),
             }
-            cache.set(cache_key, factors, PricingService.CACHE_TIMEOUT)
+
+        # The filtered factors depend on the service level, property and
+        # vehicle type, so they are part of the key
+        factors = PricingService.CACHE.get_or_set(
+            f"factors_{active_config.id}_{service_level}_{property_type}_{vehicle_type}",
+            load_factors,
+        )
 
         return factors
 
@@ -678,12 +677,7 @@ class WeatherService:
     """Service class to handle weather API integration"""
     
     CACHE_TIMEOUT = 3600  # Cache weather data for 1 hour
-    CACHE_KEY_PREFIX = "weather_"
-    
-    @staticmethod
-    def get_cache_key(city: str, date: str) -> str:
-        """Generate a cache key for weather data"""
-        return f"{WeatherService.CACHE_KEY_PREFIX}{city}_{date}"
+    CACHE = namespace("weather", timeout=CACHE_TIMEOUT)
     
     @staticmethod
     def get_weather_condition(weather_code: int) -> str:
@@ -712,37 +706,42 @@ class WeatherService:
         Get weather data for a specific city and date
         Returns cached data if available, otherwise fetches from API
         """
-        cache_key = WeatherService.get_cache_key(city, date)
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return cached_data
-        
+        # Failed lookups are not cached, so they are retried next time
+        weather_data = WeatherService.CACHE.get_or_set(
+            f"{city}_{date}",
+            lambda: WeatherService._fetch_weather_data(city, date),
+            cache_none=False,
+        )
+        return weather_data or {"weather_type": "normal"}
+
+    @staticmethod
+    def _fetch_weather_data(city: str, date: str):
+        """Weather data for a city and date from the API, or None"""
         try:
             # Get API key from settings
             api_key = settings.OPENWEATHERMAP_API_KEY
             if not api_key:
                 logger.warning("OpenWeatherMap API key not configured")
-                return {"weather_type": "normal"}
+                return None
             
             # Convert date string to datetime
             target_date = datetime.strptime(date, "%Y-%m-%d")
             
             # Get coordinates for the city
             geo_url = f"http://api.openweathermap.org/geo/1.0/direct?q={city},GB&limit=1&appid={api_key}"
-            geo_response = requests.get(geo_url)
+            geo_response = http_client.get(geo_url)
             geo_data = geo_response.json()
             
             if not geo_data:
                 logger.warning(f"No coordinates found for city: {city}")
-                return {"weather_type": "normal"}
+                return None
             
             lat = geo_data[0]["lat"]
             lon = geo_data[0]["lon"]
             
             # Get 5-day forecast
             forecast_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-            forecast_response = requests.get(forecast_url)
+            forecast_response = http_client.get(forecast_url)
             forecast_data = forecast_response.json()
             
             # Find the forecast for the target date
@@ -755,7 +754,7 @@ class WeatherService:
             
             if not target_forecast:
                 logger.warning(f"No forecast found for date: {date}")
-                return {"weather_type": "normal"}
+                return None
             
             # Get weather condition from the forecast
             weather_code = target_forecast["weather"][0]["id"]
@@ -769,11 +768,8 @@ class WeatherService:
                 "description": target_forecast["weather"][0]["description"]
             }
             
-            # Cache the weather data
-            cache.set(cache_key, weather_data, WeatherService.CACHE_TIMEOUT)
-            
             return weather_data
             
         except Exception as e:
             logger.error(f"Error fetching weather data: {str(e)}")
-            return {"weather_type": "normal"}
+            return None
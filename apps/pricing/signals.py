@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .services import PricingService
+
+
+def invalidate_pricing_cache(sender, **kwargs):
+    """Any pricing configuration or factor change makes cached factors stale"""
+    PricingService.CACHE.invalidate()
+
+
+# m2m_changed covers the configuration's factor relations
+SIGNALS = {"save": post_save, "delete": post_delete, "m2m": m2m_changed}
+
+for model in apps.get_app_config("pricing").get_models():
+    for signal_name, signal in SIGNALS.items():
+        signal.connect(
+            invalidate_pricing_cache,
+            sender=model,
+            dispatch_uid=f"pricing_cache_{model.__name__}_{signal_name}",
+        )
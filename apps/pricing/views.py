@@ -39,6 +39,9 @@ from .serializers import (
     DateBasedPriceCalculationSerializer,
 )
 from .services import PricingService
+from utils.debug_trace import get_tracer
+
+tracer = get_tracer(__name__)
 
 
 class PricingFactorViewSet(viewsets.ModelViewSet):
@@ -445,7 +448,7 @@ class PricingConfigurationViewSet(viewsets.ModelViewSet):
         """
         PricingService.ensure_default_config_exists()
 
-        print("Pricing endpoint accessed", request.data)
+        tracer.debug("Pricing endpoint accessed {}", request.data)
         serializer = DateBasedPriceCalculationSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -606,7 +609,9 @@ class PricingFactorsViewSet(viewsets.ViewSet):
         ).data
 
         # Debug: Print the serialized data to see what's being returned
-        print(f"DEBUG - {model_class.__name__} serialized data:", serialized_data)
+        tracer.debug(
+            "DEBUG - {} serialized data: {}", model_class.__name__, serialized_data
+        )
 
         # If we have an active config, mark which factors are associated with it
         if active_config and model_class != PricingConfiguration:
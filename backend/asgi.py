@@ -3,6 +3,7 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from apps.Tracking.routing import websocket_urlpatterns
+from apps.Job.routing import websocket_urlpatterns as job_websocket_urlpatterns
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
@@ -10,7 +11,7 @@ application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": 
         URLRouter(
-            websocket_urlpatterns
+            websocket_urlpatterns + job_websocket_urlpatterns
         ),
   
 })
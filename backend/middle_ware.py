@@ -1,5 +1,21 @@
+import logging
+from contextlib import ExitStack
+
+from django.db import connections
 from django.http import HttpResponsePermanentRedirect
 
+from utils.request_metrics import (
+    QueryRecorder,
+    current_profile,
+    end_profile,
+    get_config,
+    registry,
+    start_profile,
+)
+
+logger = logging.getLogger(__name__)
+
+
 # middleware.py in any of your apps
 class ConditionalSlashMiddleware:
     def __init__(self, get_response):
@@ -14,4 +30,59 @@ class ConditionalSlashMiddleware:
             # For non-API, non-admin URLs that don't end with slash, redirect
             return HttpResponsePermanentRedirect(request.path + '/')
             
-        return self.get_response(request)
\ No newline at end of file
+        return self.get_response(request)
+
+class RequestMetricsMiddleware:
+    """
+    Measures every request: wall time, SQL count/time, repeated SQL
+    (N+1), outbound HTTP time and cache hits/misses
+
+    Results go into the rolling per-view histogram in utils.request_metrics
+    and, when enabled, a Server-Timing response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config["ENABLED"] or any(
+            request.path.startswith(prefix) for prefix in config["EXCLUDE_PATHS"]
+        ):
+            return self.get_response(request)
+
+        token = start_profile()
+        profile = current_profile()
+        recorder = QueryRecorder(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+
+            total_ms = profile.elapsed_ms()
+            match = getattr(request, "resolver_match", None)
+            if match is not None:
+                profile.view_name = match.view_name or match._func_path
+
+            duplicates = profile.duplicate_queries(config["DUPLICATE_QUERY_THRESHOLD"])
+            registry.record(profile, total_ms, duplicates, recorder.samples)
+
+            if duplicates:
+                logger.warning(
+                    f"Repeated SQL in {profile.view_name}: "
+                    + ", ".join(f"{fp} x{count}" for fp, count in duplicates.items())
+                )
+            if total_ms >= config["SLOW_REQUEST_MS"]:
+                logger.warning(
+                    f"Slow request {request.method} {request.path} "
+                    f"({profile.view_name}): {total_ms:.0f}ms, "
+                    f"{profile.sql_count} queries in {profile.sql_ms:.0f}ms, "
+                    f"http {profile.http_ms:.0f}ms"
+                )
+
+            if config["SERVER_TIMING"]:
+                response["Server-Timing"] = profile.server_timing(total_ms)
+            return response
+        finally:
+            end_profile(token)
@@ -14,7 +14,6 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -33,6 +32,32 @@ if not SECRET_KEY:
 OPENWEATHERMAP_API_KEY = os.environ.get("OPENWEATHERMAP_API_KEY", "")
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
+# Shared outbound HTTP client (utils/http_client.py)
+OUTBOUND_HTTP = {
+    "TIMEOUT": 10,  # seconds
+    "RETRIES": 2,  # idempotent requests only
+    "BACKOFF": 0.2,  # seconds, doubled per retry with full jitter
+    "POOL_SIZE": 10,  # keep-alive connections per host
+    "CIRCUIT_FAILURE_THRESHOLD": 5,
+    "CIRCUIT_RESET_TIMEOUT": 30,  # seconds
+    "HOSTS": {
+        "api.stripe.com": {"TIMEOUT": 30, "RETRIES": 0},
+        "api.openrouteservice.org": {"TIMEOUT": 15},
+    },
+}
+
+# Postcode/address lookup fan-out
+POSTCODE_LOOKUP_MAX_WORKERS = int(os.getenv("POSTCODE_LOOKUP_MAX_WORKERS", "8"))
+POSTCODE_LOOKUP_TIMEOUT = float(os.getenv("POSTCODE_LOOKUP_TIMEOUT", "5"))
+# Providers still waiting for a pool thread after this long are cancelled
+POSTCODE_LOOKUP_QUEUE_TIMEOUT = float(os.getenv("POSTCODE_LOOKUP_QUEUE_TIMEOUT", "5"))
+POSTCODE_LOOKUP_ENOUGH_ADDRESSES = 20  # Stop waiting on slower providers after this
+# Local postcode index built by `manage.py load_postcodes`
+POSTCODE_INDEX_PATH = os.getenv(
+    "POSTCODE_INDEX_PATH", str(BASE_DIR / "data" / "postcodes.idx")
+)
+POSTCODE_ADDRESS_CACHE_TTL = 60 * 60 * 24 * 30  # 30 days
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
@@ -48,6 +73,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "rest_framework_simplejwt",
@@ -79,9 +105,12 @@ INSTALLED_APPS = [
     "apps.CommonItems",
     "apps.RequestItems",
     "apps.JourneyStop",
+    "apps.Analytics",
 ]
 
 MIDDLEWARE = [
+    # Outermost, so the measured wall time covers every other middleware
+    "backend.middle_ware.RequestMetricsMiddleware",
     # 'backend.middle_ware.ConditionalSlashMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -225,7 +254,7 @@ TABLE_NAME_TEMPLATE = "{table_name}"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.Authentication.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.TokenAuthentication",
     ),
@@ -256,7 +285,9 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # last_login is buffered by the token serializer (apps/User/activity.py)
+    "UPDATE_LAST_LOGIN": False,
+    "TOKEN_OBTAIN_SERIALIZER": "apps.Authentication.serializer.BufferedLastLoginTokenObtainPairSerializer",
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "VERIFYING_KEY": SECRET_KEY,
@@ -337,6 +368,96 @@ LOGGING = {
     },
 }
 
+# Debug tracing (utils/debug_trace.py). Off by default; replaces print() debugging.
+# Per-module overrides use the dotted module prefix, e.g.
+#     "apps.Payment": {"LEVEL": "DEBUG", "SAMPLE_RATE": 0.1}
+DEBUG_TRACE = {
+    "ENABLED": os.getenv("DEBUG_TRACE_ENABLED", "False").lower() == "true",
+    "LEVEL": os.getenv("DEBUG_TRACE_LEVEL", "DEBUG"),
+    "SAMPLE_RATE": float(os.getenv("DEBUG_TRACE_SAMPLE_RATE", "1.0")),
+    "MODULES": {},
+}
+
+# Request performance metrics (utils/request_metrics.py), exposed to staff at
+# /morevans/api/v1/metrics/requests/ (JSON, or ?output=prometheus)
+REQUEST_METRICS = {
+    "ENABLED": os.getenv("REQUEST_METRICS_ENABLED", "True").lower() == "true",
+    "SERVER_TIMING": os.getenv("REQUEST_METRICS_SERVER_TIMING", str(DEBUG)).lower()
+    == "true",
+    "WINDOW_SECONDS": 900,
+    "DUPLICATE_QUERY_THRESHOLD": 5,
+    "SLOW_REQUEST_MS": 2000,
+    "EXCLUDE_PATHS": ["/morevans/api/v1/metrics/"],
+}
+
+# Seconds admin dashboard figures are cached (utils/dashboard_metrics.py);
+# writes to the underlying models invalidate them through signals
+DASHBOARD_METRICS_TTL = 60
+
+# admin_stats ranges of at least this many days are read from the daily
+# rollups (apps/Analytics) once build_daily_rollups has run
+DASHBOARD_ROLLUP_MIN_DAYS = 90
+
+# Rows updated up to this many seconds before the rollup watermark are
+# re-read, in case they committed out of order
+ROLLUP_OVERLAP_SECONDS = 300
+
+# CommonItem typeahead search (apps/CommonItems/search.py)
+COMMON_ITEM_SEARCH = {
+    "LIMIT": 20,
+    "MAX_LIMIT": 100,
+}
+
+# Catalog snapshot (apps/CommonItems/snapshot.py): seconds to wait after a
+# catalog write before rebuilding, so bursts of writes rebuild once
+CATALOG_SNAPSHOT_REBUILD_DELAY = 1.0
+CATALOG_SNAPSHOT_TTL = 24 * 60 * 60
+# Seconds between checks of the catalog tables against this process's
+# snapshot; bounds staleness when the default cache is not shared
+CATALOG_SNAPSHOT_CHECK_INTERVAL = 10
+
+# Cache hits/misses are counted per request by the instrumented backends.
+# "default" is shared by every worker when REDIS_CACHE_URL is set (and is a
+# per-process stand-in otherwise); "local" is the in-process tier in front of
+# it (utils/caching.py)
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "utils.request_metrics.InstrumentedRedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "KEY_PREFIX": "morevans",
+        }
+        if REDIS_CACHE_URL
+        else {
+            "BACKEND": "utils.request_metrics.InstrumentedLocMemCache",
+        }
+    ),
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "local-tier",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Namespaced two-tier caching (utils/caching.py)
+CACHE_LAYER = {
+    "LOCAL_TIMEOUT": 5,
+    "LOCK_TIMEOUT": 10,
+    "NAMESPACES": {},
+}
+
+# JWT authentication (apps/Authentication/authentication.py): seconds a user's
+# principal is cached, and the false positive rate of the in-memory filter of
+# blacklisted tokens (false positives cost one query)
+AUTH_PRINCIPAL_CACHE_TTL = 300
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = 0.001
+
+# Login activity and last_login are written in batches (apps/User/activity.py):
+# at most this many seconds after a login, or once this many are buffered
+LOGIN_ACTIVITY_FLUSH_INTERVAL = 2.0
+LOGIN_ACTIVITY_MAX_BUFFER = 200
+
 # --- mailing system setting ----
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
@@ -355,6 +476,10 @@ SENDGRID_TRACK_CLICKS_PLAIN = False
 SENDGRID_TRACK_CLICKS_HTML = False
 SENDGRID_TRACK_OPENS = False
 
+# Emails are sent over one persistent connection per process (utils/emails.py),
+# reopened after this many idle seconds
+EMAIL_CONNECTION_IDLE_TIMEOUT = 30
+
 # Disable sandbox mode for production (emails will be delivered)
 SENDGRID_SANDBOX_MODE_IN_DEBUG = False
 SENDGRID_ECHO_TO_STDOUT = DEBUG  # Only echo to stdout in debug mode
@@ -385,6 +510,32 @@ STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 
 print("Stripe WEBHOOK Key:", STRIPE_WEBHOOK_SECRET)
 # Stripe Configuration
+# Webhook events are stored by the webhook view and applied by the
+# process_stripe_events worker (apps/Payment/webhook_processor.py)
+STRIPE_EVENT_PROCESSING = {
+    "BATCH_SIZE": 20,
+    "MAX_ATTEMPTS": 5,
+    "POLL_INTERVAL": 2,
+}
+
+# Background bulk polling (apps/Payment/polling.py). The rate limit is shared
+# by every poll worker through the cache; Stripe allows 100 read requests/s
+# live and 25/s in test mode.
+STRIPE_POLLING = {
+    "CONCURRENCY": 8,
+    "RATE_PER_SECOND": 20,
+    "MAX_PAYMENTS": 500,
+}
+
+# Side effects of Request/Job status transitions are appended to the
+# domain event outbox and fanned out by the process_domain_events worker
+# (apps/Notification/outbox.py)
+DOMAIN_EVENTS = {
+    "BATCH_SIZE": 100,
+    "MAX_ATTEMPTS": 5,
+    "POLL_INTERVAL": 1,
+}
+
 STRIPE_LIVE_MODE = False  # Set to True for production
 STRIPE_CURRENCY = "gbp"  # Default currency
 STRIPE_SUPPORTED_CURRENCIES = ["usd", "eur", "gbp", "ghs"]  # Supported currencies
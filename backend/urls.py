@@ -12,6 +12,7 @@ from rest_framework_simplejwt.views import (
 from apps.Job.views import JobViewSet
 from django.conf import settings
 from django.conf.urls.static import static
+from utils.views import RequestMetricsView
 
 # Import the ViewSets from Vehicle and Driver apps
 from apps.Vehicle.views import VehicleViewSet, VehicleDocumentViewSet
@@ -100,6 +101,12 @@ urlpatterns = [
                     apps.ApiConnectionStatus.views.ApiConnectionStatusView.as_view(),
                     name="status",
                 ),
+                # Per-process request metrics (staff only)
+                path(
+                    "metrics/requests/",
+                    RequestMetricsView.as_view(),
+                    name="request_metrics",
+                ),
                 # Authentication endpoints
                 path("auth/", include("apps.Authentication.urls")),
                 # Request app URLs
@@ -120,6 +127,7 @@ urlpatterns = [
                 path("", include("apps.Message.urls")),
                 path("", include("apps.Services.urls")),
                 path("", include("apps.Vehicle.urls")),
+                path("", include("apps.Analytics.urls")),
                 # Media files under API prefix
                 *static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT),
             ]
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UtilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'utils'
+
+    def ready(self):
+        from utils.debug_trace import configure_tracing
+
+        configure_tracing()
+
+        import utils.signals
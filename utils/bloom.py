@@ -0,0 +1,54 @@
+"""
+In-memory Bloom filter
+
+A compact set that answers "definitely not present" or "possibly present".
+Used in front of tables that are checked on every request but rarely match
+(e.g. blacklisted JWTs), so the common case needs no query and only possible
+matches are confirmed against the database.
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Args:
+        capacity: Number of items the filter is sized for
+        error_rate: False positive rate at ``capacity`` items
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def saturated(self) -> bool:
+        """Whether more items were added than the filter was sized for"""
+        return self.count > self.capacity
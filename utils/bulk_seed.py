@@ -0,0 +1,216 @@
+"""
+Bulk seeding for the catalog management commands
+
+The seed commands (initial_items_cat, initial_services,
+initial_vehicle_categories, ...) used to call ``get_or_create`` and ``save``
+per row, which takes minutes on a fresh database. ``BulkSeeder`` upserts a
+list of rows for one model with a handful of queries:
+
+- the existing rows are loaded once into a map keyed by the rows' natural key
+  (e.g. ``name`` or ``(name, category)``);
+- incoming rows are diffed against the map, so rows that did not change are
+  not written at all;
+- new rows are inserted with ``bulk_create`` and changed rows written with
+  ``bulk_update``, both in chunks of ``batch_size``.
+
+When the natural key is a unique constraint (``ServiceCategory.slug``) and
+the database supports it, inserts use ``bulk_create(update_conflicts=True)``
+so a concurrent run cannot fail on a duplicate; other keys have no constraint
+to conflict on and rely on the diff.
+
+Bulk writes skip ``save()`` and model signals: callers refresh what those
+would have maintained (CommonItem search documents, the catalog snapshot)
+once at the end, with ``refresh_catalog``.
+
+Seeding is idempotent: a second run with the same data writes nothing.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from django.db import connection, models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+@dataclass
+class SeedResult:
+    """Outcome of seeding one model"""
+
+    created: List = field(default_factory=list)
+    updated: List = field(default_factory=list)
+    unchanged: int = 0
+    # Natural key -> instance, for every seeded row (new or existing)
+    objects: Dict[Tuple, models.Model] = field(default_factory=dict)
+
+    def get(self, *key):
+        return self.objects.get(key)
+
+
+class BulkSeeder:
+    """
+    Idempotent bulk upsert of seed rows keyed by a natural key
+
+    Args:
+        model: The model to seed
+        key_fields: Fields identifying a row (foreign keys as field names,
+            with instances as values in the rows)
+        update_fields: Fields synced on existing rows; other row values are
+            only used when the row is created (like ``get_or_create``
+            defaults). Defaults to every non-key field in the rows.
+        batch_size: Rows per INSERT/UPDATE statement
+    """
+
+    def __init__(
+        self,
+        model,
+        key_fields: Sequence[str],
+        update_fields: Sequence[str] = None,
+        batch_size: int = BATCH_SIZE,
+    ):
+        self.model = model
+        self.key_fields = tuple(key_fields)
+        self.update_fields = None if update_fields is None else tuple(update_fields)
+        self.batch_size = batch_size
+        self._fields = {f.name: f for f in model._meta.concrete_fields}
+
+    def _value(self, field_name: str, value):
+        """A row value as it is stored on the instance, for comparison"""
+        model_field = self._fields[field_name]
+        if model_field.is_relation:
+            return value.pk if isinstance(value, models.Model) else value
+        if value is None:
+            return None
+        return model_field.to_python(value)
+
+    def key_of_row(self, row: Dict) -> Tuple:
+        return tuple(self._value(name, row[name]) for name in self.key_fields)
+
+    def key_of_instance(self, instance) -> Tuple:
+        return tuple(
+            getattr(instance, self._fields[name].attname) for name in self.key_fields
+        )
+
+    def existing(self) -> Dict[Tuple, models.Model]:
+        """Existing rows by natural key (the oldest one if a key is duplicated)"""
+        existing = {}
+        for instance in self.model.objects.order_by("created_at"):
+            existing.setdefault(self.key_of_instance(instance), instance)
+        return existing
+
+    def _has_unique_key(self) -> bool:
+        if len(self.key_fields) == 1 and self._fields[self.key_fields[0]].unique:
+            return True
+        return any(
+            isinstance(constraint, models.UniqueConstraint)
+            and constraint.condition is None
+            and set(constraint.fields) == set(self.key_fields)
+            for constraint in self.model._meta.constraints
+        )
+
+    def seed(self, rows: Iterable[Dict]) -> SeedResult:
+        """Insert missing rows and update changed ones"""
+        result = SeedResult()
+        existing = self.existing()
+        changed_fields, row_fields = set(), set()
+
+        for row in rows:
+            row_fields.update(row)
+            key = self.key_of_row(row)
+            if key in result.objects:
+                # Repeated in the seed data: the first occurrence wins
+                continue
+
+            instance = existing.get(key)
+            if instance is None:
+                instance = self.model(**row)
+                result.created.append(instance)
+            else:
+                fields = self.update_fields
+                if fields is None:
+                    fields = [name for name in row if name not in self.key_fields]
+                changed = [
+                    name
+                    for name in fields
+                    if getattr(instance, self._fields[name].attname)
+                    != self._value(name, row[name])
+                ]
+                if changed:
+                    for name in changed:
+                        setattr(instance, name, row[name])
+                    changed_fields.update(changed)
+                    result.updated.append(instance)
+                else:
+                    result.unchanged += 1
+            result.objects[key] = instance
+
+        self._create(result.created, row_fields)
+        if result.updated:
+            now = timezone.now()
+            for instance in result.updated:
+                instance.updated_at = now
+            self.model.objects.bulk_update(
+                result.updated,
+                [*sorted(changed_fields), "updated_at"],
+                batch_size=self.batch_size,
+            )
+
+        logger.info(
+            f"Seeded {self.model.__name__}: {len(result.created)} created, "
+            f"{len(result.updated)} updated, {result.unchanged} unchanged"
+        )
+        return result
+
+    def _create(self, instances: List, row_fields: set):
+        if not instances:
+            return
+        if not (
+            self._has_unique_key()
+            and connection.features.supports_update_conflicts_with_target
+        ):
+            self.model.objects.bulk_create(instances, batch_size=self.batch_size)
+            return
+
+        update_fields = set(
+            row_fields if self.update_fields is None else self.update_fields
+        ) - set(self.key_fields)
+        if update_fields:
+            self.model.objects.bulk_create(
+                instances,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=self.key_fields,
+                update_fields=[*sorted(update_fields), "updated_at"],
+            )
+        else:
+            self.model.objects.bulk_create(
+                instances, batch_size=self.batch_size, ignore_conflicts=True
+            )
+
+
+def lookup(model, key_field: str, **filters) -> Dict:
+    """Map of ``key_field`` value -> instance, loaded with one query"""
+    lookup_map = {}
+    for instance in model.objects.filter(**filters).order_by("created_at"):
+        lookup_map.setdefault(getattr(instance, key_field), instance)
+    return lookup_map
+
+
+def refresh_catalog(common_items: Iterable = ()):
+    """
+    Redo what ``save()`` and the catalog signals would have done after a bulk
+    seed: rebuild the search documents of the given CommonItems and move the
+    catalog snapshot to a new version
+    """
+    from apps.CommonItems import snapshot
+    from apps.CommonItems.models import CommonItem
+    from apps.CommonItems.search import refresh_search_documents
+
+    pks = [item.pk for item in common_items]
+    if pks:
+        refresh_search_documents(CommonItem.objects.filter(pk__in=pks))
+    snapshot.invalidate()
@@ -0,0 +1,410 @@
+"""
+Two-tier, namespaced caching
+
+Every subsystem (pricing, weather, provider availability, the admin
+dashboards, ...) caches through a ``CacheNamespace`` instead of the raw
+``cache`` object:
+
+- values live in the shared ``default`` cache (Redis when ``REDIS_CACHE_URL``
+  is set, so every gunicorn worker sees the same entries; ``is_shared`` tells
+  callers that depend on cross-process invalidation) and are copied into
+  the per-process ``local`` cache for ``LOCAL_TIMEOUT`` seconds, so hot keys
+  cost no network round trip;
+- keys are ``<namespace>:v<version>:<key>``; ``invalidate()`` bumps the
+  namespace version, which drops every entry of the namespace at once. Other
+  processes see the new version within ``LOCAL_TIMEOUT`` seconds;
+- ``get_or_set`` is single-flight: one thread per process (tracked per key,
+  so unrelated keys never wait on each other) and, through a lock key in the
+  shared cache, one process computes a missing value while the others wait
+  for it instead of all recomputing it (cache stampede);
+- hits (local and shared), misses, recomputes and waits are counted per
+  namespace and exposed with the request metrics.
+
+A shared cache that is down is treated as a miss: values are computed and
+served from the local tier rather than failing the request.
+
+Namespaces are created with ``namespace(name, timeout=...)``; their options
+can be overridden per name in ``settings.CACHE_LAYER["NAMESPACES"]``.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "SHARED_ALIAS": "default",
+    "LOCAL_ALIAS": "local",
+    "TIMEOUT": 300,  # seconds a value is kept in the shared cache
+    "LOCAL_TIMEOUT": 5,  # seconds a value (and the version) is kept in-process
+    "LOCK_TIMEOUT": 10,  # longest a recompute may hold the single-flight lock
+    "LOCK_POLL_INTERVAL": 0.05,  # seconds between checks while waiting on it
+    "NAMESPACES": {},  # per-namespace overrides, e.g. {"weather": {"TIMEOUT": 60}}
+}
+
+_missing = object()
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "CACHE_LAYER", {})}
+
+
+class _Stats:
+    """Per-namespace counters"""
+
+    FIELDS = ("local_hits", "shared_hits", "misses", "computes", "waits", "errors")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Counter] = {}
+
+    def incr(self, namespace: str, field: str, amount: int = 1):
+        with self._lock:
+            self._counters.setdefault(namespace, Counter())[field] += amount
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            counters = {name: dict(counter) for name, counter in self._counters.items()}
+
+        snapshot = {}
+        for name, counter in sorted(counters.items()):
+            stats = {field: counter.get(field, 0) for field in self.FIELDS}
+            hits = stats["local_hits"] + stats["shared_hits"]
+            lookups = hits + stats["misses"]
+            stats["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+            snapshot[name] = stats
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = _Stats()
+
+# Keys being computed by a thread of this process -> (done event, thread id)
+_in_flight: Dict[str, tuple] = {}
+_in_flight_lock = threading.Lock()
+
+
+class CacheNamespace:
+    """
+    A versioned key space in the two-tier cache
+
+    Args:
+        name: Namespace, used as the key prefix and the metrics label
+        timeout: Seconds values are kept in the shared cache
+        local_timeout: Seconds values are kept in-process (0 disables it)
+    """
+
+    def __init__(self, name: str, timeout: int = None, local_timeout: int = None):
+        config = get_config()
+        overrides = config["NAMESPACES"].get(name, {})
+        self.name = name
+        self.timeout = overrides.get(
+            "TIMEOUT", timeout if timeout is not None else config["TIMEOUT"]
+        )
+        self.local_timeout = overrides.get(
+            "LOCAL_TIMEOUT",
+            local_timeout if local_timeout is not None else config["LOCAL_TIMEOUT"],
+        )
+        self.lock_timeout = config["LOCK_TIMEOUT"]
+        self.lock_poll_interval = config["LOCK_POLL_INTERVAL"]
+        self._shared_alias = config["SHARED_ALIAS"]
+        self._local_alias = config["LOCAL_ALIAS"]
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    @property
+    def is_shared(self) -> bool:
+        """Whether the shared tier is seen by every process (not a
+        per-process stand-in), so invalidations reach other workers"""
+        return not isinstance(self.shared, (LocMemCache, DummyCache))
+
+    @property
+    def local(self):
+        if not self.local_timeout:
+            return None
+        try:
+            return caches[self._local_alias]
+        except InvalidCacheBackendError:
+            return None
+
+    def _version_key(self) -> str:
+        return f"{self.name}:version"
+
+    def version(self) -> int:
+        """The namespace version, read from the shared cache at most every
+        ``local_timeout`` seconds"""
+        local = self.local
+        if local is not None:
+            version = local.get(self._version_key())
+            if version is not None:
+                return version
+
+        try:
+            version = self.shared.get(self._version_key())
+            if version is None:
+                self.shared.add(self._version_key(), 0, timeout=None)
+                version = self.shared.get(self._version_key(), 0)
+        except Exception as e:
+            self._shared_error("read the version", e)
+            version = 0
+
+        if local is not None:
+            local.set(self._version_key(), version, timeout=self.local_timeout)
+        return version
+
+    def make_key(self, key) -> str:
+        return f"{self.name}:v{self.version()}:{key}"
+
+    def get(self, key, default=None):
+        """A cached value, from the local tier first"""
+        value = self._get(self.make_key(key))
+        return default if value is _missing else value
+
+    def _get(self, full_key: str):
+        local = self.local
+        if local is not None:
+            value = local.get(full_key, _missing)
+            if value is not _missing:
+                stats.incr(self.name, "local_hits")
+                return value
+
+        try:
+            value = self.shared.get(full_key, _missing)
+        except Exception as e:
+            self._shared_error("read", e)
+            value = _missing
+
+        if value is _missing:
+            stats.incr(self.name, "misses")
+            return _missing
+
+        stats.incr(self.name, "shared_hits")
+        if local is not None:
+            local.set(full_key, value, timeout=self._local_ttl())
+        return value
+
+    def set(self, key, value, timeout: int = None):
+        self._set(self.make_key(key), value, timeout)
+
+    def _set(self, full_key: str, value, timeout: int = None):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            self.shared.set(full_key, value, timeout=timeout)
+        except Exception as e:
+            self._shared_error("write", e)
+        local = self.local
+        if local is not None:
+            local.set(full_key, value, timeout=self._local_ttl(timeout))
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        try:
+            self.shared.delete(full_key)
+        except Exception as e:
+            self._shared_error("delete", e)
+        if self.local is not None:
+            self.local.delete(full_key)
+
+    def get_or_set(
+        self,
+        key,
+        compute: Callable,
+        timeout: int = None,
+        cache_none: bool = True,
+    ):
+        """
+        The cached value for ``key``, computing and storing it on a miss
+
+        Only one caller computes a missing value at a time; concurrent
+        callers (in this and other processes) wait for its result.
+
+        Args:
+            compute: Called without arguments to produce the value
+            timeout: Seconds to keep the value (default: the namespace's)
+            cache_none: Whether a ``None`` result is stored
+        """
+        full_key = self.make_key(key)
+        value = self._get(full_key)
+        if value is not _missing:
+            return value
+
+        event = self._claim(full_key)
+        if event is None:
+            # Another thread of this process is computing it
+            value = self._peek(full_key)
+            if value is not _missing:
+                stats.incr(self.name, "waits")
+                return value
+            # It did not store a value in time; compute it here instead
+            return self._compute(full_key, compute, timeout, cache_none)
+
+        locked = False
+        lock_key = f"{full_key}:lock"
+        try:
+            # Another thread may have filled it before this one claimed it
+            value = self._peek(full_key)
+            if value is not _missing:
+                stats.incr(self.name, "waits")
+                return value
+
+            try:
+                locked = self.shared.add(lock_key, 1, timeout=self.lock_timeout)
+            except Exception as e:
+                self._shared_error("lock", e)
+                locked = True
+
+            if not locked:
+                # Another process is computing it. Let this process's other
+                # callers wait on the shared cache too rather than on us.
+                self._release(full_key, event)
+                event = None
+                value = self._wait_for(full_key)
+                if value is not _missing:
+                    stats.incr(self.name, "waits")
+                    return value
+
+            return self._compute(full_key, compute, timeout, cache_none)
+        finally:
+            if event is not None:
+                self._release(full_key, event)
+            if locked:
+                try:
+                    self.shared.delete(lock_key)
+                except Exception:
+                    pass
+
+    def _claim(self, full_key: str):
+        """
+        Claim the computation of ``full_key`` in this process
+
+        Returns the event to set once done, or None after waiting (at most
+        ``lock_timeout`` seconds) for the thread that holds the claim
+        """
+        thread_id = threading.get_ident()
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            with _in_flight_lock:
+                claim = _in_flight.get(full_key)
+                if claim is None:
+                    event = threading.Event()
+                    _in_flight[full_key] = (event, thread_id)
+                    return event
+            event, owner = claim
+            remaining = deadline - time.monotonic()
+            # A nested call for the key its own thread is computing cannot wait
+            if owner == thread_id or remaining <= 0:
+                return None
+            if event.wait(remaining) and self._peek(full_key) is not _missing:
+                return None
+
+    def _release(self, full_key: str, event: threading.Event):
+        with _in_flight_lock:
+            if _in_flight.get(full_key, (None,))[0] is event:
+                del _in_flight[full_key]
+        event.set()
+
+    def _compute(self, full_key: str, compute: Callable, timeout, cache_none):
+        stats.incr(self.name, "computes")
+        value = compute()
+        if value is not None or cache_none:
+            self._set(full_key, value, timeout)
+        return value
+
+    def _peek(self, full_key: str):
+        """Read both tiers without counting a lookup"""
+        local = self.local
+        if local is not None:
+            value = local.get(full_key, _missing)
+            if value is not _missing:
+                return value
+        try:
+            return self.shared.get(full_key, _missing)
+        except Exception:
+            return _missing
+
+    def _wait_for(self, full_key: str):
+        """Poll the shared cache until another process stored the value"""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            value = self._peek(full_key)
+            if value is not _missing:
+                return value
+        # The other process is slow or died; compute it here instead
+        return _missing
+
+    def invalidate(self):
+        """Drop every entry of the namespace, in every process"""
+        try:
+            self.shared.add(self._version_key(), 0, timeout=None)
+            try:
+                version = self.shared.incr(self._version_key())
+            except ValueError:
+                # Evicted between add() and incr()
+                version = 1
+                self.shared.set(self._version_key(), version, timeout=None)
+        except Exception as e:
+            self._shared_error("invalidate", e)
+            version = self.version() + 1
+
+        if self.local is not None:
+            # This process switches immediately
+            self.local.set(self._version_key(), version, timeout=self.local_timeout)
+
+    def _local_ttl(self, timeout: int = None) -> int:
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(self.local_timeout, timeout)
+
+    def _shared_error(self, operation: str, error: Exception):
+        stats.incr(self.name, "errors")
+        logger.warning(
+            f"Shared cache unavailable ({self.name}: {operation}): {str(error)}"
+        )
+
+
+_namespaces: Dict[str, CacheNamespace] = {}
+_namespaces_lock = threading.Lock()
+
+
+def namespace(name: str, timeout: int = None, local_timeout: int = None):
+    """The process-wide ``CacheNamespace`` called ``name``"""
+    with _namespaces_lock:
+        if name not in _namespaces:
+            _namespaces[name] = CacheNamespace(name, timeout, local_timeout)
+        return _namespaces[name]
+
+
+def metrics() -> Dict[str, Dict]:
+    """Per-namespace hit/miss counters of this process"""
+    return stats.snapshot()
+
+
+def prometheus() -> str:
+    """The per-namespace counters in the Prometheus text exposition format"""
+    lines = [
+        "# HELP morevans_cache_events Cache hits, misses, recomputes and errors per namespace",
+        "# TYPE morevans_cache_events counter",
+    ]
+    for name, namespace_stats in metrics().items():
+        for field in _Stats.FIELDS:
+            lines.append(
+                f'morevans_cache_events{{namespace="{name}",event="{field}"}} '
+                f"{namespace_stats[field]}"
+            )
+    return "\n".join(lines) + "\n"
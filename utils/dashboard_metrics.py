@@ -0,0 +1,289 @@
+"""
+Admin dashboard metrics
+
+Each dashboard is computed with one or two conditional-aggregation queries
+(``Count``/``Sum`` with ``filter=``) instead of a query per figure, and the
+result is cached for ``DASHBOARD_METRICS_TTL`` seconds.
+
+Every dashboard is a cache namespace (utils/caching.py). The model signals
+in utils/signals.py invalidate it when the underlying rows change, so cached
+results are never served after a write in the same process; other processes
+pick up the change within the namespace's local timeout. Concurrent misses
+compute a dashboard once.
+
+Long ``admin_stats`` ranges are served from the daily rollups in
+apps/Analytics once they have been built.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Callable, Dict
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from utils.caching import namespace
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_STATS = "payment_stats"
+PAYMENT_METHOD_OVERVIEW = "payment_method_overview"
+USER_STATS = "user_stats"
+GROUP_STATS = "group_stats"
+
+
+def _ttl() -> int:
+    return getattr(settings, "DASHBOARD_METRICS_TTL", 60)
+
+
+def _namespace(dashboard: str):
+    return namespace(f"dashboard:{dashboard}", timeout=_ttl())
+
+
+def invalidate(*dashboards: str):
+    """Make every cached variant of the given dashboards stale"""
+    for dashboard in dashboards:
+        _namespace(dashboard).invalidate()
+
+
+def cached(dashboard: str, compute: Callable[[], Dict], *params) -> Dict:
+    """Return a dashboard from the cache, computing it on a miss"""
+    return _namespace(dashboard).get_or_set(
+        ":".join(map(str, params)) or "all", compute
+    )
+
+
+def _status_breakdown(field: str, choices, amount_field: str = None):
+    """
+    Conditional aggregates for every choice of ``field``, for use in a single
+    ``aggregate()`` call
+    """
+    aggregates = {}
+    for value, _ in choices:
+        condition = Q(**{field: value})
+        aggregates[f"{value}__count"] = Count("id", filter=condition)
+        if amount_field:
+            aggregates[f"{value}__amount"] = Sum(amount_field, filter=condition)
+    return aggregates
+
+
+def payment_stats(days: int = 30) -> Dict:
+    """Payment totals for the last ``days`` days (PaymentViewSet.admin_stats)"""
+    return cached(PAYMENT_STATS, lambda: _compute_payment_stats(days), days)
+
+
+def _compute_payment_stats(days: int) -> Dict:
+    from apps.Analytics.models import RollupWatermark
+    from apps.Payment.models import Payment
+
+    queryset = Payment.objects.filter(
+        created_at__gte=timezone.now() - timedelta(days=days)
+    )
+
+    if (
+        days >= getattr(settings, "DASHBOARD_ROLLUP_MIN_DAYS", 90)
+        and RollupWatermark.objects.filter(
+            source="payments", watermark__isnull=False
+        ).exists()
+    ):
+        return {
+            **_payment_stats_from_rollups(days),
+            "recent_payments": _recent_payments(queryset),
+        }
+
+    # Query 1: totals and the per-status breakdown
+    totals = queryset.aggregate(
+        total_payments=Count("id"),
+        total_amount=Sum("amount"),
+        average_amount=Avg("amount"),
+        **_status_breakdown("status", Payment.PAYMENT_STATUS, "amount"),
+    )
+    by_status = [
+        {
+            "status": value,
+            "count": totals[f"{value}__count"],
+            "total_amount": totals[f"{value}__amount"],
+        }
+        for value in sorted(value for value, _ in Payment.PAYMENT_STATUS)
+        if totals[f"{value}__count"]
+    ]
+
+    # Query 2: currencies are open-ended, so they are grouped
+    by_currency = list(
+        queryset.values("currency")
+        .annotate(count=Count("id"), total_amount=Sum("amount"))
+        .order_by("currency")
+    )
+
+    return {
+        "total_payments": totals["total_payments"],
+        "total_amount": totals["total_amount"] or 0,
+        "average_amount": totals["average_amount"] or 0,
+        "by_status": by_status,
+        "by_currency": by_currency,
+        "recent_payments": _recent_payments(queryset),
+    }
+
+
+def _recent_payments(queryset):
+    return list(
+        queryset.order_by("-created_at")[:10].values(
+            "id",
+            "amount",
+            "currency",
+            "status",
+            "created_at",
+            "request__tracking_number",
+            "request__user__email",
+        )
+    )
+
+
+def _payment_stats_from_rollups(days: int) -> Dict:
+    """Totals and breakdowns from one grouped query over the daily rollups"""
+    from apps.Analytics.models import DailyPaymentRollup
+
+    groups = (
+        DailyPaymentRollup.objects.filter(
+            date__gte=timezone.localdate() - timedelta(days=days)
+        )
+        .values("status", "currency")
+        .annotate(count=Sum("count"), total_amount=Sum("total_amount"))
+    )
+
+    total_payments, total_amount = 0, 0
+    by_status, by_currency = {}, {}
+    for group in groups:
+        total_payments += group["count"]
+        total_amount += group["total_amount"]
+        for breakdown, key in ((by_status, "status"), (by_currency, "currency")):
+            entry = breakdown.setdefault(
+                group[key], {key: group[key], "count": 0, "total_amount": 0}
+            )
+            entry["count"] += group["count"]
+            entry["total_amount"] += group["total_amount"]
+
+    return {
+        "total_payments": total_payments,
+        "total_amount": total_amount,
+        "average_amount": total_amount / total_payments if total_payments else 0,
+        "by_status": [by_status[key] for key in sorted(by_status)],
+        "by_currency": [by_currency[key] for key in sorted(by_currency)],
+    }
+
+
+def payment_method_overview() -> Dict:
+    """Payment method totals (PaymentMethodViewSet.admin_overview)"""
+    return cached(PAYMENT_METHOD_OVERVIEW, _compute_payment_method_overview)
+
+
+def _compute_payment_method_overview() -> Dict:
+    from apps.Payment.models import PaymentMethod
+
+    totals = PaymentMethod.objects.aggregate(
+        total_payment_methods=Count("id"),
+        active_payment_methods=Count("id", filter=Q(is_active=True)),
+        default_payment_methods=Count("id", filter=Q(is_default=True)),
+    )
+
+    return {
+        **totals,
+        "by_type": list(
+            PaymentMethod.objects.values("stripe_payment_method_type")
+            .annotate(count=Count("id"))
+            .order_by("stripe_payment_method_type")
+        ),
+        "recent_additions": list(
+            PaymentMethod.objects.select_related("user")
+            .order_by("-created_at")[:10]
+            .values(
+                "id",
+                "user__email",
+                "stripe_payment_method_type",
+                "is_default",
+                "is_active",
+                "created_at",
+            )
+        ),
+    }
+
+
+def user_stats() -> Dict:
+    """User totals (UserManagementViewSet.stats)"""
+    return cached(USER_STATS, _compute_user_stats)
+
+
+def _compute_user_stats() -> Dict:
+    from apps.Request.models import Request
+    from apps.User.models import User
+
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    totals = User.objects.aggregate(
+        total_users=Count("id"),
+        customers=Count("id", filter=Q(user_type="customer")),
+        providers=Count("id", filter=Q(user_type="provider")),
+        admins=Count("id", filter=Q(user_type="admin")),
+        active=Count("id", filter=Q(account_status="active")),
+        inactive=Count("id", filter=Q(account_status="inactive")),
+        new_users_30d=Count("id", filter=Q(date_joined__gte=thirty_days_ago)),
+    )
+    customer_requests = Request.objects.filter(user__user_type="customer").count()
+
+    return {
+        "total_users": totals["total_users"],
+        "by_type": {
+            "customers": totals["customers"],
+            "providers": totals["providers"],
+            "admins": totals["admins"],
+        },
+        "by_status": {
+            "active": totals["active"],
+            "inactive": totals["inactive"],
+        },
+        "new_users_30d": totals["new_users_30d"],
+        "requests": {
+            "total_customer_requests": customer_requests,
+        },
+    }
+
+
+def group_stats() -> Dict:
+    """Group and permission usage (UserManagementViewSet.advanced_stats)"""
+    return cached(GROUP_STATS, _compute_group_stats)
+
+
+def _compute_group_stats() -> Dict:
+    # One grouped query gives the breakdown and both totals
+    group_breakdown = [
+        {"group_name": name, "user_count": user_count}
+        for name, user_count in Group.objects.annotate(
+            user_count=Count("user")
+        ).values_list("name", "user_count")
+    ]
+    total_groups = len(group_breakdown)
+    groups_with_users = sum(1 for group in group_breakdown if group["user_count"])
+
+    permissions = Permission.objects.aggregate(
+        total=Count("id", distinct=True),
+        in_use=Count(
+            "id",
+            filter=Q(group__isnull=False) | Q(user__isnull=False),
+            distinct=True,
+        ),
+    )
+
+    return {
+        "groups": {
+            "total_groups": total_groups,
+            "groups_with_users": groups_with_users,
+            "empty_groups": total_groups - groups_with_users,
+            "group_breakdown": group_breakdown,
+        },
+        "permissions": {
+            "total_permissions": permissions["total"],
+            "permissions_in_use": permissions["in_use"],
+            "unused_permissions": permissions["total"] - permissions["in_use"],
+        },
+    }
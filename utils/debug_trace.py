@@ -0,0 +1,167 @@
+"""
+Debug tracing
+
+Replaces ad-hoc ``print()`` debugging across the apps. Tracing is disabled by
+default; when enabled through ``settings.DEBUG_TRACE`` each module can have
+its own level and sample rate, and records are handed to a background
+``QueueListener`` so the calling thread never blocks on stdout.
+
+Usage::
+
+    from utils.debug_trace import get_tracer
+
+    tracer = get_tracer(__name__)
+    tracer.debug("Payment {} moved to {}", payment.id, status, request_id=request.id)
+
+Messages use ``str.format`` placeholders and are only formatted when the
+record is actually emitted. Keyword arguments are attached as structured
+fields.
+"""
+
+import atexit
+import logging
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from django.conf import settings
+
+TRACE_LOGGER_NAME = "trace"
+
+DEFAULT_CONFIG = {
+    "ENABLED": False,
+    "LEVEL": "DEBUG",
+    "SAMPLE_RATE": 1.0,
+    "MODULES": {},  # dotted module prefix -> {"LEVEL": ..., "SAMPLE_RATE": ...}
+}
+
+_tracers: Dict[str, "Tracer"] = {}
+_tracers_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+
+def _get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "DEBUG_TRACE", {})}
+
+
+class TraceMessage:
+    """Defers ``str.format`` until a handler actually renders the record"""
+
+    __slots__ = ("template", "args")
+
+    def __init__(self, template, args):
+        self.template = template
+        self.args = args
+
+    def __str__(self):
+        if not self.args:
+            return str(self.template)
+        try:
+            return str(self.template).format(*self.args)
+        except (IndexError, KeyError, ValueError):
+            return " ".join([str(self.template), *map(str, self.args)])
+
+
+class TraceFormatter(logging.Formatter):
+    """``<time> <LEVEL> <module> <message> key=value ...``"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "trace_fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        return line
+
+
+class Tracer:
+    """Per-module trace emitter with a cached level and sample rate"""
+
+    def __init__(self, module: str):
+        self.module = module
+        self.logger = logging.getLogger(f"{TRACE_LOGGER_NAME}.{module}")
+        self.configure(_get_config())
+
+    def configure(self, config: Dict):
+        """Resolve this module's level/sample rate (longest prefix wins)"""
+        level = config["LEVEL"]
+        sample_rate = config["SAMPLE_RATE"]
+
+        best = ""
+        for prefix, overrides in config["MODULES"].items():
+            matches = self.module == prefix or self.module.startswith(prefix + ".")
+            if matches and len(prefix) > len(best):
+                best = prefix
+                level = overrides.get("LEVEL", level)
+                sample_rate = overrides.get("SAMPLE_RATE", sample_rate)
+
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.sample_rate = float(sample_rate)
+        # A single comparison on the hot path when tracing is off
+        self.min_level = self.level if config["ENABLED"] else logging.CRITICAL + 1
+
+    def is_enabled(self, level: int = logging.DEBUG) -> bool:
+        return level >= self.min_level
+
+    def _emit(self, level: int, template, args, fields):
+        if level < self.min_level:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self.logger.log(
+            level, TraceMessage(template, args), extra={"trace_fields": fields}
+        )
+
+    def debug(self, template, *args, **fields):
+        self._emit(logging.DEBUG, template, args, fields)
+
+    def info(self, template, *args, **fields):
+        self._emit(logging.INFO, template, args, fields)
+
+    def warning(self, template, *args, **fields):
+        self._emit(logging.WARNING, template, args, fields)
+
+
+def get_tracer(module: str) -> Tracer:
+    """Return the shared tracer for a module (usually ``__name__``)"""
+    tracer = _tracers.get(module)
+    if tracer is None:
+        with _tracers_lock:
+            tracer = _tracers.setdefault(module, Tracer(module))
+    return tracer
+
+
+def configure_tracing():
+    """
+    Apply ``settings.DEBUG_TRACE`` to every tracer and, when enabled, start
+    the background listener that writes trace records to stdout
+
+    Called from ``UtilsConfig.ready``; safe to call again after changing
+    settings (e.g. in tests).
+    """
+    global _listener
+
+    config = _get_config()
+    with _tracers_lock:
+        for tracer in _tracers.values():
+            tracer.configure(config)
+
+    trace_logger = logging.getLogger(TRACE_LOGGER_NAME)
+    trace_logger.propagate = False
+    trace_logger.setLevel(logging.DEBUG)
+
+    if not config["ENABLED"] or _listener is not None:
+        return
+
+    record_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        TraceFormatter("{asctime} {levelname} {name} {message}", style="{")
+    )
+    trace_logger.addHandler(QueueHandler(record_queue))
+
+    _listener = QueueListener(record_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,181 @@
+"""
+Email rendering and sending
+
+OTP and notification emails used to look up and compile their templates,
+rebuild the inline logo and open a new SMTP/SendGrid connection for every
+message. This module keeps what does not change per message:
+
+- compiled templates are cached per process (``get_templates``), with a
+  fallback template for notification types that have none of their own;
+- ``render_email`` renders the HTML and text parts of one message, and
+  ``render_bulk`` renders one template for many recipients on top of a
+  context shared by all of them;
+- ``send_messages`` sends through one persistent connection per process
+  (``EmailConnectionPool``), in batches, and returns which messages were
+  accepted so callers can record delivery per message. The connection is
+  reopened after ``EMAIL_CONNECTION_IDLE_TIMEOUT`` seconds of inactivity or a
+  failure.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+_templates: Dict[Tuple[str, str], Tuple] = {}
+_templates_lock = threading.Lock()
+
+
+def get_templates(template_name: str, fallback: str = None):
+    """The compiled ``<template_name>.html`` and ``.txt`` templates, loaded once"""
+    key = (template_name, fallback)
+    templates = _templates.get(key)
+    if templates is not None:
+        return templates
+
+    try:
+        templates = (
+            get_template(f"{template_name}.html"),
+            get_template(f"{template_name}.txt"),
+        )
+    except TemplateDoesNotExist:
+        if fallback is None:
+            raise
+        logger.warning(f"No email template {template_name}, using {fallback}")
+        templates = get_templates(fallback)
+
+    with _templates_lock:
+        _templates[key] = templates
+    return templates
+
+
+def clear_template_cache():
+    with _templates_lock:
+        _templates.clear()
+
+
+def base_context() -> Dict:
+    """Context every email template gets"""
+    return {"app_name": "MoreVans", "current_year": datetime.now().year}
+
+
+def render_email(template_name: str, context: Dict, fallback: str = None):
+    """The (HTML, text) bodies of one email"""
+    html_template, text_template = get_templates(template_name, fallback)
+    return html_template.render(context), text_template.render(context)
+
+
+def render_bulk(
+    template_name: str,
+    contexts: Iterable[Dict],
+    shared_context: Dict = None,
+    fallback: str = None,
+) -> List[Tuple[str, str]]:
+    """Render one template for many recipients; ``shared_context`` is built
+    once and extended by each recipient's own context"""
+    shared = {**base_context(), **(shared_context or {})}
+    html_template, text_template = get_templates(template_name, fallback)
+    rendered = []
+    for context in contexts:
+        context = {**shared, **context}
+        rendered.append((html_template.render(context), text_template.render(context)))
+    return rendered
+
+
+def build_message(subject: str, to: Sequence[str], html: str, text: str):
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=text,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+    message.attach_alternative(html, "text/html")
+    return message
+
+
+class EmailConnectionPool:
+    """
+    One persistent email backend connection per process
+
+    SMTP connections are not thread-safe, so sends are serialized on a lock;
+    that also keeps the connection count to the provider at one per worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connection = None
+        self._last_used = 0.0
+
+    def _idle_timeout(self) -> float:
+        return getattr(settings, "EMAIL_CONNECTION_IDLE_TIMEOUT", 30)
+
+    def _open(self):
+        if (
+            self._connection is not None
+            and time.monotonic() - self._last_used > self._idle_timeout()
+        ):
+            # The server has probably dropped it
+            self._close()
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._connection.open()
+        return self._connection
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def send(self, messages: Sequence) -> List[bool]:
+        """Send each message; returns whether each one was accepted"""
+        results = []
+        with self._lock:
+            for message in messages:
+                results.append(self._send_one(message))
+            self._last_used = time.monotonic()
+        return results
+
+    def _send_one(self, message) -> bool:
+        for attempt in range(2):
+            try:
+                connection = self._open()
+                message.connection = connection
+                return bool(connection.send_messages([message]))
+            except Exception as e:
+                # Reconnect once: the connection may have gone stale
+                self._close()
+                if attempt:
+                    logger.error(f"Failed to send email to {message.to}: {str(e)}")
+        return False
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+pool = EmailConnectionPool()
+
+
+def send_messages(messages: Sequence, batch_size: int = BATCH_SIZE) -> List[bool]:
+    """Send messages through the pooled connection, ``batch_size`` at a time
+    (other threads can send between batches); returns a result per message"""
+    results = []
+    for start in range(0, len(messages), batch_size):
+        results += pool.send(messages[start : start + batch_size])
+    sent = sum(results)
+    if messages:
+        logger.info(f"Sent {sent}/{len(messages)} emails")
+    return results
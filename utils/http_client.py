@@ -0,0 +1,296 @@
+"""
+Shared outbound HTTP client
+
+All third-party integrations (Google Maps, postcodes.io, Ideal Postcodes,
+OpenRouteService, OpenWeatherMap, Stripe) go through this module so that:
+
+- each host gets its own pooled keep-alive session;
+- every call has a timeout, and idempotent calls are retried with jittered
+  exponential backoff;
+- a per-host circuit breaker fails fast while a provider is down, so one slow
+  third party cannot tie up every gunicorn worker;
+- per-host latency and error counts are recorded, and the time is also
+  attributed to the current request (utils.request_metrics).
+
+Configuration lives in ``settings.OUTBOUND_HTTP``; see backend/settings.py.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from utils.request_metrics import record_http
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "TIMEOUT": 10,  # seconds
+    "RETRIES": 2,
+    "BACKOFF": 0.2,  # seconds, doubled on every retry
+    "POOL_SIZE": 10,
+    "CIRCUIT_FAILURE_THRESHOLD": 5,  # consecutive failures before opening
+    "CIRCUIT_RESET_TIMEOUT": 30,  # seconds before a half-open trial call
+    "HOSTS": {},  # per-host overrides of the keys above
+}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised when a host's circuit breaker is open and the call is skipped"""
+
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single host"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                # Let a single trial call through; everyone else is refused
+                # until it is recorded. A trial that never reported back
+                # (e.g. its caller died) is replaced after reset_timeout.
+                if (
+                    self.trial_in_flight
+                    and now - self.trial_started_at < self.reset_timeout
+                ):
+                    return False
+                self.trial_in_flight = True
+                self.trial_started_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class HostMetrics:
+    """Running latency and error counters for a single host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.short_circuited = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms: float, error: bool):
+        with self._lock:
+            self.requests += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            if error:
+                self.errors += 1
+
+    def record_short_circuit(self):
+        with self._lock:
+            self.short_circuited += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "short_circuited": self.short_circuited,
+                "avg_ms": (
+                    round(self.total_ms / self.requests, 2) if self.requests else 0.0
+                ),
+                "max_ms": round(self.max_ms, 2),
+            }
+
+
+class InstrumentedSession(requests.Session):
+    """
+    Session bound to one host that enforces the circuit breaker and records
+    metrics on every request, including requests made by third-party SDKs
+    that are handed this session (e.g. Stripe)
+    """
+
+    def __init__(self, host: str, breaker: CircuitBreaker, metrics: HostMetrics):
+        super().__init__()
+        self.host = host
+        self.breaker = breaker
+        self.metrics = metrics
+
+    def request(self, method, url, *args, **kwargs):
+        if not self.breaker.allow_request():
+            self.metrics.record_short_circuit()
+            raise CircuitOpenError(f"Circuit open for {self.host}")
+
+        started = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self.metrics.record(elapsed_ms, error=True)
+            record_http(elapsed_ms)
+            self.breaker.record_failure()
+            raise
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        server_error = response.status_code >= 500
+        self.metrics.record(elapsed_ms, error=server_error)
+        record_http(elapsed_ms)
+        if server_error:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+
+class OutboundHTTPClient:
+    """Per-host pooled HTTP client with timeouts, retries and circuit breakers"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self._sessions: Dict[str, InstrumentedSession] = {}
+        self._lock = threading.Lock()
+
+    def host_config(self, host: str) -> Dict:
+        """Return the effective configuration for a host"""
+        return {**self.config, **self.config["HOSTS"].get(host, {})}
+
+    def session_for(self, host: str) -> InstrumentedSession:
+        """Return the pooled session for a host, creating it on first use"""
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                config = self.host_config(host)
+                session = InstrumentedSession(
+                    host,
+                    CircuitBreaker(
+                        config["CIRCUIT_FAILURE_THRESHOLD"],
+                        config["CIRCUIT_RESET_TIMEOUT"],
+                    ),
+                    HostMetrics(),
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=config["POOL_SIZE"]
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request through the host's pooled session
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute URL
+            timeout (float): Overrides the configured timeout
+            retries (int): Overrides the configured retry count. Non-idempotent
+                methods are not retried unless this is given explicitly.
+
+        Returns:
+            requests.Response: The final response (possibly a retryable status
+            once retries are exhausted)
+
+        Raises:
+            CircuitOpenError: The host's circuit breaker is open
+            requests.RequestException: The request failed after all retries
+        """
+        method = method.upper()
+        host = urlparse(url).netloc
+        config = self.host_config(host)
+        session = self.session_for(host)
+
+        if timeout is None:
+            timeout = config["TIMEOUT"]
+        if retries is None:
+            retries = config["RETRIES"] if method in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except CircuitOpenError:
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= retries:
+                    raise
+                logger.warning(
+                    f"{method} {host} failed ({e.__class__.__name__}), "
+                    f"retry {attempt + 1}/{retries}"
+                )
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                logger.warning(
+                    f"{method} {host} returned {response.status_code}, "
+                    f"retry {attempt + 1}/{retries}"
+                )
+
+            self._sleep_before_retry(attempt, config["BACKOFF"])
+            attempt += 1
+
+    def _sleep_before_retry(self, attempt: int, backoff: float):
+        """Exponential backoff with full jitter"""
+        time.sleep(random.uniform(0, backoff * (2**attempt)))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Per-host latency/error counters and circuit breaker state"""
+        return {
+            host: {**session.metrics.snapshot(), "circuit": session.breaker.state}
+            for host, session in list(self._sessions.items())
+        }
+
+
+http_client = OutboundHTTPClient(getattr(settings, "OUTBOUND_HTTP", None))
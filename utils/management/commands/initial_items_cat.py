@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from apps.CommonItems.models import CommonItem, ItemCategory
+from utils.bulk_seed import BulkSeeder, lookup, refresh_catalog
 
 
 class Command(BaseCommand):
@@ -2028,101 +2029,80 @@ class Command(BaseCommand):
             },
         ]
 
-        # Process each category and its "items"
-        with transaction.atomic():
-            categories_created = 0
-            items_created = 0
+        # Bulk upsert: a few queries in total instead of a few per item
+        from apps.Services.models import ServiceCategory
 
-            for category_data in common_items:
-                # Create or get the category
-                category_name = category_data["name"]
-                display_name = category_name.replace(
-                    "_", " "
-                ).title()  # Convert underscores to spaces and capitalize
+        default_icon_data = {
+            "icon": "IconBox",  # Default icon
+            "color": "bg-gray-100 text-gray-800 dark:bg-gray-800 dark:text-gray-200",
+            "tab_color": "bg-gray-500 text-gray-100 dark:bg-gray-800 dark:text-gray-200",
+        }
 
-                # Get icon and color information
-                icon_data = category_icons.get(
-                    category_name,
+        with transaction.atomic():
+            category_rows = []
+            for category_data in common_items:
+                # Convert underscores to spaces and capitalize
+                display_name = category_data["name"].replace("_", " ").title()
+                icon_data = category_icons.get(category_data["name"], default_icon_data)
+                category_rows.append(
                     {
-                        "icon": "IconBox",  # Default icon
-                        "color": "bg-gray-100 text-gray-800 dark:bg-gray-800 dark:text-gray-200",
-                        "tab_color": "bg-gray-500 text-gray-100 dark:bg-gray-800 dark:text-gray-200",
-                    },
-                )
-
-                category, created = ItemCategory.objects.get_or_create(
-                    name=display_name,
-                    defaults={
+                        "name": display_name,
                         "description": f"Common {display_name} items for moving",
                         "icon": icon_data["icon"],
                         "color": icon_data["color"],
                         "tab_color": icon_data["tab_color"],
-                    },
+                    }
                 )
 
-                if created:
-                    categories_created += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Created category: {display_name}")
-                    )
-                else:
-                    # Update the category with icon and color if it already exists
-                    category.icon = icon_data["icon"]
-                    category.color = icon_data["color"]
-                    category.tab_color = icon_data["tab_color"]
-                    category.save()
+            # Existing categories only get their icon and colors refreshed
+            categories = BulkSeeder(
+                ItemCategory,
+                key_fields=["name"],
+                update_fields=["icon", "color", "tab_color"],
+            ).seed(category_rows)
+
+            service_categories = lookup(ServiceCategory, "name")
+            item_rows = []
+            for category_data, category_row in zip(common_items, category_rows):
+                category = categories.get(category_row["name"])
+
+                # The service category for this item category (sub-service category)
+                service_category_name = category_to_service.get(category_data["name"])
+                service_category_obj = service_categories.get(service_category_name)
+                if service_category_name and service_category_obj is None:
                     self.stdout.write(
-                        f"Updated category: {display_name} with icon and color information"
+                        self.style.WARNING(
+                            f"ServiceCategory '{service_category_name}' not found for item category '{category_data['name']}'. Leaving blank."
+                        )
                     )
 
-                # Create the item types for this category
                 for item_data in category_data["items"]:
-                    # Convert "weight" to numeric
-                    weight = float(item_data.get("weight", 0))
-
-                    # Handle missing fields with defaults
-                    needs_disassembly = item_data.get("needs_disassembly", False)
-                    fragile = item_data.get("fragile", False)
-
-                    # Look up the service category for this item (sub-service category)
-                    service_category_name = category_to_service.get(category_name)
-                    service_category_obj = None
-                    if service_category_name:
-                        from apps.Services.models import ServiceCategory
-
-                        try:
-                            service_category_obj = ServiceCategory.objects.get(
-                                name=service_category_name
-                            )
-                        except ServiceCategory.DoesNotExist:
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f"ServiceCategory '{service_category_name}' not found for item category '{category_name}'. Leaving blank."
-                                )
-                            )
-
-                    # Create the item type
-                    item_type, created = CommonItem.objects.get_or_create(
-                        name=item_data["name"],
-                        category=category,
-                        defaults={
+                    item_rows.append(
+                        {
+                            "name": item_data["name"],
+                            "category": category,
                             "dimensions": item_data.get("dimensions", ""),
-                            "weight": weight,
-                            "needs_disassembly": needs_disassembly,
-                            "fragile": fragile,
+                            "weight": float(item_data.get("weight", 0)),
+                            "needs_disassembly": item_data.get(
+                                "needs_disassembly", False
+                            ),
+                            "fragile": item_data.get("fragile", False),
                             "service_category": service_category_obj,
-                        },
+                        }
                     )
 
-                    if created:
-                        items_created += 1
-                        if (
-                            items_created % 10 == 0
-                        ):  # Log every 10 "items" to avoid console spam
-                            self.stdout.write(f"Created {items_created} items...")
+            # Existing items are left as they are (get_or_create semantics)
+            items = BulkSeeder(
+                CommonItem, key_fields=["name", "category"], update_fields=[]
+            ).seed(item_rows)
+
+            # Bulk writes skip save() and signals
+            refresh_catalog(items.created)
 
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Successfully imported {categories_created} categories and {items_created} item types with Tabler icon information"
+                    f"Successfully imported {len(categories.created)} categories "
+                    f"({len(categories.updated)} updated) and {len(items.created)} "
+                    f"item types with Tabler icon information"
                 )
             )
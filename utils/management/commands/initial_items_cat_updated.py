@@ -8,8 +8,9 @@ from apps.CommonItems.models import (
     ItemType,
 )
 from apps.Services.models import ServiceCategory
-from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
+from collections import defaultdict
 import re
+from utils.bulk_seed import BulkSeeder, SeedResult, lookup, refresh_catalog
 
 # Import data from separate files
 from .data.item_types_data import item_types_data
@@ -148,10 +149,6 @@ class Command(BaseCommand):
         with transaction.atomic():
             self.stdout.write("Starting import process...")
 
-            # Create categories
-            categories_created = 0
-            categories_updated = 0
-
             # Build a mapping from display names to snake_case
             display_to_snake = {}
             for key in list(category_icons.keys()):
@@ -169,151 +166,135 @@ class Command(BaseCommand):
                         "tab_color": "bg-gray-500 text-gray-100 dark:bg-gray-800 dark:text-gray-200",
                     }
 
-            # Create categories (always use snake_case for DB)
-            for display_name, snake_case_name in display_to_snake.items():
-                icon_data = category_icons[snake_case_name]
-                category, created = ItemCategory.objects.get_or_create(
-                    name=snake_case_name,
-                    defaults={
-                        "icon": icon_data["icon"],
-                        "color": icon_data["color"],
-                        "tab_color": icon_data["tab_color"],
-                    },
-                )
-                if created:
-                    categories_created += 1
-                    self.stdout.write(
-                        f"Created category: {snake_case_name} (from '{display_name}')"
-                    )
-                else:
-                    # Update existing category with new icon data
-                    category.icon = icon_data["icon"]
-                    category.color = icon_data["color"]
-                    category.tab_color = icon_data["tab_color"]
-                    category.save()
-                    categories_updated += 1
-                    self.stdout.write(
-                        f"Updated category: {snake_case_name} (from '{display_name}')"
-                    )
-
+            # Create categories (always use snake_case for DB); existing ones
+            # get their icon data refreshed
+            categories = BulkSeeder(
+                ItemCategory,
+                key_fields=["name"],
+                update_fields=["icon", "color", "tab_color"],
+            ).seed(
+                {
+                    "name": snake_case_name,
+                    "icon": category_icons[snake_case_name]["icon"],
+                    "color": category_icons[snake_case_name]["color"],
+                    "tab_color": category_icons[snake_case_name]["tab_color"],
+                }
+                for snake_case_name in display_to_snake.values()
+            )
+            for category in categories.created:
+                self.stdout.write(f"Created category: {category.name}")
+            for category in categories.updated:
+                self.stdout.write(f"Updated category: {category.name}")
             self.stdout.write(
-                f"Categories: {categories_created} created, {categories_updated} updated"
+                f"Categories: {len(categories.created)} created, "
+                f"{len(categories.updated)} updated, {categories.unchanged} unchanged"
             )
 
-            # Create item types for each category
-            types_created = 0
-            types_updated = 0
-
             # When looking up categories, always use snake_case
+            category_map = lookup(ItemCategory, "name")
+
+            # Create item types for each category
+            type_rows = []
             for category_name, types_list in item_types_data.items():
                 snake_case_name = to_snake_case(category_name)
-                try:
-                    category = ItemCategory.objects.get(name=snake_case_name)
-                except ObjectDoesNotExist:
+                category = category_map.get(snake_case_name)
+                if category is None:
                     self.stdout.write(
                         f"WARNING: Category '{snake_case_name}' not found. Skipping types."
                     )
                     continue
 
                 for type_data in types_list:
-                    item_type, created = ItemType.objects.get_or_create(
-                        name=type_data["name"],
-                        category=category,
-                        defaults={
+                    type_rows.append(
+                        {
+                            "name": type_data["name"],
+                            "category": category,
                             "description": type_data["description"],
                             "icon": type_data["icon"],
                             "color": type_data["color"],
                             "tab_color": type_data["tab_color"],
                             "priority": type_data["priority"],
-                        },
+                        }
                     )
 
-                    if created:
-                        types_created += 1
-                        self.stdout.write(
-                            f"Created type: {type_data['name']} for {category_name}"
-                        )
-                    else:
-                        # Update existing type
-                        item_type.description = type_data["description"]
-                        item_type.icon = type_data["icon"]
-                        item_type.color = type_data["color"]
-                        item_type.tab_color = type_data["tab_color"]
-                        item_type.priority = type_data["priority"]
-                        item_type.save()
-                        types_updated += 1
-                        self.stdout.write(
-                            f"Updated type: {type_data['name']} for {category_name}"
-                        )
-
+            types = BulkSeeder(ItemType, key_fields=["name", "category"]).seed(
+                type_rows
+            )
             self.stdout.write(
-                f"Item types: {types_created} created, {types_updated} updated"
+                f"Item types: {len(types.created)} created, "
+                f"{len(types.updated)} updated, {types.unchanged} unchanged"
             )
 
+            # Types per category, in display order, for the lookups below
+            types_by_category = defaultdict(list)
+            for item_type in ItemType.objects.order_by("priority", "name"):
+                types_by_category[item_type.category_id].append(item_type)
+            type_map = {
+                (item_type.category_id, item_type.name): item_type
+                for category_types in types_by_category.values()
+                for item_type in category_types
+            }
+
             # Create brands and models for automotive category
-            brands_created = 0
-            models_created = 0
+            brands = item_models = SeedResult()
 
             if "automotive" in brand_data:
-                try:
-                    automotive_category = ItemCategory.objects.get(name="automotive")
-                except ObjectDoesNotExist:
+                automotive_category = category_map.get("automotive")
+                if automotive_category is None:
                     self.stdout.write(
                         f"WARNING: Automotive category not found. Skipping brands."
                     )
                 else:
-                    for brand_info in brand_data["automotive"]:
-                        brand, created = ItemBrand.objects.get_or_create(
-                            name=brand_info["brand"],
-                            category=automotive_category,
-                            defaults={"description": f"{brand_info['brand']} vehicles"},
-                        )
-
-                        if created:
-                            brands_created += 1
-                            self.stdout.write(f"Created brand: {brand_info['brand']}")
+                    brands = BulkSeeder(
+                        ItemBrand, key_fields=["name", "category"], update_fields=[]
+                    ).seed(
+                        {
+                            "name": brand_info["brand"],
+                            "category": automotive_category,
+                            "description": f"{brand_info['brand']} vehicles",
+                        }
+                        for brand_info in brand_data["automotive"]
+                    )
 
-                        # Get the type for this brand
-                        try:
-                            brand_type = ItemType.objects.get(
-                                name=brand_info["type"], category=automotive_category
-                            )
-                        except ObjectDoesNotExist:
+                    model_rows = []
+                    for brand_info in brand_data["automotive"]:
+                        # Models are only added for brands whose type exists
+                        if (
+                            automotive_category.id,
+                            brand_info["type"],
+                        ) not in type_map:
                             self.stdout.write(
                                 f"WARNING: Type '{brand_info['type']}' not found for brand {brand_info['brand']}. Skipping models."
                             )
                             continue
 
-                        # Create models for this brand
+                        brand = brands.get(brand_info["brand"], automotive_category.id)
                         for model_name in brand_info["models"]:
-                            model, created = ItemModel.objects.get_or_create(
-                                name=model_name,
-                                brand=brand,
-                                defaults={
-                                    "description": f"{brand_info['brand']} {model_name}"
-                                },
+                            model_rows.append(
+                                {
+                                    "name": model_name,
+                                    "brand": brand,
+                                    "description": f"{brand_info['brand']} {model_name}",
+                                }
                             )
 
-                            if created:
-                                models_created += 1
-                                self.stdout.write(
-                                    f"Created model: {brand_info['brand']} {model_name}"
-                                )
+                    item_models = BulkSeeder(
+                        ItemModel, key_fields=["name", "brand"], update_fields=[]
+                    ).seed(model_rows)
 
-            self.stdout.write(f"Brands: {brands_created} created")
-            self.stdout.write(f"Models: {models_created} created")
+            self.stdout.write(f"Brands: {len(brands.created)} created")
+            self.stdout.write(f"Models: {len(item_models.created)} created")
 
-            # Create common items
-            items_created = 0
-            items_updated = 0
+            # Service categories by name, for the items below
+            service_categories = lookup(ServiceCategory, "name")
 
             # When creating items, always use snake_case for category lookup
+            item_rows = []
             for category_data in common_items:
                 display_name = category_data["name"]
                 snake_case_name = to_snake_case(display_name)
-                try:
-                    category = ItemCategory.objects.get(name=snake_case_name)
-                except ObjectDoesNotExist:
+                category = category_map.get(snake_case_name)
+                if category is None:
                     self.stdout.write(
                         f"WARNING: Category '{snake_case_name}' not found. Skipping items."
                     )
@@ -322,11 +303,10 @@ class Command(BaseCommand):
                 # Get service category for this item category
                 service_category = None
                 if snake_case_name in category_to_service:
-                    try:
-                        service_category = ServiceCategory.objects.get(
-                            name=category_to_service[snake_case_name]
-                        )
-                    except ObjectDoesNotExist:
+                    service_category = service_categories.get(
+                        category_to_service[snake_case_name]
+                    )
+                    if service_category is None:
                         self.stdout.write(
                             f"WARNING: ServiceCategory '{category_to_service[snake_case_name]}' not found for item category '{snake_case_name}'. Leaving blank."
                         )
@@ -337,11 +317,8 @@ class Command(BaseCommand):
 
                     # First, try to use the explicit type from the item data
                     if "type" in item_data:
-                        try:
-                            item_type = ItemType.objects.get(
-                                name=item_data["type"], category=category
-                            )
-                        except ObjectDoesNotExist:
+                        item_type = type_map.get((category.id, item_data["type"]))
+                        if item_type is None:
                             self.stdout.write(
                                 f"WARNING: Type '{item_data['type']}' not found for item '{item_data['name']}'. Will try to infer type."
                             )
@@ -350,60 +327,49 @@ class Command(BaseCommand):
                     if not item_type and snake_case_name in brand_data:
                         for brand_info in brand_data[snake_case_name]:
                             if brand_info["brand"].lower() in item_data["name"].lower():
-                                try:
-                                    item_type = ItemType.objects.get(
-                                        name=brand_info["type"], category=category
-                                    )
+                                item_type = type_map.get(
+                                    (category.id, brand_info["type"])
+                                )
+                                if item_type:
                                     break
-                                except ObjectDoesNotExist:
-                                    continue
 
                     # If still no type, try to infer from item name
                     if not item_type:
                         item_name_lower = item_data["name"].lower()
-                        for type_obj in ItemType.objects.filter(category=category):
+                        for type_obj in types_by_category[category.id]:
                             if type_obj.name.lower() in item_name_lower:
                                 item_type = type_obj
                                 break
 
-                    # Create or update the common item
-                    defaults = {
-                        "category": category,
-                        "type": item_type,
-                        "service_category": service_category,
-                        "dimensions": item_data.get("dimensions", {}),
-                        "weight": item_data.get("weight", 0),
-                        "needs_disassembly": item_data.get("needs_disassembly", False),
-                        "fragile": item_data.get("fragile", False),
-                    }
-
-                    item, created = CommonItem.objects.get_or_create(
-                        name=item_data["name"], category=category, defaults=defaults
+                    item_rows.append(
+                        {
+                            "name": item_data["name"],
+                            "category": category,
+                            "type": item_type,
+                            "service_category": service_category,
+                            "dimensions": item_data.get("dimensions", {}),
+                            "weight": item_data.get("weight", 0),
+                            "needs_disassembly": item_data.get(
+                                "needs_disassembly", False
+                            ),
+                            "fragile": item_data.get("fragile", False),
+                        }
                     )
 
-                    if created:
-                        items_created += 1
-                        self.stdout.write(
-                            f"Created item: {item_data['name']} ({snake_case_name})"
-                        )
-                    else:
-                        # Update existing item
-                        item.type = item_type
-                        item.service_category = service_category
-                        item.dimensions = item_data.get("dimensions", {})
-                        item.weight = item_data.get("weight", 0)
-                        item.needs_disassembly = item_data.get(
-                            "needs_disassembly", False
-                        )
-                        item.fragile = item_data.get("fragile", False)
-                        item.save()
-                        items_updated += 1
-                        self.stdout.write(
-                            f"Updated item: {item_data['name']} ({snake_case_name})"
-                        )
-
+            # Create or update the common items
+            items = BulkSeeder(CommonItem, key_fields=["name", "category"]).seed(
+                item_rows
+            )
+            for item in items.created:
+                self.stdout.write(f"Created item: {item.name} ({item.category.name})")
+            for item in items.updated:
+                self.stdout.write(f"Updated item: {item.name} ({item.category.name})")
             self.stdout.write(
-                f"Common items: {items_created} created, {items_updated} updated"
+                f"Common items: {len(items.created)} created, "
+                f"{len(items.updated)} updated, {items.unchanged} unchanged"
             )
 
+            # Bulk writes skip save() and signals
+            refresh_catalog(items.created + items.updated)
+
             self.stdout.write("SUCCESS: Import completed successfully!")
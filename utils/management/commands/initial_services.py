@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils.text import slugify
 from apps.Services.models import ServiceCategory, Services
+from utils.bulk_seed import BulkSeeder, refresh_catalog
 
 
 class Command(BaseCommand):
@@ -72,59 +73,39 @@ class Command(BaseCommand):
         services_data = self._get_services_data()
 
         with transaction.atomic():
-            categories_created = 0
-            categories_updated = 0
-            services_created = 0
-            services_updated = 0
-
-            # First, create/update all categories
-            category_map = {}  # To map category names to objects
+            category_rows = []
             for category_data in categories_data:
                 slug = slugify(category_data["name"])
                 if len(slug) > 50:
                     slug = slug[:50].rstrip("-")
-
-                category, created = ServiceCategory.objects.get_or_create(
-                    slug=slug,
-                    defaults={
+                category_rows.append(
+                    {
+                        "slug": slug,
                         "name": category_data["name"],
                         "description": category_data["description"],
                         "icon": category_data["icon"],
-                    },
+                    }
                 )
 
-                category_map[category_data["name"]] = category
-
-                if created:
-                    categories_created += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Created service category: {category_data['name']}"
-                        )
-                    )
-                else:
-                    # Update existing category with new data
-                    updated = False
-                    if category.name != category_data["name"]:
-                        category.name = category_data["name"]
-                        updated = True
-                    if category.description != category_data["description"]:
-                        category.description = category_data["description"]
-                        updated = True
-                    if category.icon != category_data["icon"]:
-                        category.icon = category_data["icon"]
-                        updated = True
-
-                    if updated:
-                        category.save()
-                        categories_updated += 1
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"Updated service category: {category_data['name']}"
-                            )
-                        )
+            # First, create/update all categories
+            categories = BulkSeeder(ServiceCategory, key_fields=["slug"]).seed(
+                category_rows
+            )
+            # To map category names to objects
+            category_map = {
+                row["name"]: categories.get(row["slug"]) for row in category_rows
+            }
+            for category in categories.created:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Created service category: {category.name}")
+                )
+            for category in categories.updated:
+                self.stdout.write(
+                    self.style.WARNING(f"Updated service category: {category.name}")
+                )
 
             # Then, create/update all services
+            service_rows = []
             for service_data in services_data:
                 category_name = service_data["category"]
                 if category_name not in category_map:
@@ -134,53 +115,40 @@ class Command(BaseCommand):
                         )
                     )
                     continue
-
-                service, created = Services.objects.get_or_create(
-                    name=service_data["name"],
-                    defaults={
+                service_rows.append(
+                    {
+                        "name": service_data["name"],
                         "description": service_data["description"],
                         "service_category": category_map[category_name],
                         "icon": service_data["icon"],
-                    },
+                    }
                 )
 
-                if created:
-                    services_created += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Created service: {service_data['name']} (Category: {category_name})"
-                        )
+            services = BulkSeeder(Services, key_fields=["name"]).seed(service_rows)
+            for service in services.created:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Created service: {service.name} (Category: {service.service_category.name})"
+                    )
+                )
+            for service in services.updated:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Updated service: {service.name} (Category: {service.service_category.name})"
                     )
-                else:
-                    # Update existing service with new data
-                    updated = False
-                    if service.description != service_data["description"]:
-                        service.description = service_data["description"]
-                        updated = True
-                    if service.service_category != category_map[category_name]:
-                        service.service_category = category_map[category_name]
-                        updated = True
-                    if service.icon != service_data["icon"]:
-                        service.icon = service_data["icon"]
-                        updated = True
+                )
 
-                    if updated:
-                        service.save()
-                        services_updated += 1
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"Updated service: {service_data['name']} (Category: {category_name})"
-                            )
-                        )
+            # Bulk writes skip the catalog signals
+            refresh_catalog()
 
             # Summary
             self.stdout.write(
                 self.style.SUCCESS(
                     f"\nSummary:"
-                    f"\n- Created: {categories_created} new service categories"
-                    f"\n- Updated: {categories_updated} existing service categories"
-                    f"\n- Created: {services_created} new services"
-                    f"\n- Updated: {services_updated} existing services"
+                    f"\n- Created: {len(categories.created)} new service categories"
+                    f"\n- Updated: {len(categories.updated)} existing service categories"
+                    f"\n- Created: {len(services.created)} new services"
+                    f"\n- Updated: {len(services.updated)} existing services"
                     f"\n- Total processed: {len(categories_data)} categories, {len(services_data)} services"
                 )
             )
@@ -191,9 +159,11 @@ class Command(BaseCommand):
                     f"\nAll service categories and services in database:"
                 )
             )
-            for category in ServiceCategory.objects.all().order_by("name"):
+            for category in ServiceCategory.objects.prefetch_related(
+                "services"
+            ).order_by("name"):
                 self.stdout.write(f"  - {category.slug}: {category.name}")
-                for service in category.services.all().order_by("name"):
+                for service in sorted(category.services.all(), key=lambda s: s.name):
                     self.stdout.write(f"    * {service.name}")
 
     def _get_categories_data(self):
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from apps.CommonItems.models import VehicleType, VehicleCategory, VehicleSize
+from utils.bulk_seed import BulkSeeder, lookup, refresh_catalog
 
 
 class Command(BaseCommand):
@@ -172,114 +173,68 @@ class Command(BaseCommand):
             },
         ]
 
-        # Process each vehicle type, category, and size
+        # Process each vehicle type, category, and size; existing rows are
+        # updated with the latest data
         with transaction.atomic():  # type: ignore
-            types_created = 0
-            categories_created = 0
-            sizes_created = 0
-
             # Create vehicle types
-            for type_data in vehicle_types:
-                vehicle_type, created = VehicleType.objects.get_or_create(
-                    name=type_data["name"],
-                    defaults={
-                        "description": type_data["description"],
-                        "icon": type_data["icon"],
-                        "color": type_data["color"],
-                        "tab_color": type_data["tab_color"],
-                        "priority": type_data["priority"],
-                        "is_active": True,
-                    },
-                )
-
-                if created:
-                    types_created += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Created vehicle type: {type_data['name']}")  # type: ignore
-                    )
-                else:
-                    # Update existing type with latest data
-                    vehicle_type.description = type_data["description"]
-                    vehicle_type.icon = type_data["icon"]
-                    vehicle_type.color = type_data["color"]
-                    vehicle_type.tab_color = type_data["tab_color"]
-                    vehicle_type.priority = type_data["priority"]
-                    vehicle_type.is_active = True
-                    vehicle_type.save()
-                    self.stdout.write(
-                        self.style.WARNING(f"Updated vehicle type: {type_data['name']}")  # type: ignore
-                    )
+            types = BulkSeeder(VehicleType, key_fields=["name"]).seed(
+                {
+                    "name": type_data["name"],
+                    "description": type_data["description"],
+                    "icon": type_data["icon"],
+                    "color": type_data["color"],
+                    "tab_color": type_data["tab_color"],
+                    "priority": type_data["priority"],
+                    "is_active": True,
+                }
+                for type_data in vehicle_types
+            )
+            self._report("vehicle type", types)
 
             # Create vehicle categories
-            for category_data in vehicle_categories:
-                vehicle_type = VehicleType.objects.get(name=category_data["type_name"])
-                category, created = VehicleCategory.objects.get_or_create(
-                    name=category_data["name"],
-                    type=vehicle_type,
-                    defaults={
-                        "description": category_data["description"],
-                        "icon": category_data["icon"],
-                        "color": category_data["color"],
-                        "tab_color": category_data["tab_color"],
-                        "priority": category_data["priority"],
-                        "is_active": True,
-                    },
-                )
-
-                if created:
-                    categories_created += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Created vehicle category: {category_data['name']}")  # type: ignore
-                    )
-                else:
-                    # Update existing category with latest data
-                    category.description = category_data["description"]
-                    category.icon = category_data["icon"]
-                    category.color = category_data["color"]
-                    category.tab_color = category_data["tab_color"]
-                    category.priority = category_data["priority"]
-                    category.is_active = True
-                    category.save()
-                    self.stdout.write(
-                        self.style.WARNING(f"Updated vehicle category: {category_data['name']}")  # type: ignore
-                    )
+            type_map = lookup(VehicleType, "name")
+            categories = BulkSeeder(VehicleCategory, key_fields=["name", "type"]).seed(
+                {
+                    "name": category_data["name"],
+                    "type": type_map[category_data["type_name"]],
+                    "description": category_data["description"],
+                    "icon": category_data["icon"],
+                    "color": category_data["color"],
+                    "tab_color": category_data["tab_color"],
+                    "priority": category_data["priority"],
+                    "is_active": True,
+                }
+                for category_data in vehicle_categories
+            )
+            self._report("vehicle category", categories)
 
             # Create vehicle sizes
-            for size_data in vehicle_sizes:
-                size, created = VehicleSize.objects.get_or_create(
-                    name=size_data["name"],
-                    defaults={
-                        "description": size_data["description"],
-                        "max_length": size_data["max_length"],
-                        "icon": size_data["icon"],
-                        "color": size_data["color"],
-                        "tab_color": size_data["tab_color"],
-                        "priority": size_data["priority"],
-                        "is_active": True,
-                    },
-                )
+            sizes = BulkSeeder(VehicleSize, key_fields=["name"]).seed(
+                {
+                    "name": size_data["name"],
+                    "description": size_data["description"],
+                    "max_length": size_data["max_length"],
+                    "icon": size_data["icon"],
+                    "color": size_data["color"],
+                    "tab_color": size_data["tab_color"],
+                    "priority": size_data["priority"],
+                    "is_active": True,
+                }
+                for size_data in vehicle_sizes
+            )
+            self._report("vehicle size", sizes)
 
-                if created:
-                    sizes_created += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Created vehicle size: {size_data['name']}")  # type: ignore
-                    )
-                else:
-                    # Update existing size with latest data
-                    size.description = size_data["description"]
-                    size.max_length = size_data["max_length"]
-                    size.icon = size_data["icon"]
-                    size.color = size_data["color"]
-                    size.tab_color = size_data["tab_color"]
-                    size.priority = size_data["priority"]
-                    size.is_active = True
-                    size.save()
-                    self.stdout.write(
-                        self.style.WARNING(f"Updated vehicle size: {size_data['name']}")  # type: ignore
-                    )
+            # Bulk writes skip the catalog signals
+            refresh_catalog()
 
             self.stdout.write(
                 self.style.SUCCESS(  # type: ignore
-                    f"\nSuccessfully imported {types_created} vehicle types, {categories_created} vehicle categories, and {sizes_created} vehicle sizes"
+                    f"\nSuccessfully imported {len(types.created)} vehicle types, {len(categories.created)} vehicle categories, and {len(sizes.created)} vehicle sizes"
                 )
             )
+
+    def _report(self, label, result):
+        for instance in result.created:
+            self.stdout.write(self.style.SUCCESS(f"Created {label}: {instance.name}"))  # type: ignore
+        for instance in result.updated:
+            self.stdout.write(self.style.WARNING(f"Updated {label}: {instance.name}"))  # type: ignore
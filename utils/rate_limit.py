@@ -0,0 +1,248 @@
+"""
+Atomic sliding-window rate limiting
+
+A ``Limit`` allows ``limit`` hits per ``window`` seconds for each key (a user,
+an IP address, or one global key). Counts are kept in the shared cache as a
+sliding-window counter: one counter per fixed window, with the previous
+window's count weighted by how much of it still overlaps the sliding window.
+
+``RateLimiter.hit`` checks and counts several (limit, key) pairs at once, and
+only counts them if every one of them allows the hit:
+
+- on Redis this is a single Lua script, so the check and the increments are
+  one atomic round trip for all keys;
+- on other backends (LocMem in development and tests) the counters are read
+  with one ``get_many`` and incremented with ``incr``, under a process lock.
+  LocMem is per-process, so that is atomic as well; on a shared non-Redis
+  backend the increments are still atomic but concurrent hits can overshoot
+  a limit by the number of concurrent callers.
+
+``peek`` reads the counts without counting, ``release`` gives back a hit
+(e.g. when the rate-limited action then failed) and ``reset`` clears keys.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit"
+
+
+@dataclass(frozen=True)
+class Limit:
+    """``limit`` hits per ``window`` seconds, per key"""
+
+    name: str
+    limit: int
+    window: int
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    # The first limit that refused the hit, if any
+    limit: Optional[Limit] = None
+    key: Optional[str] = None
+    count: float = 0.0
+    retry_after: int = 0
+
+
+# Check all keys, then count them all only if every one allows the hit (a
+# negative limit is not checked)
+SLIDING_WINDOW_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local checks = #KEYS / 2
+for i = 1, checks do
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    local estimate = previous * tonumber(ARGV[3 * i]) + current
+    local limit = tonumber(ARGV[3 * i - 1])
+    if limit >= 0 and estimate + cost > limit then
+        return {i, tostring(current), tostring(previous)}
+    end
+end
+for i = 1, checks do
+    redis.call('INCRBY', KEYS[2 * i - 1], cost)
+    redis.call('EXPIRE', KEYS[2 * i - 1], ARGV[3 * i + 1])
+end
+return {0, '0', '0'}
+"""
+
+Check = Tuple[Limit, str]
+
+
+class RateLimiter:
+    """Sliding-window counters for any number of (limit, key) pairs"""
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._script = None
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _window_keys(self, check: Check, now: float):
+        limit, key = check
+        index = int(now // limit.window)
+        elapsed = (now % limit.window) / limit.window
+        current = f"{KEY_PREFIX}:{limit.name}:{key}:{index}"
+        previous = f"{KEY_PREFIX}:{limit.name}:{key}:{index - 1}"
+        # Share of the previous window still inside the sliding window
+        return current, previous, 1.0 - elapsed
+
+    def _retry_after(
+        self, limit: Limit, cost: int, current: float, previous: float, now: float
+    ) -> int:
+        """Seconds until a hit of ``cost`` fits under ``limit`` again, given
+        the counts of the current and previous fixed windows"""
+        elapsed = now % limit.window
+        allowed = limit.limit - cost
+        if allowed < 0:
+            # Never fits; retrying after a full sliding window is as good as any
+            return 2 * limit.window
+        if current <= allowed:
+            # Fits in this window once enough of the previous one has slid out:
+            # previous * (1 - elapsed / window) + current <= allowed
+            share = 1.0 - (allowed - current) / previous if previous else 0.0
+            return max(1, math.ceil(share * limit.window - elapsed))
+        # Only fits in the next window, as this one's count slides out of it
+        share = 1.0 - allowed / current
+        return max(1, math.ceil(limit.window - elapsed + share * limit.window))
+
+    def hit(
+        self, checks: Sequence[Check], cost: int = 1, enforce: bool = True
+    ) -> RateLimitResult:
+        """
+        Count a hit against every key, unless one of them is over its limit
+
+        With ``enforce=False`` the hit is counted regardless of the limits
+        (e.g. failed logins, which keep a lock going while they continue).
+        """
+        checks = list(checks)
+        if not checks:
+            return RateLimitResult(allowed=True)
+        now = time.time()
+        try:
+            if isinstance(self.cache, RedisCache):
+                return self._hit_redis(checks, cost, now, enforce)
+            return self._hit_fallback(checks, cost, now, enforce)
+        except Exception as e:
+            # Like the cache layer, an unavailable cache does not fail requests
+            logger.warning(f"Rate limiter unavailable, allowing request: {str(e)}")
+            return RateLimitResult(allowed=True)
+
+    def _hit_redis(self, checks: List[Check], cost: int, now: float, enforce: bool):
+        cache = self.cache
+        keys, args = [], [cost]
+        for check in checks:
+            current, previous, weight = self._window_keys(check, now)
+            keys += [
+                cache.make_and_validate_key(current),
+                cache.make_and_validate_key(previous),
+            ]
+            args += [check[0].limit if enforce else -1, weight, 2 * check[0].window]
+
+        client = cache._cache.get_client(write=True)
+        if self._script is None:
+            self._script = client.register_script(SLIDING_WINDOW_SCRIPT)
+        blocked, current, previous = self._script(keys=keys, args=args, client=client)
+        return self._result(
+            checks, int(blocked), cost, float(current), float(previous), now
+        )
+
+    def _hit_fallback(self, checks: List[Check], cost: int, now: float, enforce: bool):
+        cache = self.cache
+        windows = [self._window_keys(check, now) for check in checks]
+        with self._lock:
+            counts = cache.get_many(
+                [key for current, previous, _ in windows for key in (current, previous)]
+            )
+            for position, (current, previous, weight) in enumerate(windows, start=1):
+                current_count = counts.get(current, 0)
+                previous_count = counts.get(previous, 0)
+                estimate = previous_count * weight + current_count
+                if enforce and estimate + cost > checks[position - 1][0].limit:
+                    return self._result(
+                        checks, position, cost, current_count, previous_count, now
+                    )
+
+            for check, (current, _, _) in zip(checks, windows):
+                cache.add(current, 0, timeout=2 * check[0].window)
+                try:
+                    cache.incr(current, cost)
+                except ValueError:
+                    # Evicted between add() and incr()
+                    cache.set(current, cost, timeout=2 * check[0].window)
+        return RateLimitResult(allowed=True)
+
+    def _result(
+        self,
+        checks,
+        blocked: int,
+        cost: int,
+        current: float,
+        previous: float,
+        now: float,
+    ):
+        if not blocked:
+            return RateLimitResult(allowed=True)
+        limit, key = checks[blocked - 1]
+        weight = 1.0 - (now % limit.window) / limit.window
+        return RateLimitResult(
+            allowed=False,
+            limit=limit,
+            key=key,
+            count=previous * weight + current,
+            retry_after=self._retry_after(limit, cost, current, previous, now),
+        )
+
+    def peek(self, checks: Sequence[Check]) -> List[float]:
+        """Current sliding-window counts of the keys, with one cache read"""
+        now = time.time()
+        windows = [self._window_keys(check, now) for check in checks]
+        counts = self.cache.get_many(
+            [key for current, previous, _ in windows for key in (current, previous)]
+        )
+        return [
+            counts.get(previous, 0) * weight + counts.get(current, 0)
+            for current, previous, weight in windows
+        ]
+
+    def exceeded(self, check: Check) -> bool:
+        """Whether the key is at or over its limit (without counting a hit)"""
+        return self.peek([check])[0] >= check[0].limit
+
+    def release(self, checks: Iterable[Check], cost: int = 1):
+        """Give back a hit counted by ``hit`` (the limited action did not happen)"""
+        now = time.time()
+        for check in checks:
+            current, _, _ = self._window_keys(check, now)
+            try:
+                if self.cache.decr(current, cost) < 0:
+                    self.cache.set(current, 0, timeout=2 * check[0].window)
+            except ValueError:
+                # Expired or in the next window already: nothing to give back
+                pass
+
+    def reset(self, checks: Iterable[Check]) -> int:
+        """Clear the keys' counters; returns how many had a count"""
+        now = time.time()
+        keys = [key for check in checks for key in self._window_keys(check, now)[:2]]
+        if not keys:
+            return 0
+        counts = self.cache.get_many(keys)
+        self.cache.delete_many(keys)
+        return sum(1 for count in counts.values() if count)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,425 @@
+"""
+Request performance metrics
+
+Records, for every request handled by ``RequestMetricsMiddleware``:
+
+- the resolved view name and wall time;
+- SQL query count and time, via a database execute wrapper;
+- repeated SQL fingerprints (the same statement run many times in one
+  request is usually an N+1);
+- time spent in outbound HTTP calls made through ``utils.http_client``;
+- cache hits and misses on the instrumented cache backends below.
+
+Per-view figures are folded into a rolling in-memory histogram (one per
+process) that is exposed through ``RequestMetricsView`` as JSON or
+Prometheus text. Configuration lives in ``settings.REQUEST_METRICS``.
+"""
+
+import bisect
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "ENABLED": True,
+    "SERVER_TIMING": False,  # add a Server-Timing header to every response
+    "WINDOW_SECONDS": 900,  # how far back the rolling histogram reaches
+    "SLOT_SECONDS": 60,  # granularity at which old samples are dropped
+    "BUCKETS_MS": [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000],
+    "DUPLICATE_QUERY_THRESHOLD": 5,  # repeats of one statement flagged as N+1
+    "DUPLICATE_QUERY_MAX_ENTRIES": 200,  # repeated statements kept, most frequent
+    "SLOW_REQUEST_MS": 2000,  # log a warning for requests slower than this
+    "EXCLUDE_PATHS": [],  # path prefixes that are not measured
+}
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+
+def get_config() -> Dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, "REQUEST_METRICS", {})}
+
+
+class RequestProfile:
+    """Counters collected while a single request is being handled"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_name = UNRESOLVED_VIEW
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.sql_fingerprints: Counter = Counter()
+        self.http_count = 0
+        self.http_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Outbound calls and cache reads may happen on worker threads that
+        # were handed a copy of the request context
+        self._lock = threading.Lock()
+
+    def record_query(self, sql: str, elapsed_ms: float):
+        self.sql_count += 1
+        self.sql_ms += elapsed_ms
+        self.sql_fingerprints[fingerprint_sql(sql)] += 1
+
+    def record_http(self, elapsed_ms: float):
+        with self._lock:
+            self.http_count += 1
+            self.http_ms += elapsed_ms
+
+    def record_cache(self, hits: int = 0, misses: int = 0):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def duplicate_queries(self, threshold: int) -> Dict[str, int]:
+        """Fingerprints that were executed at least ``threshold`` times"""
+        return {
+            fingerprint: count
+            for fingerprint, count in self.sql_fingerprints.most_common()
+            if count >= threshold
+        }
+
+    def server_timing(self, total_ms: float) -> str:
+        return ", ".join(
+            [
+                f"total;dur={total_ms:.1f}",
+                f'db;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+                f'http;dur={self.http_ms:.1f};desc="{self.http_count} calls"',
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            ]
+        )
+
+
+_current_profile: contextvars.ContextVar[Optional[RequestProfile]] = (
+    contextvars.ContextVar("request_profile", default=None)
+)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+def start_profile() -> contextvars.Token:
+    return _current_profile.set(RequestProfile())
+
+
+def end_profile(token: contextvars.Token):
+    _current_profile.reset(token)
+
+
+def record_http(elapsed_ms: float):
+    """Attribute an outbound HTTP call to the current request, if any"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record_http(elapsed_ms)
+
+
+def record_cache(hits: int = 0, misses: int = 0):
+    """Attribute cache reads to the current request, if any"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record_cache(hits, misses)
+
+
+# "IN (%s, %s, ...)" placeholder lists, whose length follows the parameters
+_IN_LIST = re.compile(r"\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)", re.IGNORECASE)
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+    Short stable identifier for a statement
+
+    Django passes parameters separately, so the SQL text is already free of
+    literal values and identical statements share a fingerprint. ``IN``
+    placeholder lists are collapsed first, so the same lookup over a
+    different number of ids is still one statement.
+    """
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return hashlib.md5(sql.encode("utf-8"), usedforsecurity=False).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` callable that times every statement"""
+
+    def __init__(self, profile: RequestProfile):
+        self.profile = profile
+        self.samples: Dict[str, str] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.profile.record_query(sql, elapsed_ms)
+            self.samples.setdefault(fingerprint_sql(sql), sql)
+
+
+class _Slot:
+    """Samples recorded during one ``SLOT_SECONDS`` interval"""
+
+    __slots__ = (
+        "start",
+        "buckets",
+        "count",
+        "total_ms",
+        "sql_count",
+        "sql_ms",
+        "http_ms",
+        "cache_hits",
+        "cache_misses",
+        "n_plus_one",
+    )
+
+    def __init__(self, start: int, bucket_count: int):
+        self.start = start
+        self.buckets = [0] * bucket_count
+        self.count = 0
+        self.total_ms = 0.0
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.http_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.n_plus_one = 0
+
+
+class ViewStats:
+    """Rolling duration histogram and totals for one view"""
+
+    def __init__(self, buckets: List[float], slot_seconds: int, window_seconds: int):
+        self.buckets = buckets
+        self.slot_seconds = slot_seconds
+        self.max_slots = max(1, window_seconds // slot_seconds)
+        self.slots: deque = deque()
+
+    def _slot(self, now: float) -> _Slot:
+        slot_start = int(now // self.slot_seconds) * self.slot_seconds
+        if not self.slots or self.slots[-1].start != slot_start:
+            # One extra bucket for samples above the largest bound
+            self.slots.append(_Slot(slot_start, len(self.buckets) + 1))
+        self._expire(now)
+        return self.slots[-1]
+
+    def _expire(self, now: float):
+        oldest = now - self.max_slots * self.slot_seconds
+        while self.slots and self.slots[0].start <= oldest:
+            self.slots.popleft()
+
+    def record(self, total_ms: float, profile: RequestProfile, n_plus_one: bool):
+        slot = self._slot(time.time())
+        slot.buckets[bisect.bisect_left(self.buckets, total_ms)] += 1
+        slot.count += 1
+        slot.total_ms += total_ms
+        slot.sql_count += profile.sql_count
+        slot.sql_ms += profile.sql_ms
+        slot.http_ms += profile.http_ms
+        slot.cache_hits += profile.cache_hits
+        slot.cache_misses += profile.cache_misses
+        slot.n_plus_one += int(n_plus_one)
+
+    def snapshot(self) -> Dict:
+        self._expire(time.time())
+        slots = list(self.slots)
+        bucket_counts = [sum(counts) for counts in zip(*(s.buckets for s in slots))]
+        bucket_counts = bucket_counts or [0] * (len(self.buckets) + 1)
+        count = sum(s.count for s in slots)
+        total_ms = sum(s.total_ms for s in slots)
+
+        def average(attribute):
+            total = sum(getattr(s, attribute) for s in slots)
+            return round(total / count, 2) if count else 0.0
+
+        return {
+            "count": count,
+            "total_ms": round(total_ms, 2),
+            "avg_ms": round(total_ms / count, 2) if count else 0.0,
+            "p50_ms": self._percentile(bucket_counts, count, 0.50),
+            "p95_ms": self._percentile(bucket_counts, count, 0.95),
+            "p99_ms": self._percentile(bucket_counts, count, 0.99),
+            "avg_queries": average("sql_count"),
+            "avg_sql_ms": average("sql_ms"),
+            "avg_http_ms": average("http_ms"),
+            "cache_hits": sum(s.cache_hits for s in slots),
+            "cache_misses": sum(s.cache_misses for s in slots),
+            "n_plus_one_requests": sum(s.n_plus_one for s in slots),
+            "buckets": bucket_counts,
+        }
+
+    def _percentile(self, bucket_counts: List[int], count: int, quantile: float):
+        """Upper bound of the bucket holding the quantile (None if unbounded)"""
+        if not count:
+            return None
+        target = quantile * count
+        seen = 0
+        for i, bucket_count in enumerate(bucket_counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+
+class MetricsRegistry:
+    """Process-wide per-view statistics"""
+
+    def __init__(self):
+        self._views: Dict[str, ViewStats] = {}
+        self._duplicate_queries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        profile: RequestProfile,
+        total_ms: float,
+        duplicates: Dict[str, int],
+        samples: Dict[str, str],
+    ):
+        config = get_config()
+        with self._lock:
+            stats = self._views.get(profile.view_name)
+            if stats is None:
+                stats = self._views[profile.view_name] = ViewStats(
+                    config["BUCKETS_MS"],
+                    config["SLOT_SECONDS"],
+                    config["WINDOW_SECONDS"],
+                )
+            stats.record(total_ms, profile, n_plus_one=bool(duplicates))
+
+            for fingerprint, count in duplicates.items():
+                if fingerprint not in self._duplicate_queries:
+                    self._make_room(config["DUPLICATE_QUERY_MAX_ENTRIES"])
+                entry = self._duplicate_queries.setdefault(
+                    fingerprint,
+                    {
+                        "view": profile.view_name,
+                        "sql": samples.get(fingerprint, "")[:500],
+                        "requests": 0,
+                        "max_repeats": 0,
+                    },
+                )
+                entry["requests"] += 1
+                entry["max_repeats"] = max(entry["max_repeats"], count)
+
+    def _make_room(self, max_entries: int):
+        """Drop the least frequent repeated statements down to ``max_entries - 1``"""
+        entries = self._duplicate_queries
+        while entries and len(entries) >= max_entries:
+            del entries[min(entries, key=lambda key: entries[key]["requests"])]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            views = {name: stats.snapshot() for name, stats in self._views.items()}
+            duplicates = sorted(
+                (
+                    {"fingerprint": fingerprint, **entry}
+                    for fingerprint, entry in self._duplicate_queries.items()
+                ),
+                key=lambda entry: entry["requests"],
+                reverse=True,
+            )
+        return {
+            "buckets_ms": get_config()["BUCKETS_MS"],
+            "views": dict(
+                sorted(
+                    views.items(), key=lambda item: item[1]["total_ms"], reverse=True
+                )
+            ),
+            "duplicate_queries": duplicates,
+        }
+
+    def prometheus(self) -> str:
+        """Render the current window in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        buckets = snapshot["buckets_ms"]
+        lines = [
+            "# HELP morevans_request_duration_ms Request wall time per view",
+            "# TYPE morevans_request_duration_ms histogram",
+        ]
+        for view, stats in snapshot["views"].items():
+            label = view.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(buckets + ["+Inf"], stats["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'morevans_request_duration_ms_bucket{{view="{label}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'morevans_request_duration_ms_sum{{view="{label}"}} {stats["total_ms"]}'
+            )
+            lines.append(
+                f'morevans_request_duration_ms_count{{view="{label}"}} {stats["count"]}'
+            )
+
+        for name, key, help_text in (
+            (
+                "request_sql_queries_avg",
+                "avg_queries",
+                "Average SQL queries per request",
+            ),
+            ("request_sql_ms_avg", "avg_sql_ms", "Average SQL time per request"),
+            (
+                "request_http_ms_avg",
+                "avg_http_ms",
+                "Average outbound HTTP time per request",
+            ),
+            ("request_cache_hits", "cache_hits", "Cache hits in the window"),
+            ("request_cache_misses", "cache_misses", "Cache misses in the window"),
+            ("request_n_plus_one", "n_plus_one_requests", "Requests with repeated SQL"),
+        ):
+            lines.append(f"# HELP morevans_{name} {help_text}")
+            lines.append(f"# TYPE morevans_{name} gauge")
+            for view, stats in snapshot["views"].items():
+                label = view.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'morevans_{name}{{view="{label}"}} {stats[key]}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._duplicate_queries.clear()
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentedCacheMixin:
+    """Counts hits and misses of ``get``/``get_many`` against the current request"""
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version=version)
+        if value is self._missing:
+            record_cache(misses=1)
+            return default
+        record_cache(hits=1)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        record_cache(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.Payment.models import Payment, PaymentMethod
+from apps.Request.models import Request
+from apps.User.models import User
+from utils import dashboard_metrics
+
+# Model -> dashboards whose cached figures depend on it
+DASHBOARD_DEPENDENCIES = {
+    Payment: [dashboard_metrics.PAYMENT_STATS],
+    PaymentMethod: [dashboard_metrics.PAYMENT_METHOD_OVERVIEW],
+    User: [dashboard_metrics.USER_STATS],
+    Request: [dashboard_metrics.USER_STATS],
+    Group: [dashboard_metrics.GROUP_STATS],
+}
+
+
+def invalidate_dashboards(sender, **kwargs):
+    dashboard_metrics.invalidate(*DASHBOARD_DEPENDENCIES[sender])
+
+
+for model in DASHBOARD_DEPENDENCIES:
+    post_save.connect(
+        invalidate_dashboards,
+        sender=model,
+        dispatch_uid=f"dashboards_save_{model.__name__}",
+    )
+    post_delete.connect(
+        invalidate_dashboards,
+        sender=model,
+        dispatch_uid=f"dashboards_delete_{model.__name__}",
+    )
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_stats(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        dashboard_metrics.invalidate(dashboard_metrics.GROUP_STATS)
@@ -1,3 +1,51 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from utils import caching
+from utils.http_client import http_client
+from utils.request_metrics import registry
+
+
+class RequestMetricsView(APIView):
+    """
+    Rolling per-view request metrics for this process
+
+    Returns JSON by default, or the Prometheus text format with
+    ``?output=prometheus``. ``DELETE`` clears the window.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return Response(
+                {"message": "Only staff members can view request metrics."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if request.query_params.get("output") == "prometheus":
+            return HttpResponse(
+                registry.prometheus() + caching.prometheus(),
+                content_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+
+        return Response(
+            {
+                **registry.snapshot(),
+                "outbound_http": http_client.metrics(),
+                "cache_namespaces": caching.metrics(),
+            }
+        )
+
+    def delete(self, request):
+        if not request.user.is_staff:
+            return Response(
+                {"message": "Only staff members can reset request metrics."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        registry.reset()
+        caching.stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)